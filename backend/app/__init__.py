@@ -60,23 +60,76 @@ def create_app(test_config=None):
     # Elle provoque une erreur avec PostgreSQL ou d'autres SGBD. Décommentez la ligne ci-dessous uniquement si vous utilisez SQLite pour les tests :
     # app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", {"connect_args": {"check_same_thread": False}})
 
+    # Pool de connexions dimensionné sur les threads gunicorn (voir app/db_pool.py)
+    from . import db_pool
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", db_pool.engine_options(app.config))
+
     # Initialisation des extensions
     db.init_app(app)
     migrate.init_app(app, db)
     jwt.init_app(app) # intégration JWT dans l'app
+    db_pool.init_app(app) # métriques du pool, commande `flask db-pool`
     
     # Désactiver le rate limiting en mode test
     if app.config.get("TESTING"):
         limiter.enabled = False
     limiter.init_app(app) # intégration Flask-Limiter
     
+    # Unité de travail : un seul COMMIT par requête (voir app/unit_of_work.py)
+    from . import unit_of_work
+    unit_of_work.init_app(app)
+    
+    # Pipeline d'audit : écriture par lots en arrière-plan (voir app/audit.py)
+    from . import audit
+    audit.init_app(app)
+    
+    # Cache en lecture des listes par utilisateur, invalidé par événements (voir app/cache.py)
+    from . import cache
+    cache.init_app(app)
+    
+    # GET conditionnels des notes : compteurs de 304 (voir app/etag.py)
+    from . import etag
+    etag.init_app(app)
+    
+    # Recherche plein texte des notes : tsvector/GIN ou index en mémoire (voir app/search.py)
+    from . import search
+    search.init_app(app)
+    
+    # Flux SSE des changements par utilisateur (voir app/realtime.py)
+    from . import realtime
+    realtime.init_app(app)
+    
+    # Statistiques d'administration pré-agrégées et commande `flask stats` (voir app/stats.py)
+    from . import stats
+    stats.init_app(app)
+    
+    # Partitions mensuelles et rétention des logs d'actions, `flask action-logs` (voir app/partitions.py)
+    from . import partitions
+    partitions.init_app(app)
+    
+    # Rôle des utilisateurs authentifiés en cache par processus (voir app/identity.py)
+    from . import identity
+    identity.init_app(app)
+    
+    # Hachage des mots de passe configurable, hors du thread de la requête (voir app/passwords.py)
+    from . import passwords
+    passwords.init_app(app)
+    
+    # Métriques Prometheus par route (latence, requêtes SQL, 429) sur GET /metrics (voir app/metrics.py)
+    from . import metrics
+    metrics.init_app(app)
+    
+    # Profileur SQL optionnel (route, méthode de service, N+1, requêtes lentes) (voir app/profiler.py)
+    from . import profiler
+    profiler.init_app(app)
+    
     # Configuration CORS
     CORS(app, resources={
         r"/v1/*": {
             "origins": os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:3001,http://localhost:5173").split(","),
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "expose_headers": ["Content-Type", "Authorization"],
+            "allow_headers": ["Content-Type", "Authorization", "If-None-Match", "Last-Event-ID"],
+            "expose_headers": ["Content-Type", "Authorization", "ETag"],
             "supports_credentials": True,
             "max_age": 3600
         }
@@ -123,6 +176,11 @@ def create_app(test_config=None):
     def _expired_token(jwt_header, jwt_payload):
         return jsonify(error="Token expired", message="Please log in again"), 401
 
+    # Ticket de flux SSE présenté ailleurs que sur le flux (voir app/realtime.py)
+    @jwt.token_verification_failed_loader
+    def _wrong_token_scope(jwt_header, jwt_payload):
+        return jsonify(error="Invalid token", message="This token is not valid for this endpoint"), 401
+
     # Enregistrement des blueprints de l'API v1
     from .routes.v1 import register_v1_blueprints
     register_v1_blueprints(app)
@@ -0,0 +1,433 @@
+"""
+Pipeline d'écriture des logs d'audit (ActionLog).
+
+Les routes ne sauvegardent plus elles-mêmes leurs ActionLog : elles appellent
+audit.record(action_log). Deux modes (configuration AUDIT_MODE) :
+
+- "sync" : le log est écrit par ActionLogRepository dans la transaction de la
+  requête (atomique avec le changement). Défaut en TESTING.
+- "async" : le log est placé, après le COMMIT de la requête, dans une file
+  bornée en mémoire. Un thread d'arrière-plan l'insère par lots (INSERT
+  multi-lignes) toutes les AUDIT_FLUSH_INTERVAL_MS ms ou dès AUDIT_BATCH_SIZE
+  lignes. La latence de la requête ne comprend plus l'écriture du log.
+
+Repli durable : un fichier spool append-only (une ligne JSON par log) reçoit
+les logs qui ne peuvent pas être insérés (file pleine, base indisponible,
+arrêt du processus). Il est rejoué au démarrage du thread et après chaque lot
+inséré avec succès. Seuls les logs encore en mémoire lors d'un arrêt brutal
+(kill -9) sont perdus, soit au plus une fenêtre de AUDIT_FLUSH_INTERVAL_MS.
+Une ligne tronquée du spool est ignorée (journalisée) sans bloquer le rejeu ;
+les fichiers <spool>.*.replay d'un rejeu interrompu sont repris au démarrage.
+
+Métriques (profondeur de file, latence des lots, logs spoolés) : stats(),
+exposées par GET /v1/admin/audit/stats.
+"""
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+from flask import current_app
+from sqlalchemy import insert
+from . import db, unit_of_work
+from .metrics import observe_action_log_write
+from .models import ActionLog
+from .repositories import ActionLogRepository
+from .stats import count_action_logs
+
+# Colonnes d'un log, dans l'ordre du spool
+_COLUMNS = ("user_id", "action_type", "target_id", "payload", "timestamp")
+
+
+def _row_from_log(action_log: ActionLog) -> Dict[str, Any]:
+    """Extraire les colonnes d'un ActionLog non persisté (horodaté maintenant)."""
+    return {
+        "user_id": action_log.user_id,
+        "action_type": action_log.action_type,
+        "target_id": action_log.target_id,
+        "payload": action_log.payload,
+        "timestamp": action_log.timestamp or datetime.now(timezone.utc),
+    }
+
+
+def _pid_alive(pid: int) -> bool:
+    """Le processus pid tourne-t-il encore (sur cette machine) ?"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class AuditWriter:
+    """File bornée + thread d'insertion par lots + spool de repli."""
+
+    def __init__(self, app, queue_size: int = 10000, batch_size: int = 500,
+                 flush_interval_ms: int = 200, spool_path: Optional[str] = None):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.spool_path = spool_path
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._spool_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._spool_pending = bool(spool_path and os.path.exists(spool_path))
+        self._stats = {
+            "enqueued": 0,
+            "flushed": 0,
+            "batches": 0,
+            "failed_batches": 0,
+            "spooled": 0,
+            "replayed": 0,
+            "skipped_lines": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+
+    # ---------- Production ----------
+
+    def enqueue(self, rows: Iterable[Dict[str, Any]]) -> None:
+        """
+        Placer des logs dans la file, sans bloquer la requête.
+
+        Si la file est pleine, les logs sont écrits directement dans le spool.
+
+        Args:
+            rows: Dictionnaires de colonnes (voir _COLUMNS)
+        """
+        self._ensure_started()
+        overflow = []
+        for row in rows:
+            try:
+                self._queue.put_nowait(row)
+                self._count("enqueued")
+            except queue.Full:
+                overflow.append(row)
+        if overflow:
+            self._spool(overflow)
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    # ---------- Thread d'insertion ----------
+
+    def _ensure_started(self) -> None:
+        # Démarrage paresseux : après un fork (gunicorn), chaque worker a son thread
+        if self._thread and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        with self.app.app_context():
+            self._replay_spool(leftovers=True)
+            while not self._stop.is_set():
+                batch = self._next_batch()
+                if batch:
+                    self._write_batch(batch)
+
+    def _next_batch(self) -> List[Dict[str, Any]]:
+        """Attendre un premier log puis accumuler jusqu'à batch_size ou flush_interval."""
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            self._insert(batch)
+        except Exception:
+            self.app.logger.exception("Audit batch insert failed, spooling %d logs", len(batch))
+            self._count("failed_batches")
+            self._spool(batch)
+        else:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            observe_action_log_write(self.app, "async", elapsed_ms / 1000, len(batch))
+            with self._stats_lock:
+                self._stats["flushed"] += len(batch)
+                self._stats["batches"] += 1
+                self._stats["last_flush_ms"] = round(elapsed_ms, 3)
+                self._stats["max_flush_ms"] = max(self._stats["max_flush_ms"], round(elapsed_ms, 3))
+                self._stats["total_flush_ms"] += elapsed_ms
+            if self._spool_pending:
+                self._replay_spool()
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        """Un INSERT multi-lignes dans sa propre transaction (connexion dédiée)."""
+        completed = [ActionLog.with_structured_columns(row) for row in rows]
+        with db.engine.begin() as connection:
+            connection.execute(insert(ActionLog.__table__), completed)
+            count_action_logs(connection, completed)
+
+    # ---------- Spool ----------
+
+    def _spool(self, rows: List[Dict[str, Any]], count: bool = True) -> None:
+        if not self.spool_path:
+            self.app.logger.error("Audit spool disabled, %d logs lost", len(rows))
+            return
+        lines = []
+        for row in rows:
+            record = dict(row)
+            record["timestamp"] = record["timestamp"].isoformat()
+            lines.append(json.dumps(record) + "\n")
+        with self._spool_lock:
+            os.makedirs(os.path.dirname(self.spool_path) or ".", exist_ok=True)
+            with open(self.spool_path, "a", encoding="utf-8") as spool:
+                spool.writelines(lines)
+                spool.flush()
+                os.fsync(spool.fileno())
+            self._spool_pending = True
+        if count:
+            self._count("spooled", len(rows))
+
+    def _replay_spool(self, leftovers: bool = False) -> None:
+        """
+        Réinsérer le contenu du spool (renommé d'abord : un seul processus le rejoue).
+
+        Ne lève jamais d'exception : le thread d'insertion doit survivre à un
+        spool illisible.
+
+        Args:
+            leftovers: Rejouer aussi les fichiers <spool>.*.replay laissés par un
+                processus arrêté pendant un rejeu (au démarrage du thread)
+        """
+        if not self.spool_path:
+            return
+        try:
+            if leftovers:
+                for path in self._leftover_replays():
+                    self._replay_file(path)
+            replaying = self._claim_spool()
+            if replaying:
+                self._replay_file(replaying)
+        except Exception:
+            self.app.logger.exception("Audit spool replay failed, keeping it for later")
+
+    def _claim_spool(self) -> Optional[str]:
+        """Renommer le spool en fichier de rejeu propre à ce processus (None si absent)."""
+        # Nom unique : un rejeu interrompu de ce processus n'est jamais écrasé
+        replaying = f"{self.spool_path}.{os.getpid()}.{time.time_ns()}.replay"
+        with self._spool_lock:
+            try:
+                os.replace(self.spool_path, replaying)
+            except FileNotFoundError:
+                return None
+            finally:
+                self._spool_pending = False
+        return replaying
+
+    def _leftover_replays(self) -> List[str]:
+        """Fichiers de rejeu de ce processus ou de processus qui ne tournent plus."""
+        prefix = f"{self.spool_path}."
+        paths = []
+        for path in sorted(glob.glob(f"{glob.escape(self.spool_path)}.*.replay")):
+            pid = path[len(prefix):].split(".", 1)[0]
+            if not pid.isdigit() or int(pid) == os.getpid() or not _pid_alive(int(pid)):
+                paths.append(path)
+        return paths
+
+    def _replay_file(self, replaying: str) -> None:
+        """Insérer les lignes d'un fichier de rejeu puis le supprimer (lignes illisibles ignorées)."""
+        rows = []
+        with open(replaying, encoding="utf-8", errors="replace") as spool:
+            for number, line in enumerate(spool, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+                except (ValueError, TypeError, KeyError):
+                    # Ligne tronquée (processus tué pendant _spool) : perdue, mais seule
+                    self.app.logger.error("Skipping unreadable audit spool line %d in %s", number, replaying)
+                    self._count("skipped_lines")
+                    continue
+                rows.append({column: record.get(column) for column in _COLUMNS})
+        inserted = 0
+        try:
+            while inserted < len(rows):
+                chunk = rows[inserted:inserted + self.batch_size]
+                self._insert(chunk)
+                inserted += len(chunk)
+                self._count("replayed", len(chunk))
+        except Exception:
+            self.app.logger.exception("Audit spool replay failed, keeping it for later")
+            # Remettre dans le spool ce qui n'a pas été inséré
+            self._spool(rows[inserted:], count=False)
+        os.unlink(replaying)
+
+    # ---------- Contrôle ----------
+
+    def drain(self, timeout: float = 5.0) -> bool:
+        """
+        Attendre que tous les logs en file soient insérés (ou spoolés).
+
+        Args:
+            timeout: Attente maximale en secondes
+
+        Returns:
+            True si la file est vide
+        """
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.005)
+        return not self._queue.unfinished_tasks
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Arrêter le thread et vider la file en base, à défaut dans le spool."""
+        self.drain(timeout)
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+        remaining = []
+        while True:
+            try:
+                remaining.append(self._queue.get_nowait())
+                self._queue.task_done()
+            except queue.Empty:
+                break
+        if remaining:
+            with self.app.app_context():
+                try:
+                    self._insert(remaining)
+                except Exception:
+                    self._spool(remaining)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Métriques du pipeline.
+
+        Returns:
+            Profondeur de file, compteurs et latences des lots
+        """
+        with self._stats_lock:
+            counters = dict(self._stats)
+        batches = counters["batches"]
+        return {
+            "mode": "async",
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "running": bool(self._thread and self._thread.is_alive()),
+            "spool_pending": self._spool_pending,
+            **{key: value for key, value in counters.items() if key != "total_flush_ms"},
+            "avg_flush_ms": round(counters["total_flush_ms"] / batches, 3) if batches else None,
+        }
+
+
+def init_app(app) -> None:
+    """
+    Configurer le pipeline d'audit de l'application.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault(
+        "AUDIT_MODE",
+        os.getenv("AUDIT_MODE", "sync" if app.config.get("TESTING") else "async")
+    )
+    app.config.setdefault("AUDIT_QUEUE_SIZE", int(os.getenv("AUDIT_QUEUE_SIZE", "10000")))
+    app.config.setdefault("AUDIT_BATCH_SIZE", int(os.getenv("AUDIT_BATCH_SIZE", "500")))
+    app.config.setdefault("AUDIT_FLUSH_INTERVAL_MS", int(os.getenv("AUDIT_FLUSH_INTERVAL_MS", "200")))
+    app.config.setdefault(
+        "AUDIT_SPOOL_PATH",
+        os.getenv("AUDIT_SPOOL_PATH", os.path.join(app.instance_path, "audit_spool.jsonl"))
+    )
+
+    if app.config["AUDIT_MODE"] not in ("sync", "async"):
+        raise ValueError("AUDIT_MODE must be 'sync' or 'async'")
+
+    writer = None
+    if app.config["AUDIT_MODE"] == "async":
+        writer = AuditWriter(
+            app,
+            queue_size=app.config["AUDIT_QUEUE_SIZE"],
+            batch_size=app.config["AUDIT_BATCH_SIZE"],
+            flush_interval_ms=app.config["AUDIT_FLUSH_INTERVAL_MS"],
+            spool_path=app.config["AUDIT_SPOOL_PATH"],
+        )
+        atexit.register(writer.shutdown)
+    app.extensions["audit"] = writer
+
+
+def get_writer() -> Optional[AuditWriter]:
+    """Writer asynchrone de l'application courante (None en mode sync)."""
+    return current_app.extensions.get("audit")
+
+
+def record(action_log: ActionLog) -> None:
+    """
+    Journaliser une action.
+
+    Args:
+        action_log: ActionLog non persisté construit par la route
+    """
+    if get_writer() is None:
+        start = time.perf_counter()
+        ActionLogRepository().save(action_log)
+        observe_action_log_write(current_app, "sync", time.perf_counter() - start, 1)
+        return
+    record_many([_row_from_log(action_log)])
+
+
+def record_many(rows: List[Dict[str, Any]]) -> None:
+    """
+    Journaliser plusieurs actions (INSERT multi-lignes).
+
+    En mode sync, les logs rejoignent la transaction de la requête. En mode
+    async, ils sont mis en file après le COMMIT (abandonnés en cas d'annulation).
+
+    Args:
+        rows: Dictionnaires de colonnes (user_id, action_type, target_id, payload)
+    """
+    if not rows:
+        return
+    writer = get_writer()
+    if writer is None:
+        start = time.perf_counter()
+        ActionLogRepository().bulk_create(rows)
+        observe_action_log_write(current_app, "sync", time.perf_counter() - start, len(rows))
+        return
+    now = datetime.now(timezone.utc)
+    rows = [{"timestamp": now, **row} for row in rows]
+    unit_of_work.on_commit(lambda: writer.enqueue(rows))
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Métriques du pipeline d'audit de l'application courante.
+
+    Returns:
+        Dictionnaire de métriques ({"mode": "sync"} en mode synchrone)
+    """
+    writer = get_writer()
+    return writer.stats() if writer else {"mode": "sync"}
@@ -0,0 +1,268 @@
+"""
+Cache en lecture (read-through) des lectures par utilisateur les plus fréquentes.
+
+GET /v1/notes, /v1/contacts, /v1/contacts/assignable et /v1/assignments/unread
+sont interrogés en boucle par le frontend. Les services passent par cached()
+qui renvoie la réponse mise en cache ou la calcule puis la stocke.
+
+Invalidation par générations : chaque clé contient la génération courante de
+(espace de noms, utilisateur). Un événement de domaine (app/events.py)
+incrémente la génération des utilisateurs concernés ; leurs anciennes entrées
+ne sont plus jamais lues et expirent d'elles-mêmes (TTL / LRU). Un
+changement de username ou d'email, ou une suppression de compte, n'invalide
+que le compte et ses correspondants (notes partagées, carnets de contacts qui
+le contiennent).
+
+Backends (configuration CACHE_BACKEND) :
+- "null" : pas de cache (défaut en TESTING)
+- "memory" : LRU en mémoire avec TTL, propre à chaque processus (défaut)
+- "redis" : partagé entre workers (CACHE_REDIS_URL, paquet redis requis)
+
+Avec plusieurs workers (WEB_CONCURRENCY > 1), seul "redis" propage les
+invalidations à tous : "memory" servirait des réponses périmées jusqu'au TTL
+et est remplacé par "null" au démarrage (avertissement dans les logs).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+from flask import current_app
+from . import events
+from .workers import serving_workers
+
+# Espaces de noms mis en cache
+NOTES = "notes"
+CONTACTS = "contacts"
+ASSIGNABLE = "assignable"
+UNREAD = "unread"
+
+# Espaces de noms invalidés par chaque événement de domaine
+INVALIDATIONS = {
+    events.NOTE_CHANGED: (NOTES,),
+    events.ASSIGNMENT_CHANGED: (NOTES, UNREAD),
+    events.CONTACT_CHANGED: (CONTACTS, ASSIGNABLE),
+    # Username changé ou compte supprimé : lectures du compte et de ses correspondants
+    events.USER_CHANGED: (NOTES, CONTACTS, ASSIGNABLE, UNREAD),
+}
+
+
+class NullCache:
+    """Backend sans stockage : chaque lecture est un miss."""
+
+    name = "null"
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        pass
+
+    def get_generation(self, key: str) -> int:
+        return 0
+
+    def incr_generation(self, key: str) -> int:
+        return 0
+
+    def size(self) -> int:
+        return 0
+
+
+class MemoryCache:
+    """LRU borné avec expiration par entrée, thread-safe."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        # Générations hors LRU : les évincer ferait réapparaître d'anciennes entrées
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_generation(self, key: str) -> int:
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def incr_generation(self, key: str) -> int:
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            return self._generations[key]
+
+    def size(self) -> int:
+        return len(self._entries)
+
+
+class RedisCache:
+    """Backend Redis (ou compatible) partagé entre processus."""
+
+    name = "redis"
+
+    def __init__(self, url: str, prefix: str = "stickynotes:cache:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(self.prefix + key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, ttl: int) -> None:
+        self._client.set(self.prefix + key, value, ex=ttl)
+
+    def get_generation(self, key: str) -> int:
+        value = self._client.get(self.prefix + key)
+        return int(value) if value is not None else 0
+
+    def incr_generation(self, key: str) -> int:
+        return int(self._client.incr(self.prefix + key))
+
+    def size(self) -> int:
+        return int(self._client.dbsize())
+
+
+class ReadThroughCache:
+    """Façade : clés versionnées par génération, compteurs de hits/misses."""
+
+    def __init__(self, backend, ttl: int = 30):
+        self.backend = backend
+        self.ttl = ttl
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _key(self, namespace: str, user_id: int, params: Dict[str, Any]) -> str:
+        generation = self.backend.get_generation(f"gen:{namespace}:{user_id}")
+        digest = hashlib.sha1(
+            json.dumps(params, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()[:16]
+        return f"{namespace}:{user_id}:{generation}:{digest}"
+
+    def get_or_load(self, namespace: str, user_id: int, params: Dict[str, Any],
+                    loader: Callable[[], Any]) -> Any:
+        # Clé calculée AVANT le chargement : si une écriture invalide pendant le
+        # chargement, le résultat est stocké sous l'ancienne génération (jamais relu)
+        key = self._key(namespace, user_id, params)
+        cached_value = self.backend.get(key)
+        if cached_value is not None:
+            self._count("hits")
+            return json.loads(cached_value)
+        self._count("misses")
+        value = loader()
+        self.backend.set(key, json.dumps(value), self.ttl)
+        return value
+
+    def invalidate(self, namespaces: Iterable[str], user_ids: Iterable[int]) -> None:
+        for namespace in namespaces:
+            for user_id in user_ids:
+                self.backend.incr_generation(f"gen:{namespace}:{user_id}")
+                self._count("invalidations")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            counters = dict(self._stats)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "backend": self.backend.name,
+            "ttl": self.ttl,
+            "entries": self.backend.size(),
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+def _on_domain_event(event_name: str, data: Dict[str, Any]) -> None:
+    """Invalider exactement les entrées des utilisateurs concernés."""
+    namespaces = INVALIDATIONS.get(event_name)
+    if namespaces:
+        get_cache().invalidate(namespaces, data["user_ids"])
+
+
+def init_app(app) -> None:
+    """
+    Configurer le cache de l'application et l'abonner aux événements de domaine.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault(
+        "CACHE_BACKEND",
+        os.getenv("CACHE_BACKEND", "null" if app.config.get("TESTING") else "memory")
+    )
+    app.config.setdefault("CACHE_DEFAULT_TTL", int(os.getenv("CACHE_DEFAULT_TTL", "30")))
+    app.config.setdefault("CACHE_MAX_ENTRIES", int(os.getenv("CACHE_MAX_ENTRIES", "10000")))
+    app.config.setdefault("CACHE_REDIS_URL", os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0"))
+
+    backend_name = app.config["CACHE_BACKEND"]
+    if backend_name == "memory" and serving_workers() > 1:
+        # Une écriture n'invaliderait que le worker qui l'a traitée : lectures périmées ailleurs
+        app.logger.warning(
+            "CACHE_BACKEND=memory is per process and %s workers are configured: cache disabled "
+            "(set CACHE_BACKEND=redis)", serving_workers()
+        )
+        backend_name = "null"
+    if backend_name == "null":
+        backend = NullCache()
+    elif backend_name == "memory":
+        backend = MemoryCache(max_entries=app.config["CACHE_MAX_ENTRIES"])
+    elif backend_name == "redis":
+        backend = RedisCache(app.config["CACHE_REDIS_URL"])
+    else:
+        raise ValueError("CACHE_BACKEND must be 'null', 'memory' or 'redis'")
+
+    app.extensions["cache"] = ReadThroughCache(backend, ttl=app.config["CACHE_DEFAULT_TTL"])
+    for event_name in INVALIDATIONS:
+        events.subscribe(event_name, _on_domain_event)
+
+
+def get_cache() -> ReadThroughCache:
+    """Cache de l'application courante."""
+    return current_app.extensions["cache"]
+
+
+def cached(namespace: str, user_id: int, params: Dict[str, Any], loader: Callable[[], Any]) -> Any:
+    """
+    Lecture via le cache : renvoie la valeur en cache ou l'obtient de loader().
+
+    La valeur doit être sérialisable en JSON (c'est la réponse de l'API).
+
+    Args:
+        namespace: Espace de noms (NOTES, CONTACTS, ASSIGNABLE, UNREAD)
+        user_id: Utilisateur propriétaire de la lecture
+        params: Paramètres qui distinguent les réponses (filtres, page...)
+        loader: Fonction calculant la valeur en cas de miss
+
+    Returns:
+        Valeur (copie désérialisée en cas de hit)
+    """
+    cache = get_cache()
+    if isinstance(cache.backend, NullCache):
+        return loader()
+    return cache.get_or_load(namespace, user_id, params, loader)
@@ -0,0 +1,219 @@
+"""
+Pool de connexions PostgreSQL dimensionné sur le serveur WSGI, et ses métriques.
+
+En production (gunicorn.conf.py), chaque worker gunicorn a son propre pool
+SQLAlchemy. Un thread de requête tient au plus une connexion : le pool est
+donc dimensionné sur GUNICORN_THREADS (DB_POOL_SIZE par défaut), avec
+DB_MAX_OVERFLOW connexions temporaires en plus. Au total, une réplique ouvre
+au plus WEB_CONCURRENCY x (DB_POOL_SIZE + DB_MAX_OVERFLOW) connexions ;
+`flask db-pool budget --replicas N` vérifie que N répliques tiennent dans
+DB_MAX_CONNECTIONS (max_connections de PostgreSQL, moins une réserve pour
+l'administration et les migrations).
+
+Réglages (variables d'environnement) :
+- DB_POOL_SIZE, DB_MAX_OVERFLOW : taille du pool par worker
+- DB_POOL_TIMEOUT : attente maximale d'une connexion libre (secondes), puis erreur
+- DB_POOL_RECYCLE : âge maximal d'une connexion (secondes), sous les timeouts
+  des proxys / load balancers
+- DB_POOL_PRE_PING : vérifier la connexion avant usage (redémarrage de PostgreSQL)
+
+Métriques (GET /v1/admin/db-pool/stats) : connexions ouvertes, prises, rendues,
+attente cumulée et maximale pour obtenir une connexion, attentes expirées.
+Sous SQLite (tests), SQLAlchemy garde son pool par défaut, sans réglages.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from .workers import web_concurrency
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class PoolMetrics:
+    """Compteurs du pool, alimentés par les événements SQLAlchemy et InstrumentedQueuePool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {
+            "connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0,
+            "waits": 0, "wait_seconds_total": 0.0, "wait_seconds_max": 0.0, "timeouts": 0,
+        }
+
+    def count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[key] += amount
+
+    def record_wait(self, seconds: float, timed_out: bool) -> None:
+        with self._lock:
+            self._counters["waits"] += 1
+            self._counters["wait_seconds_total"] += seconds
+            self._counters["wait_seconds_max"] = max(self._counters["wait_seconds_max"], seconds)
+            if timed_out:
+                self._counters["timeouts"] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+        counters["wait_seconds_total"] = round(counters["wait_seconds_total"], 6)
+        counters["wait_seconds_max"] = round(counters["wait_seconds_max"], 6)
+        return counters
+
+
+# Métriques du processus : le pool est créé par Flask-SQLAlchemy, avant toute requête
+metrics = PoolMetrics()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool qui mesure le temps passé à obtenir une connexion (pool saturé)."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        metrics.record_wait(time.perf_counter() - start, timed_out=False)
+        return connection
+
+
+def _pool_size() -> int:
+    # Un thread de requête = au plus une connexion
+    return int(os.getenv("DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4")))
+
+
+def _max_overflow() -> int:
+    return int(os.getenv("DB_MAX_OVERFLOW", "2"))
+
+
+def engine_options(config) -> Dict[str, Any]:
+    """
+    Options de moteur SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS) dérivées de l'environnement.
+
+    Args:
+        config: Configuration Flask (SQLALCHEMY_DATABASE_URI déjà fixée)
+
+    Returns:
+        Options du pool ; vide pour SQLite (pool par défaut de SQLAlchemy)
+    """
+    if str(config.get("SQLALCHEMY_DATABASE_URI", "")).startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": _pool_size(),
+        "max_overflow": _max_overflow(),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": _env_bool("DB_POOL_PRE_PING", "true"),
+    }
+
+
+def _attach(engine) -> None:
+    """Abonner les compteurs aux événements du pool d'un moteur."""
+    event.listen(engine, "connect", lambda *args: metrics.count("connects"))
+    event.listen(engine, "checkout", lambda *args: metrics.count("checkouts"))
+    event.listen(engine, "checkin", lambda *args: metrics.count("checkins"))
+    event.listen(engine, "invalidate", lambda *args: metrics.count("invalidations"))
+
+
+def stats(engine=None) -> Dict[str, Any]:
+    """
+    État du pool du processus courant et compteurs cumulés.
+
+    Args:
+        engine: Moteur SQLAlchemy (défaut : celui de l'application)
+
+    Returns:
+        Dictionnaire {pool, size, checked_out, overflow, ...compteurs}
+    """
+    if engine is None:
+        from . import db
+        engine = db.engine
+    pool = engine.pool
+    state: Dict[str, Optional[int]] = {"size": None, "checked_out": None, "overflow": None}
+    if isinstance(pool, QueuePool):
+        state = {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+    return {
+        "pool": type(pool).__name__,
+        "pid": os.getpid(),
+        **state,
+        **metrics.snapshot(),
+    }
+
+
+def connection_budget(replicas: int, workers: int, pool_size: int, max_overflow: int) -> Dict[str, int]:
+    """
+    Connexions PostgreSQL maximales ouvertes par l'API.
+
+    Args:
+        replicas: Nombre de répliques (conteneurs) de l'API
+        workers: Workers gunicorn par réplique (WEB_CONCURRENCY)
+        pool_size: Connexions permanentes par worker
+        max_overflow: Connexions temporaires par worker
+
+    Returns:
+        {"per_worker", "per_replica", "total"}
+    """
+    per_worker = pool_size + max_overflow
+    return {
+        "per_worker": per_worker,
+        "per_replica": per_worker * workers,
+        "total": per_worker * workers * replicas,
+    }
+
+
+db_pool_cli = AppGroup("db-pool", help="Dimensionnement et métriques du pool de connexions.")
+
+
+@db_pool_cli.command("budget")
+@click.option("--replicas", type=int, default=1, help="Répliques de l'API.")
+@click.option("--workers", type=int, default=None, help="Workers par réplique (défaut : comme gunicorn.conf.py).")
+def _budget_command(replicas, workers):
+    """Vérifier que les pools de N répliques tiennent dans DB_MAX_CONNECTIONS."""
+    options = current_app.config["SQLALCHEMY_ENGINE_OPTIONS"]
+    pool_size = options.get("pool_size", _pool_size())
+    max_overflow = options.get("max_overflow", _max_overflow())
+    workers = workers or web_concurrency()
+    budget = connection_budget(replicas, workers, pool_size, max_overflow)
+    limit = current_app.config["DB_MAX_CONNECTIONS"]
+
+    click.echo(f"pool per worker: {pool_size} + {max_overflow} overflow")
+    click.echo(f"per replica ({workers} workers): {budget['per_replica']}")
+    click.echo(f"total ({replicas} replicas): {budget['total']} / {limit}")
+    if budget["total"] > limit:
+        raise click.ClickException(
+            f"{budget['total']} connections exceed DB_MAX_CONNECTIONS={limit}: "
+            "reduce DB_POOL_SIZE / DB_MAX_OVERFLOW / WEB_CONCURRENCY or add a pooler (PgBouncer)"
+        )
+
+
+@db_pool_cli.command("stats")
+def _stats_command():
+    """Afficher l'état du pool de ce processus."""
+    for key, value in stats().items():
+        click.echo(f"{key}: {value}")
+
+
+def init_app(app) -> None:
+    """
+    Abonner les métriques au pool de l'application et enregistrer `flask db-pool`.
+
+    À appeler après db.init_app (les options du pool viennent d'engine_options).
+
+    Args:
+        app: Application Flask
+    """
+    from . import db
+    app.config.setdefault("DB_MAX_CONNECTIONS", int(os.getenv("DB_MAX_CONNECTIONS", "90")))
+    with app.app_context():
+        _attach(db.engine)
+    app.cli.add_command(db_pool_cli)
@@ -0,0 +1,157 @@
+"""
+GET conditionnels (ETag / If-None-Match) pour les lectures de notes.
+
+Chaque utilisateur porte un compteur users.notes_version, incrémenté dans la
+MÊME transaction que toute écriture qui change ce qu'il voit dans ses notes
+(note, assignation, contact, username d'un correspondant). L'ETag d'une
+réponse est dérivé de (utilisateur, version, URL) : le vérifier ne coûte
+qu'une lecture de clé primaire, sans requête de notes ni to_dict().
+
+Si le client renvoie un If-None-Match qui correspond, la route répond 304
+sans corps ; sinon la réponse est construite puis marquée de son ETag.
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterable, Set
+from flask import current_app, make_response, request
+from sqlalchemy import or_, select, update
+from . import db
+from .models import Assignment, Note, User
+
+
+def init_app(app) -> None:
+    """
+    Initialiser les compteurs de hits/misses des GET conditionnels.
+
+    Args:
+        app: Application Flask
+    """
+    app.extensions["etag"] = {
+        "stats": {"hits": 0, "misses": 0},
+        "lock": threading.Lock(),
+    }
+
+
+def bump_notes_version(user_ids: Iterable[int]) -> None:
+    """
+    Incrémenter la version des notes des utilisateurs concernés.
+
+    Doit être appelée AVANT le COMMIT de l'écriture : la nouvelle version est
+    ainsi visible exactement quand les données le sont.
+
+    Args:
+        user_ids: Utilisateurs dont les lectures de notes changent
+    """
+    ids = sorted({uid for uid in user_ids if uid is not None})
+    if not ids:
+        return
+    db.session.execute(
+        update(User)
+        .where(User.id.in_(ids))
+        .values(notes_version=User.notes_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def bump_correspondents(user_id: int) -> Set[int]:
+    """
+    Incrémenter la version de l'utilisateur et de ceux qui partagent une note avec lui.
+
+    Utilisé quand le compte lui-même change (username affiché dans les notes,
+    suppression).
+
+    Args:
+        user_id: Utilisateur modifié
+
+    Returns:
+        Utilisateurs dont la version a été incrémentée (lui compris)
+    """
+    recipients = (
+        select(Assignment.user_id)
+        .join(Note, Note.id == Assignment.note_id)
+        .where(Note.creator_id == user_id)
+    )
+    creators = (
+        select(Note.creator_id)
+        .join(Assignment, Assignment.note_id == Note.id)
+        .where(Assignment.user_id == user_id)
+    )
+    result = db.session.execute(
+        update(User)
+        .where(or_(User.id == user_id, User.id.in_(recipients), User.id.in_(creators)))
+        .values(notes_version=User.notes_version + 1)
+        .returning(User.id)
+        .execution_options(synchronize_session=False)
+    )
+    return {bumped_id for (bumped_id,) in result}
+
+
+def notes_etag(user_id: int) -> str:
+    """
+    ETag (valeur non quotée) de la requête courante pour un utilisateur.
+
+    Args:
+        user_id: Utilisateur authentifié
+
+    Returns:
+        Empreinte de (utilisateur, version des notes, chemin, paramètres)
+    """
+    version = db.session.execute(
+        select(User.notes_version).where(User.id == user_id)
+    ).scalar()
+    args = sorted(request.args.items(multi=True))
+    raw = f"{user_id}:{version}:{request.path}:{args}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:32]
+
+
+def conditional_notes_response(user_id: int, build: Callable[[], Any]):
+    """
+    Répondre 304 si If-None-Match correspond, sinon construire la réponse.
+
+    L'ETag d'une réponse 200 est calculé APRÈS build() : une lecture qui écrit
+    (marquage comme lu) incrémente la version, et le client reçoit l'ETag
+    correspondant à l'état qu'il vient de lire.
+
+    Args:
+        user_id: Utilisateur authentifié
+        build: Fonction construisant le corps de la réponse
+
+    Returns:
+        Réponse Flask (304 sans corps ou 200 avec ETag)
+    """
+    # Sans If-None-Match, rien à valider : seule la lecture après build() est faite
+    current = notes_etag(user_id) if request.if_none_match else None
+    if current is not None and request.if_none_match.contains(current):
+        _count("hits")
+        response = make_response("", 304)
+        response.set_etag(current)
+    else:
+        _count("misses")
+        response = make_response(build())
+        response.set_etag(notes_etag(user_id))
+    # Le navigateur peut conserver la réponse mais doit la revalider à chaque fois
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _count(key: str) -> None:
+    state = current_app.extensions["etag"]
+    with state["lock"]:
+        state["stats"][key] += 1
+
+
+def stats() -> Dict[str, Any]:
+    """
+    Compteurs des GET conditionnels.
+
+    Returns:
+        Dictionnaire hits (304), misses (200) et hit_ratio
+    """
+    state = current_app.extensions["etag"]
+    with state["lock"]:
+        counters = dict(state["stats"])
+    lookups = counters["hits"] + counters["misses"]
+    return {
+        **counters,
+        "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+    }
@@ -0,0 +1,77 @@
+"""
+Événements de domaine émis par les méthodes d'écriture des repositories.
+
+Chaque écriture (note, assignation, contact, utilisateur) publie un événement
+décrivant ce qui a changé et QUELS utilisateurs sont concernés. Les abonnés
+(invalidation du cache, notifications...) réagissent sans que les services
+ou les routes aient à les connaître.
+
+Les événements sont délivrés après le COMMIT : dans une requête enrôlée dans
+l'unité de travail, ils sont différés jusqu'au COMMIT de fin de requête et
+abandonnés en cas d'annulation ; hors requête, le repository vient de valider,
+ils sont délivrés immédiatement.
+
+Payload : user_ids, action ("created", "updated", "deleted", et pour les
+assignations "read", "unread", "status_changed", "priority_changed") et les
+identifiants de l'objet (note_id, assignment_id, contact_id).
+"""
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List
+from flask import current_app
+from . import unit_of_work
+
+# Noms d'événements
+NOTE_CHANGED = "note.changed"              # user_ids : créateur + destinataires
+ASSIGNMENT_CHANGED = "assignment.changed"  # user_ids : destinataire(s) + créateur de la note
+CONTACT_CHANGED = "contact.changed"        # user_ids : propriétaire + contact (réciprocité)
+USER_CHANGED = "user.changed"              # user_ids : le compte + correspondants (username, suppression)
+
+# Abonnés par nom d'événement ("*" : tous les événements)
+Handler = Callable[[str, Dict[str, Any]], None]
+_handlers: Dict[str, List[Handler]] = defaultdict(list)
+
+
+def subscribe(event_name: str, handler: Handler) -> None:
+    """
+    Abonner un handler à un événement (idempotent).
+
+    Args:
+        event_name: Nom d'événement ou "*" pour tous
+        handler: Fonction (nom, payload)
+    """
+    if handler not in _handlers[event_name]:
+        _handlers[event_name].append(handler)
+
+
+def unsubscribe(event_name: str, handler: Handler) -> None:
+    """
+    Retirer un handler.
+
+    Args:
+        event_name: Nom d'événement ou "*"
+        handler: Handler précédemment abonné
+    """
+    if handler in _handlers[event_name]:
+        _handlers[event_name].remove(handler)
+
+
+def emit(event_name: str, user_ids: Iterable[int], **payload: Any) -> None:
+    """
+    Publier un événement, délivré après le COMMIT de la transaction courante.
+
+    Args:
+        event_name: Nom de l'événement (constantes du module)
+        user_ids: Utilisateurs concernés par le changement
+        **payload: Données complémentaires (action, note_id, contact_id...)
+    """
+    data = {"user_ids": sorted({uid for uid in user_ids if uid is not None}), **payload}
+    unit_of_work.on_commit(lambda: _dispatch(event_name, data))
+
+
+def _dispatch(event_name: str, data: Dict[str, Any]) -> None:
+    for handler in list(_handlers[event_name]) + list(_handlers["*"]):
+        try:
+            handler(event_name, data)
+        except Exception:
+            # Un abonné défaillant ne doit pas faire échouer une écriture déjà validée
+            current_app.logger.exception("Event handler failed for %s", event_name)
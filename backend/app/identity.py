@@ -0,0 +1,196 @@
+"""
+Résolution JWT → rôle de l'utilisateur, avec cache par processus à TTL court.
+
+Les tokens ne portent que l'id de l'utilisateur (identity). @admin_required et
+les routes qui distinguent admin / utilisateur relisaient le compte à chaque
+requête pour connaître son rôle (et vérifier qu'il existe encore). Ce module
+garde (id → rôle) en mémoire IDENTITY_CACHE_TTL_SECONDS secondes : une
+vérification d'autorisation en cache ne coûte aucune requête SQL.
+
+Le rôle n'est pas placé dans les claims du JWT : une rétrogradation ou une
+suppression de compte ne prendrait effet qu'à l'expiration du token.
+
+Invalidation : un listener de session relève les comptes supprimés et les
+changements de rôle au flush (update_user_role, delete_user, suppression par
+le compte lui-même...) et les retire du cache au COMMIT. Le cache est propre à
+chaque processus : avec plusieurs workers, un autre worker peut appliquer
+l'ancien rôle jusqu'au TTL. IDENTITY_CACHE_TTL_SECONDS=0 désactive le cache.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+from flask import current_app, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from . import db
+from .models import User
+
+_PENDING_KEY = "identity_changes"
+
+
+class Identity(NamedTuple):
+    """Utilisateur authentifié, tel que vu par les vérifications d'autorisation."""
+    id: int
+    role: str
+
+    @property
+    def is_admin(self) -> bool:
+        return self.role == "admin"
+
+
+class IdentityCache:
+    """LRU borné (id → Identity) avec expiration, thread-safe."""
+
+    def __init__(self, ttl: int = 30, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        # Incrémentée à chaque invalidation : un chargement concurrent ne réinsère pas l'ancien rôle
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, user_id: int) -> Optional[Identity]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self._stats["hits"] += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[user_id]
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, identity: Identity, generation: int) -> None:
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[identity.id] = (identity, time.monotonic() + self.ttl)
+            self._entries.move_to_end(identity.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_ids: Iterable[int]) -> None:
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+                self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._stats)
+            entries = len(self._entries)
+        lookups = counters["hits"] + counters["misses"]
+        return {
+            "ttl": self.ttl,
+            "entries": entries,
+            **counters,
+            "hit_ratio": round(counters["hits"] / lookups, 3) if lookups else None,
+        }
+
+
+def get_identity_cache() -> IdentityCache:
+    """Cache d'identités de l'application courante."""
+    return current_app.extensions["identity"]
+
+
+def resolve(user_id: int) -> Optional[Identity]:
+    """
+    Rôle d'un utilisateur, depuis le cache ou la base.
+
+    Args:
+        user_id: ID de l'utilisateur
+
+    Returns:
+        Identity, ou None si le compte n'existe plus (non mis en cache)
+    """
+    cache = get_identity_cache()
+    identity = cache.get(user_id)
+    if identity is not None:
+        return identity
+    generation = cache.generation
+    user = db.session.get(User, user_id)
+    if user is None:
+        return None
+    identity = Identity(user.id, user.role)
+    cache.put(identity, generation)
+    return identity
+
+
+def current_identity() -> Optional[Identity]:
+    """
+    Utilisateur du JWT de la requête courante (après verify_jwt_in_request / @jwt_required).
+
+    Returns:
+        Identity, ou None si le compte n'existe plus
+    """
+    return resolve(int(get_jwt_identity()))
+
+
+def is_admin(user_id: int) -> bool:
+    """
+    L'utilisateur est-il administrateur ? (False si le compte n'existe plus)
+
+    Args:
+        user_id: ID de l'utilisateur
+
+    Returns:
+        True pour un compte admin existant
+    """
+    identity = resolve(user_id)
+    return identity is not None and identity.is_admin
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    # session.dirty / session.deleted et l'historique des attributs sont encore ceux d'avant le flush
+    changed = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    changed.update(
+        obj.id for obj in session.dirty
+        if isinstance(obj, User) and inspect(obj).attrs.role.history.has_changes()
+    )
+    if changed:
+        session.info.setdefault(_PENDING_KEY, set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    changed = session.info.pop(_PENDING_KEY, None)
+    if changed and has_app_context() and "identity" in current_app.extensions:
+        get_identity_cache().invalidate(changed)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes(session, previous_transaction):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def init_app(app) -> None:
+    """
+    Configurer le cache d'identités de l'application.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("IDENTITY_CACHE_TTL_SECONDS", int(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "30")))
+    app.config.setdefault("IDENTITY_CACHE_MAX_ENTRIES", int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "10000")))
+    app.extensions["identity"] = IdentityCache(
+        ttl=app.config["IDENTITY_CACHE_TTL_SECONDS"],
+        max_entries=app.config["IDENTITY_CACHE_MAX_ENTRIES"],
+    )
@@ -0,0 +1,104 @@
+"""
+Réponses des grandes listes : tableau complet, pages par curseur ou flux NDJSON.
+
+GET /v1/users et les listes d'administration renvoient historiquement toute la
+table en un seul tableau JSON, ce qui ne tient plus la charge au-delà de
+quelques dizaines de milliers de lignes. Deux modes s'y ajoutent :
+- ?cursor= (vide pour la première page) : pages de per_page lignes par id,
+  réponse {<clé>, per_page, has_next, next_cursor}
+- ?format=ndjson ou Accept: application/x-ndjson : un objet JSON par ligne,
+  lu par lots depuis un curseur serveur (mémoire constante)
+
+Sans ces paramètres, le tableau complet est conservé pour compatibilité.
+"""
+from typing import Any, Callable, Iterable, List
+from flask import Response, abort, current_app, jsonify, request, stream_with_context
+from .pagination import InvalidCursor, iter_batches, paginate_by_id
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Lignes lues par aller-retour en mode flux
+STREAM_BATCH_SIZE = 500
+
+Serializer = Callable[[List[Any]], List[dict]]
+
+
+def wants_ndjson() -> bool:
+    """Le client demande-t-il un flux NDJSON (paramètre format ou en-tête Accept) ?"""
+    if request.args.get("format") == "ndjson":
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+
+def page_size(default: int = 20, maximum: int = 100) -> int:
+    """
+    Lire per_page dans la requête, borné comme GET /v1/notes.
+
+    Args:
+        default: Valeur si absent ou invalide
+        maximum: Valeur maximale
+
+    Returns:
+        Nombre d'items par page
+    """
+    per_page = request.args.get("per_page", default, type=int)
+    if per_page < 1:
+        return default
+    return min(per_page, maximum)
+
+
+def ndjson_response(batches: Iterable[List[dict]]) -> Response:
+    """
+    Réponse en flux : un objet JSON par ligne, lot par lot.
+
+    Args:
+        batches: Itérateur de listes de dictionnaires déjà sérialisés
+
+    Returns:
+        Réponse Flask streamée (le contexte de requête reste ouvert jusqu'à la fin)
+    """
+    def generate():
+        for batch in batches:
+            yield "".join(current_app.json.dumps(item) + "\n" for item in batch)
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+
+def list_response(query: Any, id_column: Any, serialize: Serializer, key: str,
+                  descending: bool = False):
+    """
+    Répondre à une liste selon le mode demandé (tableau, curseur ou NDJSON).
+
+    Args:
+        query: Requête ORM non triée (options de chargement déjà appliquées)
+        id_column: Colonne id servant d'ordre et de curseur
+        serialize: Fonction lot de lignes -> liste de dictionnaires
+        key: Clé de la liste dans la réponse paginée (ex : "users")
+        descending: Ids décroissants (plus récents d'abord)
+
+    Returns:
+        Réponse Flask
+
+    Raises:
+        400: Si le curseur est invalide
+    """
+    order = id_column.desc() if descending else id_column.asc()
+    if wants_ndjson():
+        ordered = query.order_by(order)
+        return ndjson_response(serialize(batch) for batch in iter_batches(ordered, STREAM_BATCH_SIZE))
+
+    cursor = request.args.get("cursor")
+    if cursor is None:
+        return jsonify(serialize(query.order_by(order).all()))
+
+    per_page = page_size()
+    try:
+        rows, next_cursor = paginate_by_id(query, id_column, cursor, per_page, descending)
+    except InvalidCursor:
+        abort(400, description="Invalid cursor")
+    return jsonify({
+        key: serialize(rows),
+        "per_page": per_page,
+        "has_next": next_cursor is not None,
+        "next_cursor": next_cursor,
+    })
@@ -0,0 +1,409 @@
+"""
+Métriques au format texte Prometheus : GET /metrics.
+
+Par route (blueprint + endpoint Flask) :
+- http_requests_total : requêtes par méthode et code de statut ;
+- http_request_duration_seconds : histogramme de latence (jusqu'à la
+  construction de la réponse : un flux NDJSON / SSE n'est pas compté en entier) ;
+- http_request_db_queries / http_request_db_seconds : nombre de requêtes SQL
+  et temps passé en base par requête HTTP (événements before/after_cursor_execute) ;
+- http_rate_limited_total : requêtes refusées par Flask-Limiter (429).
+
+Et pour le processus :
+- action_log_write_duration_seconds : écriture des logs d'actions (lot du
+  writer asynchrone, ou INSERT dans la requête en mode sync) ;
+- db_pool_* : état et attentes du pool de connexions (app/db_pool.py) ;
+- audit_queue_depth / audit_spool_pending : pipeline d'audit (app/audit.py).
+
+Avec plusieurs workers gunicorn, METRICS_MULTIPROC_DIR (ou
+PROMETHEUS_MULTIPROC_DIR ; défini par gunicorn.conf.py) désigne un dossier
+partagé : chaque worker y écrit ses compteurs et histogrammes toutes les
+METRICS_FLUSH_SECONDS (et à l'arrêt), et le worker qui répond au scrape
+additionne ceux de tous les workers, y compris les workers terminés (les
+compteurs ne reculent pas quand gunicorn recycle un worker). Les jauges
+restent par processus (étiquette pid) et disparaissent avec leur worker.
+Les valeurs des autres workers ont au plus METRICS_FLUSH_SECONDS de retard.
+Sans dossier, les valeurs sont celles du seul processus qui répond.
+
+Si METRICS_TOKEN est défini, /metrics exige `Authorization: Bearer <METRICS_TOKEN>`.
+"""
+import atexit
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+DB_TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Compteur par combinaison d'étiquettes."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Sequence[str] = (), amount: float = 1) -> None:
+        key = tuple(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, labels: Sequence[str] = ()) -> float:
+        with self._lock:
+            return self._values.get(tuple(labels), 0)
+
+    def dump(self) -> List[list]:
+        """Séries sérialisables en JSON : [[étiquettes, valeur], ...]."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def samples(self, others: Iterable[List[list]] = ()) -> List[str]:
+        """
+        Lignes d'exposition, additionnées aux dump() d'autres processus.
+
+        Args:
+            others: Résultats de dump() des autres workers
+        """
+        with self._lock:
+            values = dict(self._values)
+        for dumped in others:
+            for key, value in dumped:
+                values[tuple(key)] = values.get(tuple(key), 0) + value
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {_number(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram:
+    """Histogramme cumulatif (buckets fixes) par combinaison d'étiquettes."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # étiquettes -> [comptes par bucket (non cumulés), somme, nombre]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Sequence[str] = ()) -> None:
+        key = tuple(labels)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def count(self, labels: Sequence[str] = ()) -> int:
+        with self._lock:
+            series = self._series.get(tuple(labels))
+            return series[2] if series else 0
+
+    def dump(self) -> List[list]:
+        """Séries sérialisables en JSON : [[étiquettes, comptes par bucket, somme, nombre], ...]."""
+        with self._lock:
+            return [[list(key), list(s[0]), s[1], s[2]] for key, s in self._series.items()]
+
+    def samples(self, others: Iterable[List[list]] = ()) -> List[str]:
+        """
+        Lignes d'exposition, additionnées aux dump() d'autres processus.
+
+        Args:
+            others: Résultats de dump() des autres workers
+        """
+        with self._lock:
+            snapshot = {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+        for dumped in others:
+            for key, counts, total, number in dumped:
+                if len(counts) != len(self.buckets):
+                    continue  # buckets d'une autre version du code
+                mine = snapshot.get(tuple(key), ([0] * len(self.buckets), 0.0, 0))
+                snapshot[tuple(key)] = ([a + b for a, b in zip(mine[0], counts)], mine[1] + total, mine[2] + number)
+        lines = []
+        for key, (counts, total, number) in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {number}")
+        return lines
+
+
+class Registry:
+    """Métriques d'une application, leur partage entre workers et leur rendu texte."""
+
+    def __init__(self, multiproc_dir: str = "", flush_seconds: float = 5.0):
+        self.multiproc_dir = multiproc_dir
+        self.flush_seconds = flush_seconds
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid: Optional[int] = None
+        self._flusher_lock = threading.Lock()
+        route = ("blueprint", "endpoint")
+        self.requests = Counter("http_requests_total", "HTTP requests by route, method and status.",
+                                route + ("method", "status"))
+        self.latency = Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                 route + ("method",))
+        self.db_queries = Histogram("http_request_db_queries", "SQL queries per HTTP request.",
+                                    route, QUERY_COUNT_BUCKETS)
+        self.db_seconds = Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request.",
+                                    route, DB_TIME_BUCKETS)
+        self.rate_limited = Counter("http_rate_limited_total", "Requests rejected by the rate limiter.", route)
+        self.action_log_writes = Histogram("action_log_write_duration_seconds",
+                                           "Action log write latency (async batch or sync insert).",
+                                           ("mode",), DB_TIME_BUCKETS)
+        self.action_log_rows = Counter("action_log_rows_written_total", "Action logs written.", ("mode",))
+
+    def metrics(self):
+        return (self.requests, self.latency, self.db_queries, self.db_seconds, self.rate_limited,
+                self.action_log_writes, self.action_log_rows)
+
+    # ---------- Partage entre workers (METRICS_MULTIPROC_DIR) ----------
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{pid}.json")
+
+    def flush(self, gauges: Iterable[Tuple[str, str, str, float]] = ()) -> None:
+        """
+        Écrire les valeurs du processus courant dans le dossier partagé.
+
+        Args:
+            gauges: Jauges du processus, relues par les autres workers tant qu'il vit
+        """
+        if not self.multiproc_dir:
+            return
+        state = {
+            "metrics": {metric.name: metric.dump() for metric in self.metrics()},
+            "gauges": [list(gauge) for gauge in gauges],
+        }
+        path = self._path(os.getpid())
+        partial = f"{path}.partial"
+        with open(partial, "w", encoding="utf-8") as handle:
+            json.dump(state, handle)
+        # Jamais de fichier à moitié écrit pour un scrape concurrent
+        os.replace(partial, path)
+
+    def _others(self) -> List[Tuple[int, Dict[str, Any]]]:
+        """États écrits par les autres processus : [(pid, état), ...]."""
+        if not self.multiproc_dir:
+            return []
+        states = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics_*.json")):
+            pid = os.path.basename(path)[len("metrics_"):-len(".json")]
+            if not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(path, encoding="utf-8") as handle:
+                    states.append((int(pid), json.load(handle)))
+            except (OSError, ValueError):
+                continue  # supprimé ou remplacé entre glob et open
+        return states
+
+    def start_flusher(self, app) -> None:
+        """
+        Démarrer (une fois par processus) le thread qui écrit les valeurs toutes les flush_seconds.
+
+        Args:
+            app: Application Flask (jauges lues dans son contexte)
+        """
+        if not self.multiproc_dir or (self._flusher_pid == os.getpid() and self._flusher.is_alive()):
+            return
+        with self._flusher_lock:
+            # Démarrage paresseux : après un fork (gunicorn), chaque worker a son thread
+            if self._flusher_pid == os.getpid() and self._flusher.is_alive():
+                return
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            self._flusher = threading.Thread(target=self._run_flusher, args=(app,),
+                                             name="metrics-flusher", daemon=True)
+            self._flusher_pid = os.getpid()
+            self._flusher.start()
+            atexit.register(self._flush_app, app)
+
+    def _flush_app(self, app) -> None:
+        with app.app_context():
+            self.flush(_process_gauges())
+
+    def _run_flusher(self, app) -> None:
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self._flush_app(app)
+            except Exception:  # noqa: BLE001 - le thread survit à un disque plein
+                app.logger.exception("metrics flush failed")
+
+    def render(self, gauges: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+        from .audit import _pid_alive
+        others = self._others()
+        gauges_by_pid = [(os.getpid(), list(gauges))]
+        gauges_by_pid += [(pid, state.get("gauges", [])) for pid, state in others if _pid_alive(pid)]
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(state["metrics"].get(metric.name, []) for _, state in others))
+        series: Dict[str, Tuple[str, str, List[str]]] = {}
+        for pid, process_gauges in gauges_by_pid:
+            for name, kind, help_text, value in process_gauges:
+                series.setdefault(name, (kind, help_text, []))[2].append(f'{name}{{pid="{pid}"}} {_number(value)}')
+        for name, (kind, help_text, samples) in series.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+def observe_action_log_write(app, mode: str, seconds: float, rows: int) -> None:
+    """
+    Enregistrer l'écriture d'un lot de logs d'actions.
+
+    Args:
+        app: Application Flask (le writer asynchrone n'a pas de contexte)
+        mode: "async" ou "sync"
+        seconds: Durée de l'écriture
+        rows: Nombre de logs écrits
+    """
+    registry = app.extensions.get("metrics")
+    if registry is None:
+        return
+    registry.action_log_writes.observe(seconds, (mode,))
+    registry.action_log_rows.inc((mode,), rows)
+
+
+# ---------- Instrumentation des requêtes ----------
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_query_start")
+    if not starts or not has_request_context():
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    g.metrics_db_queries = g.get("metrics_db_queries", 0) + 1
+    g.metrics_db_seconds = g.get("metrics_db_seconds", 0.0) + elapsed
+
+
+def _route_labels() -> Tuple[str, str]:
+    if request.url_rule is None:
+        return ("", "unmatched")
+    return (request.blueprint or "", request.endpoint or "")
+
+
+def _start_timer() -> None:
+    g.metrics_start = time.perf_counter()
+    g.metrics_db_queries = 0
+    g.metrics_db_seconds = 0.0
+
+
+def _record_request(response):
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+    registry = current_app.extensions["metrics"]
+    registry.start_flusher(current_app._get_current_object())
+    route = _route_labels()
+    registry.requests.inc(route + (request.method, str(response.status_code)))
+    registry.latency.observe(time.perf_counter() - start, route + (request.method,))
+    registry.db_queries.observe(g.pop("metrics_db_queries", 0), route)
+    registry.db_seconds.observe(g.pop("metrics_db_seconds", 0.0), route)
+    if response.status_code == 429:
+        registry.rate_limited.inc(route)
+    return response
+
+
+def _process_gauges() -> List[Tuple[str, str, str, float]]:
+    """Jauges lues au moment du scrape : pool de connexions et pipeline d'audit."""
+    from . import audit, db_pool
+    pool = db_pool.stats()
+    gauges = [
+        ("db_pool_checked_out", "gauge", "Connections currently checked out.", pool["checked_out"] or 0),
+        ("db_pool_overflow", "gauge", "Overflow connections currently open.", pool["overflow"] or 0),
+        ("db_pool_checkouts_total", "counter", "Connection checkouts.", pool["checkouts"]),
+        ("db_pool_wait_seconds_total", "counter", "Time spent waiting for a free connection.",
+         pool["wait_seconds_total"]),
+        ("db_pool_timeouts_total", "counter", "Connection requests that timed out.", pool["timeouts"]),
+    ]
+    if pool["size"] is not None:
+        gauges.insert(0, ("db_pool_size", "gauge", "Configured pool size.", pool["size"]))
+    audit_stats = audit.stats()
+    if audit_stats.get("mode") == "async":
+        gauges.append(("audit_queue_depth", "gauge", "Action logs waiting to be written.",
+                       audit_stats["queue_depth"]))
+        gauges.append(("audit_spool_pending", "gauge", "Action logs spooled to disk.",
+                       int(bool(audit_stats["spool_pending"]))))
+    return gauges
+
+
+def metrics_view():
+    """GET /metrics : exposition texte Prometheus."""
+    token = current_app.config["METRICS_TOKEN"]
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied, f"Bearer {token}"):
+            return Response("unauthorized\n", status=401, mimetype="text/plain")
+    body = current_app.extensions["metrics"].render(_process_gauges())
+    return Response(body, content_type=CONTENT_TYPE)
+
+
+def init_app(app) -> None:
+    """
+    Instrumenter les requêtes de l'application et exposer GET /metrics.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("METRICS_TOKEN", os.getenv("METRICS_TOKEN", ""))
+    app.config.setdefault(
+        "METRICS_MULTIPROC_DIR",
+        os.getenv("METRICS_MULTIPROC_DIR", os.getenv("PROMETHEUS_MULTIPROC_DIR", ""))
+    )
+    app.config.setdefault("METRICS_FLUSH_SECONDS", float(os.getenv("METRICS_FLUSH_SECONDS", "5")))
+    app.extensions["metrics"] = Registry(app.config["METRICS_MULTIPROC_DIR"], app.config["METRICS_FLUSH_SECONDS"])
+    # En tête des before_request : la latence inclut le rate limiting et les 429 sont comptés
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_view, methods=["GET"])
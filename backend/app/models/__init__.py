@@ -8,6 +8,8 @@ from .user import User
 from .assignment import Assignment
 from .contact import Contact
 from .action_log import ActionLog
+from .stats import PlatformStat, ActionLogDailyStat, ActionLogUserStat
 
 # Export de tous les modèles pour faciliter l'import
-__all__ = ['Note', 'User', 'Assignment', 'Contact', 'ActionLog']
\ No newline at end of file
+__all__ = ['Note', 'User', 'Assignment', 'Contact', 'ActionLog',
+           'PlatformStat', 'ActionLogDailyStat', 'ActionLogUserStat']
\ No newline at end of file
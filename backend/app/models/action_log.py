@@ -1,9 +1,18 @@
 """
 Modèle pour les journaux d'actions.
 """
+import json
 from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import event
 from .. import db
 
+# Actions dont la cible (target_id) est une note ou un utilisateur
+NOTE_TARGET_ACTIONS = frozenset({"note_created", "note_updated", "note_deleted"})
+USER_TARGET_ACTIONS = frozenset({"user_registered", "user_deleted", "user_logout", "password_changed"})
+# Clés du payload désignant l'utilisateur concerné, par ordre de priorité
+SUBJECT_USER_KEYS = ("assigned_user_id", "assigned_to", "user_id")
+
 class ActionLog(db.Model):
     """
     But : journaliser les actions effectuées par les utilisateurs pour l'audit et le suivi.
@@ -16,6 +25,20 @@ class ActionLog(db.Model):
     action_type = db.Column(db.String(80), nullable=False)
     timestamp = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
     payload = db.Column(db.String(255))  # détails supplémentaires sur l'action/JSON
+    # Colonnes structurées extraites du payload (indexées pour les historiques)
+    note_id = db.Column(db.Integer, nullable=True)  # note concernée (pas de FK : l'audit survit à la note)
+    subject_user_id = db.Column(db.Integer, nullable=True)  # utilisateur concerné (destinataire, compte...)
+
+    # Sous PostgreSQL, table partitionnée par mois sur timestamp (voir app/partitions.py) :
+    # la clé primaire réelle est (id, timestamp), id reste unique via sa séquence
+    __table_args__ = (
+        db.Index("ix_action_logs_note_id_action_type_timestamp", "note_id", "action_type", "timestamp"),
+        db.Index("ix_action_logs_subject_user_id_timestamp", "subject_user_id", "timestamp"),
+        # GET /v1/action_logs : tri par timestamp, filtres user_id / action_type
+        db.Index("ix_action_logs_timestamp", "timestamp"),
+        db.Index("ix_action_logs_user_id_timestamp", "user_id", "timestamp"),
+        db.Index("ix_action_logs_action_type_timestamp", "action_type", "timestamp"),
+    )
 
     # Donne accès à l'utilisateur qui a généré une action/journal
     # et permet d'obtenir tous les logs d'un utilisateur facilement (user.action_logs)
@@ -27,6 +50,48 @@ class ActionLog(db.Model):
         """
         return f"<ActionLog id={self.id} user_id={self.user_id} action_type={self.action_type!r}>"
 
+    @staticmethod
+    def structured_columns(action_type: str, target_id: Optional[int],
+                           payload: Optional[str]) -> Dict[str, Optional[int]]:
+        """
+        Extraire note_id et subject_user_id d'un log.
+        Args: action_type, target_id, payload (JSON) du log.
+        Returns: dict: {"note_id": ..., "subject_user_id": ...} (None si non applicable).
+        """
+        data: Dict[str, Any] = {}
+        if payload:
+            try:
+                parsed = json.loads(payload)
+                data = parsed if isinstance(parsed, dict) else {}
+            except ValueError:
+                data = {}
+
+        def _int(value):
+            return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+        note_id = target_id if action_type in NOTE_TARGET_ACTIONS else _int(data.get("note_id"))
+        subject_user_id = target_id if action_type in USER_TARGET_ACTIONS else None
+        if subject_user_id is None:
+            subject_user_id = next(
+                (_int(data[key]) for key in SUBJECT_USER_KEYS if _int(data.get(key)) is not None),
+                None
+            )
+        return {"note_id": note_id, "subject_user_id": subject_user_id}
+
+    @classmethod
+    def with_structured_columns(cls, row: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compléter un dictionnaire de colonnes (INSERT en masse) avec note_id et subject_user_id.
+        Args: row (dict): colonnes du log ; les valeurs déjà fournies sont conservées.
+        Returns: dict: nouvelle ligne complétée.
+        """
+        completed = dict(row)
+        derived = cls.structured_columns(row.get("action_type"), row.get("target_id"), row.get("payload"))
+        for key, value in derived.items():
+            if completed.get(key) is None:
+                completed[key] = value
+        return completed
+
     def to_dict(self):
         """
         Convertit l'instance ActionLog en dictionnaire pour la sérialisation JSON.
@@ -39,4 +104,16 @@ class ActionLog(db.Model):
             "action_type": self.action_type,
             "timestamp": self.timestamp.isoformat() if self.timestamp else None,
             "payload": self.payload,
-        }
\ No newline at end of file
+            "note_id": self.note_id,
+            "subject_user_id": self.subject_user_id,
+        }
+
+
+@event.listens_for(ActionLog, "before_insert")
+def _fill_structured_columns(mapper, connection, target):
+    """Renseigner note_id / subject_user_id depuis le payload s'ils ne sont pas fournis."""
+    derived = ActionLog.structured_columns(target.action_type, target.target_id, target.payload)
+    if target.note_id is None:
+        target.note_id = derived["note_id"]
+    if target.subject_user_id is None:
+        target.subject_user_id = derived["subject_user_id"]
\ No newline at end of file
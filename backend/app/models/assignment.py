@@ -2,7 +2,11 @@
 Modèle pour les assignations de notes aux utilisateurs.
 """
 from datetime import datetime, timezone
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import column_property, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from .. import db
+from .note import Note
 
 class Assignment(db.Model):
     """
@@ -12,16 +16,21 @@ class Assignment(db.Model):
     __tablename__ = "assignments"
     __table_args__ = (
         db.UniqueConstraint('note_id', 'user_id', name='uq_note_user'),
+        # Branche "assignées à" de la visibilité des notes (voir repositories/visibility.py)
+        db.Index('ix_assignments_user_id_note_id', 'user_id', 'note_id'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
-    note_id = db.Column(db.Integer, db.ForeignKey('notes.id'), nullable=False)
+    # active_history : les anciennes valeurs restent connues à la mise à jour (compteurs de la note)
+    note_id = column_property(db.Column(db.Integer, db.ForeignKey('notes.id'), nullable=False), active_history=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     assigned_date = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
-    is_read = db.Column(db.Boolean, default=False)
+    is_read = column_property(db.Column(db.Boolean, default=False), active_history=True)
     read_date = db.Column(db.DateTime)  # Date où le destinataire a lu la note
     recipient_priority = db.Column(db.Boolean, default=False)
-    recipient_status = db.Column(db.String(20), nullable=False, default='en_cours')  # 'en_cours' ou 'terminé'
+    recipient_status = column_property(  # 'en_cours' ou 'terminé'
+        db.Column(db.String(20), nullable=False, default='en_cours'), active_history=True
+    )
     finished_date = db.Column(db.DateTime)  # Date où le destinataire a marqué comme terminé
 
     # Relations 
@@ -44,3 +53,93 @@ class Assignment(db.Model):
             "recipient_status": self.recipient_status,
             "finished_date": self.finished_date.isoformat() if self.finished_date else None,
         }
+
+
+# Compteurs de Note tenus à jour par chaque écriture d'assignation (flush ORM)
+ROLLUP_COLUMNS = ('assignment_count', 'read_count', 'completed_count')
+
+
+def rollup_of(is_read, recipient_status):
+    """
+    Contribution d'une assignation aux compteurs de sa note.
+
+    Args:
+        is_read: Statut de lecture
+        recipient_status: Statut du destinataire
+
+    Returns:
+        Tuple aligné sur ROLLUP_COLUMNS
+    """
+    return (1, 1 if is_read else 0, 1 if recipient_status == 'terminé' else 0)
+
+
+def _loaded_note(session, note_id):
+    """Instance Note déjà présente dans la session (sans requête), ou None."""
+    return session.identity_map.get(inspect(Note).identity_key_from_primary_key((note_id,)))
+
+
+def _shift_rollups(connection, note_id, deltas, session=None):
+    """
+    Ajouter deltas aux compteurs de la note (un UPDATE relatif, sans lecture).
+
+    Args:
+        connection: Connexion de la transaction en cours
+        note_id: ID de la note
+        deltas: Variations alignées sur ROLLUP_COLUMNS
+        session: Session dont l'instance Note déjà chargée est alignée (sans requête)
+    """
+    changes = {name: delta for name, delta in zip(ROLLUP_COLUMNS, deltas) if delta}
+    if not changes:
+        return
+    table = Note.__table__
+    connection.execute(
+        update(table).where(table.c.id == note_id)
+        .values({name: table.c[name] + delta for name, delta in changes.items()})
+    )
+    note = _loaded_note(session, note_id) if session else None
+    for name, delta in changes.items():
+        if note is not None and name in note.__dict__:
+            set_committed_value(note, name, (note.__dict__[name] or 0) + delta)
+
+
+def _previous(state, name):
+    """Valeur de l'attribut avant la modification en cours de flush."""
+    history = state.attrs[name].history
+    if history.deleted:
+        return history.deleted[0]
+    return state.attrs[name].value
+
+
+@event.listens_for(Assignment, "after_insert")
+def _count_after_insert(mapper, connection, target):
+    """Une assignation de plus sur la note."""
+    _shift_rollups(connection, target.note_id, rollup_of(target.is_read, target.recipient_status),
+                   object_session(target))
+
+
+@event.listens_for(Assignment, "after_delete")
+def _count_after_delete(mapper, connection, target):
+    """Une assignation de moins sur la note (sauf si la note est supprimée dans le même flush)."""
+    session = object_session(target)
+    if session is not None and _loaded_note(session, target.note_id) in session.deleted:
+        return
+    old = rollup_of(target.is_read, target.recipient_status)
+    _shift_rollups(connection, target.note_id, [-value for value in old], session)
+
+
+@event.listens_for(Assignment, "after_update")
+def _count_after_update(mapper, connection, target):
+    """Lecture, statut ou note modifiés : les compteurs de l'ancienne et de la nouvelle note suivent."""
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in ('note_id', 'is_read', 'recipient_status')):
+        return
+    session = object_session(target)
+    old_note_id = _previous(state, 'note_id')
+    old = rollup_of(_previous(state, 'is_read'), _previous(state, 'recipient_status'))
+    new = rollup_of(target.is_read, target.recipient_status)
+    if old_note_id == target.note_id:
+        _shift_rollups(connection, target.note_id, [after - before for before, after in zip(old, new)], session)
+        return
+    if old_note_id is not None:
+        _shift_rollups(connection, old_note_id, [-value for value in old], session)
+    _shift_rollups(connection, target.note_id, new, session)
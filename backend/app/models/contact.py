@@ -2,6 +2,9 @@
 Modèle pour les contacts.
 """
 from datetime import datetime, timezone
+from sqlalchemy import and_, event, exists, func, or_, select, update
+from sqlalchemy.orm import object_session
+from sqlalchemy.orm.attributes import set_committed_value
 from .. import db
 
 class Contact(db.Model):
@@ -11,6 +14,8 @@ class Contact(db.Model):
     __tablename__ = "contacts"
     __table_args__ = (
         db.UniqueConstraint('user_id', 'contact_user_id', name='uq_user_contact'),
+        # Lecture des contacts assignables (mutuels) d'un utilisateur en un seul accès indexé
+        db.Index('ix_contacts_user_id_mutual', 'user_id', 'mutual'),
     )
 
     id = db.Column(db.Integer, primary_key=True)
@@ -19,6 +24,8 @@ class Contact(db.Model):
     nickname = db.Column(db.String(80), nullable=False)
     contact_action = db.Column(db.String(80))
     created_date = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Réciprocité précalculée, maintenue à la création/suppression (voir événements en bas de module)
+    mutual = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
 
     # Relations pour accès rapide à l'objet User (propriétaire et contact)
     user = db.relationship('User', foreign_keys=[user_id], back_populates='contacts')
@@ -28,7 +35,10 @@ class Contact(db.Model):
         return f"<Contact id={self.id} nickname={self.nickname!r}>"
 
     def is_mutual(self):
-        """Vérifie si le contact est réciproque (l'autre personne m'a aussi ajouté)."""
+        """
+        Vérifie si le contact est réciproque (l'autre personne m'a aussi ajouté).
+        Exécute une requête : pour une liste, lire la colonne précalculée `mutual`.
+        """
         mutual = Contact.query.filter_by(
             user_id=self.contact_user_id,  # L'autre personne
             contact_user_id=self.user_id   # M'a ajouté aussi
@@ -36,6 +46,9 @@ class Contact(db.Model):
         return mutual is not None
 
     def to_dict(self):
+        """
+        Conversion en dict pour API (réciprocité : colonne précalculée `mutual`).
+        """
         return {
             "id": self.id,
             "user_id": self.user_id,
@@ -43,5 +56,68 @@ class Contact(db.Model):
             "nickname": self.nickname,
             "contact_action": self.contact_action,
             "created_date": self.created_date.isoformat() if self.created_date else None,
-            "is_mutual": self.is_mutual(),
+            "is_mutual": bool(self.mutual),
         }
+
+
+def _reverse_of(table, target):
+    """Condition désignant le contact inverse (l'autre personne m'a ajouté)."""
+    return and_(
+        table.c.user_id == target.contact_user_id,
+        table.c.contact_user_id == target.user_id
+    )
+
+
+def _sync_reverse_in_session(target, mutual):
+    """Aligner l'instance inverse déjà chargée dans la session (sans requête)."""
+    session = object_session(target)
+    if session is None:
+        return
+    for obj in list(session.identity_map.values()):
+        if (isinstance(obj, Contact) and obj.user_id == target.contact_user_id
+                and obj.contact_user_id == target.user_id):
+            set_committed_value(obj, 'mutual', mutual)
+
+
+def _lock_pair(connection, target):
+    """
+    Sérialiser les écritures d'une même paire d'utilisateurs (PostgreSQL).
+
+    Sans verrou, A->B et B->A insérés par deux transactions concurrentes ne voient
+    pas la ligne non validée de l'autre : les deux contacts resteraient non
+    mutuels. Le verrou consultatif est pris sur (plus petit id, plus grand id) et
+    libéré à la fin de la transaction ; la seconde transaction lit alors la
+    ligne validée par la première. SQLite sérialise déjà les écritures.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    low, high = sorted((target.user_id, target.contact_user_id))
+    connection.execute(select(func.pg_advisory_xact_lock(low, high)))
+
+
+@event.listens_for(Contact, "after_insert")
+def _set_mutual_after_insert(mapper, connection, target):
+    """
+    Si le contact inverse existe, les deux contacts deviennent mutuels.
+    Fait après l'INSERT : les insertions groupées d'un même flush sont alors toutes visibles.
+    """
+    _lock_pair(connection, target)
+    table = Contact.__table__
+    reverse_exists = connection.execute(
+        select(exists().where(_reverse_of(table, target)))
+    ).scalar()
+    if reverse_exists:
+        connection.execute(
+            update(table).where(or_(table.c.id == target.id, _reverse_of(table, target))).values(mutual=True)
+        )
+        set_committed_value(target, 'mutual', True)
+        _sync_reverse_in_session(target, True)
+
+
+@event.listens_for(Contact, "after_delete")
+def _unmark_reverse_after_delete(mapper, connection, target):
+    """Le contact inverse n'est plus mutuel."""
+    _lock_pair(connection, target)
+    table = Contact.__table__
+    connection.execute(update(table).where(_reverse_of(table, target)).values(mutual=False))
+    _sync_reverse_in_session(target, False)
@@ -9,6 +9,12 @@ class Note(db.Model):
     Représente une note stockée dans la table "notes"
     """
     __tablename__ = "notes"
+    __table_args__ = (
+        # Branche "créées par" de la visibilité des notes, triée par date (voir repositories/visibility.py)
+        db.Index('ix_notes_creator_id_delete_date_created_date', 'creator_id', 'delete_date', 'created_date'),
+        # Notes orphelines d'un créateur (assignment_count = 0), comptées et triées par date sur l'index
+        db.Index('ix_notes_creator_id_assignment_count', 'creator_id', 'assignment_count', 'delete_date', 'created_date'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.Text, nullable=False)
@@ -22,11 +28,17 @@ class Note(db.Model):
     # finished_date et status SUPPRIMÉS : ambigus pour multi-destinataires
     # Utiliser Assignment.recipient_status et Assignment.finished_date à la place
     important = db.Column(db.Boolean, default=False)
+    # Compteurs d'assignations (destinataires, lus, terminés), maintenus par les écritures
+    # d'assignations dans la même transaction (voir models/assignment.py)
+    assignment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    read_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Relations (foreign_keys spécifié explicitement car 2 FK vers User: creator_id et deleted_by)
     creator = db.relationship('User', foreign_keys=[creator_id], backref='created_notes')
     deleter = db.relationship('User', foreign_keys=[deleted_by], backref='deleted_notes')
-    assignments = db.relationship('Assignment', back_populates='note', lazy=True)
+    # Suppression définitive (admin) : les assignations de la note sont supprimées avec elle
+    assignments = db.relationship('Assignment', back_populates='note', lazy=True, cascade='all, delete-orphan')
 
     def __repr__(self):
         """Représentation textuelle pour le débogage."""
@@ -47,6 +59,14 @@ class Note(db.Model):
             # deleted_by_username est ajouté seulement pour le créateur dans le service
         }
 
+    def to_progress_dict(self):
+        """Avancement vu par le créateur ("3/10 lus, 2 terminés"), lu sur les compteurs de la note"""
+        return {
+            "total_recipients": self.assignment_count or 0,
+            "read_count": self.read_count or 0,
+            "completed_count": self.completed_count or 0,
+        }
+
     def to_details_dict(self, assignment=None):
         """Conversion pour le bloc détails (inclut deleted_by pour traçabilité)"""
         return {
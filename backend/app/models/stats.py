@@ -0,0 +1,46 @@
+"""
+Modèles des compteurs agrégés (statistiques d'administration).
+"""
+from .. import db
+
+
+class PlatformStat(db.Model):
+    """
+    But : un compteur global nommé (total_users, total_action_logs...), lu en une requête.
+    """
+    __tablename__ = "platform_stats"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f"<PlatformStat {self.name}={self.value}>"
+
+
+class ActionLogDailyStat(db.Model):
+    """
+    But : nombre de logs d'actions par jour et par type, maintenu à chaque insertion de log.
+    """
+    __tablename__ = "action_log_daily_stats"
+
+    day = db.Column(db.Date, primary_key=True)
+    action_type = db.Column(db.String(80), primary_key=True)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ActionLogDailyStat {self.day} {self.action_type}={self.count}>"
+
+
+class ActionLogUserStat(db.Model):
+    """
+    But : nombre de logs d'actions par auteur (pas de FK : compteur reporté
+    sur anonymous_action_logs à la suppression du compte, comme les logs).
+    """
+    __tablename__ = "action_log_user_stats"
+
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    count = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ActionLogUserStat user_id={self.user_id} count={self.count}>"
@@ -2,10 +2,9 @@
 Modèle pour les utilisateurs.
 """
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
 from sqlalchemy.orm import validates
 from email_validator import validate_email as validate_email_format, EmailNotValidError
-from .. import db
+from .. import db, passwords
 
 class User(db.Model):
     """
@@ -19,6 +18,8 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)  # Augmenté de 128 à 255 car erreur mdp trop long
     role = db.Column(db.String(20), nullable=False, default='user')  # 'user' ou 'admin'
     created_date = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    # Compteur incrémenté à chaque écriture visible dans ses notes (ETag, voir app/etag.py)
+    notes_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
 
     # Ajout de la relation avec les contacts
     # Les relations sont configurées dans les autres modèles (Assignment, Note, Contact)
@@ -75,10 +76,10 @@ class User(db.Model):
 
     # gestion mdp
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = passwords.hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return passwords.verify_password(self.password_hash, password)
     
     def is_admin(self):
         """Vérifie si l'utilisateur est un administrateur."""
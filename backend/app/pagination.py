@@ -0,0 +1,159 @@
+"""
+Outils de pagination par curseur (keyset pagination).
+
+Contrairement à OFFSET/LIMIT, la pagination par curseur reprend la lecture
+juste après la dernière ligne renvoyée : la page 500 coûte autant que la page 1.
+Le curseur est un jeton opaque (JSON encodé en base64 url-safe).
+"""
+import base64
+import json
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Levée quand un curseur ne peut pas être décodé."""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """
+    Encoder des valeurs de tri en jeton opaque.
+
+    Args:
+        values: Dictionnaire sérialisable (les datetime sont convertis en ISO 8601)
+
+    Returns:
+        Jeton base64 url-safe sans padding
+    """
+    raw = json.dumps(_to_json(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    """
+    Décoder un jeton produit par encode_cursor.
+
+    Args:
+        token: Jeton opaque reçu du client
+
+    Returns:
+        Dictionnaire des valeurs de tri
+
+    Raises:
+        InvalidCursor: Si le jeton est malformé
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+    if not isinstance(data, dict):
+        raise InvalidCursor("Cursor payload must be an object")
+    return _from_json(data)
+
+
+def _to_json(value: Any) -> Any:
+    """Remplacer récursivement les datetime par {"$dt": iso}."""
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, dict):
+        return {key: _to_json(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(item) for item in value]
+    return value
+
+
+def _from_json(value: Any) -> Any:
+    """Inverse de _to_json."""
+    if isinstance(value, dict):
+        if set(value) == {"$dt"}:
+            try:
+                return datetime.fromisoformat(value["$dt"])
+            except (TypeError, ValueError) as e:
+                raise InvalidCursor(str(e))
+        return {key: _from_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_from_json(item) for item in value]
+    return value
+
+
+def keyset_condition(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """
+    Construire la condition "strictement après le curseur" pour un tri multi-colonnes.
+
+    Pour des clés (a DESC, b DESC) et des valeurs (va, vb), produit :
+        a < va OR (a = va AND b < vb)
+
+    Args:
+        keys: Liste de (expression SQL, tri décroissant ?)
+        values: Valeurs de la dernière ligne de la page précédente
+
+    Returns:
+        Expression SQLAlchemy utilisable dans filter()
+    """
+    clauses: List[Any] = []
+    for index, ((column, descending), value) in enumerate(zip(keys, values)):
+        equalities = [
+            previous_column == previous_value
+            for (previous_column, _), previous_value in zip(keys[:index], values[:index])
+        ]
+        comparison = column < value if descending else column > value
+        clauses.append(and_(*equalities, comparison))
+    return or_(*clauses)
+
+
+def paginate_by_id(query: Any, id_column: Any, cursor: str, per_page: int,
+                   descending: bool = False) -> Tuple[List[Any], Optional[str]]:
+    """
+    Pagination par curseur sur la clé primaire (listes sans autre tri).
+
+    Args:
+        query: Requête ORM non triée
+        id_column: Colonne id du modèle (ex : User.id)
+        cursor: Jeton reçu du client ('' pour la première page)
+        per_page: Nombre d'items par page
+        descending: Ids décroissants (plus récents d'abord)
+
+    Returns:
+        Tuple (lignes de la page, curseur de la page suivante ou None)
+
+    Raises:
+        InvalidCursor: Si le jeton est malformé
+    """
+    if cursor:
+        after = decode_cursor(cursor).get("after_id")
+        if not isinstance(after, int) or isinstance(after, bool):
+            raise InvalidCursor("Cursor must carry an integer id")
+        query = query.filter(id_column < after if descending else id_column > after)
+    order = id_column.desc() if descending else id_column.asc()
+    rows = query.order_by(order).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor({"after_id": getattr(rows[-1], id_column.key)})
+    return rows, next_cursor
+
+
+def iter_batches(query: Any, batch_size: int = 500) -> Iterator[List[Any]]:
+    """
+    Parcourir une requête par lots sans la matérialiser (yield_per).
+
+    Sous PostgreSQL, yield_per ouvre un curseur serveur : la mémoire reste
+    bornée par batch_size quelle que soit la taille de la table. Les objets
+    déjà parcourus ne sont plus référencés et quittent l'identity map.
+
+    Args:
+        query: Requête ORM triée
+        batch_size: Nombre de lignes lues par aller-retour
+
+    Returns:
+        Itérateur de listes d'au plus batch_size lignes
+    """
+    rows = iter(query.yield_per(batch_size))
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
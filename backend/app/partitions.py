@@ -0,0 +1,341 @@
+"""
+Partitionnement mensuel de action_logs, rétention et archivage.
+
+action_logs ne fait que grossir (connexions, CRUD des notes, assignations...).
+Sous PostgreSQL, la migration f8c2b6e4a913 en fait une table partitionnée par
+plage de timestamp (partitionnement déclaratif), une partition par mois :
+- les requêtes bornées dans le temps (GET /v1/action_logs?since=&until=) ne
+  lisent que les partitions concernées (partition pruning) ;
+- purger un mois revient à détacher et supprimer une partition, sans DELETE
+  massif ni VACUUM.
+
+Les partitions des mois à venir doivent exister avant d'être remplies :
+`flask action-logs create-partitions` (à planifier, ex : chaque jour) crée le
+mois courant et les ACTION_LOG_PARTITIONS_AHEAD suivants. Une partition
+DEFAULT reçoit les lignes hors de toute plage, pour qu'un oubli ne bloque pas
+les écritures.
+
+Rétention : `flask action-logs archive --keep-months N` écrit chaque mois plus
+ancien dans un fichier CSV compressé (ACTION_LOG_ARCHIVE_DIR), puis détache et
+supprime la partition. Les lignes anciennes de la partition DEFAULT, et sans
+partitionnement (SQLite, base non migrée) les lignes du mois, sont archivées
+puis supprimées par DELETE. Les agrégats de statistiques
+(app/stats.py) conservent les comptes des mois archivés.
+"""
+import csv
+import gzip
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional, Tuple
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, column, delete, func, select, table as table_clause, text
+from . import db
+from .models import ActionLog
+
+TABLE = ActionLog.__tablename__
+DEFAULT_PARTITION = f"{TABLE}_default"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_(\d{{4}})_(\d{{2}})$")
+# Attente maximale du verrou de DETACH PARTITION avant abandon (la commande est relançable)
+DETACH_LOCK_TIMEOUT = "5s"
+
+
+def month_start(value: date) -> date:
+    """Premier jour du mois de value."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    """Premier jour du mois situé count mois après month (count peut être négatif)."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """Nom de la partition d'un mois (ex : action_logs_2026_10)."""
+    return f"{TABLE}_{month.year:04d}_{month.month:02d}"
+
+
+def is_partition(name: str) -> bool:
+    """Le nom désigne-t-il une partition gérée par ce module ? (ignorée par l'autogénération Alembic)"""
+    return name == DEFAULT_PARTITION or bool(_PARTITION_NAME.match(name))
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def is_partitioned(connection) -> bool:
+    """
+    action_logs est-elle une table partitionnée ?
+
+    Args:
+        connection: Connexion SQLAlchemy
+
+    Returns:
+        True sous PostgreSQL après la migration de partitionnement
+    """
+    if connection.dialect.name != "postgresql":
+        return False
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table p "
+        "JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = :table "
+        "AND c.relnamespace = to_regnamespace(current_schema()))"
+    ), {"table": TABLE}).scalar()
+
+
+def list_partitions(connection) -> List[Tuple[str, date]]:
+    """
+    Partitions mensuelles existantes, de la plus ancienne à la plus récente.
+
+    Args:
+        connection: Connexion SQLAlchemy (PostgreSQL)
+
+    Returns:
+        Liste de (nom, premier jour du mois)
+    """
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "WHERE parent.relname = :table AND parent.relnamespace = to_regnamespace(current_schema())"
+    ), {"table": TABLE}).scalars()
+    months = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            months.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(months, key=lambda item: item[1])
+
+
+def create_partitions(connection, months_ahead: int, start: Optional[date] = None) -> List[str]:
+    """
+    Créer les partitions manquantes du mois de start (défaut : courant) aux months_ahead suivants.
+
+    Args:
+        connection: Connexion SQLAlchemy (PostgreSQL, table partitionnée)
+        months_ahead: Nombre de mois à préparer après le mois de départ
+        start: Date dans le premier mois à créer
+
+    Returns:
+        Noms des partitions créées
+    """
+    existing = {name for name, _ in list_partitions(connection)}
+    first = month_start(start or _today())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first, offset)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        # Échoue si la partition DEFAULT contient déjà des lignes de ce mois : les déplacer d'abord
+        connection.execute(text(
+            f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        created.append(name)
+    return created
+
+
+def _window(table, start: date, end: date):
+    """Condition timestamp dans [start, end)."""
+    return and_(
+        table.c.timestamp >= datetime.combine(start, datetime.min.time()),
+        table.c.timestamp < datetime.combine(end, datetime.min.time()),
+    )
+
+
+def _export(connection, table, window, path: str) -> None:
+    """Écrire les lignes de table qui vérifient window dans un CSV gzip (en-tête compris)."""
+    names = [col.name for col in ActionLog.__table__.columns]
+    query = select(*[table.c[name] for name in names]).where(window).order_by(
+        table.c.id
+    ).execution_options(yield_per=1000)
+    partial = f"{path}.partial"
+    with gzip.open(partial, "wt", newline="", encoding="utf-8") as archive:
+        writer = csv.writer(archive)
+        writer.writerow(names)
+        for row in connection.execute(query):
+            writer.writerow([value.isoformat() if isinstance(value, datetime) else value for value in row])
+    # Fichier complet seulement une fois écrit : une archive interrompue reste en .partial
+    os.replace(partial, path)
+
+
+def _source(name: str):
+    """Partition name vue comme une table ayant les colonnes d'action_logs."""
+    return table_clause(name, *[column(c.name, c.type) for c in ActionLog.__table__.columns])
+
+
+def _months_from(oldest: Optional[datetime], cutoff: date) -> List[date]:
+    """Mois de celui d'oldest jusqu'à cutoff exclu (aucun si oldest est None)."""
+    months = []
+    month = month_start(oldest.date()) if oldest else cutoff
+    while month < cutoff:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def _detach_and_drop(name: str, rows: int, window, path: str) -> None:
+    """
+    Détacher puis supprimer une partition déjà exportée dans path.
+
+    Le DETACH tourne dans sa propre transaction, courte et bornée par
+    DETACH_LOCK_TIMEOUT : il ne reste pas en file d'attente devant les
+    écritures de action_logs. DETACH ... CONCURRENTLY est refusé par
+    PostgreSQL tant qu'une partition DEFAULT existe.
+
+    Args:
+        name: Partition à supprimer
+        rows: Nombre de lignes exportées
+        window: Plage de timestamp du mois
+        path: Archive du mois, réécrite si des lignes sont arrivées depuis l'export
+    """
+    connection = db.session.connection()
+    connection.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+    connection.execute(text(f'ALTER TABLE "{TABLE}" DETACH PARTITION "{name}"'))
+    db.session.commit()
+    # Détachée, la partition ne reçoit plus d'écritures : rattraper un export incomplet
+    source = _source(name)
+    connection = db.session.connection()
+    if connection.execute(select(func.count()).select_from(source)).scalar() != rows:
+        _export(connection, source, window, path)
+    connection.execute(text(f'DROP TABLE "{name}"'))
+
+
+def archive_before(cutoff: date, archive_dir: str, dry_run: bool = False) -> List[Dict]:
+    """
+    Archiver puis supprimer les mois de logs antérieurs à cutoff.
+
+    Chaque mois est écrit dans <archive_dir>/action_logs_AAAA_MM.csv.gz
+    (en-tête + une ligne par log) avant suppression, puis validé
+    (db.session.commit()) : une erreur laisse archivés les mois précédents,
+    et relancer la commande reprend au mois en échec.
+
+    Avec une table partitionnée, la partition est exportée tant qu'elle est
+    attachée, puis détachée et supprimée (voir _detach_and_drop) : aucun
+    verrou exclusif sur action_logs pendant l'export. Les lignes de la
+    partition DEFAULT (mois sans partition) sont archivées puis supprimées par
+    DELETE, comme les lignes d'une table non partitionnée.
+
+    Args:
+        cutoff: Les mois qui se terminent au plus tard à cette date sont archivés
+        archive_dir: Dossier des archives
+        dry_run: Lister seulement, sans écrire ni supprimer
+
+    Returns:
+        Liste de {"month", "partition", "rows", "path"}
+    """
+    cutoff = month_start(cutoff)
+    connection = db.session.connection()
+    partitioned = is_partitioned(connection)
+    # (partition à détacher ou None, table lue, mois)
+    months = []
+    if partitioned:
+        months = [(name, _source(name), month) for name, month in list_partitions(connection) if month < cutoff]
+        leftovers = _source(DEFAULT_PARTITION)
+    else:
+        leftovers = ActionLog.__table__
+    oldest = connection.execute(
+        select(func.min(leftovers.c.timestamp))
+        .where(leftovers.c.timestamp < datetime.combine(cutoff, datetime.min.time()))
+    ).scalar()
+    months += [(None, leftovers, month) for month in _months_from(oldest, cutoff)]
+    months.sort(key=lambda item: item[2])
+
+    if not dry_run:
+        os.makedirs(archive_dir, exist_ok=True)
+    archived = []
+    for name, source, month in months:
+        window = _window(source, month, add_months(month, 1))
+        connection = db.session.connection()
+        rows = connection.execute(select(func.count()).select_from(source).where(window)).scalar()
+        if not rows and not name:
+            continue
+        path = os.path.join(archive_dir, f"{partition_name(month)}.csv.gz")
+        archived.append({
+            "month": month.isoformat()[:7],
+            "partition": name or (DEFAULT_PARTITION if partitioned else None),
+            "rows": rows,
+            "path": path,
+        })
+        if dry_run:
+            continue
+        _export(connection, source, window, path)
+        if name:
+            # Fin de la transaction de lecture avant le DETACH
+            db.session.commit()
+            _detach_and_drop(name, rows, window, path)
+        else:
+            connection.execute(delete(source).where(window))
+        db.session.commit()
+    return archived
+
+
+action_logs_cli = AppGroup("action-logs", help="Partitions, rétention et archivage des logs d'actions.")
+
+
+@action_logs_cli.command("create-partitions")
+@click.option("--ahead", type=int, default=None, help="Mois à préparer après le mois courant.")
+def _create_partitions_command(ahead):
+    """Créer les partitions du mois courant et des mois suivants (PostgreSQL)."""
+    connection = db.session.connection()
+    if not is_partitioned(connection):
+        raise click.ClickException("action_logs is not partitioned (PostgreSQL migration required)")
+    months_ahead = current_app.config["ACTION_LOG_PARTITIONS_AHEAD"] if ahead is None else ahead
+    created = create_partitions(connection, months_ahead)
+    db.session.commit()
+    click.echo(f"created: {', '.join(created) or 'none'}")
+
+
+@action_logs_cli.command("partitions")
+def _list_partitions_command():
+    """Lister les partitions mensuelles et leur nombre de lignes estimé."""
+    connection = db.session.connection()
+    if not is_partitioned(connection):
+        raise click.ClickException("action_logs is not partitioned (PostgreSQL migration required)")
+    for name, _ in list_partitions(connection) + [(DEFAULT_PARTITION, None)]:
+        estimate = connection.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE relname = :name"), {"name": name}
+        ).scalar()
+        click.echo(f"{name}\t~{max(estimate or 0, 0)} rows")
+
+
+@action_logs_cli.command("archive")
+@click.option("--keep-months", type=int, default=None, help="Mois conservés, mois courant inclus.")
+@click.option("--archive-dir", default=None, help="Dossier des archives CSV gzip.")
+@click.option("--dry-run", is_flag=True, help="Afficher les mois concernés sans rien modifier.")
+def _archive_command(keep_months, archive_dir, dry_run):
+    """Archiver puis supprimer les mois au-delà de la rétention."""
+    keep = current_app.config["ACTION_LOG_RETENTION_MONTHS"] if keep_months is None else keep_months
+    if keep < 1:
+        raise click.ClickException("--keep-months must be at least 1")
+    cutoff = add_months(month_start(_today()), -(keep - 1))
+    archived = archive_before(cutoff, archive_dir or current_app.config["ACTION_LOG_ARCHIVE_DIR"], dry_run=dry_run)
+    if dry_run:
+        db.session.rollback()
+    else:
+        db.session.commit()
+    for entry in archived:
+        suffix = " (dry-run)" if dry_run else ""
+        click.echo(f"{entry['month']}\t{entry['rows']} rows\t{entry['path']}{suffix}")
+    if not archived:
+        click.echo(f"nothing to archive before {cutoff.isoformat()}")
+
+
+def init_app(app) -> None:
+    """
+    Configurer la rétention des logs d'actions et enregistrer `flask action-logs`.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("ACTION_LOG_PARTITIONS_AHEAD", int(os.getenv("ACTION_LOG_PARTITIONS_AHEAD", "3")))
+    app.config.setdefault("ACTION_LOG_RETENTION_MONTHS", int(os.getenv("ACTION_LOG_RETENTION_MONTHS", "12")))
+    app.config.setdefault(
+        "ACTION_LOG_ARCHIVE_DIR",
+        os.getenv("ACTION_LOG_ARCHIVE_DIR", os.path.join(app.instance_path, "action_log_archive"))
+    )
+    app.cli.add_command(action_logs_cli)
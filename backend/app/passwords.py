@@ -0,0 +1,301 @@
+"""
+Hachage des mots de passe : algorithme interchangeable, coût configurable,
+calcul hors du thread de la requête.
+
+Un hachage scrypt / PBKDF2 coûte volontairement des dizaines de millisecondes
+de CPU. Calculé dans le thread de la requête, un afflux de connexions occupe
+tous les workers et les requêtes ordinaires (lectures de notes...) attendent.
+Les hachages et vérifications passent donc par un pool de processus borné
+(PASSWORD_HASH_WORKERS processus, PASSWORD_HASH_MAX_PENDING calculs en
+attente ou en cours au plus ; au-delà, 503). PASSWORD_HASH_WORKERS vaut par
+défaut cpu_count // WEB_CONCURRENCY : les pools de tous les workers gunicorn
+se partagent les cœurs. PASSWORD_HASH_WORKERS=0 calcule dans le thread
+courant (défaut en TESTING).
+
+Algorithme (PASSWORD_HASHER) :
+- "werkzeug" (défaut) : werkzeug.security, PASSWORD_HASH_METHOD au format
+  werkzeug (ex : "scrypt:32768:8:1", "pbkdf2:sha256:600000") ;
+- "argon2" : argon2id (paquet argon2-cffi requis), coût PASSWORD_HASH_METHOD
+  au format "time_cost:memory_cost:parallelism" (ex : "3:65536:4").
+
+Rehachage transparent : à chaque connexion réussie, un hash produit avec un
+autre algorithme ou d'autres paramètres est recalculé avec la configuration
+courante (needs_rehash). Les anciens hashes restent vérifiables.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, Optional
+from flask import abort, current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from .workers import serving_workers
+
+DEFAULT_METHODS = {"werkzeug": "scrypt:32768:8:1", "argon2": "3:65536:4"}
+
+
+def _werkzeug_method(method: str) -> str:
+    """Méthode werkzeug avec ses paramètres par défaut explicités (préfixe des hashes produits)."""
+    name, *args = method.split(":")
+    if name == "scrypt" and len(args) in (0, 3):
+        return "scrypt:" + ":".join(args or ["32768", "8", "1"])
+    if name == "pbkdf2" and len(args) <= 2:
+        hash_name = args[0] if args else "sha256"
+        iterations = args[1] if len(args) == 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f"pbkdf2:{hash_name}:{iterations}"
+    raise ValueError(f"Unsupported PASSWORD_HASH_METHOD for werkzeug: {method!r}")
+
+
+def _check_werkzeug(password_hash: str, password: str) -> bool:
+    try:
+        return check_password_hash(password_hash, password)
+    except ValueError:
+        # Méthode inconnue de werkzeug (hash d'un autre algorithme)
+        return False
+
+
+class WerkzeugHasher:
+    """Hashes werkzeug (method$salt$hash) : scrypt ou PBKDF2."""
+
+    name = "werkzeug"
+
+    def __init__(self, method: str):
+        self.method = _werkzeug_method(method)
+
+    def hash(self, password: str) -> str:
+        return generate_password_hash(password, method=self.method)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        return _check_werkzeug(password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return password_hash.split("$", 1)[0] != self.method
+
+
+class Argon2Hasher:
+    """Hashes argon2id ; vérifie aussi les anciens hashes werkzeug (migration)."""
+
+    name = "argon2"
+
+    def __init__(self, method: str):
+        try:
+            from argon2 import PasswordHasher
+        except ImportError as exc:
+            raise RuntimeError("PASSWORD_HASHER=argon2 requires the 'argon2-cffi' package") from exc
+        time_cost, memory_cost, parallelism = (int(part) for part in method.split(":"))
+        self.method = method
+        self._hasher = PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+
+    def hash(self, password: str) -> str:
+        return self._hasher.hash(password)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        if not password_hash.startswith("$argon2"):
+            return _check_werkzeug(password_hash, password)
+        from argon2.exceptions import InvalidHashError, VerificationError
+        try:
+            return self._hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        if not password_hash.startswith("$argon2"):
+            return True
+        return self._hasher.check_needs_rehash(password_hash)
+
+
+HASHERS = {"werkzeug": WerkzeugHasher, "argon2": Argon2Hasher}
+
+
+# Fonctions exécutées dans les processus du pool (le hasher est transmis par pickle)
+def _hash(hasher, password: str) -> str:
+    return hasher.hash(password)
+
+
+def _verify(hasher, password_hash: str, password: str) -> bool:
+    return hasher.verify(password_hash, password)
+
+
+class PasswordService:
+    """Hasher configuré + pool de processus borné, créé à la première utilisation."""
+
+    def __init__(self, hasher, workers: int, max_pending: int, timeout: float):
+        self.hasher = hasher
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._stats = {"hashes": 0, "verifications": 0, "rehashes": 0, "rejected": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            # Pool propre à chaque processus : gunicorn forke les workers après create_app
+            if self._pool is None or self._pool_pid != os.getpid():
+                # spawn : les workers web ont des threads (audit, SSE), un fork les copierait à mi-état
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        if self.workers <= 0:
+            return fn(self.hasher, *args)
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("rejected")
+            abort(503, description="Authentication service busy, retry later")
+        try:
+            future = self._executor().submit(fn, self.hasher, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Place libérée à la fin du calcul, pas à l'abandon de l'attente : MAX_PENDING borne le pool
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()  # encore en file : retiré du pool (sans effet s'il a démarré)
+            self._count("rejected")
+            abort(503, description="Authentication service busy, retry later")
+
+    def hash(self, password: str) -> str:
+        self._count("hashes")
+        return self._run(_hash, password)
+
+    def verify(self, password_hash: str, password: str) -> bool:
+        self._count("verifications")
+        return self._run(_verify, password_hash, password)
+
+    def needs_rehash(self, password_hash: str) -> bool:
+        return self.hasher.needs_rehash(password_hash)
+
+    def rehash_if_needed(self, password_hash: str, password: str) -> Optional[str]:
+        if not self.hasher.needs_rehash(password_hash):
+            return None
+        self._count("rehashes")
+        return self.hash(password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._stats)
+        return {"hasher": self.hasher.name, "method": self.hasher.method, "workers": self.workers, **counters}
+
+
+def get_password_service() -> PasswordService:
+    """Service de hachage de l'application courante."""
+    return current_app.extensions["passwords"]
+
+
+def hash_password(password: str) -> str:
+    """
+    Hacher un mot de passe avec l'algorithme et le coût configurés.
+
+    Args:
+        password: Mot de passe en clair
+
+    Returns:
+        Hash à stocker dans users.password_hash
+
+    Raises:
+        503: Si trop de calculs sont déjà en attente
+    """
+    return get_password_service().hash(password)
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    """
+    Vérifier un mot de passe contre un hash stocké (tout algorithme connu).
+
+    Args:
+        password_hash: Hash stocké
+        password: Mot de passe en clair
+
+    Returns:
+        True si le mot de passe correspond
+
+    Raises:
+        503: Si trop de calculs sont déjà en attente
+    """
+    return get_password_service().verify(password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """
+    Le hash a-t-il été produit avec un autre algorithme ou d'autres paramètres ?
+
+    Args:
+        password_hash: Hash stocké
+
+    Returns:
+        True s'il faut le recalculer (à la prochaine connexion réussie)
+    """
+    return get_password_service().needs_rehash(password_hash)
+
+
+def rehash_if_needed(password_hash: str, password: str) -> Optional[str]:
+    """
+    Recalculer un hash vérifié s'il ne suit plus la configuration courante.
+
+    Args:
+        password_hash: Hash stocké, qui vient d'être vérifié
+        password: Mot de passe en clair correspondant
+
+    Returns:
+        Nouveau hash à stocker, ou None s'il est à jour
+    """
+    return get_password_service().rehash_if_needed(password_hash, password)
+
+
+def stats() -> Dict[str, Any]:
+    """Compteurs du service de hachage (hachages, vérifications, rehachages, refus)."""
+    return get_password_service().stats()
+
+
+def default_workers() -> int:
+    """
+    Processus de hachage par worker web : les cœurs partagés entre les WEB_CONCURRENCY
+    workers gunicorn de la machine (pas de surréservation du CPU).
+
+    Returns:
+        Nombre de processus du pool (au moins 1)
+    """
+    return max(1, (os.cpu_count() or 1) // serving_workers())
+
+
+def init_app(app) -> None:
+    """
+    Configurer l'algorithme de hachage et le pool de processus.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("PASSWORD_HASHER", os.getenv("PASSWORD_HASHER", "werkzeug"))
+    hasher_name = app.config["PASSWORD_HASHER"]
+    if hasher_name not in HASHERS:
+        raise ValueError("PASSWORD_HASHER must be one of: " + ", ".join(HASHERS))
+    app.config.setdefault("PASSWORD_HASH_METHOD", os.getenv("PASSWORD_HASH_METHOD", DEFAULT_METHODS[hasher_name]))
+    app.config.setdefault(
+        "PASSWORD_HASH_WORKERS",
+        int(os.getenv("PASSWORD_HASH_WORKERS", "0" if app.config.get("TESTING") else str(default_workers())))
+    )
+    app.config.setdefault("PASSWORD_HASH_MAX_PENDING", int(os.getenv("PASSWORD_HASH_MAX_PENDING", "64")))
+    app.config.setdefault("PASSWORD_HASH_TIMEOUT_SECONDS", float(os.getenv("PASSWORD_HASH_TIMEOUT_SECONDS", "10")))
+
+    app.extensions["passwords"] = PasswordService(
+        HASHERS[hasher_name](app.config["PASSWORD_HASH_METHOD"]),
+        workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_pending=app.config["PASSWORD_HASH_MAX_PENDING"],
+        timeout=app.config["PASSWORD_HASH_TIMEOUT_SECONDS"],
+    )
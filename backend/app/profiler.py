@@ -0,0 +1,240 @@
+"""
+Profileur SQL optionnel : chaque requête SQL rattachée à sa route et à la
+méthode de service qui l'a émise, détection des N+1, journal des requêtes lentes.
+
+Activé par SQL_PROFILER_ENABLED (désactivé par défaut). Une requête HTTP sur
+1/SQL_PROFILER_SAMPLE_RATE est profilée (1.0 : toutes) : en production, un
+taux faible (ex : 0.01) borne le coût. Pour une requête profilée, les
+événements before/after_cursor_execute du moteur relèvent :
+- la durée de chaque requête SQL ;
+- la méthode de service qui l'a émise (NoteService.get_notes...), trouvée en
+  remontant la pile jusqu'au premier cadre de app/services/ ("view" sinon) ;
+- le nombre d'exécutions d'une même requête SQL dans la requête HTTP : à
+  partir de SQL_PROFILER_DUPLICATE_THRESHOLD, c'est un N+1 probable.
+
+Les requêtes SQL plus longues que SQL_SLOW_QUERY_MS sont écrites (une ligne
+JSON, sans les paramètres) dans SQL_SLOW_QUERY_LOG, journal tournant
+(SQL_SLOW_QUERY_LOG_BYTES x SQL_SLOW_QUERY_LOG_BACKUPS fichiers).
+
+Résumé agrégé du processus : GET /v1/admin/profiler (DELETE le remet à zéro).
+"""
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter as TallyCounter, deque
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+SERVICES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "services")
+MAX_STATEMENT_LENGTH = 500
+
+
+def _service_tag() -> str:
+    """Méthode de service la plus proche dans la pile d'appel ("view" si aucune)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(SERVICES_DIR):
+            owner = frame.f_locals.get("self")
+            prefix = type(owner).__name__ if owner is not None else os.path.basename(frame.f_code.co_filename)
+            return f"{prefix}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "view"
+
+
+class RequestProfile:
+    """Requêtes SQL d'une requête HTTP profilée."""
+
+    def __init__(self):
+        self.statements: List[tuple] = []  # (sql, service, durée en ms)
+        self.pending: List[float] = []
+
+
+class SqlProfiler:
+    """Agrégats du processus et journal des requêtes lentes."""
+
+    def __init__(self, sample_rate: float, slow_ms: float, duplicate_threshold: int,
+                 slow_log: Optional[logging.Logger] = None, max_entries: int = 1000):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.duplicate_threshold = duplicate_threshold
+        self.slow_log = slow_log
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests_profiled = 0
+            self.requests_skipped = 0
+            # (route, service, sql) -> [exécutions, total ms, max ms]
+            self._statements: Dict[tuple, list] = {}
+            # (route, service, sql) -> [requêtes HTTP concernées, répétitions max dans une requête]
+            self._duplicates: Dict[tuple, list] = {}
+            self._slow = deque(maxlen=50)
+
+    def should_profile(self) -> bool:
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if not sampled:
+            with self._lock:
+                self.requests_skipped += 1
+        return sampled
+
+    def record(self, route: str, profile: RequestProfile) -> None:
+        """Agréger les requêtes SQL d'une requête HTTP terminée."""
+        repeats = TallyCounter((sql, service) for sql, service, _ in profile.statements)
+        slow = []
+        with self._lock:
+            self.requests_profiled += 1
+            for sql, service, duration_ms in profile.statements:
+                key = (route, service, sql)
+                entry = self._statements.get(key)
+                if entry is None:
+                    if len(self._statements) >= self.max_entries:
+                        continue
+                    entry = self._statements[key] = [0, 0.0, 0.0]
+                entry[0] += 1
+                entry[1] += duration_ms
+                entry[2] = max(entry[2], duration_ms)
+                if duration_ms >= self.slow_ms:
+                    slow.append({
+                        "at": datetime.now(timezone.utc).isoformat(), "duration_ms": round(duration_ms, 3),
+                        "route": route, "service": service, "statement": sql,
+                    })
+            for (sql, service), count in repeats.items():
+                if count >= self.duplicate_threshold:
+                    entry = self._duplicates.setdefault((route, service, sql), [0, 0])
+                    entry[0] += 1
+                    entry[1] = max(entry[1], count)
+            self._slow.extend(slow)
+        if self.slow_log is not None:
+            for entry in slow:
+                self.slow_log.warning(json.dumps(entry))
+
+    def summary(self, limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            statements = [
+                {"route": route, "service": service, "statement": sql, "count": count,
+                 "total_ms": round(total, 3), "avg_ms": round(total / count, 3), "max_ms": round(peak, 3)}
+                for (route, service, sql), (count, total, peak) in self._statements.items()
+            ]
+            duplicates = [
+                {"route": route, "service": service, "statement": sql, "requests": requests,
+                 "max_repeats": repeats}
+                for (route, service, sql), (requests, repeats) in self._duplicates.items()
+            ]
+            slow = list(self._slow)[-limit:]
+            profiled, skipped = self.requests_profiled, self.requests_skipped
+        by_service: Dict[str, Dict[str, float]] = {}
+        for item in statements:
+            totals = by_service.setdefault(item["service"], {"count": 0, "total_ms": 0.0})
+            totals["count"] += item["count"]
+            totals["total_ms"] = round(totals["total_ms"] + item["total_ms"], 3)
+        return {
+            "sample_rate": self.sample_rate,
+            "slow_query_ms": self.slow_ms,
+            "requests_profiled": profiled,
+            "requests_skipped": skipped,
+            "by_service": dict(sorted(by_service.items(), key=lambda kv: -kv[1]["total_ms"])),
+            "top_by_time": sorted(statements, key=lambda item: -item["total_ms"])[:limit],
+            "top_by_count": sorted(statements, key=lambda item: -item["count"])[:limit],
+            "n_plus_one": sorted(duplicates, key=lambda item: -item["max_repeats"])[:limit],
+            "slow_queries": slow,
+        }
+
+
+def get_profiler() -> SqlProfiler:
+    """Profileur de l'application courante."""
+    return current_app.extensions["profiler"]
+
+
+def _current_profile() -> Optional[RequestProfile]:
+    return g.get("sql_profile") if has_request_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is not None:
+        profile.pending.append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is None or not profile.pending:
+        return
+    duration_ms = (time.perf_counter() - profile.pending.pop()) * 1000
+    sql = " ".join(statement.split())[:MAX_STATEMENT_LENGTH]
+    profile.statements.append((sql, _service_tag(), duration_ms))
+
+
+def _start_profile() -> None:
+    if current_app.config["SQL_PROFILER_ENABLED"] and get_profiler().should_profile():
+        g.sql_profile = RequestProfile()
+
+
+def _finish_profile(response):
+    profile = g.pop("sql_profile", None)
+    if profile is not None:
+        route = request.endpoint or "unmatched"
+        get_profiler().record(route, profile)
+    return response
+
+
+def _slow_query_logger(app) -> logging.Logger:
+    """Logger des requêtes lentes, fichier tournant propre à l'application."""
+    logger = logging.getLogger(f"{__name__}.slow.{id(app)}")
+    logger.propagate = False
+    path = app.config["SQL_SLOW_QUERY_LOG"]
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    handler = RotatingFileHandler(
+        path, maxBytes=app.config["SQL_SLOW_QUERY_LOG_BYTES"],
+        backupCount=app.config["SQL_SLOW_QUERY_LOG_BACKUPS"], delay=True,
+    )
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.handlers = [handler]
+    logger.setLevel(logging.WARNING)
+    return logger
+
+
+def init_app(app) -> None:
+    """
+    Configurer le profileur et l'abonner au moteur de l'application.
+
+    À appeler après db.init_app. Le profilage peut être activé à chaud
+    (app.config["SQL_PROFILER_ENABLED"]) : les événements sont toujours
+    écoutés, mais ne font rien hors d'une requête échantillonnée.
+
+    Args:
+        app: Application Flask
+    """
+    from . import db
+    app.config.setdefault(
+        "SQL_PROFILER_ENABLED", os.getenv("SQL_PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+    )
+    app.config.setdefault("SQL_PROFILER_SAMPLE_RATE", float(os.getenv("SQL_PROFILER_SAMPLE_RATE", "1.0")))
+    app.config.setdefault("SQL_PROFILER_DUPLICATE_THRESHOLD", int(os.getenv("SQL_PROFILER_DUPLICATE_THRESHOLD", "3")))
+    app.config.setdefault("SQL_SLOW_QUERY_MS", float(os.getenv("SQL_SLOW_QUERY_MS", "100")))
+    app.config.setdefault(
+        "SQL_SLOW_QUERY_LOG",
+        os.getenv("SQL_SLOW_QUERY_LOG", os.path.join(app.instance_path, "slow_queries.log"))
+    )
+    app.config.setdefault("SQL_SLOW_QUERY_LOG_BYTES", int(os.getenv("SQL_SLOW_QUERY_LOG_BYTES", str(10 * 1024 * 1024))))
+    app.config.setdefault("SQL_SLOW_QUERY_LOG_BACKUPS", int(os.getenv("SQL_SLOW_QUERY_LOG_BACKUPS", "5")))
+
+    app.extensions["profiler"] = SqlProfiler(
+        sample_rate=app.config["SQL_PROFILER_SAMPLE_RATE"],
+        slow_ms=app.config["SQL_SLOW_QUERY_MS"],
+        duplicate_threshold=app.config["SQL_PROFILER_DUPLICATE_THRESHOLD"],
+        slow_log=_slow_query_logger(app),
+    )
+    with app.app_context():
+        event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(db.engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
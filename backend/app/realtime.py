@@ -0,0 +1,342 @@
+"""
+Flux de changements temps réel (Server-Sent Events) par utilisateur.
+
+Les événements de domaine (app/events.py) sur les notes, assignations et
+contacts sont republiés, après COMMIT, dans le flux de chaque utilisateur
+concerné. GET /v1/events/stream les pousse au client, qui n'a plus à
+interroger /v1/notes ou /v1/assignments/unread en boucle : il recharge
+seulement ce qu'un événement signale.
+
+Chaque événement SSE porte un id. À la reconnexion, le navigateur renvoie
+Last-Event-ID et le flux reprend après cet id à partir du tampon de
+l'utilisateur. Si le tampon ne remonte plus assez loin (ou si l'id est
+inconnu, par exemple après un redémarrage), un événement "reset" demande au
+client un rechargement complet.
+
+Brokers (configuration REALTIME_BROKER) :
+- "memory" : tampon circulaire par utilisateur, propre au processus (défaut)
+- "redis" : un stream Redis par utilisateur (XADD MAXLEN / XREAD BLOCK),
+  partagé entre workers (REALTIME_REDIS_URL, paquet redis, Redis >= 7)
+
+EventSource ne permet pas d'en-tête Authorization : le client demande un
+ticket (POST /v1/events/ticket, JWT en en-tête) et le passe dans l'URL du
+flux (?jwt=<ticket>). Le ticket est un JWT de portée "events", valable
+REALTIME_TICKET_SECONDS et refusé partout ailleurs que sur le flux : l'URL
+qui finit dans les logs d'accès ne donne pas accès à l'API. Un JWT
+d'accès ordinaire n'est pas accepté dans l'URL.
+
+Un flux occupe un thread de worker gthread pendant toute sa durée :
+REALTIME_MAX_STREAMS borne les flux ouverts par processus (503 au-delà,
+0 : sans limite), pour que les requêtes de l'API gardent des threads.
+gunicorn.conf.py le fixe à la moitié de GUNICORN_THREADS.
+
+Avec plusieurs workers (WEB_CONCURRENCY > 1), seul "redis" délivre un
+événement à un client connecté à un autre worker que celui qui a traité
+l'écriture : l'application refuse de démarrer avec "memory".
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from flask import abort, current_app, request
+from flask_jwt_extended import create_access_token
+from . import events
+from .workers import serving_workers
+
+# Événements de domaine relayés aux clients (type SSE : "<domaine>.<action>")
+RELAYED_EVENTS = (events.NOTE_CHANGED, events.ASSIGNMENT_CHANGED, events.CONTACT_CHANGED)
+
+# Type envoyé quand la reprise après Last-Event-ID est impossible
+RESET = "reset"
+
+# Portée des tickets de flux (claim "scope") et seule route qui les accepte
+TICKET_SCOPE = "events"
+STREAM_ENDPOINT = "realtime.stream_events"
+
+Event = Dict[str, Any]
+
+
+class MemoryBroker:
+    """Tampon circulaire borné par utilisateur, ids croissants par processus."""
+
+    name = "memory"
+
+    def __init__(self, buffer_size: int = 256):
+        self.buffer_size = buffer_size
+        self._buffers: Dict[int, Deque[Event]] = {}
+        # Plus grand id sorti du tampon de chaque utilisateur
+        self._evicted: Dict[int, int] = {}
+        self._last_id = 0
+        self._condition = threading.Condition()
+
+    def publish(self, user_ids: Iterable[int], event_type: str, data: Dict[str, Any]) -> None:
+        with self._condition:
+            self._last_id += 1
+            event = {"id": str(self._last_id), "type": event_type, "data": data}
+            for user_id in user_ids:
+                buffer = self._buffers.setdefault(user_id, deque(maxlen=self.buffer_size))
+                if len(buffer) == buffer.maxlen:
+                    self._evicted[user_id] = int(buffer[0]["id"])
+                buffer.append(event)
+            self._condition.notify_all()
+
+    def latest_id(self, user_id: int) -> str:
+        with self._condition:
+            return str(self._last_id)
+
+    def read_since(self, user_id: int, last_id: str) -> Tuple[List[Event], bool]:
+        try:
+            after = int(last_id)
+        except ValueError:
+            return [], True
+        with self._condition:
+            return self._read(user_id, after)
+
+    def wait(self, user_id: int, last_id: str, timeout: float) -> List[Event]:
+        after = int(last_id)
+        with self._condition:
+            self._condition.wait_for(lambda: self._has_newer(user_id, after), timeout)
+            return self._read(user_id, after)[0]
+
+    def _has_newer(self, user_id: int, after: int) -> bool:
+        buffer = self._buffers.get(user_id)
+        return bool(buffer) and int(buffer[-1]["id"]) > after
+
+    def _read(self, user_id: int, after: int) -> Tuple[List[Event], bool]:
+        if after > self._last_id or after < self._evicted.get(user_id, 0):
+            return [], True
+        return [e for e in self._buffers.get(user_id, ()) if int(e["id"]) > after], False
+
+
+class RedisBroker:
+    """Un stream Redis par utilisateur, partagé entre processus."""
+
+    name = "redis"
+
+    def __init__(self, url: str, buffer_size: int = 256, prefix: str = "stickynotes:events:"):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("REALTIME_BROKER=redis requires the 'redis' package") from exc
+        self._redis = redis
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self.buffer_size = buffer_size
+        self.prefix = prefix
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.prefix}{user_id}"
+
+    def _event(self, entry) -> Event:
+        entry_id, fields = entry
+        return {"id": entry_id, "type": fields["type"], "data": json.loads(fields["data"])}
+
+    def publish(self, user_ids: Iterable[int], event_type: str, data: Dict[str, Any]) -> None:
+        fields = {"type": event_type, "data": json.dumps(data)}
+        pipeline = self._client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.xadd(self._key(user_id), fields, maxlen=self.buffer_size, approximate=True)
+        pipeline.execute()
+
+    def latest_id(self, user_id: int) -> str:
+        last = self._client.xrevrange(self._key(user_id), count=1)
+        return last[0][0] if last else "0-0"
+
+    def read_since(self, user_id: int, last_id: str) -> Tuple[List[Event], bool]:
+        key = self._key(user_id)
+        try:
+            entries = self._client.xrange(key, min=f"({last_id}", count=self.buffer_size)
+            info = self._client.xinfo_stream(key) if entries else None
+        except self._redis.ResponseError:
+            return [], True
+        # Entrées supprimées par MAXLEN au-delà de last_id : reprise incomplète
+        if info and _stream_id(info.get("max-deleted-entry-id", "0-0")) > _stream_id(last_id):
+            return [], True
+        return [self._event(entry) for entry in entries], False
+
+    def wait(self, user_id: int, last_id: str, timeout: float) -> List[Event]:
+        result = self._client.xread({self._key(user_id): last_id},
+                                    count=self.buffer_size, block=int(timeout * 1000))
+        return [self._event(entry) for _, entries in result for entry in entries]
+
+
+def _stream_id(value: str) -> Tuple[int, int]:
+    milliseconds, _, sequence = value.partition("-")
+    return int(milliseconds), int(sequence or 0)
+
+
+def _on_domain_event(event_name: str, data: Dict[str, Any]) -> None:
+    """Relayer un événement de domaine dans le flux des utilisateurs concernés."""
+    action = data.get("action")
+    if not action:
+        return
+    event_type = f"{event_name.split('.')[0]}.{action}"
+    payload = {key: value for key, value in data.items() if key not in ("user_ids", "action")}
+    try:
+        get_broker().publish(data["user_ids"], event_type, payload)
+    except Exception:
+        # Le client rattrapera par rechargement : l'écriture est déjà validée
+        current_app.logger.exception("Realtime publish failed for %s", event_type)
+
+
+def init_app(app) -> None:
+    """
+    Configurer le broker temps réel et l'abonner aux événements de domaine.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("REALTIME_BROKER", os.getenv("REALTIME_BROKER", "memory"))
+    app.config.setdefault("REALTIME_BUFFER_SIZE", int(os.getenv("REALTIME_BUFFER_SIZE", "256")))
+    app.config.setdefault("REALTIME_REDIS_URL", os.getenv("REALTIME_REDIS_URL", "redis://localhost:6379/0"))
+    app.config.setdefault("REALTIME_HEARTBEAT_SECONDS", float(os.getenv("REALTIME_HEARTBEAT_SECONDS", "15")))
+    app.config.setdefault("REALTIME_STREAM_MAX_SECONDS", float(os.getenv("REALTIME_STREAM_MAX_SECONDS", "300")))
+    app.config.setdefault("REALTIME_MAX_STREAMS", int(os.getenv("REALTIME_MAX_STREAMS", "0")))
+    app.config.setdefault("REALTIME_TICKET_SECONDS", int(os.getenv("REALTIME_TICKET_SECONDS", "60")))
+
+    broker_name = app.config["REALTIME_BROKER"]
+    if broker_name == "memory" and serving_workers() > 1:
+        raise RuntimeError(
+            f"REALTIME_BROKER=memory cannot reach clients of the other {serving_workers() - 1} workers: "
+            "set REALTIME_BROKER=redis or WEB_CONCURRENCY=1"
+        )
+    if broker_name == "memory":
+        broker = MemoryBroker(buffer_size=app.config["REALTIME_BUFFER_SIZE"])
+    elif broker_name == "redis":
+        broker = RedisBroker(app.config["REALTIME_REDIS_URL"], buffer_size=app.config["REALTIME_BUFFER_SIZE"])
+    else:
+        raise ValueError("REALTIME_BROKER must be 'memory' or 'redis'")
+
+    app.extensions["realtime"] = broker
+    max_streams = app.config["REALTIME_MAX_STREAMS"]
+    app.extensions["realtime_slots"] = threading.BoundedSemaphore(max_streams) if max_streams > 0 else None
+    for event_name in RELAYED_EVENTS:
+        events.subscribe(event_name, _on_domain_event)
+
+    from . import jwt
+    jwt.token_verification_loader(_ticket_only_on_stream)
+
+
+def _ticket_only_on_stream(jwt_header, jwt_data) -> bool:
+    """Un ticket de flux n'authentifie que GET /v1/events/stream."""
+    if jwt_data.get("scope") == TICKET_SCOPE:
+        return request.endpoint == STREAM_ENDPOINT
+    return True
+
+
+def issue_ticket(user_id: int) -> str:
+    """
+    Créer un ticket de flux SSE pour user_id.
+
+    Args:
+        user_id: Utilisateur authentifié
+
+    Returns:
+        JWT de portée "events", valable REALTIME_TICKET_SECONDS
+    """
+    return create_access_token(
+        identity=str(user_id),
+        expires_delta=timedelta(seconds=current_app.config["REALTIME_TICKET_SECONDS"]),
+        additional_claims={"scope": TICKET_SCOPE},
+    )
+
+
+def get_broker():
+    """Broker de l'application courante."""
+    return current_app.extensions["realtime"]
+
+
+def acquire_stream_slot() -> Callable[[], None]:
+    """
+    Réserver une place de flux SSE dans ce processus.
+
+    Returns:
+        Fonction qui libère la place (idempotente), à appeler à la fermeture du flux
+
+    Raises:
+        503: Si REALTIME_MAX_STREAMS flux sont déjà ouverts
+    """
+    slots = current_app.extensions["realtime_slots"]
+    if slots is None:
+        return lambda: None
+    if not slots.acquire(blocking=False):
+        abort(503, description="Too many open event streams, retry later")
+    released = threading.Event()
+
+    def release() -> None:
+        if not released.is_set():
+            released.set()
+            slots.release()
+    return release
+
+
+def format_event(event: Event) -> str:
+    """
+    Sérialiser un événement au format text/event-stream.
+
+    Args:
+        event: Dictionnaire id / type / data
+
+    Returns:
+        Bloc SSE terminé par une ligne vide
+    """
+    data = json.dumps({"type": event["type"], **event["data"]})
+    return f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n"
+
+
+def stream(broker, user_id: int, last_event_id: Optional[str],
+           heartbeat: float, max_duration: float) -> Iterator[str]:
+    """
+    Générer le flux SSE d'un utilisateur.
+
+    La position de départ est fixée à l'appel (pas à la première lecture du
+    générateur) : rien de ce qui est publié entre-temps n'est perdu. La
+    connexion est fermée après max_duration : le navigateur se reconnecte
+    avec Last-Event-ID sans rien perdre, et un worker n'est pas bloqué
+    indéfiniment par un client.
+
+    Args:
+        broker: Broker temps réel
+        user_id: Utilisateur authentifié
+        last_event_id: Id renvoyé par le client à la reconnexion (None : à partir de maintenant)
+        heartbeat: Secondes sans événement avant un commentaire keep-alive
+        max_duration: Durée maximale de la connexion en secondes
+
+    Returns:
+        Itérateur de blocs text/event-stream
+    """
+    backlog: List[Event] = []
+    if last_event_id is None:
+        last_id = broker.latest_id(user_id)
+    else:
+        backlog, lost = broker.read_since(user_id, last_event_id)
+        if lost:
+            last_id = broker.latest_id(user_id)
+            backlog = [{"id": last_id, "type": RESET, "data": {}}]
+        elif backlog:
+            last_id = backlog[-1]["id"]
+        else:
+            last_id = last_event_id
+    return _generate(broker, user_id, last_id, backlog, heartbeat, max_duration)
+
+
+def _generate(broker, user_id: int, last_id: str, backlog: List[Event],
+              heartbeat: float, max_duration: float) -> Iterator[str]:
+    yield "retry: 3000\n\n"
+    for event in backlog:
+        yield format_event(event)
+
+    deadline = time.monotonic() + max_duration
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        pending = broker.wait(user_id, last_id, min(heartbeat, remaining))
+        if not pending:
+            yield ": keep-alive\n\n"
+            continue
+        for event in pending:
+            yield format_event(event)
+            last_id = event["id"]
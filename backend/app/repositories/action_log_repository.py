@@ -2,10 +2,12 @@
 Repository pour l'accès aux données des logs d'actions.
 Encapsule toutes les requêtes SQLAlchemy liées aux action logs.
 """
-from typing import List, Optional, Dict, Any
-from sqlalchemy import func
-from .. import db
-from ..models import ActionLog
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.orm import aliased
+from .. import db, stats, unit_of_work
+from ..models import ActionLog, User
 
 
 class ActionLogRepository:
@@ -54,6 +56,32 @@ class ActionLogRepository:
             ActionLog.timestamp.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
     
+    def find_note_history(self, note_id: int,
+                          action_types: Iterable[str]) -> List[Tuple[ActionLog, Optional[str], Optional[str]]]:
+        """
+        Récupérer les logs d'une note pour certains types d'action, en une requête.
+        
+        Utilise l'index (note_id, action_type, timestamp) ; les usernames de
+        l'utilisateur concerné et de l'auteur sont joints dans la même requête.
+        
+        Args:
+            note_id: ID de la note
+            action_types: Types d'action à inclure
+            
+        Returns:
+            Liste de tuples (log, username concerné, username auteur), du plus ancien au plus récent
+        """
+        subject = aliased(User)
+        actor = aliased(User)
+        return db.session.query(ActionLog, subject.username, actor.username).outerjoin(
+            subject, subject.id == ActionLog.subject_user_id
+        ).outerjoin(
+            actor, actor.id == ActionLog.user_id
+        ).filter(
+            ActionLog.note_id == note_id,
+            ActionLog.action_type.in_(list(action_types))
+        ).order_by(ActionLog.timestamp.asc(), ActionLog.id.asc()).all()
+    
     def find_by_action_type(self, action_type: str, page: int = 1, per_page: int = 50) -> Any:
         """
         Récupérer les logs par type d'action avec pagination.
@@ -70,37 +98,6 @@ class ActionLogRepository:
             ActionLog.timestamp.desc()
         ).paginate(page=page, per_page=per_page, error_out=False)
     
-    def get_stats(self) -> Dict[str, Any]:
-        """
-        Récupérer les statistiques globales des logs.
-        
-        Returns:
-            Dictionnaire avec les statistiques
-        """
-        total_actions = ActionLog.query.count()
-        
-        # Compter par type d'action
-        action_counts = db.session.query(
-            ActionLog.action_type,
-            func.count(ActionLog.id).label('count')
-        ).group_by(ActionLog.action_type).all()
-        
-        actions_by_type = {
-            action_type: count 
-            for action_type, count in action_counts
-        }
-        
-        # Compter les utilisateurs actifs
-        active_users = db.session.query(
-            func.count(func.distinct(ActionLog.user_id))
-        ).scalar()
-        
-        return {
-            "total_actions": total_actions,
-            "actions_by_type": actions_by_type,
-            "active_users": active_users
-        }
-    
     def save(self, action_log: ActionLog) -> ActionLog:
         """
         Sauvegarder un log d'action.
@@ -112,6 +109,25 @@ class ActionLogRepository:
             ActionLog sauvegardé avec ID généré
         """
         db.session.add(action_log)
-        db.session.commit()
-        db.session.refresh(action_log)
+        unit_of_work.commit(action_log)
         return action_log
+    
+    def bulk_create(self, rows: List[Dict[str, Any]]) -> None:
+        """
+        Insérer plusieurs logs en un seul INSERT multi-lignes.
+        
+        Les logs sont enregistrés dans la même transaction que les changements
+        qu'ils décrivent.
+        
+        Args:
+            rows: Dictionnaires de colonnes (user_id, action_type, target_id, payload,
+                timestamp optionnel)
+        """
+        if not rows:
+            return
+        now = datetime.now(timezone.utc)
+        completed = [ActionLog.with_structured_columns({"timestamp": now, **row}) for row in rows]
+        db.session.execute(insert(ActionLog).values(completed))
+        # INSERT hors ORM : pas de flush d'ActionLog, agrégats comptés ici
+        stats.count_action_logs(db.session.connection(), completed)
+        unit_of_work.commit()
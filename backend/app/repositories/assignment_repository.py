@@ -2,14 +2,23 @@
 Repository pour l'accès aux données des assignations.
 Encapsule toutes les requêtes SQLAlchemy liées aux assignations.
 """
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set
 from datetime import datetime, timezone
-from .. import db
-from ..models import Assignment
+from sqlalchemy import insert, inspect, update
+from .. import db, etag, events, unit_of_work
+from ..models import Assignment, Note
+from ..serialization import load_options
 
 
 class AssignmentRepository:
-    """Gestion de l'accès aux données pour les assignations."""
+    """
+    Gestion de l'accès aux données pour les assignations.
+    
+    Les compteurs de la note (assignment_count, read_count, completed_count) sont
+    mis à jour dans la transaction de chaque écriture : par les événements du
+    modèle au flush (save, delete, mark_as_read, mark_as_unread, update_status...)
+    et explicitement par bulk_create.
+    """
     
     def find_by_id(self, assignment_id: int) -> Optional[Assignment]:
         """
@@ -33,7 +42,7 @@ class AssignmentRepository:
         Returns:
             Liste des assignations
         """
-        return Assignment.query.filter_by(note_id=note_id).all()
+        return Assignment.query.options(*load_options("assignment")).filter_by(note_id=note_id).all()
     
     def find_for_user_and_note(self, user_id: int, note_id: int) -> Optional[Assignment]:
         """
@@ -51,6 +60,83 @@ class AssignmentRepository:
             note_id=note_id
         ).first()
     
+    def find_by_ids(self, assignment_ids: Iterable[int]) -> List[Assignment]:
+        """
+        Récupérer plusieurs assignations par leurs IDs (utilisateurs chargés).
+        
+        Args:
+            assignment_ids: IDs des assignations
+            
+        Returns:
+            Liste des assignations triées par ID
+        """
+        return Assignment.query.options(*load_options("assignment")).filter(
+            Assignment.id.in_(list(assignment_ids))
+        ).order_by(Assignment.id.asc()).all()
+    
+    def find_assigned_user_ids(self, note_id: int, user_ids: Iterable[int]) -> Set[int]:
+        """
+        Parmi des utilisateurs, lesquels ont déjà une assignation sur la note.
+        
+        Args:
+            note_id: ID de la note
+            user_ids: IDs des utilisateurs à vérifier
+            
+        Returns:
+            Ensemble des IDs déjà assignés
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        rows = db.session.query(Assignment.user_id).filter(
+            Assignment.note_id == note_id,
+            Assignment.user_id.in_(user_ids)
+        ).all()
+        return {user_id for (user_id,) in rows}
+    
+    def bulk_create(self, note_id: int, user_ids: List[int], is_read: bool = False) -> Dict[int, int]:
+        """
+        Créer plusieurs assignations d'une note en un seul INSERT multi-lignes.
+        
+        Args:
+            note_id: ID de la note
+            user_ids: IDs des destinataires (déjà validés)
+            is_read: Statut de lecture initial
+            
+        Returns:
+            Dictionnaire {user_id: assignment_id}
+        """
+        if not user_ids:
+            return {}
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "note_id": note_id,
+                "user_id": user_id,
+                "assigned_date": now,
+                "is_read": is_read,
+                "read_date": now if is_read else None,
+                "recipient_priority": False,
+                "recipient_status": "en_cours",
+            }
+            for user_id in user_ids
+        ]
+        result = db.session.execute(
+            insert(Assignment).values(rows).returning(Assignment.id, Assignment.user_id)
+        )
+        created = {user_id: assignment_id for assignment_id, user_id in result}
+        # INSERT hors unité de travail : les compteurs de la note sont mis à jour ici
+        creator_id = db.session.execute(
+            update(Note).where(Note.id == note_id)
+            .values(assignment_count=Note.assignment_count + len(created),
+                    read_count=Note.read_count + (len(created) if is_read else 0))
+            .returning(Note.creator_id)
+        ).scalar()
+        etag.bump_notes_version([*user_ids, creator_id])
+        unit_of_work.commit()
+        events.emit(events.ASSIGNMENT_CHANGED, [*user_ids, creator_id], action="created", note_id=note_id)
+        return created
+    
     def find_by_user(self, user_id: int) -> List[Assignment]:
         """
         Récupérer toutes les assignations d'un utilisateur.
@@ -61,7 +147,22 @@ class AssignmentRepository:
         Returns:
             Liste des assignations
         """
-        return Assignment.query.filter_by(user_id=user_id).all()
+        return Assignment.query.options(*load_options("assignment")).filter_by(user_id=user_id).all()
+    
+    def find_unread_by_user(self, user_id: int) -> List[Assignment]:
+        """
+        Récupérer les assignations non lues d'un utilisateur.
+        
+        Args:
+            user_id: ID de l'utilisateur
+            
+        Returns:
+            Liste des assignations non lues
+        """
+        return Assignment.query.options(*load_options("assignment")).filter_by(
+            user_id=user_id,
+            is_read=False
+        ).order_by(Assignment.id.asc()).all()
     
     def mark_as_read(self, assignment: Assignment) -> Assignment:
         """
@@ -75,7 +176,7 @@ class AssignmentRepository:
         """
         assignment.is_read = True
         assignment.read_date = datetime.now(timezone.utc)
-        db.session.commit()
+        self._commit_and_emit(assignment, "read")
         return assignment
     
     def mark_as_unread(self, assignment: Assignment) -> Assignment:
@@ -90,7 +191,7 @@ class AssignmentRepository:
         """
         assignment.is_read = False
         assignment.read_date = None
-        db.session.commit()
+        self._commit_and_emit(assignment, "unread")
         return assignment
     
     def update_status(self, assignment: Assignment, status: str) -> Assignment:
@@ -111,7 +212,7 @@ class AssignmentRepository:
         elif status in ['en_attente', 'en_cours']:
             assignment.finished_date = None
         
-        db.session.commit()
+        self._commit_and_emit(assignment, "status_changed")
         return assignment
     
     def toggle_priority(self, assignment: Assignment) -> Assignment:
@@ -125,7 +226,7 @@ class AssignmentRepository:
             Assignment mise à jour
         """
         assignment.recipient_priority = not assignment.recipient_priority
-        db.session.commit()
+        self._commit_and_emit(assignment, "priority_changed")
         return assignment
     
     def save(self, assignment: Assignment) -> Assignment:
@@ -138,9 +239,9 @@ class AssignmentRepository:
         Returns:
             Assignment sauvegardée avec ID généré si création
         """
+        action = "updated" if inspect(assignment).persistent else "created"
         db.session.add(assignment)
-        db.session.commit()
-        db.session.refresh(assignment)
+        self._commit_and_emit(assignment, action, refresh=True)
         return assignment
     
     def delete(self, assignment: Assignment) -> None:
@@ -150,5 +251,31 @@ class AssignmentRepository:
         Args:
             assignment: Assignment à supprimer
         """
+        user_ids = self._affected_user_ids(assignment)
+        etag.bump_notes_version(user_ids)
+        note_id, assignment_id = assignment.note_id, assignment.id
         db.session.delete(assignment)
-        db.session.commit()
+        unit_of_work.commit()
+        events.emit(events.ASSIGNMENT_CHANGED, user_ids, action="deleted",
+                    note_id=note_id, assignment_id=assignment_id)
+    
+    def _affected_user_ids(self, assignment: Assignment) -> Set[int]:
+        """Destinataire (actuel et précédent s'il a changé) et créateur de la note."""
+        user_ids = {assignment.user_id, *inspect(assignment).attrs.user_id.history.deleted}
+        note = assignment.note or db.session.get(Note, assignment.note_id)
+        if note is not None:
+            user_ids.add(note.creator_id)
+        return user_ids
+    
+    def _commit_and_emit(self, assignment: Assignment, action: str, refresh: bool = False) -> None:
+        """Valider puis publier ASSIGNMENT_CHANGED (action) pour les utilisateurs concernés."""
+        user_ids = self._affected_user_ids(assignment)
+        etag.bump_notes_version(user_ids)
+        note_id, assignment_id = assignment.note_id, assignment.id
+        if refresh:
+            unit_of_work.commit(assignment)
+            assignment_id = assignment.id
+        else:
+            unit_of_work.commit()
+        events.emit(events.ASSIGNMENT_CHANGED, user_ids, action=action,
+                    note_id=note_id, assignment_id=assignment_id)
@@ -2,9 +2,11 @@
 Repository pour l'accès aux données des contacts.
 Encapsule toutes les requêtes SQLAlchemy liées aux contacts.
 """
-from typing import List, Optional
-from .. import db
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import inspect
+from .. import db, etag, events, unit_of_work
 from ..models import Contact
+from ..serialization import load_options
 
 
 class ContactRepository:
@@ -32,7 +34,44 @@ class ContactRepository:
         Returns:
             Liste des contacts
         """
-        return Contact.query.filter_by(user_id=user_id).all()
+        return Contact.query.options(*load_options("contact")).filter_by(user_id=user_id).all()
+    
+    def find_mutual_by_user(self, user_id: int) -> List[Contact]:
+        """
+        Récupérer les contacts mutuels d'un utilisateur.
+        Lecture indexée de la colonne précalculée `mutual` (index user_id, mutual).
+        
+        Args:
+            user_id: ID de l'utilisateur
+            
+        Returns:
+            Liste des contacts réciproques
+        """
+        return Contact.query.options(*load_options("contact")).filter_by(
+            user_id=user_id,
+            mutual=True
+        ).all()
+    
+    def find_mutual_contact_user_ids(self, user_id: int, candidate_ids: Iterable[int]) -> Set[int]:
+        """
+        Parmi des utilisateurs candidats, lesquels sont des contacts mutuels de user_id.
+        
+        Args:
+            user_id: ID du propriétaire du carnet
+            candidate_ids: IDs des utilisateurs à vérifier
+            
+        Returns:
+            Ensemble des IDs de contacts mutuels
+        """
+        candidate_ids = list(candidate_ids)
+        if not candidate_ids:
+            return set()
+        rows = db.session.query(Contact.contact_user_id).filter(
+            Contact.user_id == user_id,
+            Contact.mutual == True,
+            Contact.contact_user_id.in_(candidate_ids)
+        ).all()
+        return {contact_user_id for (contact_user_id,) in rows}
     
     def find_by_user_and_contact(self, user_id: int, contact_user_id: int) -> Optional[Contact]:
         """
@@ -73,9 +112,14 @@ class ContactRepository:
         Returns:
             Contact sauvegardé avec ID généré si création
         """
+        action = "updated" if inspect(contact).persistent else "created"
         db.session.add(contact)
-        db.session.commit()
-        db.session.refresh(contact)
+        user_ids = (contact.user_id, contact.contact_user_id)
+        # Surnoms affichés dans les notes du propriétaire
+        etag.bump_notes_version(user_ids)
+        unit_of_work.commit(contact)
+        # La réciprocité change aussi du côté du contact
+        events.emit(events.CONTACT_CHANGED, user_ids, action=action, contact_id=contact.id)
         return contact
     
     def delete(self, contact: Contact) -> None:
@@ -85,5 +129,9 @@ class ContactRepository:
         Args:
             contact: Contact à supprimer
         """
+        user_ids = (contact.user_id, contact.contact_user_id)
+        etag.bump_notes_version(user_ids)
+        contact_id = contact.id
         db.session.delete(contact)
-        db.session.commit()
+        unit_of_work.commit()
+        events.emit(events.CONTACT_CHANGED, user_ids, action="deleted", contact_id=contact_id)
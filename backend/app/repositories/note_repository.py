@@ -2,10 +2,31 @@
 Repository pour l'accès aux données des notes.
 Encapsule toutes les requêtes SQLAlchemy liées aux notes.
 """
-from typing import List, Optional
-from sqlalchemy import or_
-from .. import db
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import case, inspect
+from .. import db, etag, events, search, unit_of_work
 from ..models import Note, Assignment
+from ..pagination import keyset_condition
+from ..serialization import load_options
+from . import visibility
+
+
+# Clés de tri supportées par la liste des notes : (expression, décroissant ?)
+# Note.id sert de départage pour garantir un ordre total (requis par le keyset).
+# L'importance est comparée en entier (1/0) : NULL est traité comme False.
+SORT_KEYS = {
+    'date_desc': [(Note.created_date, True), (Note.id, True)],
+    'date_asc': [(Note.created_date, False), (Note.id, False)],
+    'important_first': [
+        (case((Note.important == True, 1), else_=0), True),
+        (Note.created_date, True),
+        (Note.id, True),
+    ],
+}
+
+# Tri par pertinence de la recherche plein texte (pagination OFFSET uniquement :
+# le score dépend de la requête et ne peut pas servir de curseur)
+RELEVANCE = 'relevance'
 
 
 class NoteRepository:
@@ -35,19 +56,191 @@ class NoteRepository:
         Returns:
             Liste des notes visibles
         """
-        query = Note.query.join(
-            Assignment, Note.id == Assignment.note_id, isouter=True
-        ).filter(
-            or_(
-                Note.creator_id == user_id,
-                Assignment.user_id == user_id
-            )
+        return Note.query.options(*load_options("note")).filter(
+            Note.id.in_(visibility.visible_note_ids(user_id, include_deleted))
+        ).all()
+    
+    def build_visible_query(self, user_id: int, filter_param: Optional[str] = None,
+                            search_query: Optional[str] = None, creator_id: Optional[int] = None,
+                            important: Optional[bool] = None) -> Any:
+        """
+        Construire la requête des notes visibles (non supprimées) avec les filtres de liste.
+        
+        Args:
+            user_id: ID de l'utilisateur courant
+            filter_param: 'important', 'important_by_me', 'unread', 'received', 'sent',
+                          'in_progress' ou 'completed'
+            search_query: Texte recherché dans le contenu
+            creator_id: Restreindre aux notes d'un créateur
+            important: Filtre booléen direct sur Note.important
+            
+        Returns:
+            Query SQLAlchemy (non triée, non paginée)
+        """
+        # Semi-jointure sur l'UNION ALL des branches "créées par" / "assignées à"
+        query = Note.query.options(*load_options("note")).filter(
+            Note.id.in_(visibility.visible_note_ids(user_id)),
+            Note.delete_date.is_(None)  # Exclure les notes supprimées (soft delete)
         )
         
-        if not include_deleted:
-            query = query.filter(Note.delete_date.is_(None))
+        if search_query:
+            # Recherche plein texte indexée (voir app/search.py)
+            query = query.filter(self.search_criterion(search_query))
         
-        return query.distinct().all()
+        if creator_id is not None:
+            query = query.filter(Note.creator_id == creator_id)
+        
+        if important is not None:
+            query = query.filter(Note.important == important)
+        
+        if filter_param == 'important':
+            # Notes marquées importantes par le créateur
+            query = query.filter(Note.important == True)
+        elif filter_param == 'important_by_me':
+            # Notes marquées prioritaires par le destinataire
+            query = query.filter(Note.id.in_(
+                visibility.assigned_to(user_id, Assignment.recipient_priority == True)
+            ))
+        elif filter_param == 'unread':
+            query = query.filter(Note.id.in_(
+                visibility.assigned_to(user_id, Assignment.is_read == False)
+            ))
+        elif filter_param == 'received':
+            query = query.filter(Note.id.in_(visibility.assigned_to(user_id)))
+        elif filter_param == 'sent':
+            # Notes créées par l'utilisateur ET assignées à quelqu'un
+            query = query.filter(Note.creator_id == user_id, visibility.has_assignment())
+        elif filter_param == 'in_progress':
+            query = query.filter(visibility.status_filter(user_id, 'en_cours'))
+        elif filter_param == 'completed':
+            query = query.filter(visibility.status_filter(user_id, 'terminé'))
+        
+        return query
+    
+    def build_exchanged_query(self, user_id: int, contact_user_id: int,
+                              filter_param: Optional[str] = None,
+                              search_query: Optional[str] = None) -> Any:
+        """
+        Construire la requête des notes échangées avec un contact.
+        
+        Args:
+            user_id: ID de l'utilisateur courant
+            contact_user_id: ID de l'utilisateur contact
+            filter_param: 'received', 'sent', 'unread' ou 'important'
+            search_query: Texte recherché dans le contenu
+            
+        Returns:
+            Query SQLAlchemy (non triée, non paginée)
+        """
+        note_ids = visibility.exchanged_note_ids(
+            user_id,
+            contact_user_id,
+            sent=filter_param not in ('received', 'unread'),
+            received=filter_param != 'sent',
+            unread_only=filter_param == 'unread'
+        )
+        query = Note.query.options(*load_options("note")).filter(Note.id.in_(note_ids))
+        
+        if filter_param == 'important':
+            # Notes marquées importantes par le créateur
+            query = query.filter(Note.important == True)
+        
+        if search_query:
+            query = query.filter(self.search_criterion(search_query))
+        
+        return query
+    
+    def search_criterion(self, search_query: str) -> Any:
+        """
+        Condition de recherche plein texte sur le contenu des notes.
+        
+        Tous les mots doivent apparaître, en préfixe, sans tenir compte de la casse.
+        PostgreSQL : tsvector + index GIN ; sinon index inversé en mémoire.
+        
+        Args:
+            search_query: Texte saisi par l'utilisateur
+            
+        Returns:
+            Condition SQLAlchemy applicable à une requête sur Note
+        """
+        return search.get_backend().criterion(search_query)
+    
+    def paginate_ranked(self, query: Any, search_query: str, page: int, per_page: int) -> Any:
+        """
+        Pagination OFFSET triée par pertinence décroissante (puis id décroissant).
+        
+        Args:
+            query: Requête déjà filtrée par search_criterion
+            search_query: Texte recherché (sert au calcul du score)
+            page: Numéro de page
+            per_page: Nombre d'items par page
+            
+        Returns:
+            Objet Pagination de SQLAlchemy
+        """
+        rank = search.get_backend().rank(search_query)
+        return query.order_by(rank.desc(), Note.id.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+    
+    def paginate_offset(self, query: Any, sort: str, page: int, per_page: int) -> Any:
+        """
+        Pagination classique OFFSET/LIMIT (avec COUNT total).
+        
+        Args:
+            query: Requête construite par build_visible_query
+            sort: Clé de SORT_KEYS
+            page: Numéro de page
+            per_page: Nombre d'items par page
+            
+        Returns:
+            Objet Pagination de SQLAlchemy
+        """
+        return query.order_by(*self._order_by(sort)).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+    
+    def paginate_keyset(self, query: Any, sort: str, after: Optional[Tuple] = None,
+                        per_page: int = 20) -> Tuple[List[Note], bool]:
+        """
+        Pagination par curseur : lit les per_page notes situées après `after`.
+        
+        Le coût ne dépend pas de la profondeur de page (pas d'OFFSET ni de COUNT).
+        
+        Args:
+            query: Requête construite par build_visible_query
+            sort: Clé de SORT_KEYS
+            after: Valeurs de tri de la dernière note déjà vue (None = première page)
+            per_page: Nombre d'items par page
+            
+        Returns:
+            Tuple (notes de la page, existe-t-il une page suivante)
+        """
+        if after is not None:
+            query = query.filter(keyset_condition(SORT_KEYS[sort], after))
+        rows = query.order_by(*self._order_by(sort)).limit(per_page + 1).all()
+        return rows[:per_page], len(rows) > per_page
+    
+    @staticmethod
+    def sort_values(note: Note, sort: str) -> Tuple:
+        """
+        Valeurs de tri d'une note pour une clé de SORT_KEYS (contenu du curseur).
+        
+        Args:
+            note: Note de référence
+            sort: Clé de SORT_KEYS
+            
+        Returns:
+            Tuple aligné sur SORT_KEYS[sort]
+        """
+        if sort == 'important_first':
+            return (1 if note.important else 0, note.created_date, note.id)
+        return (note.created_date, note.id)
+    
+    @staticmethod
+    def _order_by(sort: str) -> List[Any]:
+        """Clauses ORDER BY correspondant à une clé de SORT_KEYS."""
+        return [column.desc() if descending else column.asc() for column, descending in SORT_KEYS[sort]]
     
     def find_created_by(self, user_id: int, include_deleted: bool = False) -> List[Note]:
         """
@@ -60,12 +253,9 @@ class NoteRepository:
         Returns:
             Liste des notes créées
         """
-        query = Note.query.filter_by(creator_id=user_id)
-        
-        if not include_deleted:
-            query = query.filter(Note.delete_date.is_(None))
-        
-        return query.all()
+        return Note.query.options(*load_options("note")).filter(
+            *visibility.created_by_criteria(user_id, include_deleted)
+        ).all()
     
     def save(self, note: Note) -> Note:
         """
@@ -77,9 +267,12 @@ class NoteRepository:
         Returns:
             Note sauvegardée avec ID généré si création
         """
+        action = "updated" if inspect(note).persistent else "created"
         db.session.add(note)
-        db.session.commit()
-        db.session.refresh(note)  # Rafraîchir pour avoir les relations à jour
+        user_ids = self._affected_user_ids(note)
+        etag.bump_notes_version(user_ids)
+        unit_of_work.commit(note)
+        events.emit(events.NOTE_CHANGED, user_ids, action=action, note_id=note.id)
         return note
     
     def soft_delete(self, note: Note, deleted_by_user_id: int) -> None:
@@ -93,27 +286,69 @@ class NoteRepository:
         from datetime import datetime, timezone
         note.delete_date = datetime.now(timezone.utc)
         note.deleted_by = deleted_by_user_id
-        db.session.commit()
+        user_ids = self._affected_user_ids(note)
+        etag.bump_notes_version(user_ids)
+        unit_of_work.commit()
+        events.emit(events.NOTE_CHANGED, user_ids, action="deleted", note_id=note.id)
+    
+    def delete(self, note: Note) -> None:
+        """
+        Suppression définitive d'une note (les assignations suivent en cascade).
+        
+        Args:
+            note: Note à supprimer
+        """
+        user_ids = self._affected_user_ids(note)
+        etag.bump_notes_version(user_ids)
+        note_id = note.id
+        db.session.delete(note)
+        unit_of_work.commit()
+        events.emit(events.NOTE_CHANGED, user_ids, action="deleted", note_id=note_id)
+    
+    def _affected_user_ids(self, note: Note) -> Set[int]:
+        """Utilisateurs qui voient la note : créateur et destinataires."""
+        user_ids = {note.creator_id}
+        if note.id is not None:
+            user_ids.update(
+                user_id for (user_id,) in
+                db.session.query(Assignment.user_id).filter(Assignment.note_id == note.id)
+            )
+        return user_ids
     
     def count_orphans(self, user_id: int) -> int:
         """
         Compter les notes orphelines d'un utilisateur.
         Une note orpheline = créée par l'utilisateur + aucune assignation active.
         
+        Lecture de l'index (creator_id, assignment_count, delete_date) : pas d'accès
+        aux assignations.
+        
         Args:
             user_id: ID de l'utilisateur créateur
             
         Returns:
             Nombre de notes orphelines
         """
-        # Notes créées par l'utilisateur, non supprimées
-        my_notes = self.find_created_by(user_id, include_deleted=False)
-        
-        orphan_count = 0
-        for note in my_notes:
-            # Compter les assignations pour cette note
-            assignment_count = Assignment.query.filter_by(note_id=note.id).count()
-            if assignment_count == 0:
-                orphan_count += 1
+        return self._orphans_query(user_id).count()
+    
+    def find_orphans(self, user_id: int, after: Optional[Tuple] = None,
+                     per_page: Optional[int] = None) -> Tuple[List[Note], bool]:
+        """
+        Récupérer les notes orphelines d'un utilisateur (créées, non supprimées, sans assignation).
         
-        return orphan_count
+        Args:
+            user_id: ID de l'utilisateur créateur
+            after: Valeurs de tri (created_date, id) de la dernière note déjà vue
+            per_page: Nombre d'items par page (None = toutes les notes)
+            
+        Returns:
+            Tuple (notes orphelines plus récentes en premier, existe-t-il une page suivante)
+        """
+        query = self._orphans_query(user_id).options(*load_options("note"))
+        if per_page is None:
+            return query.order_by(*self._order_by('date_desc')).all(), False
+        return self.paginate_keyset(query, 'date_desc', after, per_page)
+    
+    def _orphans_query(self, user_id: int) -> Any:
+        """Branche "créées par" sans aucune assignation (compteur dénormalisé assignment_count)."""
+        return Note.query.filter(*visibility.created_by_criteria(user_id), Note.assignment_count == 0)
@@ -2,9 +2,10 @@
 Repository pour l'accès aux données des utilisateurs.
 Encapsule toutes les requêtes SQLAlchemy liées aux utilisateurs.
 """
-from typing import Optional
-from .. import db
-from ..models import User
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import inspect
+from .. import db, etag, events, search, unit_of_work
+from ..models import Contact, User
 
 
 class UserRepository:
@@ -46,6 +47,44 @@ class UserRepository:
         """
         return User.query.filter_by(username=username).first()
     
+    def search_by_username(self, query: str, limit: int = 10,
+                           exclude_user_id: Optional[int] = None) -> List[User]:
+        """
+        Rechercher des utilisateurs par username (une requête, index de trigrammes).
+        
+        Les usernames qui commencent par la saisie viennent d'abord, puis les
+        usernames proches (fautes de frappe), sans tenir compte de la casse.
+        
+        Args:
+            query: Texte saisi
+            limit: Nombre maximal de résultats
+            exclude_user_id: Utilisateur à exclure (le demandeur)
+            
+        Returns:
+            Liste des utilisateurs, les plus pertinents d'abord
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+        criterion, ordering = search.get_user_backend().match(query, limit, exclude_user_id)
+        return User.query.filter(criterion).order_by(*ordering).limit(limit).all()
+    
+    def find_existing_ids(self, user_ids: Iterable[int]) -> Set[int]:
+        """
+        Parmi des IDs, lesquels correspondent à un utilisateur existant (une requête).
+        
+        Args:
+            user_ids: IDs des utilisateurs
+            
+        Returns:
+            Ensemble des IDs existants
+        """
+        user_ids = list(user_ids)
+        if not user_ids:
+            return set()
+        rows = db.session.query(User.id).filter(User.id.in_(user_ids)).all()
+        return {user_id for (user_id,) in rows}
+    
     def exists(self, username: str = None, email: str = None) -> bool:
         """
         Vérifier si un utilisateur existe par username ou email.
@@ -77,11 +116,35 @@ class UserRepository:
         Returns:
             User sauvegardé avec ID généré si création
         """
+        # Un nouveau compte n'apparaît dans aucune lecture en cache ; le username et
+        # l'email d'un compte existant sont affichés chez ses correspondants (notes,
+        # contacts, assignables), le rôle et le mot de passe non
+        state = inspect(user)
+        visible_change = state.persistent and any(
+            state.attrs[name].history.has_changes() for name in ("username", "email")
+        )
         db.session.add(user)
-        db.session.commit()
-        db.session.refresh(user)
+        if visible_change:
+            user_ids = self._correspondent_ids(user.id)
+        unit_of_work.commit(user)
+        if visible_change:
+            events.emit(events.USER_CHANGED, sorted(user_ids), action="updated")
         return user
     
+    def update_password_hash(self, user: User, password_hash: str) -> None:
+        """
+        Remplacer le hash du mot de passe (rehachage à la connexion).
+        
+        Le hash n'apparaît dans aucune lecture : pas d'événement USER_CHANGED,
+        le cache des lectures n'est pas invalidé.
+        
+        Args:
+            user: Utilisateur
+            password_hash: Nouveau hash
+        """
+        user.password_hash = password_hash
+        unit_of_work.commit(user)
+    
     def delete(self, user: User) -> None:
         """
         Supprimer un utilisateur.
@@ -90,5 +153,29 @@ class UserRepository:
         Args:
             user: Instance de User à supprimer
         """
+        user_id = user.id
+        user_ids = self._correspondent_ids(user_id)
         db.session.delete(user)
-        db.session.commit()
+        unit_of_work.commit()
+        events.emit(events.USER_CHANGED, sorted(user_ids), action="deleted")
+    
+    def _correspondent_ids(self, user_id: int) -> Set[int]:
+        """
+        Utilisateurs dont les lectures affichent ce compte, avant l'écriture.
+        
+        Incrémente la version des notes (ETag) de ceux qui partagent une note avec
+        lui, et y ajoute ceux qui l'ont dans leur carnet de contacts.
+        
+        Args:
+            user_id: Utilisateur modifié ou supprimé
+            
+        Returns:
+            IDs des utilisateurs concernés (lui compris)
+        """
+        user_ids = etag.bump_correspondents(user_id)
+        user_ids.update(
+            owner_id for (owner_id,) in
+            db.session.query(Contact.user_id).filter(Contact.contact_user_id == user_id)
+        )
+        user_ids.add(user_id)
+        return user_ids
@@ -0,0 +1,151 @@
+"""
+Construction des requêtes de visibilité des notes.
+
+Une note est visible par un utilisateur s'il en est le créateur OU le destinataire.
+Exprimé avec un OR sur un LEFT JOIN suivi d'un DISTINCT, ce critère empêche
+PostgreSQL d'utiliser les index. On le décompose donc en deux branches
+indexées, combinées par UNION ALL et dédupliquées par id (semi-jointure IN) :
+
+- créées par : notes(creator_id, delete_date, created_date)
+- assignées à : assignments(user_id, note_id)
+
+Ce module est partagé par la liste des notes, les notes d'un contact et les notes orphelines.
+"""
+from sqlalchemy import and_, exists, or_, select, union_all
+from ..models import Note, Assignment
+
+
+def created_by_criteria(user_id: int, include_deleted: bool = False):
+    """
+    Conditions de la branche "créées par" (couvertes par l'index creator_id, delete_date).
+
+    Args:
+        user_id: ID du créateur
+        include_deleted: Inclure les notes supprimées (soft delete)
+
+    Returns:
+        Liste de conditions sur Note
+    """
+    criteria = [Note.creator_id == user_id]
+    if not include_deleted:
+        criteria.append(Note.delete_date.is_(None))
+    return criteria
+
+
+def created_by(user_id: int, include_deleted: bool = False):
+    """
+    Branche "créées par" : ids des notes dont l'utilisateur est créateur.
+
+    Args:
+        user_id: ID du créateur
+        include_deleted: Inclure les notes supprimées (soft delete)
+
+    Returns:
+        Select d'une colonne note_id
+    """
+    return select(Note.id.label("note_id")).where(*created_by_criteria(user_id, include_deleted))
+
+
+def assigned_to(user_id: int, *criteria):
+    """
+    Branche "assignées à" : ids des notes dont l'utilisateur est destinataire.
+
+    Args:
+        user_id: ID du destinataire
+        *criteria: Conditions supplémentaires sur Assignment (ex: is_read == False)
+
+    Returns:
+        Select d'une colonne note_id
+    """
+    return select(Assignment.note_id.label("note_id")).where(Assignment.user_id == user_id, *criteria)
+
+
+def visible_note_ids(user_id: int, include_deleted: bool = False):
+    """
+    Ids des notes visibles : UNION ALL des deux branches indexées.
+
+    Les doublons (note créée ET auto-assignée) sont éliminés par la semi-jointure
+    `Note.id IN (...)` de l'appelant, sans DISTINCT sur les lignes de notes.
+
+    Args:
+        user_id: ID de l'utilisateur
+        include_deleted: Inclure les notes supprimées
+
+    Returns:
+        Select d'une colonne note_id
+    """
+    union = union_all(created_by(user_id, include_deleted), assigned_to(user_id)).subquery()
+    return select(union.c.note_id)
+
+
+def exchanged_note_ids(user_id: int, contact_user_id: int, sent: bool = True,
+                       received: bool = True, unread_only: bool = False):
+    """
+    Ids des notes échangées entre deux utilisateurs.
+
+    - envoyées : créées par user_id ET assignées à contact_user_id
+    - reçues : créées par contact_user_id ET assignées à user_id
+
+    Args:
+        user_id: ID de l'utilisateur courant
+        contact_user_id: ID du contact
+        sent: Inclure la branche "envoyées"
+        received: Inclure la branche "reçues"
+        unread_only: Restreindre les notes reçues à celles non lues
+
+    Returns:
+        Select d'une colonne note_id
+    """
+    branches = []
+    if sent:
+        branches.append(
+            select(Assignment.note_id.label("note_id"))
+            .join(Note, Note.id == Assignment.note_id)
+            .where(Assignment.user_id == contact_user_id, Note.creator_id == user_id)
+        )
+    if received:
+        branch = (
+            select(Assignment.note_id.label("note_id"))
+            .join(Note, Note.id == Assignment.note_id)
+            .where(Assignment.user_id == user_id, Note.creator_id == contact_user_id)
+        )
+        if unread_only:
+            branch = branch.where(Assignment.is_read == False)
+        branches.append(branch)
+    if len(branches) == 1:
+        return branches[0]
+    union = union_all(*branches).subquery()
+    return select(union.c.note_id)
+
+
+def has_assignment(*criteria):
+    """
+    Condition EXISTS : la note courante possède au moins une assignation (filtrée).
+
+    Args:
+        *criteria: Conditions supplémentaires sur Assignment
+
+    Returns:
+        Expression utilisable dans filter()
+    """
+    return exists().where(Assignment.note_id == Note.id, *criteria)
+
+
+def status_filter(user_id: int, status: str):
+    """
+    Filtre par statut de destinataire, tel que vu par l'utilisateur.
+
+    Le créateur voit le statut de toutes les assignations de ses notes ;
+    un destinataire ne voit que le statut de sa propre assignation.
+
+    Args:
+        user_id: ID de l'utilisateur courant
+        status: 'en_cours' ou 'terminé'
+
+    Returns:
+        Expression utilisable dans filter()
+    """
+    return or_(
+        and_(Note.creator_id == user_id, has_assignment(Assignment.recipient_status == status)),
+        Note.id.in_(assigned_to(user_id, Assignment.recipient_status == status)),
+    )
@@ -4,14 +4,29 @@ Routes pour la consultation des logs d'actions (admin uniquement, lecture seule)
 Les logs sont créés automatiquement par le système lors des actions utilisateurs.
 Aucune création/modification/suppression manuelle n'est permise pour garantir l'intégrité de l'audit.
 """
-from flask import Blueprint, request
+from datetime import datetime, timezone
+from flask import Blueprint, abort, request
 from flask_jwt_extended import jwt_required
-from ... import db
+from ... import stats
 from ...models import ActionLog
 from ...decorators import admin_required
 
 bp = Blueprint('action_logs', __name__)
 
+
+def _parse_timestamp(name):
+    """Lire un paramètre date/heure ISO 8601, ramené en UTC sans fuseau comme la colonne timestamp."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f"{name} must be an ISO 8601 date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
 # NOTE: Pas de route POST/PUT/DELETE - Les logs sont IMMUABLES et créés automatiquement
 # par le système lors des actions (auth, notes, contacts, assignments, etc.)
 
@@ -19,7 +34,15 @@ bp = Blueprint('action_logs', __name__)
 @jwt_required()
 @admin_required()
 def list_action_logs():
-    """Lister tous les logs d'actions (admin uniquement)."""
+    """
+    Lister tous les logs d'actions (admin uniquement).
+    ---
+    Query Parameters:
+      - user_id, action_type: filtres optionnels
+      - since, until: fenêtre de temps ISO 8601 (since inclus, until exclu) ;
+        sous PostgreSQL, seules les partitions mensuelles concernées sont lues
+      - page, per_page: pagination (défaut: 1, 50)
+    """
     # Pagination pour éviter de surcharger
     page = request.args.get('page', 1, type=int)
     per_page = request.args.get('per_page', 50, type=int)
@@ -27,6 +50,8 @@ def list_action_logs():
     # Filtres optionnels
     user_id = request.args.get('user_id', type=int)
     action_type = request.args.get('action_type')
+    since = _parse_timestamp('since')
+    until = _parse_timestamp('until')
     
     query = ActionLog.query
     
@@ -34,6 +59,10 @@ def list_action_logs():
         query = query.filter_by(user_id=user_id)
     if action_type:
         query = query.filter_by(action_type=action_type)
+    if since:
+        query = query.filter(ActionLog.timestamp >= since)
+    if until:
+        query = query.filter(ActionLog.timestamp < until)
         
     logs = query.order_by(ActionLog.timestamp.desc()).paginate(
         page=page, per_page=per_page, error_out=False
@@ -62,22 +91,15 @@ def get_action_log(log_id):
 @jwt_required()
 @admin_required()
 def get_action_log_stats():
-    """Récupérer des statistiques sur les actions (admin uniquement)."""
-    from sqlalchemy import func
-    
-    # Compter les actions par type
-    action_counts = db.session.query(
-        ActionLog.action_type,
-        func.count(ActionLog.id).label('count')
-    ).group_by(ActionLog.action_type).all()
-    
-    # Compter les actions par utilisateur
-    user_counts = db.session.query(
-        ActionLog.user_id,
-        func.count(ActionLog.id).label('count')
-    ).group_by(ActionLog.user_id).all()
-    
-    return {
-        "action_counts": [{"action_type": action_type, "count": count} for action_type, count in action_counts],
-        "user_counts": [{"user_id": user_id, "count": count} for user_id, count in user_counts]
-    }
+    """
+    Récupérer des statistiques sur les actions (admin uniquement).
+    ---
+    Query Parameters:
+      - days: ajoute `daily`, le nombre de logs par jour et par type sur les N derniers jours
+      - fresh: 1 pour recompter depuis action_logs au lieu des agrégats
+    """
+    fresh = request.args.get('fresh', 'false').lower() in ('1', 'true')
+    days = request.args.get('days', type=int)
+    if days is not None and days < 1:
+        abort(400, description="days must be a positive integer")
+    return stats.action_log_stats(fresh=fresh, days=days)
@@ -3,22 +3,33 @@ Routes d'administration (réservées aux administrateurs).
 """
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required
-from ... import db
-from ...models import User, Note, Contact, Assignment, ActionLog
+from ... import audit, cache, db_pool, etag, identity, listing, profiler, stats
+from ...models import User, Note, Contact, Assignment
 from ...decorators import admin_required
+from ...repositories import (
+    AssignmentRepository, ContactRepository, NoteRepository, UserRepository
+)
+from ...serialization import load_options
 
 bp = Blueprint('admin', __name__)
 
 
+def _serialize_all(rows):
+    """Sérialiser un lot de lignes avec leur to_dict()."""
+    return [row.to_dict() for row in rows]
+
+
 @bp.get('/admin/users')
 @jwt_required()
 @admin_required()
 def list_all_users():
     """
     Liste TOUS les utilisateurs (admin only).
+
+    Pagination : ?cursor= (vide pour la première page) et per_page ;
+    flux : ?format=ndjson ou Accept: application/x-ndjson (voir app/listing.py).
     """
-    users = User.query.order_by(User.id.asc()).all()
-    return jsonify([u.to_dict() for u in users]), 200
+    return listing.list_response(User.query, User.id, _serialize_all, "users")
 
 
 @bp.get('/admin/notes')
@@ -27,9 +38,12 @@ def list_all_users():
 def list_all_notes():
     """
     Liste TOUTES les notes de tous les utilisateurs (admin only).
+
+    Pagination : ?cursor= (vide pour la première page) et per_page ;
+    flux : ?format=ndjson ou Accept: application/x-ndjson (voir app/listing.py).
     """
-    notes = Note.query.order_by(Note.id.desc()).all()
-    return jsonify([n.to_dict() for n in notes]), 200
+    query = Note.query.options(*load_options("note"))
+    return listing.list_response(query, Note.id, _serialize_all, "notes", descending=True)
 
 
 @bp.get('/admin/stats')
@@ -38,17 +52,90 @@ def list_all_notes():
 def get_stats():
     """
     Statistiques globales de la plateforme (admin only).
+
+    Lues depuis platform_stats (compteurs d'entités recalculés en une requête
+    au-delà de STATS_MAX_AGE_SECONDS) ; ?fresh=1 recompte tout exactement.
+    """
+    from flask import request
+    fresh = request.args.get('fresh', 'false').lower() in ('1', 'true')
+    return jsonify(stats.platform_stats(fresh=fresh)), 200
+
+
+@bp.get('/admin/audit/stats')
+@jwt_required()
+@admin_required()
+def get_audit_stats():
+    """
+    Métriques du pipeline d'audit : profondeur de file, latence des lots, spool (admin only).
+    """
+    return jsonify(audit.stats()), 200
+
+
+@bp.get('/admin/cache/stats')
+@jwt_required()
+@admin_required()
+def get_cache_stats():
     """
-    stats = {
-        "total_users": User.query.count(),
-        "total_notes": Note.query.count(),
-        "total_contacts": Contact.query.count(),
-        "total_assignments": Assignment.query.count(),
-        "total_action_logs": ActionLog.query.count(),
-        "important_notes": Note.query.filter_by(important=True).count(),
-        "deleted_notes": Note.query.filter(Note.delete_date.isnot(None)).count(),
-    }
-    return jsonify(stats), 200
+    Métriques du cache en lecture : backend, entrées, hits/misses, invalidations (admin only).
+    """
+    return jsonify(cache.get_cache().stats()), 200
+
+
+@bp.get('/admin/etag/stats')
+@jwt_required()
+@admin_required()
+def get_etag_stats():
+    """
+    Métriques des GET conditionnels sur les notes : réponses 304 (hits) et 200 (misses) (admin only).
+    """
+    return jsonify(etag.stats()), 200
+
+
+@bp.get('/admin/identity/stats')
+@jwt_required()
+@admin_required()
+def get_identity_stats():
+    """
+    Métriques du cache d'identités (rôle par utilisateur) : entrées, hits/misses, invalidations (admin only).
+    """
+    return jsonify(identity.get_identity_cache().stats()), 200
+
+
+@bp.get('/admin/db-pool/stats')
+@jwt_required()
+@admin_required()
+def get_db_pool_stats():
+    """
+    Pool de connexions du worker qui répond : taille, connexions prises, attentes (admin only).
+    """
+    return jsonify(db_pool.stats()), 200
+
+
+@bp.get('/admin/profiler')
+@jwt_required()
+@admin_required()
+def get_profiler_summary():
+    """
+    Résumé du profileur SQL de ce worker (admin only).
+
+    Temps et nombre d'exécutions par route et méthode de service, N+1
+    probables, dernières requêtes lentes. ?limit= (défaut : 20) par liste.
+    """
+    from flask import current_app, request
+    limit = request.args.get('limit', 20, type=int)
+    summary = profiler.get_profiler().summary(limit=max(1, min(limit, 200)))
+    return jsonify({"enabled": current_app.config["SQL_PROFILER_ENABLED"], **summary}), 200
+
+
+@bp.delete('/admin/profiler')
+@jwt_required()
+@admin_required()
+def reset_profiler():
+    """
+    Remettre à zéro les agrégats du profileur SQL de ce worker (admin only).
+    """
+    profiler.get_profiler().reset()
+    return jsonify({"reset": True}), 200
 
 
 @bp.delete('/admin/users/<int:user_id>')
@@ -60,8 +147,7 @@ def delete_user_admin(user_id):
     Attention : supprime aussi toutes ses notes, contacts, etc. (cascade).
     """
     user = User.query.get_or_404(user_id)
-    db.session.delete(user)
-    db.session.commit()
+    UserRepository().delete(user)
     return jsonify({"message": "User deleted"}), 200
 
 
@@ -84,7 +170,7 @@ def update_user_role(user_id):
         return jsonify({"error": "Invalid role. Must be 'user' or 'admin'"}), 400
     
     user.role = new_role
-    db.session.commit()
+    UserRepository().save(user)
     
     return jsonify({
         "message": "User role updated",
@@ -127,7 +213,7 @@ def update_note_admin(note_id):
     if 'status' in data:
         note.status = data['status']
     
-    db.session.commit()
+    NoteRepository().save(note)
     return jsonify({
         "message": "Note updated by admin",
         "note": note.to_dict()
@@ -143,8 +229,7 @@ def delete_note_admin(note_id):
     Suppression définitive pour résoudre des problèmes.
     """
     note = Note.query.get_or_404(note_id)
-    db.session.delete(note)
-    db.session.commit()
+    NoteRepository().delete(note)
     return jsonify({"message": "Note permanently deleted by admin"}), 200
 
 
@@ -156,9 +241,12 @@ def delete_note_admin(note_id):
 def list_all_contacts():
     """
     Liste TOUS les contacts (admin only).
+
+    Pagination : ?cursor= (vide pour la première page) et per_page ;
+    flux : ?format=ndjson ou Accept: application/x-ndjson (voir app/listing.py).
+    La réciprocité est résolue en une requête par page ou par lot.
     """
-    contacts = Contact.query.order_by(Contact.id.asc()).all()
-    return jsonify([c.to_dict() for c in contacts]), 200
+    return listing.list_response(Contact.query, Contact.id, _serialize_all, "contacts")
 
 
 @bp.get('/admin/contacts/<int:contact_id>')
@@ -186,7 +274,7 @@ def update_contact_admin(contact_id):
     if 'nickname' in data:
         contact.nickname = data['nickname']
     
-    db.session.commit()
+    ContactRepository().save(contact)
     return jsonify({
         "message": "Contact updated by admin",
         "contact": contact.to_dict()
@@ -201,8 +289,7 @@ def delete_contact_admin(contact_id):
     Supprimer un contact (admin only).
     """
     contact = Contact.query.get_or_404(contact_id)
-    db.session.delete(contact)
-    db.session.commit()
+    ContactRepository().delete(contact)
     return jsonify({"message": "Contact deleted by admin"}), 200
 
 
@@ -214,9 +301,12 @@ def delete_contact_admin(contact_id):
 def list_all_assignments():
     """
     Liste TOUTES les assignations (admin only).
+
+    Pagination : ?cursor= (vide pour la première page) et per_page ;
+    flux : ?format=ndjson ou Accept: application/x-ndjson (voir app/listing.py).
     """
-    assignments = Assignment.query.order_by(Assignment.id.desc()).all()
-    return jsonify([a.to_dict() for a in assignments]), 200
+    query = Assignment.query.options(*load_options("assignment"))
+    return listing.list_response(query, Assignment.id, _serialize_all, "assignments", descending=True)
 
 
 @bp.get('/admin/assignments/<int:assignment_id>')
@@ -250,7 +340,7 @@ def update_assignment_admin(assignment_id):
     if 'user_id' in data:
         assignment.user_id = data['user_id']
     
-    db.session.commit()
+    AssignmentRepository().save(assignment)
     return jsonify({
         "message": "Assignment updated by admin",
         "assignment": assignment.to_dict()
@@ -265,6 +355,5 @@ def delete_assignment_admin(assignment_id):
     Supprimer une assignation (admin only).
     """
     assignment = Assignment.query.get_or_404(assignment_id)
-    db.session.delete(assignment)
-    db.session.commit()
+    AssignmentRepository().delete(assignment)
     return jsonify({"message": "Assignment deleted by admin"}), 200
@@ -4,9 +4,10 @@ Routes pour la gestion des assignations.
 import json
 from flask import Blueprint, request, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ... import audit
 from ...models import Assignment, Note, ActionLog
 from ...services import AssignmentService
-from ...repositories import ActionLogRepository
+from ...serialization import load_options
 
 bp = Blueprint('assignments', __name__)
 
@@ -36,8 +37,7 @@ def create_assignment():
         target_id=assignment["id"],
         payload=json.dumps({"note_id": data["note_id"], "assigned_to": data["user_id"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return assignment, 201
 
@@ -52,7 +52,7 @@ def list_assignments():
     status = request.args.get('status')
     
     # Construire la requête avec filtres
-    query = Assignment.query
+    query = Assignment.query.options(*load_options("assignment"))
     
     if note_id:
         query = query.filter_by(note_id=note_id)
@@ -105,8 +105,7 @@ def update_assignment(assignment_id):
         target_id=assignment["id"],
         payload=json.dumps({"note_id": assignment["note_id"], "user_id": assignment["user_id"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return assignment
 
@@ -137,8 +136,7 @@ def delete_assignment(assignment_id):
             "completed_date": finished_date
         })
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return {"deleted": True}
 
@@ -159,8 +157,7 @@ def toggle_priority(assignment_id):
         target_id=assignment["id"],
         payload=json.dumps({"priority": assignment["recipient_priority"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return assignment
 
@@ -200,8 +197,7 @@ def update_status(assignment_id):
                 "user_id": assignment["user_id"]
             })
         )
-        action_log_repo = ActionLogRepository()
-        action_log_repo.save(action_log)
+        audit.record(action_log)
     
     return assignment
 
@@ -4,12 +4,11 @@ Blueprint pour l'authentification.
 import json
 from flask import Blueprint, request, abort
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from email_validator import validate_email, EmailNotValidError
 from ... import limiter
+from ... import audit
 from ...models import User, ActionLog
 from ...services.auth_service import AuthService
-from ...repositories import ActionLogRepository
 
 bp = Blueprint('auth', __name__)
 
@@ -41,8 +40,7 @@ def register():
         target_id=user_dict["id"],
         payload=json.dumps({"username": user_dict["username"], "email": user_dict["email"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
 
     return {
         "msg": "User created successfully",
@@ -115,8 +113,7 @@ def logout():
         target_id=current_user_id,
         payload=json.dumps({"timestamp": "logout"})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return {
         "msg": "Successfully logged out"
@@ -4,9 +4,11 @@ Routes pour la gestion des contacts.
 import json
 from flask import Blueprint, request, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ... import audit
 from ...models import Contact, User, ActionLog
 from ...services import ContactService
-from ...repositories import ActionLogRepository
+from ...repositories import NoteRepository
+from ...repositories.note_repository import SORT_KEYS, RELEVANCE
 
 bp = Blueprint('contacts', __name__)
 
@@ -36,8 +38,7 @@ def create_contact():
         target_id=contact["id"],
         payload=json.dumps({"contact_username": data["contact_username"], "nickname": data["nickname"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return contact, 201
 
@@ -107,8 +108,7 @@ def update_contact(contact_id):
         target_id=contact["id"],
         payload=json.dumps({"nickname": contact["nickname"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return contact
 
@@ -133,8 +133,7 @@ def delete_contact(contact_id):
         target_id=contact_id,
         payload=json.dumps({"contact_username": contact_username})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return {"deleted": True}
 
@@ -149,9 +148,6 @@ def get_contact_notes(contact_id):
     
     Supporte les mêmes paramètres de pagination que GET /notes
     """
-    from ...models import Note, Assignment
-    from sqlalchemy import and_, or_
-    
     current_user_id = int(get_jwt_identity())
     
     # Vérifier que le contact existe et appartient à l'utilisateur
@@ -174,67 +170,27 @@ def get_contact_notes(contact_id):
         page = 1
     
     # Query : notes échangées entre l'utilisateur connecté et le contact
-    # Cas 1 : Je suis créateur ET le contact est destinataire
-    # Cas 2 : Le contact est créateur ET je suis destinataire
-    query = Note.query.join(
-        Assignment, Note.id == Assignment.note_id
-    ).filter(
-        or_(
-            # Cas 1 : mes notes envoyées à ce contact
-            and_(
-                Note.creator_id == current_user_id,
-                Assignment.user_id == contact_user_id
-            ),
-            # Cas 2 : notes du contact reçues par moi
-            and_(
-                Note.creator_id == contact_user_id,
-                Assignment.user_id == current_user_id
-            )
-        )
+    # Cas 1 : mes notes envoyées à ce contact
+    # Cas 2 : notes du contact reçues par moi
+    # Filtres optionnels : 'received', 'sent', 'unread', 'important'
+    # Recherche plein texte optionnelle (q), partagée avec GET /notes
+    search_query = request.args.get('q', '').strip()
+    note_repo = NoteRepository()
+    query = note_repo.build_exchanged_query(
+        current_user_id,
+        contact_user_id,
+        filter_param=request.args.get('filter'),
+        search_query=search_query
     )
     
-    # Filtres optionnels
-    filter_param = request.args.get('filter')
-    if filter_param:
-        if filter_param == 'received':
-            # Seulement les notes reçues de ce contact
-            query = query.filter(
-                Note.creator_id == contact_user_id,
-                Assignment.user_id == current_user_id
-            )
-        elif filter_param == 'sent':
-            # Seulement mes notes envoyées à ce contact
-            query = query.filter(
-                Note.creator_id == current_user_id,
-                Assignment.user_id == contact_user_id
-            )
-        elif filter_param == 'unread':
-            # Notes non lues (si je suis destinataire)
-            query = query.filter(
-                Note.creator_id == contact_user_id,
-                Assignment.user_id == current_user_id,
-                Assignment.is_read == False
-            )
-        elif filter_param == 'important':
-            # Notes marquées importantes par le créateur
-            query = query.filter(Note.important == True)
-    
-    # Tri
+    # Tri ('date_desc' par défaut, 'date_asc', 'important_first', 'relevance' avec q) et pagination
     sort_param = request.args.get('sort', 'date_desc')
-    if sort_param == 'date_asc':
-        query = query.order_by(Note.created_date.asc())
-    elif sort_param == 'important_first':
-        query = query.order_by(Note.important.desc(), Note.created_date.desc())
+    if sort_param == RELEVANCE and search_query:
+        pagination = note_repo.paginate_ranked(query, search_query, page, per_page)
     else:
-        # Par défaut : date décroissante
-        query = query.order_by(Note.created_date.desc())
-    
-    # Pagination
-    pagination = query.distinct().paginate(
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
+        if sort_param not in SORT_KEYS:
+            sort_param = 'date_desc'
+        pagination = note_repo.paginate_offset(query, sort_param, page, per_page)
     
     # Récupérer les informations du contact pour la réponse
     contact_info = {
@@ -242,7 +198,7 @@ def get_contact_notes(contact_id):
         "contact_user_id": contact_user_id,
         "username": contact.contact_user.username,
         "nickname": contact.nickname,
-        "is_mutual": contact.is_mutual()
+        "is_mutual": contact.mutual
     }
     
     return {
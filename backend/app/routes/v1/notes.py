@@ -5,10 +5,10 @@ import json
 from datetime import datetime, timezone
 from flask import Blueprint, request, abort
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import or_
-from ...models import Note, Assignment, ActionLog
+from ... import audit, etag, listing
+from ...models import ActionLog
 from ...services.note_service import NoteService
-from ...repositories import ActionLogRepository
+from ...services.assignment_service import AssignmentService
 
 bp = Blueprint('notes', __name__)
 
@@ -41,8 +41,7 @@ def create_note():
         target_id=note_dict["id"],
         payload=json.dumps({"important": note_dict["important"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return note_dict, 201
 
@@ -56,10 +55,15 @@ def get_notes():
     Returns list of notes created by OR assigned to current user
     Query Parameters:
       - filter: 'important', 'important_by_me', 'unread', 'received', 'sent', 'in_progress', 'completed'
-      - sort: 'date_asc', 'date_desc', 'important_first'
-      - q: search query (searches in note content)
+      - sort: 'date_asc', 'date_desc', 'important_first', 'relevance' (with q, not with cursor)
+      - q: full-text search in note content (all words, prefix match, case-insensitive)
       - page: page number (default: 1)
       - per_page: items per page (default: 20, max: 100)
+      - cursor: keyset pagination token (empty for the first page); the response
+        then carries `next_cursor` instead of `page`/`pages`
+      - include_total: in cursor mode, also compute `total` (extra COUNT query)
+    Conditional GET: the response carries an ETag; sending it back in
+    If-None-Match returns 304 without body while the user's notes are unchanged.
     """
     current_user_id = int(get_jwt_identity())
     
@@ -75,119 +79,30 @@ def get_notes():
     if page < 1:
         page = 1
     
-    # Query de base - toujours LEFT JOIN pour voir toutes les notes accessibles
-    filter_param = request.args.get('filter')
-    
-    query = Note.query.join(
-        Assignment, Note.id == Assignment.note_id, isouter=True
-    ).filter(
-        or_(
-            Note.creator_id == current_user_id,
-            Assignment.user_id == current_user_id
-        ),
-        Note.delete_date.is_(None)  # Exclure les notes supprimées (soft delete)
-    )
-    
-    # Recherche textuelle
-    search_query = request.args.get('q', '').strip()
-    if search_query:
-        # Recherche insensible à la casse dans le contenu de la note
-        search_pattern = f"%{search_query}%"
-        query = query.filter(Note.content.ilike(search_pattern))
-    
-    # Filtre par créateur (pour afficher les notes d'un contact spécifique)
-    creator_id = request.args.get('creator_id', type=int)
-    if creator_id is not None:
-        query = query.filter(Note.creator_id == creator_id)
-    
-    # Filtre direct par important (booléen)
-    important_filter = request.args.get('important', type=lambda v: v.lower() == 'true')
-    if important_filter is not None:
-        query = query.filter(Note.important == important_filter)
-    
-    # Filtres
-    if filter_param:
-        if filter_param == 'important':
-            # Notes marquées importantes par le créateur
-            query = query.filter(Note.important == True)
-        elif filter_param == 'important_by_me':
-            # Notes marquées prioritaires par le destinataire
-            query = query.filter(
-                Assignment.user_id == current_user_id,
-                Assignment.recipient_priority == True
-            )
-        elif filter_param == 'unread':
-            # Assignations non lues
-            query = query.filter(
-                Assignment.user_id == current_user_id,
-                Assignment.is_read == False
-            )
-        elif filter_param == 'received':
-            # Notes assignées à l'utilisateur
-            query = query.filter(Assignment.user_id == current_user_id)
-        elif filter_param == 'sent':
-            # Notes créées par l'utilisateur ET assignées à quelqu'un
-            query = query.filter(
-                Note.creator_id == current_user_id,
-                Assignment.id.isnot(None)  # Doit avoir au moins 1 assignation
-            )
-        elif filter_param == 'in_progress':
-            # Toutes les notes avec des assignations en cours (visibles par l'utilisateur)
-            query = query.filter(
-                Assignment.recipient_status == 'en_cours',
-                Assignment.id.isnot(None)
-            )
-        elif filter_param == 'completed':
-            # Toutes les notes avec des assignations terminées (visibles par l'utilisateur)
-            query = query.filter(
-                Assignment.recipient_status == 'terminé',
-                Assignment.id.isnot(None)
-            )
-    
-    # Tri
+    # Tri : sort_by/sort_order (format alternatif) est ramené aux clés de `sort`
     sort_param = request.args.get('sort', 'date_desc')
-    sort_by = request.args.get('sort_by')  # Support pour sort_by alternatif
-    sort_order = request.args.get('sort_order', 'desc')  # Support pour sort_order alternatif
-    
-    # Utiliser sort_by/sort_order si fournis, sinon utiliser sort
-    if sort_by:
-        if sort_by == 'created_date':
-            if sort_order == 'asc':
-                query = query.order_by(Note.created_date.asc())
-            else:
-                query = query.order_by(Note.created_date.desc())
-        elif sort_by == 'important':
-            query = query.order_by(Note.important.desc(), Note.created_date.desc())
-        else:
-            # Par défaut : date décroissante
-            query = query.order_by(Note.created_date.desc())
-    elif sort_param == 'date_asc':
-        query = query.order_by(Note.created_date.asc())
-    elif sort_param == 'date_desc':
-        query = query.order_by(Note.created_date.desc())
-    elif sort_param == 'important_first':
-        # Important d'abord, puis par date décroissante
-        query = query.order_by(Note.important.desc(), Note.created_date.desc())
-    else:
-        # Par défaut : date décroissante
-        query = query.order_by(Note.created_date.desc())
-    
-    # Pagination
-    pagination = query.distinct().paginate(
+    sort_by = request.args.get('sort_by')
+    sort_order = request.args.get('sort_order', 'desc')
+    if sort_by == 'created_date':
+        sort_param = 'date_asc' if sort_order == 'asc' else 'date_desc'
+    elif sort_by == 'important':
+        sort_param = 'important_first'
+    elif sort_by:
+        sort_param = 'date_desc'
+    
+    # ✅ Délégation au service (304 si la version des notes n'a pas changé)
+    return etag.conditional_notes_response(current_user_id, lambda: note_service.list_notes(
+        user_id=current_user_id,
+        filter_param=request.args.get('filter'),
+        search_query=request.args.get('q', '').strip(),
+        creator_id=request.args.get('creator_id', type=int),
+        important=request.args.get('important', type=lambda v: v.lower() == 'true'),
+        sort=sort_param,
         page=page,
         per_page=per_page,
-        error_out=False
-    )
-    
-    return {
-        "notes": [note.to_dict() for note in pagination.items],
-        "total": pagination.total,
-        "page": page,
-        "per_page": per_page,
-        "pages": pagination.pages,
-        "has_next": pagination.has_next,
-        "has_prev": pagination.has_prev
-    }, 200
+        cursor=request.args.get('cursor'),
+        include_total=request.args.get('include_total', 'false').lower() in ('1', 'true')
+    ))
 
 
 @bp.get('/notes/<int:note_id>')
@@ -201,10 +116,10 @@ def get_note(note_id):
     """
     current_user_id = int(get_jwt_identity())
     
-    # ✅ Délégation complète au service
-    response = note_service.get_note_for_user(note_id, current_user_id)
-    
-    return response
+    # ✅ Délégation complète au service (304 si la version des notes n'a pas changé)
+    return etag.conditional_notes_response(
+        current_user_id, lambda: note_service.get_note_for_user(note_id, current_user_id)
+    )
 
 
 @bp.get('/notes/<int:note_id>/details')
@@ -235,6 +150,27 @@ def get_note_assignments(note_id):
     return note_service.get_note_assignments(note_id, current_user_id)
 
 
+@bp.post('/notes/<int:note_id>/assignments:bulk')
+@jwt_required()
+def create_note_assignments_bulk(note_id):
+    """
+    Assigner une note à plusieurs destinataires en une seule transaction.
+    
+    Body: {"user_ids": [2, 3, 4]}
+    Renvoie un résultat par destinataire (created / error) ; les logs
+    d'audit sont écrits par le service dans la même transaction.
+    """
+    data = request.get_json(silent=True) or {}
+    current_user_id = int(get_jwt_identity())
+    
+    result = AssignmentService().create_assignments_bulk(
+        note_id=note_id,
+        user_ids=data.get("user_ids"),
+        creator_id=current_user_id
+    )
+    return result, 200
+
+
 @bp.put('/notes/<int:note_id>')
 @jwt_required()
 def update_note(note_id):
@@ -261,8 +197,7 @@ def update_note(note_id):
         target_id=note_dict["id"],
         payload=json.dumps({"important": note_dict["important"]})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return note_dict
 
@@ -274,14 +209,29 @@ def get_orphan_notes():
     Récupérer les notes orphelines (sans aucune assignation active).
     Ces notes peuvent être supprimées définitivement par le créateur.
     
+    Pagination : ?cursor= (vide pour la première page) et per_page ; la réponse
+    ajoute alors per_page, has_next et next_cursor. count reste le total.
+    
     ✅ REFACTORÉ : Architecture 3 couches
     """
     current_user_id = int(get_jwt_identity())
     
     # ✅ Délégation au service
-    orphan_notes = note_service.get_orphan_notes(current_user_id)
-    
-    return {"notes": orphan_notes, "count": len(orphan_notes)}
+    return note_service.get_orphan_notes(
+        current_user_id,
+        cursor=request.args.get('cursor'),
+        per_page=listing.page_size()
+    )
+
+
+@bp.get('/notes/orphans/count')
+@jwt_required()
+def count_orphan_notes():
+    """
+    Nombre de notes orphelines (badge de la barre latérale), sans les charger.
+    """
+    current_user_id = int(get_jwt_identity())
+    return {"count": note_service.count_orphan_notes(current_user_id)}
 
 
 @bp.delete('/notes/<int:note_id>')
@@ -308,8 +258,7 @@ def delete_note(note_id):
         target_id=note_dict["id"],
         payload=json.dumps({"is_creator": is_creator})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     return note_dict
 
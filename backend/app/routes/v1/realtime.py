@@ -0,0 +1,65 @@
+"""
+Route du flux de changements temps réel (Server-Sent Events).
+"""
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from flask_jwt_extended import get_jwt, get_jwt_identity, get_jwt_request_location, jwt_required
+from ... import realtime
+
+bp = Blueprint('realtime', __name__)
+
+
+@bp.post('/events/ticket')
+@jwt_required()
+def create_stream_ticket():
+    """
+    Ticket d'accès au flux SSE, à passer en paramètre `?jwt=<ticket>`.
+    ---
+    Le ticket n'est accepté que par GET /v1/events/stream et expire après
+    REALTIME_TICKET_SECONDS (60 s) : en demander un nouveau avant chaque
+    (re)connexion.
+    Returns: {"ticket": str, "expires_in": int}
+    """
+    current_user_id = int(get_jwt_identity())
+    return jsonify(
+        ticket=realtime.issue_ticket(current_user_id),
+        expires_in=current_app.config["REALTIME_TICKET_SECONDS"],
+    ), 201
+
+
+@bp.get('/events/stream')
+@jwt_required(locations=["headers", "query_string"])
+def stream_events():
+    """
+    Flux SSE des changements qui concernent l'utilisateur courant.
+    ---
+    EventSource ne permet pas d'en-tête Authorization : passer un ticket
+    (POST /v1/events/ticket) en paramètre `?jwt=<ticket>`. Un JWT d'accès
+    n'est accepté qu'en en-tête, jamais dans l'URL (logs d'accès).
+    Events: note.created|updated|deleted, assignment.created|read|unread|
+    status_changed|priority_changed|updated|deleted, contact.created|updated|deleted,
+    reset (reprise impossible : recharger).
+    Reprise : en-tête Last-Event-ID (ou paramètre last_event_id).
+    503 : trop de flux ouverts sur ce worker (REALTIME_MAX_STREAMS).
+    """
+    if get_jwt_request_location() == "query_string" and get_jwt().get("scope") != realtime.TICKET_SCOPE:
+        abort(401, description="Use a stream ticket (POST /v1/events/ticket) in the URL, not an access token")
+    current_user_id = int(get_jwt_identity())
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    release = realtime.acquire_stream_slot()
+
+    response = Response(
+        realtime.stream(
+            realtime.get_broker(),
+            current_user_id,
+            last_event_id,
+            heartbeat=current_app.config["REALTIME_HEARTBEAT_SECONDS"],
+            max_duration=current_app.config["REALTIME_STREAM_MAX_SECONDS"],
+        ),
+        mimetype="text/event-stream",
+    )
+    # Place libérée à la fin du flux ou à la déconnexion du client
+    response.call_on_close(release)
+    response.headers["Cache-Control"] = "no-cache"
+    # Désactiver la mise en tampon des proxys (nginx)
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
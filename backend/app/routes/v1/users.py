@@ -4,10 +4,9 @@ Routes pour la gestion des utilisateurs.
 import json
 from flask import Blueprint, request, abort, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.security import check_password_hash
+from ... import audit, identity, listing, passwords
 from ...models import User, ActionLog
 from ...services import UserService
-from ...repositories import ActionLogRepository
 
 bp = Blueprint('users', __name__)
 
@@ -28,16 +27,53 @@ def get_current_user():
 @bp.get('/users')
 @jwt_required()
 def list_users():
-    """Lister tous les utilisateurs (authentification requise)."""
+    """
+    Lister tous les utilisateurs (authentification requise).
+    ---
+    Query Parameters:
+      - cursor: pagination par id (vide pour la première page) ; la réponse
+        devient {users, per_page, has_next, next_cursor}
+      - per_page: éléments par page en mode curseur (défaut: 20, max: 100)
+      - format: 'ndjson' (ou Accept: application/x-ndjson) pour un flux d'un
+        utilisateur par ligne, en mémoire constante
+    Sans ces paramètres, tableau complet (compatibilité).
+    """
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    is_admin = current_user and current_user.is_admin()
+    is_admin = identity.is_admin(current_user_id)
     
     # Utiliser le service
     service = UserService()
+    if listing.wants_ndjson():
+        return listing.ndjson_response(service.iter_users(listing.STREAM_BATCH_SIZE))
     users = service.list_users(
         current_user_id=current_user_id,
-        is_admin=is_admin
+        is_admin=is_admin,
+        cursor=request.args.get('cursor'),
+        per_page=listing.page_size()
+    )
+    
+    return jsonify(users)
+
+@bp.get('/users/search')
+@jwt_required()
+def search_users():
+    """
+    Rechercher des utilisateurs par username (authentification requise).
+    ---
+    Query Parameters:
+      - q: début ou approximation du username (insensible à la casse)
+      - limit: nombre de résultats (défaut: 10, max: 50)
+    Les usernames qui commencent par q d'abord, puis les plus proches.
+    L'utilisateur connecté n'apparaît pas dans les résultats.
+    """
+    current_user_id = int(get_jwt_identity())
+    
+    # Utiliser le service
+    service = UserService()
+    users = service.search_users(
+        request.args.get('q', ''),
+        current_user_id=current_user_id,
+        limit=request.args.get('limit', 10, type=int)
     )
     
     return jsonify(users)
@@ -47,8 +83,7 @@ def list_users():
 def get_user(user_id):
     """Récupérer un utilisateur par son ID (authentification requise)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    is_admin = current_user and current_user.is_admin()
+    is_admin = identity.is_admin(current_user_id)
     
     # Utiliser le service
     service = UserService()
@@ -61,8 +96,7 @@ def get_user(user_id):
 def update_user(user_id):
     """Mettre à jour un utilisateur (seulement son propre profil ou admin)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    is_admin = current_user and current_user.is_admin()
+    is_admin = identity.is_admin(current_user_id)
     
     data = request.get_json()
     
@@ -75,7 +109,7 @@ def update_user(user_id):
         
         # Vérifier que le mot de passe actuel est correct
         user_obj = User.query.get_or_404(user_id)
-        if not check_password_hash(user_obj.password_hash, data["current_password"]):
+        if not passwords.verify_password(user_obj.password_hash, data["current_password"]):
             abort(400, description="Current password is incorrect")
         
         # Valider la longueur du nouveau mot de passe
@@ -91,8 +125,7 @@ def update_user(user_id):
             target_id=user_id,
             payload=json.dumps({"timestamp": "password_updated"})
         )
-        action_log_repo = ActionLogRepository()
-        action_log_repo.save(action_log)
+        audit.record(action_log)
     
     # Ancien format "password" (pour compatibilité)
     elif "password" in data:
@@ -119,8 +152,7 @@ def update_user(user_id):
 def delete_user(user_id):
     """Supprimer un utilisateur (seulement son propre compte ou admin)."""
     current_user_id = int(get_jwt_identity())
-    current_user = User.query.get(current_user_id)
-    is_admin = current_user and current_user.is_admin()
+    is_admin = identity.is_admin(current_user_id)
     
     # Sauvegarder info pour le log
     user_obj = User.query.get_or_404(user_id)
@@ -133,8 +165,7 @@ def delete_user(user_id):
         target_id=user_id,
         payload=json.dumps({"username": username})
     )
-    action_log_repo = ActionLogRepository()
-    action_log_repo.save(action_log)
+    audit.record(action_log)
     
     # Utiliser le service
     service = UserService()
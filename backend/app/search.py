@@ -0,0 +1,518 @@
+"""
+Recherche plein texte dans le contenu des notes (paramètre `q`) et recherche
+des utilisateurs par username (GET /v1/users/search, en fin de module).
+
+Remplace `content ILIKE '%q%'`, qui parcourt le contenu de chaque note
+visible. Deux moteurs, choisis par SEARCH_BACKEND (défaut : selon la base) :
+
+- "postgres" : colonne générée notes.search_vector
+  (to_tsvector('french', content), maintenue par PostgreSQL à chaque écriture)
+  et index GIN ix_notes_search_vector ; classement par ts_rank_cd.
+- "memory" : index inversé en mémoire (tests SQLite, développement). Construit
+  à la première recherche, puis tenu à jour après chaque COMMIT par les
+  événements ORM sur Note.
+
+Sémantique commune : chaque mot de la requête doit apparaître (ET), en
+préfixe de mot, sans tenir compte de la casse ("proj rev" trouve
+"Projet : revue"). PostgreSQL applique en plus la racinisation française.
+
+Utilisateurs : les usernames qui commencent par la saisie d'abord (les plus
+courts en premier), puis les usernames proches (fautes de frappe). PostgreSQL
+utilise pg_trgm (index GIN ix_users_username_trgm sur lower(username), qui
+sert à la fois LIKE 'q%' et l'opérateur de similarité %) ; le repli en
+mémoire est un trie avec recherche de Levenshtein bornée.
+
+La colonne search_vector n'est pas mappée sur le modèle Note (le type
+tsvector n'existe pas en SQLite) : elle n'existe, comme l'index de
+trigrammes, que par sa migration.
+"""
+import bisect
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+from flask import current_app, has_app_context
+from sqlalchemy import and_, case, event, false, func, inspect, literal, literal_column, or_, select, true
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Session, object_session
+from . import db
+from .models import Note, User
+
+# Configuration plein texte PostgreSQL (doit correspondre à la colonne générée)
+TS_CONFIG = "french"
+
+# Objets de schéma gérés uniquement par migration (ignorés par l'autogénération)
+UNMAPPED_SCHEMA_OBJECTS = {"search_vector", "ix_notes_search_vector", "ix_users_username_trgm"}
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Découper un texte en mots normalisés (minuscules).
+
+    Args:
+        text: Texte libre
+
+    Returns:
+        Liste des mots, dans l'ordre
+    """
+    return _WORD.findall((text or "").lower())
+
+
+class PostgresSearch:
+    """tsvector + GIN : le filtrage et le classement sont faits par PostgreSQL."""
+
+    name = "postgres"
+
+    def __init__(self):
+        self._vector = literal_column("notes.search_vector", type_=TSVECTOR)
+
+    def _tsquery(self, search_query: str):
+        # Mots réduits à \w+ : aucun opérateur tsquery ne peut être injecté
+        terms = " & ".join(f"{term}:*" for term in tokenize(search_query))
+        return func.to_tsquery(literal(TS_CONFIG), terms)
+
+    def criterion(self, search_query: str):
+        if not tokenize(search_query):
+            return true()
+        return self._vector.op("@@")(self._tsquery(search_query))
+
+    def rank(self, search_query: str):
+        return func.ts_rank_cd(self._vector, self._tsquery(search_query))
+
+
+class InvertedIndex:
+    """Index inversé mot -> {note_id: occurrences}, thread-safe."""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._documents: Dict[int, Counter] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def index(self, note_id: int, content: Optional[str]) -> None:
+        with self._lock:
+            self._remove(note_id)
+            counts = Counter(tokenize(content))
+            self._documents[note_id] = counts
+            for term, count in counts.items():
+                if term not in self._postings:
+                    self._postings[term] = {}
+                    self._vocabulary_dirty = True
+                self._postings[term][note_id] = count
+
+    def remove(self, note_id: int) -> None:
+        with self._lock:
+            self._remove(note_id)
+
+    def _remove(self, note_id: int) -> None:
+        for term in self._documents.pop(note_id, ()):
+            postings = self._postings[term]
+            postings.pop(note_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+
+    def _expand(self, prefix: str) -> List[str]:
+        """Mots indexés commençant par prefix (recherche dichotomique)."""
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, search_query: str) -> Dict[int, int]:
+        """
+        Notes contenant tous les mots (en préfixe) et leur score.
+
+        Args:
+            search_query: Texte saisi
+
+        Returns:
+            Dictionnaire {note_id: nombre d'occurrences des mots trouvés}
+        """
+        terms = tokenize(search_query)
+        if not terms:
+            return {}
+        with self._lock:
+            scores: Optional[Dict[int, int]] = None
+            for prefix in terms:
+                matches: Dict[int, int] = {}
+                for term in self._expand(prefix):
+                    for note_id, count in self._postings[term].items():
+                        matches[note_id] = matches.get(note_id, 0) + count
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {note_id: score + matches[note_id]
+                              for note_id, score in scores.items() if note_id in matches}
+                if not scores:
+                    return {}
+            return scores
+
+
+class MemorySearch:
+    """Index inversé en mémoire, construit paresseusement depuis la base."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._index = InvertedIndex()
+        self._built = False
+        self._build_lock = threading.Lock()
+
+    @property
+    def built(self) -> bool:
+        return self._built
+
+    def _ensure_built(self) -> InvertedIndex:
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    for note_id, content in db.session.execute(select(Note.id, Note.content)):
+                        self._index.index(note_id, content)
+                    self._built = True
+        return self._index
+
+    def apply(self, indexed: Dict[int, str], removed: Set[int]) -> None:
+        """Reporter des écritures validées (avant construction, la base les contient déjà)."""
+        with self._build_lock:
+            if not self._built:
+                return
+            for note_id, content in indexed.items():
+                self._index.index(note_id, content)
+            for note_id in removed:
+                self._index.remove(note_id)
+
+    def scores(self, search_query: str) -> Dict[int, int]:
+        return self._ensure_built().search(search_query)
+
+    def criterion(self, search_query: str):
+        if not tokenize(search_query):
+            return true()
+        return Note.id.in_(list(self.scores(search_query)))
+
+    def rank(self, search_query: str):
+        scores = self.scores(search_query)
+        if not scores:
+            return literal(0)
+        return case(scores, value=Note.id, else_=0)
+
+
+# ---------- Utilisateurs : recherche par préfixe et approchée ----------
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _max_distance(query: str) -> int:
+    """Distance d'édition tolérée : aucune faute en dessous de 3 caractères."""
+    if len(query) < 3:
+        return 0
+    return 1 if len(query) < 6 else 2
+
+
+class PostgresUserSearch:
+    """pg_trgm : LIKE 'q%' et similarité de trigrammes sur un index GIN de lower(username)."""
+
+    name = "postgres"
+
+    def match(self, query: str, limit: int, exclude_user_id: Optional[int] = None):
+        username = func.lower(User.username)
+        is_prefix = username.like(_escape_like(query) + "%", escape="\\")
+        criterion = or_(is_prefix, username.op("%")(query)) if _max_distance(query) else is_prefix
+        if exclude_user_id is not None:
+            criterion = and_(criterion, User.id != exclude_user_id)
+        ordering = [is_prefix.desc(), func.similarity(username, query).desc(), User.username.asc()]
+        return criterion, ordering
+
+
+class _TrieNode:
+    __slots__ = ("children", "ids")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.ids: Set[int] = set()
+
+
+class UsernameTrie:
+    """Trie des usernames en minuscules, thread-safe."""
+
+    def __init__(self):
+        self._root = _TrieNode()
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def add(self, user_id: int, username: str) -> None:
+        with self._lock:
+            self._remove(user_id)
+            name = username.lower()
+            node = self._root
+            for char in name:
+                node = node.children.setdefault(char, _TrieNode())
+            node.ids.add(user_id)
+            self._names[user_id] = name
+
+    def remove(self, user_id: int) -> None:
+        with self._lock:
+            self._remove(user_id)
+
+    def _remove(self, user_id: int) -> None:
+        name = self._names.pop(user_id, None)
+        if name is None:
+            return
+        path = [self._root]
+        for char in name:
+            path.append(path[-1].children[char])
+        path[-1].ids.discard(user_id)
+        # Élaguer les branches devenues vides
+        for depth in range(len(name), 0, -1):
+            node = path[depth]
+            if node.ids or node.children:
+                break
+            del path[depth - 1].children[name[depth - 1]]
+
+    def prefix(self, prefix: str, limit: int, exclude: Set[int] = frozenset()) -> List[int]:
+        """
+        Ids dont le username commence par prefix, les plus courts d'abord puis par ordre alphabétique.
+
+        Args:
+            prefix: Début du username (minuscules)
+            limit: Nombre maximal de résultats
+            exclude: Ids à ignorer
+
+        Returns:
+            Liste d'ids ordonnée
+        """
+        with self._lock:
+            node = self._root
+            for char in prefix:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            results: List[int] = []
+            level = [(prefix, node)]
+            while level and len(results) < limit:
+                following = []
+                for name, current in level:
+                    results.extend(sorted(current.ids - exclude))
+                    following.extend((name + char, current.children[char])
+                                     for char in sorted(current.children))
+                level = following
+            return results[:limit]
+
+    def fuzzy(self, word: str, max_distance: int, exclude: Set[int] = frozenset()) -> List[Tuple[int, str, int]]:
+        """
+        Usernames à au plus max_distance modifications de word (Levenshtein).
+
+        Parcours du trie en calculant une ligne de la matrice de distance par
+        nœud : une branche est abandonnée dès que toute sa ligne dépasse le seuil.
+
+        Args:
+            word: Texte saisi (minuscules)
+            max_distance: Distance d'édition maximale
+            exclude: Ids à ignorer
+
+        Returns:
+            Liste (distance, username, id) triée
+        """
+        results: List[Tuple[int, str, int]] = []
+        first_row = list(range(len(word) + 1))
+        with self._lock:
+            stack = [(self._root, char, "", first_row) for char in self._root.children]
+            while stack:
+                parent, char, name, previous = stack.pop()
+                node = parent.children[char]
+                name += char
+                row = [previous[0] + 1]
+                for column in range(1, len(word) + 1):
+                    cost = 0 if word[column - 1] == char else 1
+                    row.append(min(row[column - 1] + 1, previous[column] + 1, previous[column - 1] + cost))
+                if row[-1] <= max_distance:
+                    results.extend((row[-1], name, user_id) for user_id in node.ids if user_id not in exclude)
+                if min(row) <= max_distance:
+                    stack.extend((node, child, name, row) for child in node.children)
+        return sorted(results)
+
+
+class MemoryUserSearch:
+    """Trie en mémoire, construit paresseusement depuis la base."""
+
+    name = "memory"
+
+    def __init__(self):
+        self._trie = UsernameTrie()
+        self._built = False
+        self._build_lock = threading.Lock()
+
+    def _ensure_built(self) -> UsernameTrie:
+        if not self._built:
+            with self._build_lock:
+                if not self._built:
+                    for user_id, username in db.session.execute(select(User.id, User.username)):
+                        self._trie.add(user_id, username)
+                    self._built = True
+        return self._trie
+
+    def apply(self, indexed: Dict[int, str], removed: Set[int]) -> None:
+        """Reporter des écritures validées (avant construction, la base les contient déjà)."""
+        with self._build_lock:
+            if not self._built:
+                return
+            for user_id, username in indexed.items():
+                self._trie.add(user_id, username)
+            for user_id in removed:
+                self._trie.remove(user_id)
+
+    def lookup(self, query: str, limit: int, exclude_user_id: Optional[int] = None) -> List[int]:
+        """Ids ordonnés : complétions du préfixe, puis usernames proches."""
+        trie = self._ensure_built()
+        exclude = {exclude_user_id} if exclude_user_id is not None else set()
+        ids = trie.prefix(query, limit, exclude)
+        if len(ids) < limit and _max_distance(query):
+            found = set(ids)
+            for _, _, user_id in trie.fuzzy(query, _max_distance(query), exclude):
+                if user_id not in found:
+                    ids.append(user_id)
+                    found.add(user_id)
+                if len(ids) == limit:
+                    break
+        return ids
+
+    def match(self, query: str, limit: int, exclude_user_id: Optional[int] = None):
+        ids = self.lookup(query, limit, exclude_user_id)
+        if not ids:
+            return false(), []
+        positions = {user_id: position for position, user_id in enumerate(ids)}
+        return User.id.in_(ids), [case(positions, value=User.id)]
+
+
+def init_app(app) -> None:
+    """
+    Choisir les moteurs de recherche (SEARCH_BACKEND : postgres, memory ou auto).
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("SEARCH_BACKEND", os.getenv("SEARCH_BACKEND", "auto"))
+    backend_name = app.config["SEARCH_BACKEND"]
+    if backend_name == "auto":
+        uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
+        backend_name = "postgres" if uri.startswith("postgresql") else "memory"
+    if backend_name == "postgres":
+        app.extensions["search"] = PostgresSearch()
+        app.extensions["user_search"] = PostgresUserSearch()
+    elif backend_name == "memory":
+        app.extensions["search"] = MemorySearch()
+        app.extensions["user_search"] = MemoryUserSearch()
+    else:
+        raise ValueError("SEARCH_BACKEND must be 'auto', 'postgres' or 'memory'")
+
+
+def get_backend():
+    """Moteur de recherche des notes de l'application courante."""
+    return current_app.extensions["search"]
+
+
+def get_user_backend():
+    """Moteur de recherche des utilisateurs de l'application courante."""
+    return current_app.extensions["user_search"]
+
+
+# ---------- Maintenance des index en mémoire ----------
+# Les changements sont notés par session et appliqués seulement après COMMIT.
+
+# Type d'index -> extension de l'application
+_MEMORY_EXTENSIONS = {"notes": "search", "users": "user_search"}
+
+
+def _pending(session, kind: str) -> Dict[str, Any]:
+    pending = session.info.setdefault("search_pending", {})
+    return pending.setdefault(kind, {"indexed": {}, "removed": set()})
+
+
+def _memory_backend(kind: str):
+    if not has_app_context():
+        return None
+    backend = current_app.extensions.get(_MEMORY_EXTENSIONS[kind])
+    return backend if isinstance(backend, (MemorySearch, MemoryUserSearch)) else None
+
+
+def _written(kind: str, target, value: str) -> None:
+    session = object_session(target)
+    if session is None or _memory_backend(kind) is None:
+        return
+    pending = _pending(session, kind)
+    pending["removed"].discard(target.id)
+    pending["indexed"][target.id] = value
+
+
+def _deleted(kind: str, target) -> None:
+    session = object_session(target)
+    if session is None or _memory_backend(kind) is None:
+        return
+    pending = _pending(session, kind)
+    pending["indexed"].pop(target.id, None)
+    pending["removed"].add(target.id)
+
+
+@event.listens_for(Note, "after_insert")
+def _note_inserted(mapper, connection, target):
+    _written("notes", target, target.content)
+
+
+@event.listens_for(Note, "after_update")
+def _note_updated(mapper, connection, target):
+    if inspect(target).attrs.content.history.has_changes():
+        _written("notes", target, target.content)
+
+
+@event.listens_for(Note, "after_delete")
+def _note_deleted(mapper, connection, target):
+    _deleted("notes", target)
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(mapper, connection, target):
+    _written("users", target, target.username)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    if inspect(target).attrs.username.history.has_changes():
+        _written("users", target, target.username)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target):
+    _deleted("users", target)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_pending(session):
+    pending = session.info.pop("search_pending", None)
+    if not pending:
+        return
+    for kind, changes in pending.items():
+        backend = _memory_backend(kind)
+        if backend is not None:
+            backend.apply(changes["indexed"], changes["removed"])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop("search_pending", None)
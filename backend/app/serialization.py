@@ -0,0 +1,40 @@
+"""
+Formes de sérialisation et relations qu'elles consomment.
+
+Chaque méthode to_*_dict() des modèles lit certaines relations (creator, user,
+contact_user...). Chargées paresseusement, elles coûtent une requête SELECT par
+ligne (problème N+1). Ce module déclare, pour chaque forme de sortie, les
+options de chargement à appliquer dans les repositories AVANT d'exécuter la
+requête, afin que la sérialisation d'une liste ne déclenche aucune requête.
+"""
+from typing import Callable, Dict, List
+from sqlalchemy.orm import joinedload
+from .models import Note, Assignment, Contact
+
+
+# forme -> fabrique des options de chargement (évaluée à l'appel pour éviter
+# de figer des options avant la configuration complète des mappers)
+SHAPES: Dict[str, Callable[[], List]] = {
+    # Note.to_dict : creator.username
+    "note": lambda: [joinedload(Note.creator)],
+    # Assignment.to_dict : user.username
+    "assignment": lambda: [joinedload(Assignment.user)],
+    # Listes de contacts enrichies : contact_user.username / email
+    "contact": lambda: [joinedload(Contact.contact_user)],
+}
+
+
+def load_options(shape: str) -> List:
+    """
+    Options de chargement nécessaires pour sérialiser une forme sans N+1.
+
+    Args:
+        shape: Nom de forme déclaré dans SHAPES
+
+    Returns:
+        Liste d'options à passer à Query.options()
+
+    Raises:
+        KeyError: Si la forme n'est pas déclarée
+    """
+    return SHAPES[shape]()
@@ -1,6 +1,7 @@
 """
 Service pour la logique métier des assignations.
 """
+import json
 from typing import Dict, Any, List
 from flask import abort
 from ..models import Assignment
@@ -8,11 +9,15 @@ from ..repositories.assignment_repository import AssignmentRepository
 from ..repositories.note_repository import NoteRepository
 from ..repositories.user_repository import UserRepository
 from ..repositories.contact_repository import ContactRepository
+from .. import audit, cache
 
 
 class AssignmentService:
     """Service de gestion de la logique métier des assignations."""
     
+    # Nombre maximal de destinataires par assignation groupée
+    MAX_BULK_RECIPIENTS = 200
+    
     def __init__(self):
         self.assignment_repo = AssignmentRepository()
         self.note_repo = NoteRepository()
@@ -63,7 +68,7 @@ class AssignmentService:
         if user_id != creator_id:
             # Vérifier que c'est un contact mutuel
             contact = self.contact_repo.find_by_user_and_contact(creator_id, user_id)
-            if not contact or not contact.is_mutual():
+            if not contact or not contact.mutual:
                 abort(403, description="Can only assign to mutual contacts")
         
         # Vérifier qu'il n'y a pas déjà une assignation
@@ -82,6 +87,104 @@ class AssignmentService:
         
         return assignment.to_dict()
     
+    def create_assignments_bulk(self, note_id: int, user_ids: List[int],
+                                creator_id: int) -> Dict[str, Any]:
+        """
+        Assigner une note à plusieurs destinataires en une seule transaction.
+        
+        Applique les mêmes règles que create_assignment, mais avec des requêtes
+        ensemblistes (une par règle, quel que soit le nombre de destinataires),
+        un seul INSERT multi-lignes pour les assignations et un seul pour les
+        logs d'audit, validés par un unique commit.
+        
+        Un destinataire refusé n'empêche pas les autres : chacun reçoit son
+        propre résultat ("created" ou "error" avec code et message).
+        
+        Args:
+            note_id: ID de la note
+            user_ids: IDs des destinataires (doublons ignorés)
+            creator_id: ID de l'utilisateur qui assigne (doit être le créateur)
+            
+        Returns:
+            Dictionnaire avec les résultats par destinataire et les compteurs
+            
+        Raises:
+            404: Si la note n'existe pas
+            403: Si l'utilisateur n'est pas le créateur de la note
+            400: Si la liste de destinataires est vide, invalide ou trop longue
+        """
+        if (not isinstance(user_ids, list) or not user_ids
+                or not all(isinstance(uid, int) and not isinstance(uid, bool) for uid in user_ids)):
+            abort(400, description="user_ids must be a non-empty list of integers")
+        
+        # Dédoublonner en conservant l'ordre de la requête
+        user_ids = list(dict.fromkeys(user_ids))
+        if len(user_ids) > self.MAX_BULK_RECIPIENTS:
+            abort(400, description=f"Cannot assign more than {self.MAX_BULK_RECIPIENTS} users at once")
+        
+        note = self.note_repo.find_by_id(note_id)
+        if not note:
+            abort(404, description="Note not found")
+        if note.creator_id != creator_id:
+            abort(403, description="Only the note creator can assign it")
+        
+        # Une requête par règle, pour tous les destinataires
+        existing_users = self.user_repo.find_existing_ids(user_ids)
+        mutual_contacts = self.contact_repo.find_mutual_contact_user_ids(creator_id, user_ids)
+        already_assigned = self.assignment_repo.find_assigned_user_ids(note_id, user_ids)
+        
+        errors = {}
+        to_create = []
+        for user_id in user_ids:
+            if user_id not in existing_users:
+                errors[user_id] = (404, "User not found")
+            elif user_id != creator_id and user_id not in mutual_contacts:
+                errors[user_id] = (403, "Can only assign to mutual contacts")
+            elif user_id in already_assigned:
+                errors[user_id] = (400, "Assignment already exists")
+            else:
+                to_create.append(user_id)
+        
+        created_ids = self.assignment_repo.bulk_create(note_id, to_create)
+        # Logs d'audit en un seul INSERT (dans la transaction de la requête en mode sync)
+        audit.record_many([
+            {
+                "user_id": creator_id,
+                "action_type": "assignment_created",
+                "target_id": created_ids[user_id],
+                "payload": json.dumps({"note_id": note_id, "assigned_to": user_id}),
+            }
+            for user_id in to_create
+        ])
+        
+        assignments = {
+            a.user_id: a for a in self.assignment_repo.find_by_ids(created_ids.values())
+        } if created_ids else {}
+        
+        results = []
+        for user_id in user_ids:
+            if user_id in assignments:
+                results.append({
+                    "user_id": user_id,
+                    "status": "created",
+                    "assignment": assignments[user_id].to_dict()
+                })
+            else:
+                code, message = errors[user_id]
+                results.append({
+                    "user_id": user_id,
+                    "status": "error",
+                    "code": code,
+                    "error": message
+                })
+        
+        return {
+            "note_id": note_id,
+            "created": len(assignments),
+            "failed": len(errors),
+            "results": results
+        }
+    
     def get_assignment(self, assignment_id: int, current_user_id: int) -> Dict[str, Any]:
         """
         Récupérer une assignation par son ID.
@@ -280,6 +383,7 @@ class AssignmentService:
         Returns:
             Liste des assignations non lues
         """
-        assignments = self.assignment_repo.find_by_user(user_id)
-        unread = [a.to_dict() for a in assignments if not a.is_read]
-        return unread
+        return cache.cached(
+            cache.UNREAD, user_id, {},
+            lambda: [a.to_dict() for a in self.assignment_repo.find_unread_by_user(user_id)]
+        )
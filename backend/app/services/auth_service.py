@@ -3,9 +3,9 @@ Service pour la logique métier de l'authentification.
 """
 from typing import Dict, Any, Tuple
 from flask import abort
-from werkzeug.security import generate_password_hash, check_password_hash
 from email_validator import validate_email, EmailNotValidError
 from flask_jwt_extended import create_access_token
+from .. import passwords
 from ..models import User
 from ..repositories.user_repository import UserRepository
 
@@ -54,7 +54,7 @@ class AuthService:
         user = User(
             username=username,
             email=email,
-            password_hash=generate_password_hash(password)
+            password_hash=passwords.hash_password(password)
         )
         
         # Sauvegarder
@@ -85,6 +85,7 @@ class AuthService:
         Raises:
             400: Si les données sont manquantes
             401: Si les credentials sont invalides
+            503: Si le service de hachage est saturé
         """
         # Validation
         if not email or not password:
@@ -93,9 +94,14 @@ class AuthService:
         # Chercher l'utilisateur par email
         user = self.user_repo.find_by_email(email)
         
-        if not user or not check_password_hash(user.password_hash, password):
+        if not user or not passwords.verify_password(user.password_hash, password):
             abort(401, description="Invalid credentials")
         
+        # Hash produit avec un ancien algorithme / coût : recalculé avec la configuration courante
+        new_hash = passwords.rehash_if_needed(user.password_hash, password)
+        if new_hash:
+            self.user_repo.update_password_hash(user, new_hash)
+        
         # Générer le token
         access_token = create_access_token(identity=str(user.id))
         
@@ -3,6 +3,7 @@ Service pour la logique métier des contacts.
 """
 from typing import Dict, Any, List
 from flask import abort
+from .. import cache
 from ..models import Contact
 from ..repositories.contact_repository import ContactRepository
 from ..repositories.user_repository import UserRepository
@@ -27,6 +28,10 @@ class ContactService:
         Returns:
             Liste des contacts avec is_mutual
         """
+        return cache.cached(cache.CONTACTS, user_id, {}, lambda: self._get_contacts_for_user(user_id))
+    
+    def _get_contacts_for_user(self, user_id: int) -> List[Dict[str, Any]]:
+        """Calcul de get_contacts_for_user sans cache."""
         # Récupérer l'utilisateur pour l'inclure comme contact spécial
         user = self.user_repo.find_by_id(user_id)
         if not user:
@@ -47,6 +52,7 @@ class ContactService:
         }]
         
         # Contacts réels
+        # Réciprocité : colonne précalculée `mutual`, sans requête supplémentaire
         contacts = self.contact_repo.find_by_user(user_id)
         for contact in contacts:
             contact_dict = contact.to_dict()
@@ -73,6 +79,10 @@ class ContactService:
         Returns:
             Liste des utilisateurs assignables
         """
+        return cache.cached(cache.ASSIGNABLE, user_id, {}, lambda: self._get_assignable_users(user_id))
+    
+    def _get_assignable_users(self, user_id: int) -> List[Dict[str, Any]]:
+        """Calcul de get_assignable_users sans cache."""
         # Inclure soi-même
         user = self.user_repo.find_by_id(user_id)
         if not user:
@@ -87,18 +97,16 @@ class ContactService:
             "is_mutual": True
         }]
         
-        # Ajouter les contacts mutuels
-        contacts = self.contact_repo.find_by_user(user_id)
-        for contact in contacts:
-            if contact.is_mutual():
-                assignable.append({
-                    "id": contact.contact_user_id,
-                    "username": contact.contact_user.username if contact.contact_user else None,
-                    "email": contact.contact_user.email if contact.contact_user else None,
-                    "nickname": contact.nickname,
-                    "is_self": False,
-                    "is_mutual": True
-                })
+        # Ajouter les contacts mutuels (lecture indexée de la réciprocité précalculée)
+        for contact in self.contact_repo.find_mutual_by_user(user_id):
+            assignable.append({
+                "id": contact.contact_user_id,
+                "username": contact.contact_user.username if contact.contact_user else None,
+                "email": contact.contact_user.email if contact.contact_user else None,
+                "nickname": contact.nickname,
+                "is_self": False,
+                "is_mutual": True
+            })
         
         return assignable
     
@@ -3,13 +3,16 @@ Service pour la logique métier des notes.
 Cette couche orchestre les repositories et contient la logique métier.
 """
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from datetime import datetime, timezone
 from flask import abort
 from ..models import Note
-from ..repositories.note_repository import NoteRepository
+from .. import cache
+from ..pagination import encode_cursor, decode_cursor, InvalidCursor
+from ..repositories.note_repository import NoteRepository, SORT_KEYS, RELEVANCE
 from ..repositories.assignment_repository import AssignmentRepository
 from ..repositories.user_repository import UserRepository
+from ..repositories.action_log_repository import ActionLogRepository
 
 
 class NoteService:
@@ -27,6 +30,134 @@ class NoteService:
         self.note_repo = NoteRepository()
         self.assignment_repo = AssignmentRepository()
         self.user_repo = UserRepository()
+        self.action_log_repo = ActionLogRepository()
+    
+    def list_notes(self, user_id: int, filter_param: Optional[str] = None,
+                   search_query: Optional[str] = None, creator_id: Optional[int] = None,
+                   important: Optional[bool] = None, sort: str = 'date_desc',
+                   page: int = 1, per_page: int = 20, cursor: Optional[str] = None,
+                   include_total: bool = False) -> Dict[str, Any]:
+        """
+        Lister les notes visibles par un utilisateur (créateur OU destinataire).
+        
+        Deux modes de pagination :
+        - OFFSET (page/per_page) : renvoie total/pages, coût croissant avec la page
+        - Curseur (cursor non None) : keyset sur (created_date, id), coût constant ;
+          le COUNT n'est exécuté que si include_total est demandé
+        
+        Args:
+            user_id: ID de l'utilisateur courant
+            filter_param: Filtre nommé (voir NoteRepository.build_visible_query)
+            search_query: Texte recherché dans le contenu
+            creator_id: Restreindre aux notes d'un créateur
+            important: Filtre booléen direct sur Note.important
+            sort: 'date_desc', 'date_asc', 'important_first' ou 'relevance'
+                  (pertinence, avec search_query et en mode OFFSET seulement)
+            page: Numéro de page (mode OFFSET)
+            per_page: Nombre d'items par page
+            cursor: Jeton opaque ('' pour la première page en mode curseur)
+            include_total: Calculer le total en mode curseur
+            
+        Returns:
+            Dictionnaire avec les notes et les métadonnées de pagination
+            
+        Raises:
+            400: Si le curseur est invalide, ne correspond pas au tri demandé,
+                 ou est combiné au tri par pertinence
+        """
+        if sort not in SORT_KEYS and not (sort == RELEVANCE and search_query):
+            sort = 'date_desc'
+        if sort == RELEVANCE and cursor is not None:
+            abort(400, description="Relevance sort does not support cursor pagination")
+        
+        params = {
+            "filter": filter_param, "q": search_query, "creator_id": creator_id,
+            "important": important, "sort": sort, "page": page, "per_page": per_page,
+            "cursor": cursor, "include_total": include_total
+        }
+        return cache.cached(cache.NOTES, user_id, params, lambda: self._list_notes(
+            user_id, filter_param, search_query, creator_id, important,
+            sort, page, per_page, cursor, include_total
+        ))
+    
+    def _list_notes(self, user_id: int, filter_param: Optional[str], search_query: Optional[str],
+                    creator_id: Optional[int], important: Optional[bool], sort: str,
+                    page: int, per_page: int, cursor: Optional[str],
+                    include_total: bool) -> Dict[str, Any]:
+        """Calcul de list_notes sans cache (mêmes arguments)."""
+        query = self.note_repo.build_visible_query(
+            user_id,
+            filter_param=filter_param,
+            search_query=search_query,
+            creator_id=creator_id,
+            important=important
+        )
+        
+        if cursor is None:
+            if sort == RELEVANCE:
+                pagination = self.note_repo.paginate_ranked(query, search_query, page, per_page)
+            else:
+                pagination = self.note_repo.paginate_offset(query, sort, page, per_page)
+            return {
+                "notes": [self._list_item(note, user_id) for note in pagination.items],
+                "total": pagination.total,
+                "page": page,
+                "per_page": per_page,
+                "pages": pagination.pages,
+                "has_next": pagination.has_next,
+                "has_prev": pagination.has_prev
+            }
+        
+        after = None
+        if cursor:
+            try:
+                decoded = decode_cursor(cursor)
+            except InvalidCursor:
+                abort(400, description="Invalid cursor")
+            if decoded.get("sort") != sort or not isinstance(decoded.get("after"), list):
+                abort(400, description="Cursor does not match the requested sort")
+            after = tuple(decoded["after"])
+            if len(after) != len(SORT_KEYS[sort]):
+                abort(400, description="Invalid cursor")
+        
+        notes, has_next = self.note_repo.paginate_keyset(query, sort, after, per_page)
+        
+        next_cursor = None
+        if has_next and notes:
+            next_cursor = encode_cursor({
+                "sort": sort,
+                "after": list(self.note_repo.sort_values(notes[-1], sort))
+            })
+        
+        response = {
+            "notes": [self._list_item(note, user_id) for note in notes],
+            "per_page": per_page,
+            "sort": sort,
+            "has_next": has_next,
+            "next_cursor": next_cursor
+        }
+        if include_total:
+            response["total"] = query.order_by(None).count()
+        return response
+    
+    @staticmethod
+    def _list_item(note: Note, user_id: int) -> Dict[str, Any]:
+        """
+        Vignette d'une note dans la liste ; le créateur y voit l'avancement des destinataires.
+        
+        Lu sur les compteurs de la note : la table des assignations n'est pas lue.
+        
+        Args:
+            note: Instance de Note
+            user_id: ID de l'utilisateur courant
+            
+        Returns:
+            Dictionnaire de la note (+ total_recipients, read_count, completed_count pour le créateur)
+        """
+        note_dict = note.to_dict()
+        if note.creator_id == user_id:
+            note_dict.update(note.to_progress_dict())
+        return note_dict
     
     def get_note_for_user(self, note_id: int, user_id: int) -> Dict[str, Any]:
         """
@@ -87,6 +218,8 @@ class NoteService:
             Dictionnaire avec toutes les informations pour le créateur
         """
         response = note.to_dict()
+        # Avancement (destinataires, lus, terminés) lu sur les compteurs de la note
+        response.update(note.to_progress_dict())
         
         # Récupérer toutes les assignations
         all_assignments = self.assignment_repo.find_by_note(note.id)
@@ -366,9 +499,7 @@ class NoteService:
         return {
             "note_id": note.id,
             "creator_id": note.creator_id,
-            "total_recipients": len(assignments),
-            "read_count": sum(1 for a in assignments if a.is_read),
-            "completed_count": sum(1 for a in assignments if a.recipient_status == 'terminé'),
+            **note.to_progress_dict(),
             "assignments": [
                 {
                     "id": a.id,
@@ -383,31 +514,70 @@ class NoteService:
             ]
         }
     
-    def get_orphan_notes(self, user_id: int) -> List[Dict[str, Any]]:
+    def get_orphan_notes(self, user_id: int, cursor: Optional[str] = None,
+                         per_page: int = 20) -> Dict[str, Any]:
         """
         Récupérer les notes orphelines (sans aucune assignation active).
         
+        Sans curseur, toutes les notes sont renvoyées (compatibilité). Avec un
+        curseur ('' pour la première page), pages keyset de per_page notes sur
+        (created_date, id), plus récentes en premier.
+        
         Args:
             user_id: ID de l'utilisateur créateur
+            cursor: Jeton opaque de pagination (None = toutes les notes)
+            per_page: Nombre d'items par page en mode curseur
             
         Returns:
-            Liste des notes orphelines
+            {notes, count} ; en mode curseur, avec per_page, has_next et next_cursor.
+            count est le nombre total de notes orphelines
+            
+        Raises:
+            400: Si le curseur est invalide
         """
-        # Récupérer toutes les notes créées par l'utilisateur (non supprimées)
-        my_notes = self.note_repo.find_created_by(user_id, include_deleted=False)
+        if cursor is None:
+            notes, _ = self.note_repo.find_orphans(user_id)
+            return {"notes": self._orphan_dicts(notes), "count": len(notes)}
         
-        orphan_notes = []
-        for note in my_notes:
-            # Vérifier si cette note a encore des assignations actives
-            active_assignments = self.assignment_repo.find_by_note(note.id)
-            
-            if len(active_assignments) == 0:
-                # Note sans assignation = note orpheline
-                note_dict = note.to_dict()
-                note_dict['is_orphan'] = True
-                orphan_notes.append(note_dict)
+        after = None
+        if cursor:
+            try:
+                decoded = decode_cursor(cursor)
+            except InvalidCursor:
+                abort(400, description="Invalid cursor")
+            after = decoded.get("after")
+            if not isinstance(after, list) or len(after) != len(SORT_KEYS['date_desc']):
+                abort(400, description="Invalid cursor")
+            after = tuple(after)
+        
+        notes, has_next = self.note_repo.find_orphans(user_id, after, per_page)
+        next_cursor = None
+        if has_next and notes:
+            next_cursor = encode_cursor({"after": list(self.note_repo.sort_values(notes[-1], 'date_desc'))})
+        return {
+            "notes": self._orphan_dicts(notes),
+            "count": self.note_repo.count_orphans(user_id),
+            "per_page": per_page,
+            "has_next": has_next,
+            "next_cursor": next_cursor
+        }
+    
+    def count_orphan_notes(self, user_id: int) -> int:
+        """
+        Nombre de notes orphelines (badge), lu sur l'index du compteur assignment_count.
         
-        return orphan_notes
+        Args:
+            user_id: ID de l'utilisateur créateur
+            
+        Returns:
+            Nombre de notes orphelines
+        """
+        return self.note_repo.count_orphans(user_id)
+    
+    @staticmethod
+    def _orphan_dicts(notes: List[Note]) -> List[Dict[str, Any]]:
+        """Sérialiser des notes orphelines (marquées is_orphan)."""
+        return [{**note.to_dict(), 'is_orphan': True} for note in notes]
     
     def get_deletion_history(self, note_id: int, user_id: int) -> List[Dict[str, Any]]:
         """
@@ -426,8 +596,6 @@ class NoteService:
             404: Si la note n'existe pas
             403: Si l'utilisateur n'est pas le créateur
         """
-        from ..models import ActionLog
-        
         # Récupérer la note
         note = self.note_repo.find_by_id(note_id)
         if not note:
@@ -437,32 +605,19 @@ class NoteService:
         if note.creator_id != user_id:
             abort(403, description="Only the creator can view deletion history")
         
-        # Récupérer les logs de suppressions d'assignations
-        deletion_logs = ActionLog.query.filter_by(
-            action_type="assignment_deleted"
-        ).all()
-        
-        # Filtrer ceux qui concernent cette note
-        deletions = []
-        for log in deletion_logs:
-            try:
-                payload = json.loads(log.payload)
-                if payload.get("note_id") == note_id:
-                    assigned_user_id = payload.get("assigned_user_id")
-                    user = self.user_repo.find_by_id(assigned_user_id)
-                    deleted_by_user = self.user_repo.find_by_id(log.user_id)
-                    
-                    deletions.append({
-                        "user_id": assigned_user_id,
-                        "username": user.username if user else f"User #{assigned_user_id}",
-                        "deleted_date": log.timestamp.isoformat() if log.timestamp else None,
-                        "deleted_by": log.user_id,
-                        "deleted_by_username": deleted_by_user.username if deleted_by_user else f"User #{log.user_id}",
-                    })
-            except (json.JSONDecodeError, KeyError):
-                continue
+        # Logs de suppression de cette note (requête indexée sur note_id)
+        history = self.action_log_repo.find_note_history(note_id, ["assignment_deleted"])
         
-        return deletions
+        return [
+            {
+                "user_id": log.subject_user_id,
+                "username": username or f"User #{log.subject_user_id}",
+                "deleted_date": log.timestamp.isoformat() if log.timestamp else None,
+                "deleted_by": log.user_id,
+                "deleted_by_username": deleted_by_username or f"User #{log.user_id}",
+            }
+            for log, username, deleted_by_username in history
+        ]
     
     def get_completion_history(self, note_id: int, user_id: int) -> List[Dict[str, Any]]:
         """
@@ -482,8 +637,6 @@ class NoteService:
             404: Si la note n'existe pas
             403: Si l'utilisateur n'est pas le créateur
         """
-        from ..models import ActionLog
-        
         # Récupérer la note
         note = self.note_repo.find_by_id(note_id)
         if not note:
@@ -493,69 +646,48 @@ class NoteService:
         if note.creator_id != user_id:
             abort(403, description="Only the creator can view completion history")
         
-        # Récupérer les logs de completions ET d'uncompletions
-        completion_logs = ActionLog.query.filter(
-            ActionLog.action_type.in_(['assignment_completed', 'assignment_uncompleted'])
-        ).order_by(ActionLog.timestamp.desc()).all()
-        
-        # Filtrer et déterminer l'état actuel de chaque assignation
-        completions_by_assignment = {}
+        # Une seule requête indexée : completions, décochages et suppressions de cette note
+        history = self.action_log_repo.find_note_history(
+            note_id, ["assignment_completed", "assignment_uncompleted", "assignment_deleted"]
+        )
         
-        for log in completion_logs:
-            try:
-                payload = json.loads(log.payload)
-                if payload.get("note_id") == note_id:
-                    assignment_id = log.target_id
-                    
-                    # Garder seulement le log le plus récent pour chaque assignation
-                    if assignment_id not in completions_by_assignment:
-                        completions_by_assignment[assignment_id] = log
-                    elif log.timestamp > completions_by_assignment[assignment_id].timestamp:
-                        completions_by_assignment[assignment_id] = log
-            except (json.JSONDecodeError, KeyError):
-                continue
+        # Log le plus récent de chaque assignation (parcours du plus récent au plus ancien)
+        latest_by_assignment = {}
+        for log, username, _ in reversed(history):
+            if log.action_type != "assignment_deleted" and log.target_id not in latest_by_assignment:
+                latest_by_assignment[log.target_id] = (log, username)
         
         # Construire la liste des completions actives
         completions = []
-        for assignment_id, log in completions_by_assignment.items():
+        for assignment_id, (log, username) in latest_by_assignment.items():
             if log.action_type == "assignment_completed":
-                payload = json.loads(log.payload)
-                assigned_user_id = payload.get("user_id")
-                user = self.user_repo.find_by_id(assigned_user_id)
-                
                 completions.append({
                     "assignment_id": assignment_id,
-                    "user_id": assigned_user_id,
-                    "username": user.username if user else f"User #{assigned_user_id}",
+                    "user_id": log.subject_user_id,
+                    "username": username or f"User #{log.subject_user_id}",
                     "completed_date": log.timestamp.isoformat() if log.timestamp else None,
                     "completed_by": log.user_id,
                 })
         
-        # AJOUT : Aussi inclure les assignations supprimées qui étaient terminées
-        # Récupérer les logs de suppressions
-        deletion_logs = ActionLog.query.filter_by(
-            action_type="assignment_deleted"
-        ).all()
-        
-        for log in deletion_logs:
+        # Aussi inclure les assignations supprimées qui étaient terminées
+        for log, username, _ in history:
+            if log.action_type != "assignment_deleted":
+                continue
             try:
                 payload = json.loads(log.payload)
-                if payload.get("note_id") == note_id and payload.get("was_completed"):
-                    # Cette assignation était terminée quand elle a été supprimée
-                    assigned_user_id = payload.get("assigned_user_id")
-                    user = self.user_repo.find_by_id(assigned_user_id)
-                    
-                    # Vérifier si on ne l'a pas déjà ajoutée (assignation toujours active)
-                    if not any(c["user_id"] == assigned_user_id for c in completions):
-                        completions.append({
-                            "assignment_id": None,  # L'assignation n'existe plus
-                            "user_id": assigned_user_id,
-                            "username": user.username if user else f"User #{assigned_user_id}",
-                            "completed_date": payload.get("completed_date"),  # Date de completion depuis le log
-                            "completed_by": assigned_user_id,
-                            "was_deleted": True,  # Indication que c'était une assignation supprimée
-                        })
-            except (json.JSONDecodeError, KeyError):
+            except (TypeError, json.JSONDecodeError):
                 continue
+            # Vérifier si on ne l'a pas déjà ajoutée (assignation toujours active)
+            if payload.get("was_completed") and not any(
+                c["user_id"] == log.subject_user_id for c in completions
+            ):
+                completions.append({
+                    "assignment_id": None,  # L'assignation n'existe plus
+                    "user_id": log.subject_user_id,
+                    "username": username or f"User #{log.subject_user_id}",
+                    "completed_date": payload.get("completed_date"),  # Date de completion depuis le log
+                    "completed_by": log.subject_user_id,
+                    "was_deleted": True,  # Indication que c'était une assignation supprimée
+                })
         
         return completions
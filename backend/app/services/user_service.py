@@ -1,12 +1,16 @@
 """
 Service pour la logique métier des utilisateurs.
 """
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Union
 from flask import abort
-from werkzeug.security import generate_password_hash
+from .. import passwords
 from ..models import User
+from ..pagination import InvalidCursor, iter_batches, paginate_by_id
 from ..repositories.user_repository import UserRepository
 
+# Nombre maximal de résultats de GET /users/search
+MAX_SEARCH_RESULTS = 50
+
 
 class UserService:
     """Service de gestion de la logique métier des utilisateurs."""
@@ -106,7 +110,7 @@ class UserService:
             if len(password) < 6:
                 abort(400, description="Password must be at least 6 characters")
             
-            user.password = generate_password_hash(password)
+            user.password_hash = passwords.hash_password(password)
         
         # Mise à jour du rôle (admin uniquement)
         if role is not None:
@@ -159,29 +163,72 @@ class UserService:
         
         return user_dict
     
-    def list_users(self, current_user_id: int, is_admin: bool = False, 
-                   page: int = 1, per_page: int = 20) -> List[Dict[str, Any]]:
+    def list_users(self, current_user_id: int, is_admin: bool = False,
+                   cursor: Optional[str] = None, per_page: int = 20) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """
-        Lister tous les utilisateurs.
+        Lister les utilisateurs.
         
         Accessible à tous pour compatibilité (peut être restreint aux admins si nécessaire).
+        Sans curseur, toute la table est renvoyée (ancienne API) ; avec un curseur,
+        une page de per_page utilisateurs triés par id.
         
         Args:
             current_user_id: ID de l'utilisateur qui demande
             is_admin: Si l'utilisateur qui demande est admin
-            page: Numéro de page (défaut: 1)
-            per_page: Éléments par page (défaut: 20)
+            cursor: Jeton de pagination ('' pour la première page, None pour tout)
+            per_page: Éléments par page en mode curseur (défaut: 20)
             
         Returns:
-            Liste des utilisateurs (pour compatibilité avec l'ancienne API)
+            Liste des utilisateurs, ou {users, per_page, has_next, next_cursor} en mode curseur
             
         Raises:
-            Aucune exception
+            400: Si le curseur est invalide
+        """
+        if cursor is None:
+            users = User.query.order_by(User.id.asc()).all()
+            return [user.to_dict() for user in users]
+        
+        try:
+            users, next_cursor = paginate_by_id(User.query, User.id, cursor, per_page)
+        except InvalidCursor:
+            abort(400, description="Invalid cursor")
+        return {
+            "users": [user.to_dict() for user in users],
+            "per_page": per_page,
+            "has_next": next_cursor is not None,
+            "next_cursor": next_cursor
+        }
+    
+    def iter_users(self, batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Parcourir tous les utilisateurs par lots, sans charger la table en mémoire.
+        
+        Args:
+            batch_size: Nombre d'utilisateurs lus par aller-retour
+            
+        Returns:
+            Itérateur de listes d'utilisateurs sérialisés, triés par id
+        """
+        query = User.query.order_by(User.id.asc())
+        for batch in iter_batches(query, batch_size):
+            yield [user.to_dict() for user in batch]
+    
+    def search_users(self, query: str, current_user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """
-        # Pour compatibilité avec l'ancienne API, retourner une liste simple
-        from ..models import User
+        Rechercher des utilisateurs par username (préfixe puis correspondance approchée).
+        
+        Remplace le chargement de toute la table pour filtrer côté client.
         
-        users = User.query.order_by(User.id.asc()).all()
+        Args:
+            query: Texte saisi
+            current_user_id: Utilisateur qui recherche (exclu des résultats)
+            limit: Nombre maximal de résultats (1 à MAX_SEARCH_RESULTS)
+            
+        Returns:
+            Liste des utilisateurs trouvés, les plus pertinents d'abord
+        """
+        limit = max(1, min(limit, MAX_SEARCH_RESULTS))
+        users = self.user_repo.search_by_username(query, limit, exclude_user_id=current_user_id)
         return [user.to_dict() for user in users]
     
     def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
@@ -0,0 +1,350 @@
+"""
+Statistiques d'administration lues depuis des compteurs agrégés.
+
+GET /v1/admin/stats émettait sept COUNT(*) sur des tables entières à chaque
+appel, et GET /v1/action_logs/stats deux GROUP BY sur toute la table d'audit.
+Les tableaux de bord lisent désormais quelques lignes pré-agrégées :
+
+- platform_stats : un compteur nommé par ligne.
+  * Compteurs d'entités (total_users, total_notes...) : recalculés ensemble
+    par une seule requête (refresh) quand ils ont plus de STATS_MAX_AGE_SECONDS,
+    ou par la commande `flask stats refresh` (cron). Les suppressions en cascade
+    faites par la base rendent un maintien ligne à ligne peu fiable.
+  * total_action_logs / anonymous_action_logs : maintenus dans la transaction
+    qui insère les logs.
+- action_log_daily_stats : logs par jour et par type d'action.
+- action_log_user_stats : logs par auteur (reportés sur anonymous_action_logs
+  à la suppression du compte, comme action_logs.user_id passe à NULL).
+
+Les agrégats d'audit sont incrémentés par UPSERT à chaque flush contenant des
+ActionLog (ORM), et par audit.py / ActionLogRepository.bulk_create pour les
+INSERT multi-lignes. `?fresh=1` recompte tout exactement depuis les tables ;
+`flask stats rebuild` reconstruit les agrégats d'audit après un import direct,
+ainsi que les compteurs dénormalisés des notes (assignment_count, read_count,
+completed_count : notes orphelines et avancement des destinataires).
+"""
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+from . import db, unit_of_work
+from .models import (
+    ActionLog, ActionLogDailyStat, ActionLogUserStat, Assignment, Contact, Note,
+    PlatformStat, User
+)
+
+TOTAL_ACTION_LOGS = "total_action_logs"
+ANONYMOUS_ACTION_LOGS = "anonymous_action_logs"
+
+
+def _entity_counts() -> Dict[str, Any]:
+    """Compteurs recalculés par refresh (nom -> SELECT COUNT)."""
+    return {
+        "total_users": select(func.count(User.id)),
+        "total_notes": select(func.count(Note.id)),
+        "total_contacts": select(func.count(Contact.id)),
+        "total_assignments": select(func.count(Assignment.id)),
+        "important_notes": select(func.count(Note.id)).where(Note.important.is_(True)),
+        "deleted_notes": select(func.count(Note.id)).where(Note.delete_date.isnot(None)),
+    }
+
+
+ENTITY_COUNTERS = tuple(_entity_counts())
+
+
+def _now() -> datetime:
+    """Horodatage UTC naïf (colonnes DateTime sans fuseau)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+# ---------- UPSERT portables ----------
+
+def _dialect_insert(connection):
+    name = connection.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        raise NotImplementedError(f"Stats counters do not support the {name} dialect")
+    return dialect_insert
+
+
+def _increment(connection, model, amounts: Mapping[Tuple, int]) -> None:
+    """Ajouter des quantités à des compteurs, en créant les lignes absentes (un seul UPSERT)."""
+    if not amounts:
+        return
+    table = model.__table__
+    keys = [column.name for column in table.primary_key.columns]
+    value = "value" if "value" in table.c else "count"
+    rows = []
+    for key, amount in amounts.items():
+        row = dict(zip(keys, key))
+        row[value] = amount
+        if "updated_at" in table.c:
+            row["updated_at"] = _now()
+        rows.append(row)
+    statement = _dialect_insert(connection)(table).values(rows)
+    changes = {value: table.c[value] + statement.excluded[value]}
+    if "updated_at" in table.c:
+        changes["updated_at"] = statement.excluded.updated_at
+    connection.execute(statement.on_conflict_do_update(index_elements=keys, set_=changes))
+
+
+def _store(connection, values: Mapping[str, int]) -> None:
+    """Écrire des valeurs absolues dans platform_stats (un seul UPSERT)."""
+    table = PlatformStat.__table__
+    now = _now()
+    statement = _dialect_insert(connection)(table).values(
+        [{"name": name, "value": value, "updated_at": now} for name, value in values.items()]
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=["name"],
+        set_={"value": statement.excluded.value, "updated_at": statement.excluded.updated_at}
+    ))
+
+
+# ---------- Agrégats d'audit (transactionnels) ----------
+
+def count_action_logs(connection, rows: Iterable[Mapping[str, Any]]) -> None:
+    """
+    Incrémenter les agrégats d'audit pour des logs insérés sur cette connexion.
+
+    Args:
+        connection: Connexion de la transaction qui insère les logs
+        rows: Colonnes des logs (action_type, user_id, timestamp)
+    """
+    daily: Counter = Counter()
+    per_user: Counter = Counter()
+    totals: Counter = Counter()
+    for row in rows:
+        timestamp = row.get("timestamp") or _now()
+        daily[(timestamp.date(), row["action_type"])] += 1
+        totals[(TOTAL_ACTION_LOGS,)] += 1
+        if row.get("user_id") is None:
+            totals[(ANONYMOUS_ACTION_LOGS,)] += 1
+        else:
+            per_user[(row["user_id"],)] += 1
+    _increment(connection, PlatformStat, totals)
+    _increment(connection, ActionLogDailyStat, daily)
+    _increment(connection, ActionLogUserStat, per_user)
+
+
+def _forget_users(connection, user_ids: List[int]) -> None:
+    """Reporter les logs des comptes supprimés sur anonymous_action_logs."""
+    moved = connection.execute(
+        delete(ActionLogUserStat.__table__)
+        .where(ActionLogUserStat.user_id.in_(user_ids))
+        .returning(ActionLogUserStat.count)
+    ).scalars().all()
+    if sum(moved):
+        _increment(connection, PlatformStat, {(ANONYMOUS_ACTION_LOGS,): sum(moved)})
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_logs(session, flush_context):
+    # session.new / session.deleted reflètent encore l'état d'avant le flush
+    logs = [obj for obj in session.new if isinstance(obj, ActionLog)]
+    deleted_users = [obj.id for obj in session.deleted if isinstance(obj, User)]
+    if not logs and not deleted_users:
+        return
+    connection = session.connection()
+    if logs:
+        count_action_logs(connection, [
+            {"action_type": log.action_type, "user_id": log.user_id, "timestamp": log.timestamp}
+            for log in logs
+        ])
+    if deleted_users:
+        _forget_users(connection, deleted_users)
+
+
+# ---------- Lecture ----------
+
+def refresh() -> Dict[str, int]:
+    """
+    Recompter les entités en une requête et mettre à jour platform_stats.
+
+    Returns:
+        Dictionnaire {compteur: valeur}
+    """
+    counts = _entity_counts()
+    row = db.session.execute(select(*[
+        query.scalar_subquery().label(name) for name, query in counts.items()
+    ])).one()
+    values = dict(row._mapping)
+    _store(db.session.connection(), values)
+    return values
+
+
+def platform_stats(fresh: bool = False) -> Dict[str, Any]:
+    """
+    Statistiques globales lues depuis platform_stats.
+
+    Les compteurs d'entités sont recalculés (une requête) s'ils manquent ou
+    ont plus de STATS_MAX_AGE_SECONDS. Avec fresh, tout est recompté depuis
+    les tables, y compris les logs d'actions.
+
+    Args:
+        fresh: Recomptage exact
+
+    Returns:
+        Compteurs et date du dernier recomptage des entités (computed_at)
+
+    Raises:
+        Aucune exception
+    """
+    rows = {stat.name: stat for stat in db.session.execute(select(PlatformStat)).scalars()}
+    entity_rows = [rows.get(name) for name in ENTITY_COUNTERS]
+    max_age = timedelta(seconds=current_app.config["STATS_MAX_AGE_SECONDS"])
+    stale = any(stat is None or _now() - stat.updated_at > max_age for stat in entity_rows)
+
+    if fresh or stale:
+        values = refresh()
+        computed_at = _now()
+        unit_of_work.commit()
+    else:
+        values = {name: rows[name].value for name in ENTITY_COUNTERS}
+        computed_at = min(stat.updated_at for stat in entity_rows)
+
+    if fresh:
+        values[TOTAL_ACTION_LOGS] = db.session.execute(select(func.count(ActionLog.id))).scalar()
+    else:
+        values[TOTAL_ACTION_LOGS] = rows[TOTAL_ACTION_LOGS].value if TOTAL_ACTION_LOGS in rows else 0
+    return {**values, "computed_at": computed_at.isoformat()}
+
+
+def action_log_stats(fresh: bool = False, days: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Nombre de logs par type d'action et par auteur.
+
+    Args:
+        fresh: GROUP BY exacts sur action_logs plutôt que les agrégats
+        days: Ajouter la série quotidienne par type des `days` derniers jours
+
+    Returns:
+        {"action_counts": [...], "user_counts": [...], "daily": [...] si days}
+    """
+    if fresh:
+        action_counts = db.session.query(
+            ActionLog.action_type, func.count(ActionLog.id)
+        ).group_by(ActionLog.action_type).all()
+        user_counts = db.session.query(
+            ActionLog.user_id, func.count(ActionLog.id)
+        ).group_by(ActionLog.user_id).all()
+    else:
+        action_counts = db.session.query(
+            ActionLogDailyStat.action_type, func.sum(ActionLogDailyStat.count)
+        ).group_by(ActionLogDailyStat.action_type).all()
+        user_counts = db.session.query(ActionLogUserStat.user_id, ActionLogUserStat.count).all()
+        anonymous = db.session.get(PlatformStat, ANONYMOUS_ACTION_LOGS)
+        if anonymous and anonymous.value:
+            user_counts.append((None, anonymous.value))
+
+    result = {
+        "action_counts": [{"action_type": action_type, "count": int(count)}
+                          for action_type, count in action_counts],
+        "user_counts": [{"user_id": user_id, "count": int(count)} for user_id, count in user_counts],
+    }
+    if days is not None:
+        if fresh:
+            day = func.date(ActionLog.timestamp)
+            daily = db.session.query(day, ActionLog.action_type, func.count(ActionLog.id)).filter(
+                ActionLog.timestamp >= datetime.combine(_now().date() - timedelta(days=days - 1), datetime.min.time())
+            ).group_by(day, ActionLog.action_type).order_by(day, ActionLog.action_type).all()
+        else:
+            daily = db.session.query(
+                ActionLogDailyStat.day, ActionLogDailyStat.action_type, ActionLogDailyStat.count
+            ).filter(
+                ActionLogDailyStat.day >= _now().date() - timedelta(days=days - 1)
+            ).order_by(ActionLogDailyStat.day, ActionLogDailyStat.action_type).all()
+        result["daily"] = [{"day": str(day), "action_type": action_type, "count": int(count)}
+                           for day, action_type, count in daily]
+    return result
+
+
+# ---------- Maintenance ----------
+
+def rebuild() -> Dict[str, int]:
+    """
+    Reconstruire tous les agrégats depuis les tables (après import ou dérive).
+
+    Returns:
+        Compteurs recalculés
+    """
+    connection = db.session.connection()
+    connection.execute(delete(ActionLogDailyStat.__table__))
+    connection.execute(delete(ActionLogUserStat.__table__))
+    day = func.date(ActionLog.timestamp)
+    connection.execute(insert(ActionLogDailyStat.__table__).from_select(
+        ["day", "action_type", "count"],
+        select(day, ActionLog.action_type, func.count(ActionLog.id)).group_by(day, ActionLog.action_type)
+    ))
+    connection.execute(insert(ActionLogUserStat.__table__).from_select(
+        ["user_id", "count"],
+        select(ActionLog.user_id, func.count(ActionLog.id))
+        .where(ActionLog.user_id.isnot(None)).group_by(ActionLog.user_id)
+    ))
+    values = refresh()
+    values[TOTAL_ACTION_LOGS] = db.session.execute(select(func.count(ActionLog.id))).scalar()
+    values[ANONYMOUS_ACTION_LOGS] = db.session.execute(
+        select(func.count(ActionLog.id)).where(ActionLog.user_id.is_(None))
+    ).scalar()
+    _store(connection, {name: values[name] for name in (TOTAL_ACTION_LOGS, ANONYMOUS_ACTION_LOGS)})
+    values["assignment_counts_fixed"] = _rebuild_assignment_counts(connection)
+    db.session.commit()
+    return values
+
+
+def _rebuild_assignment_counts(connection) -> int:
+    """Réaligner les compteurs d'assignations des notes sur la table des assignations (notes corrigées)."""
+    notes = Note.__table__
+
+    def count(*criteria):
+        return (
+            select(func.count(Assignment.id))
+            .where(Assignment.note_id == notes.c.id, *criteria).scalar_subquery()
+        )
+
+    actual = {
+        "assignment_count": count(),
+        "read_count": count(Assignment.is_read.is_(True)),
+        "completed_count": count(Assignment.recipient_status == "terminé"),
+    }
+    return connection.execute(
+        update(notes).where(or_(*[notes.c[name] != value for name, value in actual.items()])).values(actual)
+    ).rowcount
+
+
+stats_cli = AppGroup("stats", help="Compteurs agrégés des statistiques d'administration.")
+
+
+@stats_cli.command("refresh")
+def _refresh_command():
+    """Recompter les entités (à planifier, ex : toutes les minutes)."""
+    values = refresh()
+    db.session.commit()
+    for name, value in values.items():
+        click.echo(f"{name}: {value}")
+
+
+@stats_cli.command("rebuild")
+def _rebuild_command():
+    """Reconstruire aussi les agrégats des logs d'actions."""
+    for name, value in rebuild().items():
+        click.echo(f"{name}: {value}")
+
+
+def init_app(app) -> None:
+    """
+    Configurer l'âge maximal des compteurs et enregistrer `flask stats`.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault("STATS_MAX_AGE_SECONDS", int(os.getenv("STATS_MAX_AGE_SECONDS", "300")))
+    app.cli.add_command(stats_cli)
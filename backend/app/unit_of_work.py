@@ -0,0 +1,117 @@
+"""
+Unité de travail à l'échelle de la requête HTTP.
+
+Sans elle, chaque appel de repository (save, delete, mark_as_read...) valide
+sa propre transaction, puis la route en valide une autre pour l'ActionLog :
+une action utilisateur coûte plusieurs COMMIT (fsync côté base) et des
+SELECT de rafraîchissement, et le log d'audit peut être écrit sans le
+changement qu'il décrit (ou l'inverse).
+
+Pendant une requête, les repositories s'enrôlent dans l'unité de travail :
+commit() se contente d'un flush (les IDs sont générés, les contraintes
+vérifiées) et un seul COMMIT est émis à la fin de la requête si la réponse
+est un succès (< 400). Toute erreur (abort, exception) annule l'ensemble.
+
+Hors requête (CLI, scripts, tests appelant un repository directement),
+commit() valide immédiatement comme auparavant.
+
+Configuration : UNIT_OF_WORK (défaut : activé, variable d'environnement
+UNIT_OF_WORK=false pour revenir au commit par appel).
+"""
+import os
+from typing import Callable
+from flask import g, has_app_context
+from . import db
+
+# Marqueur posé sur flask.g pendant une requête enrôlée
+_ACTIVE_KEY = "_unit_of_work_active"
+# Callbacks à exécuter une fois le COMMIT de fin de requête réussi
+_CALLBACKS_KEY = "_unit_of_work_on_commit"
+
+
+def init_app(app) -> None:
+    """
+    Enregistrer les hooks de début et de fin d'unité de travail.
+
+    Args:
+        app: Application Flask
+    """
+    app.config.setdefault(
+        "UNIT_OF_WORK",
+        os.getenv("UNIT_OF_WORK", "true").lower() == "true"
+    )
+    if not app.config["UNIT_OF_WORK"]:
+        return
+
+    @app.before_request
+    def _begin_unit_of_work():
+        g.setdefault(_ACTIVE_KEY, True)
+
+    @app.after_request
+    def _complete_unit_of_work(response):
+        if not g.pop(_ACTIVE_KEY, False):
+            return response
+        callbacks = g.pop(_CALLBACKS_KEY, [])
+        if response.status_code >= 400:
+            db.session.rollback()
+            return response
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        for callback in callbacks:
+            callback()
+        return response
+
+    @app.teardown_request
+    def _abandon_unit_of_work(exc):
+        # after_request n'a pas été atteint (exception propagée) : tout annuler
+        g.pop(_CALLBACKS_KEY, None)
+        if g.pop(_ACTIVE_KEY, False):
+            db.session.rollback()
+
+
+def is_active() -> bool:
+    """
+    Une unité de travail est-elle ouverte pour la requête courante ?
+
+    Returns:
+        True si les écritures doivent être différées jusqu'à la fin de la requête
+    """
+    return has_app_context() and g.get(_ACTIVE_KEY, False)
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    Exécuter un effet de bord seulement si la requête est validée.
+
+    Dans une requête enrôlée, le callback est différé après le COMMIT de fin
+    de requête (et abandonné en cas d'annulation). Sinon il s'exécute aussitôt.
+
+    Args:
+        callback: Fonction sans argument
+    """
+    if is_active():
+        g.setdefault(_CALLBACKS_KEY, []).append(callback)
+    else:
+        callback()
+
+
+def commit(*instances) -> None:
+    """
+    Point de validation des repositories.
+
+    Dans une requête enrôlée : flush seulement (IDs et contraintes), le COMMIT
+    unique est émis en fin de requête. Sinon : COMMIT immédiat puis
+    rafraîchissement des instances passées (comportement historique).
+
+    Args:
+        *instances: Instances à rafraîchir après un COMMIT immédiat
+    """
+    if is_active():
+        db.session.flush()
+        return
+    db.session.commit()
+    for instance in instances:
+        db.session.refresh(instance)
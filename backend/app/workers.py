@@ -0,0 +1,37 @@
+"""
+Nombre de workers gunicorn, partagé par gunicorn.conf.py et les outils de
+dimensionnement (`flask db-pool budget`) : une seule valeur par défaut.
+
+Les modules dont l'état est propre au processus (cache "memory", broker
+"memory", pool de hachage) lisent serving_workers().
+"""
+import multiprocessing
+import os
+
+# Au-delà, plus de workers ajoutent surtout des connexions PostgreSQL
+MAX_DEFAULT_WORKERS = 8
+
+
+def default_workers() -> int:
+    """Workers par défaut : 2 x cœurs + 1, plafonné à MAX_DEFAULT_WORKERS."""
+    return min(multiprocessing.cpu_count() * 2 + 1, MAX_DEFAULT_WORKERS)
+
+
+def web_concurrency() -> int:
+    """
+    Workers gunicorn par réplique.
+
+    Returns:
+        WEB_CONCURRENCY si défini, sinon default_workers()
+    """
+    return int(os.getenv("WEB_CONCURRENCY") or default_workers())
+
+
+def serving_workers() -> int:
+    """
+    Workers du serveur qui exécute ce processus.
+
+    Returns:
+        WEB_CONCURRENCY (exporté par gunicorn.conf.py), 1 hors gunicorn
+    """
+    return max(1, int(os.getenv("WEB_CONCURRENCY") or 1))
@@ -0,0 +1,5 @@
+"""
+Benchmarks de performance du backend (hors suite de tests).
+
+Exécution depuis backend/ : python -m benchmarks.<nom> --help
+"""
@@ -0,0 +1,124 @@
+"""
+Benchmark des endpoints d'administration : rôle relu en base vs cache d'identités.
+
+Rejoue des lectures d'administration courantes (statistiques, première page
+des utilisateurs, métriques du cache) avec IDENTITY_CACHE_TTL_SECONDS=0 (la
+vérification @admin_required relit le compte à chaque requête) puis avec le
+cache activé, et affiche en JSON la latence par requête (médiane, p95) et le
+nombre de requêtes SQL par requête HTTP.
+
+Chaque requête HTTP a sa propre session SQLAlchemy, comme en production.
+
+Usage (depuis backend/) :
+    python -m benchmarks.admin_auth --iterations 500
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.admin_auth
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User
+
+ENDPOINTS = ("/v1/admin/stats", "/v1/admin/users?cursor=&per_page=20", "/v1/admin/cache/stats")
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _seed(users: int):
+    """Un admin et `users` comptes ; renvoie les en-têtes de l'admin."""
+    admin = User(username="bench_admin", email="bench_admin@test.com", password_hash="hash", role="admin")
+    db.session.add(admin)
+    db.session.add_all([
+        User(username=f"bench_user{i}", email=f"bench_user{i}@test.com", password_hash="hash")
+        for i in range(users)
+    ])
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(admin.id))}"}
+
+
+def run(database_url: str, ttl: int, iterations: int, users: int) -> dict:
+    """
+    Mesurer les lectures d'administration pour un TTL donné.
+
+    Args:
+        database_url: URL SQLAlchemy de la base (schéma recréé)
+        ttl: IDENTITY_CACHE_TTL_SECONDS (0 : cache désactivé)
+        iterations: Nombre de passes sur ENDPOINTS
+        users: Nombre de comptes créés
+
+    Returns:
+        Statistiques de latence et de requêtes SQL par requête HTTP
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "IDENTITY_CACHE_TTL_SECONDS": ttl,
+    })
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        headers = _seed(users)
+        engine = db.engine
+
+    client = app.test_client()
+    queries = []
+    event.listen(engine, "before_cursor_execute", lambda *args: queries.append(1))
+    durations = []
+    for _ in range(iterations):
+        for url in ENDPOINTS:
+            start = time.perf_counter()
+            response = client.get(url, headers=headers)
+            durations.append(time.perf_counter() - start)
+            assert response.status_code == 200, (url, response.get_json())
+
+    with app.app_context():
+        db.drop_all()
+
+    return {
+        "identity_cache_ttl": ttl,
+        "requests": len(durations),
+        "queries_per_request": round(len(queries) / len(durations), 2),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(_percentile(durations, 0.95) * 1000, 3),
+        "total_s": round(sum(durations), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--ttl", type=int, default=30, help="TTL du cache pour la seconde mesure.")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    db_path = None
+    if not database_url:
+        db_fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(db_fd)
+        database_url = f"sqlite:///{db_path}"
+
+    try:
+        baseline = run(database_url, ttl=0, iterations=args.iterations, users=args.users)
+        cached = run(database_url, ttl=args.ttl, iterations=args.iterations, users=args.users)
+    finally:
+        if db_path:
+            os.unlink(db_path)
+
+    print(json.dumps({
+        "scenario": "admin stats, first page of users, cache stats",
+        "results": [baseline, cached],
+        "median_speedup": round(baseline["median_ms"] / cached["median_ms"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
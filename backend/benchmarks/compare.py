@@ -0,0 +1,117 @@
+"""
+Comparer deux résultats de benchmarks/workload.py (ex : avant / après un commit).
+
+Affiche par endpoint p50/p95/p99 de la base et de la tête, avec l'écart en
+pourcentage, et signale les régressions : p95 plus lent de plus de
+--threshold % et d'au moins --min-ms (le bruit des endpoints très rapides
+est ignoré). Avec --fail-on-regression, le code de sortie vaut 1 s'il y en a
+(utilisable en CI). Les jeux de données différents sont signalés : les
+mesures ne sont alors pas comparables.
+
+Usage (depuis backend/) :
+    python -m benchmarks.compare before.json after.json
+    python -m benchmarks.compare before.json after.json --threshold 15 --fail-on-regression
+    python -m benchmarks.compare before.json after.json --json
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, List, Optional
+
+PERCENTILES = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _delta(base: Optional[float], head: Optional[float]) -> Optional[float]:
+    if base is None or head is None or base == 0:
+        return None
+    return round((head - base) / base * 100, 1)
+
+
+def compare(base: Dict[str, Any], head: Dict[str, Any], threshold: float, min_ms: float) -> Dict[str, Any]:
+    """
+    Écarts entre deux rapports, par endpoint et global.
+
+    Args:
+        base: Rapport de référence
+        head: Rapport mesuré
+        threshold: Hausse du p95 (en %) au-delà de laquelle un endpoint régresse
+        min_ms: Hausse absolue minimale du p95 pour une régression
+
+    Returns:
+        {"base", "head", "warnings", "endpoints", "overall", "regressions"}
+    """
+    rows: Dict[str, Dict[str, Any]] = {}
+    names = list(base["endpoints"]) + [name for name in head["endpoints"] if name not in base["endpoints"]]
+    for name in names + ["overall"]:
+        before = base["overall"] if name == "overall" else base["endpoints"].get(name, {})
+        after = head["overall"] if name == "overall" else head["endpoints"].get(name, {})
+        row = {"count": [before.get("count"), after.get("count")],
+               "errors": [before.get("errors"), after.get("errors")]}
+        for key in PERCENTILES:
+            row[key] = [before.get(key), after.get(key), _delta(before.get(key), after.get(key))]
+        rows[name] = row
+
+    regressions: List[str] = []
+    for name in names:
+        base_p95, head_p95, delta = rows[name]["p95_ms"]
+        if delta is not None and delta > threshold and head_p95 - base_p95 >= min_ms:
+            regressions.append(name)
+
+    warnings = []
+    base_meta, head_meta = base.get("meta", {}), head.get("meta", {})
+    for key in ("dataset", "target", "database", "concurrency", "mix"):
+        if base_meta.get(key) != head_meta.get(key):
+            warnings.append(f"{key} differs: {base_meta.get(key)} -> {head_meta.get(key)}")
+    return {
+        "base": {key: base_meta.get(key) for key in ("commit", "dirty", "timestamp")},
+        "head": {key: head_meta.get(key) for key in ("commit", "dirty", "timestamp")},
+        "warnings": warnings,
+        "endpoints": {name: rows[name] for name in names},
+        "overall": rows["overall"],
+        "regressions": regressions,
+    }
+
+
+def _format(result: Dict[str, Any]) -> str:
+    def cell(values):
+        before, after, delta = values
+        if before is None or after is None:
+            return f"{before} -> {after}".rjust(28)
+        change = f"{delta:>+6}%" if delta is not None else " " * 7
+        return f"{before:>8.2f} -> {after:>8.2f} {change}"
+
+    header = f"{'endpoint':<22}" + "".join(f"{key[:3]:>30}" for key in PERCENTILES)
+    lines = [
+        f"base {result['base']['commit']}{'+' if result['base']['dirty'] else ''} "
+        f"-> head {result['head']['commit']}{'+' if result['head']['dirty'] else ''}",
+        *[f"warning: {warning}" for warning in result["warnings"]],
+        header,
+    ]
+    for name, row in list(result["endpoints"].items()) + [("overall", result["overall"])]:
+        flag = "  REGRESSION" if name in result["regressions"] else ""
+        lines.append(f"{name:<22}" + "".join(f"  {cell(row[key])}" for key in PERCENTILES) + flag)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="hausse du p95 tolérée (%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="hausse absolue minimale du p95 (ms)")
+    parser.add_argument("--json", action="store_true", help="sortie JSON")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.base, encoding="utf-8") as handle:
+        base = json.load(handle)
+    with open(args.head, encoding="utf-8") as handle:
+        head = json.load(handle)
+    result = compare(base, head, args.threshold, args.min_ms)
+    print(json.dumps(result, indent=2) if args.json else _format(result))
+    if args.fail_on_regression and result["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+Générateur de données synthétiques pour les benchmarks de charge.
+
+Produit en masse des utilisateurs, un graphe de contacts (part de contacts
+réciproques réglable), des notes, des assignations et des logs d'actions,
+avec COPY sous PostgreSQL (psycopg2) et des INSERT par lots sinon. Les
+lignes sont produites par tranches de --batch-size : la mémoire reste
+constante, même pour 1M de notes et 10M de logs.
+
+Forme des données :
+- contacts : chaque utilisateur ajoute les --contacts-per-user suivants (ids
+  consécutifs, en anneau) ; une part --mutual-ratio de ces contacts est
+  réciproque (les deux lignes ont mutual=True, comme après
+  ContactRepository) ;
+- notes : créateurs très inégaux (quelques comptes concentrent la plupart
+  des notes), 5 % supprimées, 10 % importantes, réparties sur --months mois ;
+- assignations : 0 à 3 destinataires par note, pris parmi les contacts
+  mutuels du créateur ; 60 % lues, 25 % terminées ;
+- logs d'actions : ceux que l'API aurait écrits (note_created,
+  assignment_created, assignment_completed, pour l'historique des
+  completions), plus --action-logs logs de fond répartis sur la période.
+
+Tous les comptes ont le mot de passe PASSWORD (bench_<id>@bench.test) ; le
+premier créé est admin. Les agrégats (app/stats.py) sont reconstruits à la
+fin. Sous PostgreSQL, le schéma vient des migrations (flask db upgrade) et
+les partitions mensuelles d'action_logs de la période sont créées.
+
+Usage (depuis backend/) :
+    python -m benchmarks.datagen --scale small
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.datagen --scale large --reset
+    python -m benchmarks.datagen --users 5000 --notes 200000 --mutual-ratio 0.3
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence
+from sqlalchemy import func, inspect, select, text
+from app import create_app, db, partitions, passwords, stats
+from app.models import ActionLog, Assignment, Contact, Note, User
+
+PASSWORD = "benchmark-password"
+DEFAULT_DATABASE_URL = "sqlite:///benchmark.db"
+
+WORDS = (
+    "réunion", "client", "rapport", "budget", "livraison", "planning", "relance", "facture",
+    "contrat", "projet", "équipe", "réponse", "urgent", "semaine", "dossier", "appel",
+    "commande", "stock", "validation", "présentation", "formation", "congés", "audit", "serveur",
+    "migration", "sauvegarde", "courrier", "rendez-vous", "devis", "fournisseur",
+)
+# Logs de fond : (type, poids)
+BACKGROUND_ACTIONS = (
+    ("note_updated", 30), ("assignment_updated", 25), ("assignment_priority_updated", 10),
+    ("contact_updated", 10), ("user_logout", 15), ("contact_created", 5), ("password_changed", 5),
+)
+
+
+class Scale(NamedTuple):
+    """Volumes d'un jeu de données."""
+    users: int
+    contacts_per_user: int
+    notes: int
+    action_logs: int
+
+
+SCALES = {
+    "tiny": Scale(users=50, contacts_per_user=5, notes=300, action_logs=500),
+    "small": Scale(users=1_000, contacts_per_user=10, notes=10_000, action_logs=50_000),
+    "medium": Scale(users=10_000, contacts_per_user=20, notes=100_000, action_logs=1_000_000),
+    "large": Scale(users=100_000, contacts_per_user=20, notes=1_000_000, action_logs=10_000_000),
+}
+
+
+def _unit(*values: int) -> float:
+    """Nombre pseudo-aléatoire dans [0, 1) déterminé par values (sans état partagé)."""
+    x = 0x9E3779B97F4A7C15
+    for value in values:
+        x = ((x ^ value) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        x ^= x >> 31
+    return (x >> 11) / float(1 << 53)
+
+
+# ---------- Écriture en masse ----------
+
+class _InsertWriter:
+    """INSERT par lots (executemany) : SQLite et autres dialectes."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, table, rows: List[Dict[str, Any]]) -> None:
+        if rows:
+            self.connection.execute(table.insert(), rows)
+
+
+class _CopyWriter:
+    """COPY ... FROM STDIN (CSV) sur la connexion DBAPI psycopg2 de la transaction."""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def write(self, table, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row[column] is None else row[column] for column in columns])
+        buffer.seek(0)
+        cursor = self.connection.connection.cursor()
+        try:
+            cursor.copy_expert(
+                f'COPY "{table.name}" ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+        finally:
+            cursor.close()
+
+
+def _writer(connection):
+    if connection.dialect.name == "postgresql" and connection.dialect.driver == "psycopg2":
+        return _CopyWriter(connection)
+    return _InsertWriter(connection)
+
+
+def _batches(rows: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _next_id(model) -> int:
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+# ---------- Générateur ----------
+
+class DatasetGenerator:
+    """
+    Produire un jeu de données synthétique dans la base de l'application courante.
+
+    Les identifiants sont attribués par le générateur (à la suite des lignes
+    existantes) : les clés étrangères sont connues sans relire la base.
+    """
+
+    def __init__(self, scale: Scale, mutual_ratio: float = 0.5, months: int = 12,
+                 batch_size: int = 5000, seed: int = 42, echo: Callable[[str], None] = print):
+        if 2 * scale.contacts_per_user >= scale.users:
+            raise ValueError("users must be more than twice contacts_per_user")
+        self.scale = scale
+        self.mutual_ratio = mutual_ratio
+        self.months = months
+        self.batch_size = batch_size
+        self.seed = seed
+        self.echo = echo
+        self.rng = random.Random(seed)
+        self.end = datetime.now(timezone.utc).replace(tzinfo=None)
+        self.start = self.end - timedelta(days=30 * months)
+        self.counts = {"users": 0, "contacts": 0, "notes": 0, "assignments": 0, "action_logs": 0}
+
+    # -- utilitaires --
+
+    def _user_id(self, index: int) -> int:
+        return self.first_user_id + index % self.scale.users
+
+    def _is_mutual(self, index: int, offset: int) -> bool:
+        """Le contact index -> index + offset est-il réciproque ?"""
+        return _unit(self.seed, index, offset) < self.mutual_ratio
+
+    def _date_between(self, start: datetime, end: datetime) -> datetime:
+        span = max((end - start).total_seconds(), 1.0)
+        return start + timedelta(seconds=self.rng.random() * span)
+
+    def _write(self, table, rows: Iterable[Dict[str, Any]], counter: str) -> None:
+        for batch in _batches(rows, self.batch_size):
+            _writer(db.session.connection()).write(table, batch)
+            self.counts[counter] += len(batch)
+        db.session.commit()
+
+    def _log(self, user_id: Optional[int], action_type: str, target_id: int, timestamp: datetime,
+             payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        row = ActionLog.with_structured_columns({
+            "id": self.next_log_id, "user_id": user_id, "action_type": action_type,
+            "target_id": target_id, "timestamp": timestamp,
+            "payload": json.dumps(payload) if payload is not None else None,
+        })
+        self.next_log_id += 1
+        return row
+
+    # -- étapes --
+
+    def _users(self) -> Iterator[Dict[str, Any]]:
+        password_hash = passwords.hash_password(PASSWORD)
+        for index in range(self.scale.users):
+            user_id = self.first_user_id + index
+            yield {
+                "id": user_id, "username": f"bench_{user_id}", "email": f"bench_{user_id}@bench.test",
+                "password_hash": password_hash, "role": "admin" if index == 0 else "user",
+                "created_date": self._date_between(self.start - timedelta(days=30), self.start),
+                "notes_version": 0,
+            }
+
+    def _contacts(self) -> Iterator[Dict[str, Any]]:
+        contact_id = _next_id(Contact)
+        for index in range(self.scale.users):
+            owner = self._user_id(index)
+            for offset in range(1, self.scale.contacts_per_user + 1):
+                target = self._user_id(index + offset)
+                mutual = self._is_mutual(index, offset)
+                created = self._date_between(self.start - timedelta(days=30), self.start)
+                pairs = [(contact_id, owner, target)]
+                if mutual:
+                    pairs.append((contact_id + 1, target, owner))
+                for row_id, user_id, contact_user_id in pairs:
+                    yield {
+                        "id": row_id, "user_id": user_id, "contact_user_id": contact_user_id,
+                        "nickname": f"bench_{contact_user_id}", "contact_action": None,
+                        "created_date": created, "mutual": mutual,
+                    }
+                contact_id += len(pairs)
+
+    def _creator_index(self) -> int:
+        # Loi de puissance : les premiers comptes créent l'essentiel des notes
+        return int(self.scale.users * self.rng.random() ** 3)
+
+    def _recipients(self, creator_index: int) -> List[int]:
+        count = self.rng.choices((0, 1, 2, 3), weights=(30, 50, 15, 5))[0]
+        if not count:
+            return []
+        mutual = [offset for offset in range(1, self.scale.contacts_per_user + 1)
+                  if self._is_mutual(creator_index, offset)]
+        return [self._user_id(creator_index + offset)
+                for offset in self.rng.sample(mutual, min(count, len(mutual)))]
+
+    def _notes_batch(self, note_ids: Sequence[int]):
+        """Notes d'une tranche, leurs assignations et les logs correspondants."""
+        notes, assignments, logs = [], [], []
+        for note_id in note_ids:
+            creator_index = self._creator_index()
+            creator_id = self._user_id(creator_index)
+            created = self._date_between(self.start, self.end)
+            important = self.rng.random() < 0.1
+            deleted = self.rng.random() < 0.05
+            recipients = self._recipients(creator_index)
+            notes.append({
+                "id": note_id, "creator_id": creator_id, "created_date": created,
+                "content": " ".join(self.rng.choices(WORDS, k=self.rng.randint(3, 15))),
+                "important": important, "update_date": None,
+                "delete_date": self._date_between(created, self.end) if deleted else None,
+                "deleted_by": creator_id if deleted else None,
+                "assignment_count": len(recipients), "read_count": 0, "completed_count": 0,
+            })
+            logs.append(self._log(creator_id, "note_created", note_id, created, {"important": important}))
+            for recipient_id in recipients:
+                assignment_id = self.next_assignment_id
+                self.next_assignment_id += 1
+                assigned = self._date_between(created, min(created + timedelta(days=2), self.end))
+                read = self.rng.random() < 0.6
+                finished = read and self.rng.random() < 0.4
+                read_date = self._date_between(assigned, self.end) if read else None
+                notes[-1]["read_count"] += read
+                notes[-1]["completed_count"] += finished
+                finished_date = self._date_between(read_date, self.end) if finished else None
+                assignments.append({
+                    "id": assignment_id, "note_id": note_id, "user_id": recipient_id,
+                    "assigned_date": assigned, "is_read": read, "read_date": read_date,
+                    "recipient_priority": self.rng.random() < 0.1,
+                    "recipient_status": "terminé" if finished else "en_cours",
+                    "finished_date": finished_date,
+                })
+                logs.append(self._log(creator_id, "assignment_created", assignment_id, assigned,
+                                      {"note_id": note_id, "assigned_to": recipient_id}))
+                if finished:
+                    logs.append(self._log(recipient_id, "assignment_completed", assignment_id, finished_date,
+                                          {"status": "terminé", "note_id": note_id, "user_id": recipient_id}))
+        return notes, assignments, logs
+
+    def _background_logs(self) -> Iterator[Dict[str, Any]]:
+        actions = [action for action, _ in BACKGROUND_ACTIONS]
+        weights = [weight for _, weight in BACKGROUND_ACTIONS]
+        last_note_id = self.first_note_id + self.scale.notes - 1
+        for _ in range(self.scale.action_logs):
+            action_type = self.rng.choices(actions, weights=weights)[0]
+            user_id = self._user_id(self._creator_index())
+            if action_type.startswith("assignment_") and self.next_assignment_id > self.first_assignment_id:
+                target_id = self.rng.randrange(self.first_assignment_id, self.next_assignment_id)
+                payload = {"note_id": self.rng.randint(self.first_note_id, last_note_id)}
+            elif action_type == "note_updated":
+                target_id = self.rng.randint(self.first_note_id, last_note_id)
+                payload = {"content_changed": True}
+            elif action_type in ("user_logout", "password_changed"):
+                target_id, payload = user_id, None
+            else:
+                target_id, payload = self._user_id(self.rng.randrange(self.scale.users)), None
+            yield self._log(user_id, action_type, target_id, self._date_between(self.start, self.end), payload)
+
+    def _prepare_partitions(self) -> None:
+        connection = db.session.connection()
+        if partitions.is_partitioned(connection):
+            created = partitions.create_partitions(connection, self.months + 3, start=self.start.date())
+            db.session.commit()
+            self.echo(f"partitions created: {len(created)}")
+
+    def _reset_sequences(self) -> None:
+        connection = db.session.connection()
+        if connection.dialect.name != "postgresql":
+            return
+        for model in (User, Contact, Note, Assignment, ActionLog):
+            table = model.__tablename__
+            connection.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM \"{table}\"))"
+            ))
+        db.session.commit()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Générer le jeu de données complet.
+
+        Returns:
+            Nombre de lignes écrites par table et durée par étape
+        """
+        timings = {}
+        self.first_user_id = _next_id(User)
+        self.first_note_id = _next_id(Note)
+        self.first_assignment_id = self.next_assignment_id = _next_id(Assignment)
+        self.next_log_id = _next_id(ActionLog)
+        self._prepare_partitions()
+
+        def step(name, action):
+            started = time.perf_counter()
+            action()
+            timings[name] = round(time.perf_counter() - started, 2)
+            self.echo(f"{name}: {timings[name]}s {self.counts}")
+
+        step("users", lambda: self._write(User.__table__, self._users(), "users"))
+        step("contacts", lambda: self._write(Contact.__table__, self._contacts(), "contacts"))
+
+        def notes():
+            last = self.first_note_id + self.scale.notes
+            for chunk_start in range(self.first_note_id, last, self.batch_size):
+                note_rows, assignment_rows, log_rows = self._notes_batch(
+                    range(chunk_start, min(chunk_start + self.batch_size, last))
+                )
+                writer = _writer(db.session.connection())
+                writer.write(Note.__table__, note_rows)
+                writer.write(Assignment.__table__, assignment_rows)
+                writer.write(ActionLog.__table__, log_rows)
+                db.session.commit()
+                self.counts["notes"] += len(note_rows)
+                self.counts["assignments"] += len(assignment_rows)
+                self.counts["action_logs"] += len(log_rows)
+
+        step("notes", notes)
+        step("action_logs", lambda: self._write(ActionLog.__table__, self._background_logs(), "action_logs"))
+        self._reset_sequences()
+        step("stats", stats.rebuild)
+        return {"rows": dict(self.counts), "seconds": timings}
+
+
+def reset_schema() -> None:
+    """Vider la base : schéma recréé sous SQLite, TRUNCATE des tables sous PostgreSQL."""
+    connection = db.session.connection()
+    if connection.dialect.name == "postgresql":
+        names = ", ".join(f'"{table.name}"' for table in db.metadata.sorted_tables)
+        connection.execute(text(f"TRUNCATE {names} RESTART IDENTITY CASCADE"))
+        db.session.commit()
+        return
+    db.session.commit()
+    db.drop_all()
+    db.create_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", choices=sorted(SCALES), default="small")
+    parser.add_argument("--users", type=int)
+    parser.add_argument("--contacts-per-user", type=int)
+    parser.add_argument("--notes", type=int)
+    parser.add_argument("--action-logs", type=int, help="logs de fond, en plus de ceux des notes/assignations")
+    parser.add_argument("--mutual-ratio", type=float, default=0.5)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="vider la base avant de générer")
+    args = parser.parse_args()
+
+    preset = SCALES[args.scale]
+    scale = Scale(
+        users=args.users or preset.users,
+        contacts_per_user=args.contacts_per_user or preset.contacts_per_user,
+        notes=args.notes if args.notes is not None else preset.notes,
+        action_logs=args.action_logs if args.action_logs is not None else preset.action_logs,
+    )
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL),
+    })
+    with app.app_context():
+        if args.reset:
+            reset_schema()
+        elif not inspect(db.engine).has_table(User.__tablename__):
+            if db.engine.dialect.name == "postgresql":
+                raise SystemExit("schema missing: run `flask db upgrade` first")
+            db.create_all()
+        result = DatasetGenerator(
+            scale, mutual_ratio=args.mutual_ratio, months=args.months,
+            batch_size=args.batch_size, seed=args.seed,
+        ).run()
+    print(json.dumps({"scale": scale._asdict(), **result}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
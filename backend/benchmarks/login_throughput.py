@@ -0,0 +1,148 @@
+"""
+Benchmark des connexions : hachage dans le thread de la requête vs pool de processus.
+
+Des threads clients enchaînent des POST /v1/auth/login pendant qu'un thread
+sonde GET /v1/users/me (requête ordinaire, sans hachage). La mesure est faite
+avec PASSWORD_HASH_WORKERS=0 (hachage dans le thread) puis avec le pool de
+processus, et affiche en JSON le débit de connexions et la latence de la
+sonde (médiane, p95) : c'est elle qui souffre quand les hachages occupent
+les threads.
+
+Usage (depuis backend/) :
+    python -m benchmarks.login_throughput --threads 8 --duration 10
+    PASSWORD_HASH_METHOD=scrypt:65536:8:1 python -m benchmarks.login_throughput
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from flask_jwt_extended import create_access_token
+from app import create_app, db, passwords
+from app.models import User
+
+PASSWORD = "benchmark-password"
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _seed(count: int):
+    """`count` comptes au hash courant ; renvoie (emails, en-têtes du premier)."""
+    password_hash = passwords.hash_password(PASSWORD)
+    users = [
+        User(username=f"bench_login{i}", email=f"bench_login{i}@test.com", password_hash=password_hash)
+        for i in range(count)
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(users[0].id))}"}
+    return [user.email for user in users], headers
+
+
+def run(database_url: str, workers: int, threads: int, duration: float) -> dict:
+    """
+    Mesurer le débit de connexions et la latence de la sonde pour un nombre de processus donné.
+
+    Args:
+        database_url: URL SQLAlchemy de la base (schéma recréé)
+        workers: PASSWORD_HASH_WORKERS (0 : hachage dans le thread de la requête)
+        threads: Nombre de threads qui se connectent en boucle
+        duration: Durée de la mesure (secondes)
+
+    Returns:
+        Débit de connexions et latence de GET /v1/users/me
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "PASSWORD_HASH_WORKERS": workers,
+    })
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        emails, headers = _seed(threads)
+        service = passwords.get_password_service()
+        if workers:
+            # Démarrer les processus avant la mesure
+            service.verify(passwords.hash_password(PASSWORD), PASSWORD)
+
+    stop = threading.Event()
+    logins, probes, errors = [], [], []
+
+    def login_loop(email):
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            response = client.post("/v1/auth/login", json={"email": email, "password": PASSWORD})
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            logins.append(time.perf_counter() - start)
+
+    def probe_loop():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get("/v1/users/me", headers=headers)
+            probes.append(time.perf_counter() - start)
+            time.sleep(0.005)
+
+    pool = [threading.Thread(target=login_loop, args=(email,)) for email in emails]
+    pool.append(threading.Thread(target=probe_loop))
+    for thread in pool:
+        thread.start()
+    time.sleep(duration)
+    stop.set()
+    for thread in pool:
+        thread.join()
+
+    service.shutdown()
+    with app.app_context():
+        db.drop_all()
+
+    return {
+        "password_hash_workers": workers,
+        "logins": len(logins),
+        "logins_per_s": round(len(logins) / duration, 1),
+        "login_median_ms": round(statistics.median(logins) * 1000, 3),
+        "probe_median_ms": round(statistics.median(probes) * 1000, 3),
+        "probe_p95_ms": round(_percentile(probes, 0.95) * 1000, 3),
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processus du pool pour la seconde mesure.")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    db_path = None
+    if not database_url:
+        db_fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(db_fd)
+        database_url = f"sqlite:///{db_path}"
+
+    try:
+        inline = run(database_url, workers=0, threads=args.threads, duration=args.duration)
+        pooled = run(database_url, workers=args.workers, threads=args.threads, duration=args.duration)
+    finally:
+        if db_path:
+            os.unlink(db_path)
+
+    print(json.dumps({
+        "scenario": f"{args.threads} threads logging in, one thread probing GET /v1/users/me",
+        "results": [inline, pooled],
+        "probe_p95_speedup": round(inline["probe_p95_ms"] / pooled["probe_p95_ms"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
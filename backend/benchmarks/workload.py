@@ -0,0 +1,374 @@
+"""
+Test de charge : rejoue un mélange pondéré de lectures et d'écritures.
+
+Les requêtes sont tirées selon MIX (surcharge : --mix list_notes=50,create_note=0)
+pour des utilisateurs, notes et assignations échantillonnés dans la base
+(jeu de données de benchmarks/datagen.py), puis envoyées :
+- à l'application Flask dans le processus (client de test, par défaut) ;
+- ou à un serveur lancé (--base-url http://localhost:5000), qui doit
+  partager DATABASE_URL et JWT_SECRET_KEY : les jetons sont signés ici, sans
+  passer par /v1/auth/login (limité à 5/min).
+
+Le résultat est un JSON (commit git, jeu de données, p50/p95/p99 par
+endpoint et global) à comparer entre commits avec benchmarks/compare.py.
+Les écritures modifient le jeu de données : le régénérer (--reset) pour
+des mesures strictement comparables.
+
+Usage (depuis backend/) :
+    python -m benchmarks.workload --requests 2000 --concurrency 4 --output before.json
+    python -m benchmarks.workload --base-url http://localhost:5000 --duration 60 --concurrency 16
+    python -m benchmarks.compare before.json after.json
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import quote, urlsplit
+from flask_jwt_extended import create_access_token
+from sqlalchemy import func, select
+from app import create_app, db
+from app.models import ActionLog, Assignment, Contact, Note, User
+from benchmarks.datagen import DEFAULT_DATABASE_URL, WORDS
+
+
+class Operation(NamedTuple):
+    """Requête type du mélange : build(rng, sample) -> (chemin, en-têtes, corps JSON)."""
+    method: str
+    path: str
+    build: Callable
+
+
+class Sample(NamedTuple):
+    """Identifiants tirés du jeu de données, et en-têtes d'authentification."""
+    admin: Dict[str, str]
+    notes: List[Tuple[int, Dict[str, str]]]        # (note, en-têtes du créateur)
+    assignments: List[Tuple[int, Dict[str, str]]]  # (assignation, en-têtes du destinataire)
+
+
+def _pick(rng, items):
+    return items[rng.randrange(len(items))]
+
+
+def _as_creator(path: str, body: Optional[Callable] = None) -> Callable:
+    """Requête du créateur d'une note tirée au hasard ({id} : la note)."""
+    def build(rng, sample):
+        note_id, headers = _pick(rng, sample.notes)
+        return path.format(id=note_id, word=quote(_pick(rng, WORDS))), headers, body(rng) if body else None
+    return build
+
+
+def _as_recipient(path: str, body: Optional[Callable] = None) -> Callable:
+    """Requête du destinataire d'une assignation tirée au hasard ({id} : l'assignation)."""
+    def build(rng, sample):
+        assignment_id, headers = _pick(rng, sample.assignments)
+        return path.format(id=assignment_id), headers, body(rng) if body else None
+    return build
+
+
+def _as_admin(path: str) -> Callable:
+    def build(rng, sample):
+        since = (datetime.now(timezone.utc) - timedelta(days=7)).replace(tzinfo=None).isoformat()
+        return path.format(since=since), sample.admin, None
+    return build
+
+
+# Opération -> (poids par défaut, requête)
+MIX: Dict[str, Tuple[int, Operation]] = {
+    "list_notes": (25, Operation("GET", "/v1/notes", _as_creator("/v1/notes?per_page=20"))),
+    "list_notes_cursor": (10, Operation("GET", "/v1/notes?cursor=", _as_creator("/v1/notes?cursor=&per_page=50"))),
+    "search_notes": (5, Operation("GET", "/v1/notes?q=", _as_creator("/v1/notes?q={word}"))),
+    "note_details": (7, Operation("GET", "/v1/notes/<id>/details", _as_creator("/v1/notes/{id}/details"))),
+    "completion_history": (7, Operation("GET", "/v1/notes/<id>/completion-history",
+                                        _as_creator("/v1/notes/{id}/completion-history"))),
+    "unread_assignments": (10, Operation("GET", "/v1/assignments/unread", _as_recipient("/v1/assignments/unread"))),
+    "list_contacts": (6, Operation("GET", "/v1/contacts", _as_creator("/v1/contacts"))),
+    "admin_notes": (3, Operation("GET", "/v1/admin/notes?cursor=", _as_admin("/v1/admin/notes?cursor=&per_page=50"))),
+    "admin_users": (2, Operation("GET", "/v1/admin/users?cursor=", _as_admin("/v1/admin/users?cursor=&per_page=50"))),
+    "action_logs": (3, Operation("GET", "/v1/action_logs?since=", _as_admin("/v1/action_logs?since={since}"))),
+    "create_note": (8, Operation("POST", "/v1/notes", _as_creator(
+        "/v1/notes", lambda rng: {"content": " ".join(rng.choices(WORDS, k=6)), "important": rng.random() < 0.1}
+    ))),
+    "update_note": (4, Operation("PUT", "/v1/notes/<id>", _as_creator(
+        "/v1/notes/{id}", lambda rng: {"content": " ".join(rng.choices(WORDS, k=6)), "important": rng.random() < 0.5}
+    ))),
+    "mark_read": (6, Operation("PUT", "/v1/assignments/<id>", _as_recipient(
+        "/v1/assignments/{id}", lambda rng: {"is_read": True}
+    ))),
+    "update_status": (4, Operation("PUT", "/v1/assignments/<id>/status", _as_recipient(
+        "/v1/assignments/{id}/status", lambda rng: {"recipient_status": rng.choice(("terminé", "en_cours"))}
+    ))),
+}
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _git_commit() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], capture_output=True, text=True, check=False).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+
+
+def _headers(user_id: int) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+def sample_dataset(size: int) -> Tuple[Sample, Dict[str, int]]:
+    """
+    Tirer des notes actives et des assignations au hasard (dans un contexte d'application).
+
+    Args:
+        size: Nombre de notes et d'assignations à tirer (ORDER BY random() : un parcours
+            complet par table, une seule fois avant la mesure)
+
+    Returns:
+        (échantillon, nombre de lignes par table)
+    """
+    admin_id = db.session.execute(select(User.id).where(User.role == "admin").order_by(User.id)).scalar()
+    if admin_id is None:
+        raise SystemExit("no admin user: generate a dataset with `python -m benchmarks.datagen`")
+    notes = db.session.execute(
+        select(Note.id, Note.creator_id).where(Note.delete_date.is_(None)).order_by(func.random()).limit(size)
+    ).all()
+    assignments = db.session.execute(
+        select(Assignment.id, Assignment.user_id).order_by(func.random()).limit(size)
+    ).all()
+    if not notes or not assignments:
+        raise SystemExit("dataset has no notes or assignments")
+    tokens: Dict[int, Dict[str, str]] = {}
+
+    def headers(user_id):
+        if user_id not in tokens:
+            tokens[user_id] = _headers(user_id)
+        return tokens[user_id]
+
+    sample = Sample(
+        admin=headers(admin_id),
+        notes=[(note_id, headers(creator_id)) for note_id, creator_id in notes],
+        assignments=[(assignment_id, headers(user_id)) for assignment_id, user_id in assignments],
+    )
+    counts = {
+        model.__tablename__: db.session.execute(select(func.count()).select_from(model)).scalar()
+        for model in (User, Contact, Note, Assignment, ActionLog)
+    }
+    return sample, counts
+
+
+# ---------- Clients ----------
+
+class InProcessClient:
+    """Client de test Flask (un par thread)."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def send(self, method: str, path: str, headers: Dict[str, str], body: Optional[dict]) -> int:
+        response = self.client.open(path, method=method, headers=headers, json=body)
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Connexion HTTP persistante (keep-alive) vers un serveur lancé (une par thread)."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        parts = urlsplit(base_url)
+        self.factory = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.connection = None
+
+    def send(self, method: str, path: str, headers: Dict[str, str], body: Optional[dict]) -> int:
+        payload = json.dumps(body).encode() if body is not None else None
+        headers = dict(headers, **({"Content-Type": "application/json"} if payload is not None else {}))
+        for attempt in (1, 2):
+            if self.connection is None:
+                self.connection = self.factory(self.netloc, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                response.read()
+                return response.status
+            except (http.client.HTTPException, OSError):
+                # Connexion fermée par le serveur (max_requests gunicorn...) : une nouvelle tentative
+                self.connection.close()
+                self.connection = None
+                if attempt == 2:
+                    raise
+
+
+# ---------- Exécution ----------
+
+def _summary(durations: List[float], errors: int) -> Dict[str, Any]:
+    if not durations:
+        return {"count": 0, "errors": errors}
+    return {
+        "count": len(durations),
+        "errors": errors,
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "p50_ms": round(_percentile(durations, 0.50) * 1000, 3),
+        "p95_ms": round(_percentile(durations, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(durations, 0.99) * 1000, 3),
+        "max_ms": round(max(durations) * 1000, 3),
+    }
+
+
+def run(client_factory: Callable[[], Any], sample: Sample, mix: Dict[str, int], requests: int,
+        duration: Optional[float], concurrency: int, warmup: int, seed: int) -> Dict[str, Any]:
+    """
+    Rejouer le mélange avec `concurrency` threads.
+
+    Args:
+        client_factory: Crée le client d'un thread (InProcessClient ou HttpClient)
+        sample: Échantillon du jeu de données
+        mix: Poids par opération (0 : désactivée)
+        requests: Nombre total de requêtes mesurées (ignoré si duration)
+        duration: Durée de la mesure en secondes
+        concurrency: Nombre de threads clients
+        warmup: Requêtes non mesurées par thread avant la mesure
+        seed: Graine du tirage des opérations
+
+    Returns:
+        Latences par opération et globales, débit
+    """
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    results = {name: ([], [0]) for name in names}
+    status_counts: Dict[str, Dict[str, int]] = {name: {} for name in names}
+    lock = threading.Lock()
+    remaining = [requests]
+    clock = {}
+
+    def start_clock():
+        clock["started"] = time.perf_counter()
+        clock["deadline"] = clock["started"] + (duration or 0)
+
+    # Tous les threads partent ensemble, une fois la chauffe terminée
+    barrier = threading.Barrier(concurrency + 1, action=start_clock)
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = client_factory()
+        for _ in range(warmup):
+            operation = MIX[rng.choices(names, weights)[0]][1]
+            try:
+                client.send(operation.method, *operation.build(rng, sample))
+            except Exception:  # noqa: BLE001 - compté pendant la mesure, pas pendant la chauffe
+                pass
+        barrier.wait()
+        while True:
+            if duration is not None:
+                if time.perf_counter() >= clock["deadline"]:
+                    return
+            else:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+            name = rng.choices(names, weights)[0]
+            operation = MIX[name][1]
+            request = operation.build(rng, sample)
+            start = time.perf_counter()
+            try:
+                status = client.send(operation.method, *request)
+            except Exception:  # noqa: BLE001 - exception propagée (TESTING) ou connexion perdue
+                status = 0
+            elapsed = time.perf_counter() - start
+            with lock:
+                durations, errors = results[name]
+                durations.append(elapsed)
+                if status == 0 or status >= 400:
+                    errors[0] += 1
+                status_counts[name][str(status)] = status_counts[name].get(str(status), 0) + 1
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - clock["started"]
+
+    endpoints = {}
+    for name in names:
+        durations, errors = results[name]
+        operation = MIX[name][1]
+        endpoints[name] = {
+            "method": operation.method, "path": operation.path,
+            **_summary(durations, errors[0]), "status": status_counts[name],
+        }
+    all_durations = [value for durations, _ in results.values() for value in durations]
+    overall = _summary(all_durations, sum(errors[0] for _, errors in results.values()))
+    overall["throughput_rps"] = round(len(all_durations) / elapsed, 2) if elapsed else None
+    overall["elapsed_s"] = round(elapsed, 3)
+    return {"overall": overall, "endpoints": endpoints}
+
+
+def _parse_mix(value: Optional[str]) -> Dict[str, int]:
+    mix = {name: weight for name, (weight, _) in MIX.items()}
+    for item in filter(None, (value or "").split(",")):
+        name, _, weight = item.partition("=")
+        if name not in MIX:
+            raise SystemExit(f"unknown operation {name!r} (choices: {', '.join(MIX)})")
+        mix[name] = int(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", help="serveur à charger (défaut : application dans le processus)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, help="durée en secondes (remplace --requests)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=20, help="requêtes non mesurées par thread")
+    parser.add_argument("--mix", help="poids par opération, ex : list_notes=50,create_note=0")
+    parser.add_argument("--sample-size", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="fichier JSON (défaut : sortie standard)")
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+    mix = _parse_mix(args.mix)
+    app = create_app({"TESTING": True, "SQLALCHEMY_DATABASE_URI": database_url})
+    with app.app_context():
+        sample, counts = sample_dataset(args.sample_size)
+        dialect = db.engine.dialect.name
+
+    if args.base_url:
+        factory = lambda: HttpClient(args.base_url)  # noqa: E731
+    else:
+        factory = lambda: InProcessClient(app)  # noqa: E731
+    result = run(factory, sample, mix, args.requests, args.duration, args.concurrency, args.warmup, args.seed)
+
+    report = {
+        "meta": {
+            **_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "target": args.base_url or "in-process",
+            "database": dialect,
+            "dataset": counts,
+            "concurrency": args.concurrency,
+            "mix": {name: weight for name, weight in mix.items() if weight > 0},
+            "seed": args.seed,
+        },
+        **result,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Benchmark du chemin d'écriture : commit par appel de repository vs unité de travail.
+
+Rejoue un scénario d'écriture typique (créer une note, l'assigner, la marquer
+lue, changer le statut) avec UNIT_OF_WORK désactivé puis activé, sur une base
+fichier (les COMMIT coûtent un fsync, comme en production), et affiche en JSON
+la latence par requête (médiane, p95) et le nombre de COMMIT par requête.
+
+Usage (depuis backend/) :
+    python -m benchmarks.write_path --iterations 200
+    DATABASE_URL=postgresql+psycopg2://... python -m benchmarks.write_path
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+from sqlalchemy import event
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models import User, Contact
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def _seed():
+    """Deux utilisateurs en contact mutuel ; renvoie (en-têtes alice, id bob, en-têtes bob)."""
+    alice = User(username="bench_alice", email="bench_alice@test.com", password_hash="hash")
+    bob = User(username="bench_bob", email="bench_bob@test.com", password_hash="hash")
+    db.session.add_all([alice, bob])
+    db.session.commit()
+    db.session.add_all([
+        Contact(user_id=alice.id, contact_user_id=bob.id, nickname="Bob"),
+        Contact(user_id=bob.id, contact_user_id=alice.id, nickname="Alice"),
+    ])
+    db.session.commit()
+    return (
+        {"Authorization": f"Bearer {create_access_token(identity=str(alice.id))}"},
+        bob.id,
+        {"Authorization": f"Bearer {create_access_token(identity=str(bob.id))}"},
+    )
+
+
+def _scenario(client, alice, bob_id, bob):
+    """Une itération : 4 requêtes d'écriture. Renvoie leurs durées."""
+    durations = []
+
+    def timed(method, url, headers, body):
+        start = time.perf_counter()
+        response = getattr(client, method)(url, json=body, headers=headers)
+        durations.append(time.perf_counter() - start)
+        assert response.status_code < 400, (url, response.get_json())
+        return response.get_json()
+
+    note = timed("post", "/v1/notes", alice, {"content": "Benchmark"})
+    assignment = timed("post", "/v1/assignments", alice, {"note_id": note["id"], "user_id": bob_id})
+    timed("put", f"/v1/assignments/{assignment['id']}", bob, {"is_read": True})
+    timed("put", f"/v1/assignments/{assignment['id']}/status", bob, {"recipient_status": "terminé"})
+    return durations
+
+
+def run(database_url: str, unit_of_work: bool, iterations: int) -> dict:
+    """
+    Mesurer le scénario pour un mode donné.
+
+    Args:
+        database_url: URL SQLAlchemy de la base (schéma recréé)
+        unit_of_work: Activer l'unité de travail
+        iterations: Nombre de répétitions du scénario
+
+    Returns:
+        Statistiques de latence et de COMMIT par requête
+    """
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": database_url,
+        "UNIT_OF_WORK": unit_of_work,
+    })
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        alice, bob_id, bob = _seed()
+        client = app.test_client()
+
+        commits = []
+        event.listen(db.engine, "commit", lambda conn: commits.append(1))
+        durations = []
+        for _ in range(iterations):
+            durations.extend(_scenario(client, alice, bob_id, bob))
+        db.drop_all()
+
+    return {
+        "unit_of_work": unit_of_work,
+        "requests": len(durations),
+        "commits_per_request": round(len(commits) / len(durations), 2),
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "p95_ms": round(_percentile(durations, 0.95) * 1000, 3),
+        "total_s": round(sum(durations), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    database_url = os.getenv("DATABASE_URL")
+    db_path = None
+    if not database_url:
+        db_fd, db_path = tempfile.mkstemp(suffix=".db")
+        os.close(db_fd)
+        database_url = f"sqlite:///{db_path}"
+
+    try:
+        baseline = run(database_url, unit_of_work=False, iterations=args.iterations)
+        enlisted = run(database_url, unit_of_work=True, iterations=args.iterations)
+    finally:
+        if db_path:
+            os.unlink(db_path)
+
+    print(json.dumps({
+        "scenario": "create note, assign, mark read, update status",
+        "results": [baseline, enlisted],
+        "median_speedup": round(baseline["median_ms"] / enlisted["median_ms"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
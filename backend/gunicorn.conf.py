@@ -0,0 +1,77 @@
+"""
+Configuration gunicorn (production) : `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+Workers "gthread" par défaut : WEB_CONCURRENCY processus de GUNICORN_THREADS
+threads. Les requêtes attendent surtout PostgreSQL, les threads recouvrent
+ces attentes ; les processus utilisent plusieurs cœurs. Chaque worker a son
+propre pool SQLAlchemy dimensionné sur GUNICORN_THREADS (voir app/db_pool.py).
+Un flux SSE (/v1/events/stream) occupe un thread : REALTIME_MAX_STREAMS
+(défaut GUNICORN_THREADS / 2) borne les flux par worker, au-delà 503.
+
+GUNICORN_WORKER_CLASS=gevent (paquet gevent requis) sert de nombreuses
+connexions lentes (flux SSE /v1/events) par worker ; la concurrence n'est
+alors plus bornée par les threads : fixer DB_POOL_SIZE (défaut 10 dans ce
+mode), le pool devient la limite d'accès à la base.
+
+Avec plus d'un worker, REALTIME_BROKER=redis est requis (l'application
+refuse de démarrer sinon) et CACHE_BACKEND=redis conseillé (le cache
+"memory" est désactivé).
+
+Variables : GUNICORN_BIND, WEB_CONCURRENCY, GUNICORN_THREADS,
+GUNICORN_WORKER_CLASS, GUNICORN_TIMEOUT, GUNICORN_MAX_REQUESTS, REALTIME_MAX_STREAMS,
+METRICS_MULTIPROC_DIR.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+# Le script gunicorn ne met pas le dossier courant dans sys.path avant de lire cette configuration
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.workers import web_concurrency  # noqa: E402
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = web_concurrency()
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+# Lu par create_app dans chaque worker : même valeur pour le serveur et le pool
+os.environ["WEB_CONCURRENCY"] = str(workers)
+os.environ["GUNICORN_THREADS"] = str(threads)
+if worker_class == "gevent":
+    os.environ.setdefault("DB_POOL_SIZE", "10")
+else:
+    # Un flux SSE bloque un thread : en garder la moitié pour les requêtes de l'API
+    os.environ.setdefault("REALTIME_MAX_STREAMS", str(max(1, threads // 2)))
+
+# /metrics additionne les workers via ce dossier (voir app/metrics.py) ; vidé à chaque démarrage
+metrics_dir = os.environ.setdefault(
+    "METRICS_MULTIPROC_DIR",
+    os.getenv("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), "gunicorn-metrics")
+)
+
+
+def on_starting(server):
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+# Worker sans signe de vie interrompu ; les flux SSE envoient un keep-alive (REALTIME_HEARTBEAT_SECONDS)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycler les workers limite l'effet d'une fuite mémoire ; jitter : pas tous en même temps
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = max_requests // 10
+
+# Pas de preload : pools SQLAlchemy, threads d'audit et pools de hachage créés dans chaque worker
+preload_app = False
+
+accesslog = "-"
+# Format par défaut sans la query string (%(U)s au lieu de %(r)s) : ni ticket ?jwt= ni recherche ?q= dans les logs
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+# Derrière un reverse proxy (nginx) : X-Forwarded-* de confiance
+forwarded_allow_ips = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
@@ -90,9 +90,21 @@ def run_migrations_online():
                 directives[:] = []
                 logger.info('No changes in schema detected.')
 
+    # Objets créés uniquement par migration ou commande, absents des modèles
+    # (voir app/search.py et app/partitions.py) :
+    # l'autogénération ne doit pas proposer de les supprimer
+    def include_object(object, name, type_, reflected, compare_to):
+        from app.partitions import is_partition
+        from app.search import UNMAPPED_SCHEMA_OBJECTS
+        if not (reflected and compare_to is None):
+            return True
+        # Partitions mensuelles de action_logs, créées par `flask action-logs create-partitions`
+        return name not in UNMAPPED_SCHEMA_OBJECTS and not (type_ == "table" and is_partition(name))
+
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_object", include_object)
 
     connectable = get_engine()
 
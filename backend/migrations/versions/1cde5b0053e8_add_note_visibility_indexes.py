@@ -0,0 +1,37 @@
+"""add note visibility indexes
+
+Revision ID: 1cde5b0053e8
+Revises: e9793c3cdc56
+Create Date: 2026-10-18 09:12:41.503118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1cde5b0053e8'
+down_revision = 'e9793c3cdc56'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Index des deux branches de la requête de visibilité (UNION ALL)
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.create_index('ix_assignments_user_id_note_id', ['user_id', 'note_id'], unique=False)
+
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_notes_creator_id_delete_date_created_date',
+            ['creator_id', 'delete_date', 'created_date'],
+            unique=False
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_index('ix_notes_creator_id_delete_date_created_date')
+
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_index('ix_assignments_user_id_note_id')
@@ -0,0 +1,99 @@
+"""add structured note and subject columns to action logs
+
+Revision ID: 6183e28e20fa
+Revises: 65a8ee8e2695
+Create Date: 2026-10-18 11:12:40.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6183e28e20fa'
+down_revision = '65a8ee8e2695'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('action_logs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('note_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('subject_user_id', sa.Integer(), nullable=True))
+
+    # Backfill depuis le payload JSON (mêmes règles que ActionLog.structured_columns :
+    # premier entier JSON parmi les clés, sinon NULL). Un payload qui n'est pas du
+    # JSON valide (logs anciens, tronqués) donne NULL au lieu de faire échouer la
+    # migration : le cast est isolé dans une fonction temporaire (pg_temp).
+    op.execute(
+        """
+        CREATE FUNCTION pg_temp.payload_int(payload text, VARIADIC keys text[]) RETURNS integer
+        LANGUAGE plpgsql IMMUTABLE AS $$
+        DECLARE
+            document jsonb;
+            value jsonb;
+            key text;
+        BEGIN
+            BEGIN
+                document := payload::jsonb;
+            EXCEPTION WHEN invalid_text_representation THEN
+                RETURN NULL;
+            END;
+            IF jsonb_typeof(document) <> 'object' THEN
+                RETURN NULL;
+            END IF;
+            FOREACH key IN ARRAY keys LOOP
+                value := document -> key;
+                -- Entier JSON tenant dans un INTEGER (ni booléen, ni chaîne, ni décimal)
+                IF jsonb_typeof(value) = 'number' AND value::text ~ '^-?[0-9]{1,9}$' THEN
+                    RETURN value::text::integer;
+                END IF;
+            END LOOP;
+            RETURN NULL;
+        END $$
+        """
+    )
+    op.execute(
+        """
+        UPDATE action_logs SET note_id = target_id
+        WHERE action_type IN ('note_created', 'note_updated', 'note_deleted')
+        """
+    )
+    op.execute(
+        """
+        UPDATE action_logs
+        SET note_id = pg_temp.payload_int(payload, 'note_id')
+        WHERE action_type NOT IN ('note_created', 'note_updated', 'note_deleted')
+          AND left(payload, 1) = '{'
+        """
+    )
+    op.execute(
+        """
+        UPDATE action_logs SET subject_user_id = target_id
+        WHERE action_type IN ('user_registered', 'user_deleted', 'user_logout', 'password_changed')
+        """
+    )
+    op.execute(
+        """
+        UPDATE action_logs
+        SET subject_user_id = pg_temp.payload_int(payload, 'assigned_user_id', 'assigned_to', 'user_id')
+        WHERE action_type NOT IN ('user_registered', 'user_deleted', 'user_logout', 'password_changed')
+          AND left(payload, 1) = '{'
+        """
+    )
+    op.execute("DROP FUNCTION pg_temp.payload_int(text, text[])")
+
+    # Index créés après le backfill (plus rapide que de les maintenir pendant l'UPDATE)
+    with op.batch_alter_table('action_logs', schema=None) as batch_op:
+        batch_op.create_index('ix_action_logs_note_id_action_type_timestamp',
+                              ['note_id', 'action_type', 'timestamp'], unique=False)
+        batch_op.create_index('ix_action_logs_subject_user_id_timestamp',
+                              ['subject_user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('action_logs', schema=None) as batch_op:
+        batch_op.drop_index('ix_action_logs_subject_user_id_timestamp')
+        batch_op.drop_index('ix_action_logs_note_id_action_type_timestamp')
+        batch_op.drop_column('subject_user_id')
+        batch_op.drop_column('note_id')
@@ -0,0 +1,39 @@
+"""add precomputed mutual flag to contacts
+
+Revision ID: 65a8ee8e2695
+Revises: 1cde5b0053e8
+Create Date: 2026-10-18 10:04:27.881902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '65a8ee8e2695'
+down_revision = '1cde5b0053e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('contacts', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('mutual', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.create_index('ix_contacts_user_id_mutual', ['user_id', 'mutual'], unique=False)
+
+    # Backfill : un contact est mutuel si le contact inverse existe (auto-jointure)
+    op.execute(
+        """
+        UPDATE contacts SET mutual = EXISTS (
+            SELECT 1 FROM contacts AS inverse
+            WHERE inverse.user_id = contacts.contact_user_id
+              AND inverse.contact_user_id = contacts.user_id
+        )
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('contacts', schema=None) as batch_op:
+        batch_op.drop_index('ix_contacts_user_id_mutual')
+        batch_op.drop_column('mutual')
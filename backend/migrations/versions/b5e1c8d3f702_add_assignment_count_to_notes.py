@@ -0,0 +1,38 @@
+"""add denormalized assignment_count to notes
+
+Revision ID: b5e1c8d3f702
+Revises: f8c2b6e4a913
+Create Date: 2026-10-18 16:42:09.318245
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e1c8d3f702'
+down_revision = 'f8c2b6e4a913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('assignment_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_notes_creator_id_assignment_count',
+                              ['creator_id', 'assignment_count', 'delete_date', 'created_date'], unique=False)
+
+    # Backfill : nombre d'assignations de chaque note (seules les notes assignées sont modifiées)
+    op.execute(
+        """
+        UPDATE notes SET assignment_count = counts.total
+        FROM (SELECT note_id, COUNT(*) AS total FROM assignments GROUP BY note_id) AS counts
+        WHERE counts.note_id = notes.id
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_index('ix_notes_creator_id_assignment_count')
+        batch_op.drop_column('assignment_count')
@@ -0,0 +1,26 @@
+"""add notes_version to users
+
+Revision ID: c41d7e9a2b53
+Revises: 6183e28e20fa
+Create Date: 2026-10-18 12:05:41.308127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e9a2b53'
+down_revision = '6183e28e20fa'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('notes_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('notes_version')
@@ -0,0 +1,42 @@
+"""add denormalized read and completed counts to notes
+
+Revision ID: c8a4f2e6b913
+Revises: b5e1c8d3f702
+Create Date: 2026-10-18 18:05:51.604127
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a4f2e6b913'
+down_revision = 'b5e1c8d3f702'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('read_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('completed_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill : destinataires ayant lu / terminé chaque note (seules les notes assignées sont modifiées)
+    op.execute(
+        """
+        UPDATE notes SET read_count = counts.read_total, completed_count = counts.completed_total
+        FROM (
+            SELECT note_id,
+                   COUNT(*) FILTER (WHERE is_read) AS read_total,
+                   COUNT(*) FILTER (WHERE recipient_status = 'terminé') AS completed_total
+            FROM assignments GROUP BY note_id
+        ) AS counts
+        WHERE counts.note_id = notes.id
+        """
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('notes', schema=None) as batch_op:
+        batch_op.drop_column('completed_count')
+        batch_op.drop_column('read_count')
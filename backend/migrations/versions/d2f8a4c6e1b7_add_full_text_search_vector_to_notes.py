@@ -0,0 +1,35 @@
+"""add full-text search vector to notes
+
+Revision ID: d2f8a4c6e1b7
+Revises: c41d7e9a2b53
+Create Date: 2026-10-18 13:21:09.842517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2f8a4c6e1b7'
+down_revision = 'c41d7e9a2b53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Colonne générée : PostgreSQL la recalcule à chaque INSERT/UPDATE de content.
+    # Non mappée sur le modèle Note (voir app/search.py). L'ajout réécrit la table.
+    op.add_column('notes', sa.Column(
+        'search_vector',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('french'::regconfig, coalesce(content, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_notes_search_vector', 'notes', ['search_vector'],
+                    unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    op.drop_index('ix_notes_search_vector', table_name='notes', postgresql_using='gin')
+    op.drop_column('notes', 'search_vector')
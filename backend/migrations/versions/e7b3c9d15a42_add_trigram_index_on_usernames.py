@@ -0,0 +1,29 @@
+"""add trigram index on usernames
+
+Revision ID: e7b3c9d15a42
+Revises: d2f8a4c6e1b7
+Create Date: 2026-10-18 14:02:33.176094
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3c9d15a42'
+down_revision = 'd2f8a4c6e1b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm est une extension "trusted" (PostgreSQL >= 13) : pas besoin de superutilisateur
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Sert LIKE 'q%' et l'opérateur de similarité % de GET /v1/users/search (voir app/search.py)
+    op.execute(
+        "CREATE INDEX ix_users_username_trgm ON users USING gin (lower(username) gin_trgm_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_users_username_trgm")
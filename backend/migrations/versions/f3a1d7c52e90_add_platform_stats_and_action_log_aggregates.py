@@ -0,0 +1,59 @@
+"""add platform_stats and action log aggregates
+
+Revision ID: f3a1d7c52e90
+Revises: e7b3c9d15a42
+Create Date: 2026-10-18 15:21:07.462310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a1d7c52e90'
+down_revision = 'e7b3c9d15a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('platform_stats',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('action_log_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('action_type', sa.String(length=80), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'action_type')
+    )
+    op.create_table('action_log_user_stats',
+    sa.Column('user_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Agrégats des logs existants ; les compteurs d'entités sont calculés à la première lecture
+    op.execute(
+        "INSERT INTO action_log_daily_stats (day, action_type, count) "
+        "SELECT date(timestamp), action_type, count(id) FROM action_logs "
+        "GROUP BY date(timestamp), action_type"
+    )
+    op.execute(
+        "INSERT INTO action_log_user_stats (user_id, count) "
+        "SELECT user_id, count(id) FROM action_logs WHERE user_id IS NOT NULL GROUP BY user_id"
+    )
+    op.execute(
+        "INSERT INTO platform_stats (name, value, updated_at) "
+        "SELECT 'total_action_logs', count(id), now() AT TIME ZONE 'utc' FROM action_logs "
+        "UNION ALL "
+        "SELECT 'anonymous_action_logs', count(id), now() AT TIME ZONE 'utc' FROM action_logs WHERE user_id IS NULL"
+    )
+
+
+def downgrade():
+    op.drop_table('action_log_user_stats')
+    op.drop_table('action_log_daily_stats')
+    op.drop_table('platform_stats')
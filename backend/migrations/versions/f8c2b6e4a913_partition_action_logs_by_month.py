@@ -0,0 +1,95 @@
+"""partition action_logs by month
+
+Revision ID: f8c2b6e4a913
+Revises: f3a1d7c52e90
+Create Date: 2026-10-18 16:40:12.905113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8c2b6e4a913'
+down_revision = 'f3a1d7c52e90'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, target_id, action_type, timestamp, payload, note_id, subject_user_id"
+
+
+def _create_action_logs(partitioned):
+    op.execute(
+        "CREATE TABLE action_logs ("
+        " id integer NOT NULL DEFAULT nextval('action_logs_id_seq'::regclass),"
+        " user_id integer REFERENCES users (id) ON DELETE SET NULL,"
+        " target_id integer NOT NULL,"
+        " action_type varchar(80) NOT NULL,"
+        " timestamp timestamp without time zone NOT NULL,"
+        " payload varchar(255),"
+        " note_id integer,"
+        " subject_user_id integer,"
+        + (" PRIMARY KEY (id, timestamp)) PARTITION BY RANGE (timestamp)" if partitioned
+           else " PRIMARY KEY (id))")
+    )
+
+
+def _create_indexes():
+    op.create_index('ix_action_logs_note_id_action_type_timestamp', 'action_logs',
+                    ['note_id', 'action_type', 'timestamp'])
+    op.create_index('ix_action_logs_subject_user_id_timestamp', 'action_logs', ['subject_user_id', 'timestamp'])
+    op.create_index('ix_action_logs_timestamp', 'action_logs', ['timestamp'])
+    op.create_index('ix_action_logs_user_id_timestamp', 'action_logs', ['user_id', 'timestamp'])
+    op.create_index('ix_action_logs_action_type_timestamp', 'action_logs', ['action_type', 'timestamp'])
+
+
+def _set_aside_old_table():
+    # Les noms d'index et la séquence passent à la nouvelle table
+    op.execute("ALTER TABLE action_logs RENAME TO action_logs_old")
+    op.execute("ALTER TABLE action_logs_old RENAME CONSTRAINT action_logs_pkey TO action_logs_old_pkey")
+    op.execute("DROP INDEX IF EXISTS ix_action_logs_note_id_action_type_timestamp")
+    op.execute("DROP INDEX IF EXISTS ix_action_logs_subject_user_id_timestamp")
+    op.execute("ALTER SEQUENCE action_logs_id_seq OWNED BY NONE")
+
+
+def _replace_old_table():
+    op.execute(f"INSERT INTO action_logs ({COLUMNS}) SELECT {COLUMNS} FROM action_logs_old")
+    op.execute("DROP TABLE action_logs_old")
+    op.execute("ALTER SEQUENCE action_logs_id_seq OWNED BY action_logs.id")
+
+
+def upgrade():
+    _set_aside_old_table()
+    _create_action_logs(partitioned=True)
+
+    # Une partition par mois, du plus ancien log à trois mois après le mois courant
+    # (ensuite : `flask action-logs create-partitions`), plus une partition DEFAULT
+    op.execute("""
+        DO $$
+        DECLARE
+            month date := date_trunc('month', coalesce(
+                (SELECT min(timestamp) FROM action_logs_old), now() AT TIME ZONE 'utc'))::date;
+            last_month date := (date_trunc('month', now() AT TIME ZONE 'utc') + interval '3 months')::date;
+        BEGIN
+            WHILE month <= last_month LOOP
+                EXECUTE 'CREATE TABLE ' || quote_ident('action_logs_' || to_char(month, 'YYYY_MM'))
+                    || ' PARTITION OF action_logs FOR VALUES FROM (' || quote_literal(month::text)
+                    || ') TO (' || quote_literal((month + interval '1 month')::date::text) || ')';
+                month := (month + interval '1 month')::date;
+            END LOOP;
+        END $$
+    """)
+    op.execute("CREATE TABLE action_logs_default PARTITION OF action_logs DEFAULT")
+
+    _replace_old_table()
+    # Index créés sur la table parente : propagés à chaque partition, présente et future
+    _create_indexes()
+
+
+def downgrade():
+    _set_aside_old_table()
+    _create_action_logs(partitioned=False)
+    _replace_old_table()
+    op.create_index('ix_action_logs_note_id_action_type_timestamp', 'action_logs',
+                    ['note_id', 'action_type', 'timestamp'])
+    op.create_index('ix_action_logs_subject_user_id_timestamp', 'action_logs', ['subject_user_id', 'timestamp'])
@@ -4,12 +4,17 @@ Ce module contient les fixtures pytest pour les tests.
 """
 import os
 import tempfile
+from contextlib import contextmanager
 import pytest
+from sqlalchemy import event
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import create_access_token
 from app import create_app, db
 from app.models import User, Note, Contact, Assignment, ActionLog
 
+# Requêtes SQL par requête HTTP et budgets par route (fixture query_budget)
+pytest_plugins = ["tests.query_budget_plugin"]
+
 
 @pytest.fixture
 def app():
@@ -40,6 +45,33 @@ def app():
     os.unlink(db_path)
 
 
+@pytest.fixture
+def query_counter(app):
+    """
+    Compter les requêtes SQL émises dans un bloc (garde-fou contre les N+1).
+    
+    Usage :
+        with query_counter() as queries:
+            client.get(...)
+        assert len(queries) <= 3
+    """
+    @contextmanager
+    def _count():
+        statements = []
+        
+        def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        engine = db.engine
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+    
+    return _count
+
+
 @pytest.fixture
 def client(app):
     """Fixture pour créer un client de test."""
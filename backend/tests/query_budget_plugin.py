@@ -0,0 +1,243 @@
+"""
+Plugin pytest : requêtes SQL par requête HTTP et budget de chaque route.
+
+Pour tout test qui utilise la fixture `app`, chaque requête HTTP est comptée
+(événement before_cursor_execute du moteur, rattaché au endpoint Flask de la
+requête jusqu'au signal request_tearing_down : le flush de l'unité de travail
+est compris).
+
+ROUTE_BUDGETS déclare, pour chaque route de routes/v1, le nombre maximal de
+requêtes SQL : il ne dépend pas de la taille du résultat (une route en O(N)
+est un N+1). tests/test_query_budget.py exerce chaque route avec deux tailles
+de jeu de données et vérifie les deux propriétés.
+
+- fixture `query_budget` : track() capture les requêtes HTTP d'un bloc,
+  check() échoue si l'une dépasse le budget de sa route (avec ses requêtes
+  SQL les plus répétées) ;
+- en fin de session, si des tests ont échoué (ou avec --query-report), le
+  résumé liste les routes les plus coûteuses vues pendant la session.
+"""
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Optional
+import pytest
+from flask import has_request_context, request, request_tearing_down
+from sqlalchemy import event
+from app import db
+
+ENVIRON_KEY = "query_budget.statements"
+REPORT_SIZE = 10
+
+# Nombre maximal de requêtes SQL par requête HTTP, indépendant de la taille du
+# résultat (mesuré avec une session vide et un cache d'identités froid).
+# Toute nouvelle route de routes/v1 doit être déclarée ici.
+ROUTE_BUDGETS: Dict[str, int] = {
+    # Auth et utilisateurs
+    "auth.register": 6,
+    "auth.login": 2,                           # + UPDATE du hash s'il est à recalculer
+    "auth.logout": 4,                          # utilisateur + log d'audit (+ agrégats)
+    "auth.get_me": 1,
+    "users.get_current_user": 1,
+    "users.list_users": 2,
+    "users.search_users": 2,                   # index des noms (construit au premier appel) + utilisateurs
+    "users.get_user": 2,
+    "users.update_user": 6,                    # username changé : correspondants (notes partagées, carnets)
+    "users.delete_user": 15,                   # log + suppression en cascade (notes, contacts, assignations)
+    # Notes
+    "notes.create_note": 7,
+    "notes.get_notes": 4,                      # COUNT + page (créateurs par jointure) + version (ETag) + index de recherche
+    "notes.get_note": 6,                       # la première lecture marque l'assignation lue
+    "notes.get_note_details": 2,
+    "notes.get_note_assignments": 2,
+    "notes.update_note": 9,
+    "notes.delete_note": 10,
+    "notes.get_orphan_notes": 2,               # page keyset + total, sur l'index assignment_count
+    "notes.count_orphan_notes": 1,
+    "notes.get_deletion_history": 2,
+    "notes.get_completion_history": 2,         # note + historique indexé (note_id, action_type)
+    "notes.create_note_assignments_bulk": 12,  # un INSERT multi-lignes, quel que soit le nombre de destinataires
+    # Assignations
+    "assignments.create_assignment": 11,       # + compteur assignment_count de la note
+    "assignments.list_assignments": 1,
+    "assignments.get_assignment": 3,
+    "assignments.update_assignment": 10,       # + compteurs lus/terminés de la note
+    "assignments.delete_assignment": 10,
+    "assignments.toggle_priority": 9,
+    "assignments.update_status": 10,
+    "assignments.get_unread_assignments": 1,
+    # Contacts
+    "contacts.create_contact": 10,             # + réciprocité posée sur les deux contacts
+    "contacts.list_contacts": 2,               # moi + contacts (contact_user par jointure, réciprocité précalculée)
+    "contacts.list_assignable_users": 2,
+    "contacts.get_contact": 1,
+    "contacts.update_contact": 7,
+    "contacts.delete_contact": 9,
+    "contacts.get_contact_notes": 4,
+    # Logs d'actions et temps réel
+    "action_logs.list_action_logs": 3,
+    "action_logs.get_action_log": 2,
+    "action_logs.get_action_log_stats": 5,     # + série quotidienne (?days=)
+    "realtime.stream_events": 0,               # jusqu'aux en-têtes ; le flux ne lit pas la base
+    "realtime.create_stream_ticket": 0,
+    # Administration (admin_required : 1 requête, cache d'identités froid)
+    "admin.list_all_users": 2,
+    "admin.list_all_notes": 2,
+    "admin.list_all_contacts": 2,              # admin_required + page (réciprocité précalculée, aussi en NDJSON)
+    "admin.list_all_assignments": 2,
+    "admin.get_stats": 4,                      # compteurs recalculés s'ils sont périmés
+    "admin.get_audit_stats": 1,
+    "admin.get_cache_stats": 1,
+    "admin.get_etag_stats": 1,
+    "admin.get_identity_stats": 1,
+    "admin.get_db_pool_stats": 1,
+    "admin.get_profiler_summary": 1,
+    "admin.reset_profiler": 1,
+    "admin.delete_user_admin": 11,
+    "admin.update_user_role": 4,
+    "admin.get_note_admin": 3,
+    "admin.update_note_admin": 6,
+    "admin.delete_note_admin": 7,              # assignations supprimées en un seul DELETE
+    "admin.get_contact_admin": 2,
+    "admin.update_contact_admin": 4,
+    "admin.delete_contact_admin": 5,
+    "admin.get_assignment_admin": 3,
+    "admin.update_assignment_admin": 6,
+    "admin.delete_assignment_admin": 6,
+}
+
+
+class RequestQueries(NamedTuple):
+    """Requêtes SQL d'une requête HTTP."""
+    endpoint: str
+    method: str
+    path: str
+    statements: List[str]
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def budget(self) -> Optional[int]:
+        return ROUTE_BUDGETS.get(self.endpoint)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.count > self.budget
+
+    def describe(self, repeated: int = 3) -> str:
+        """Ligne de rapport, avec les requêtes SQL les plus répétées."""
+        budget = "-" if self.budget is None else self.budget
+        lines = [f"{self.count:>3} / {budget:<3} {self.endpoint} ({self.method} {self.path})"]
+        for statement, times in Counter(" ".join(s.split()) for s in self.statements).most_common(repeated):
+            if times > 1:
+                lines.append(f"          x{times} {statement[:160]}")
+        return "\n".join(lines)
+
+
+class QueryRecorder:
+    """Compte les requêtes SQL de chaque requête HTTP d'une application."""
+
+    def __init__(self, app):
+        self.app = app
+        self.requests: List[RequestQueries] = []
+        with app.app_context():
+            self.engine = db.engine
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if has_request_context():
+            request.environ.setdefault(ENVIRON_KEY, []).append(statement)
+
+    def _tearing_down(self, sender, **extra):
+        self.requests.append(RequestQueries(
+            endpoint=request.endpoint or "unmatched",
+            method=request.method,
+            path=request.full_path.rstrip("?"),
+            statements=request.environ.pop(ENVIRON_KEY, []),
+        ))
+
+    def start(self) -> None:
+        event.listen(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        request_tearing_down.connect(self._tearing_down, self.app)
+
+    def stop(self) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._before_cursor_execute)
+        request_tearing_down.disconnect(self._tearing_down, self.app)
+
+
+def _report(requests: List[RequestQueries]) -> str:
+    worst = sorted(requests, key=lambda r: (not r.over_budget, -r.count))[:REPORT_SIZE]
+    return "\n".join(r.describe() for r in worst)
+
+
+class QueryBudget:
+    """Fixture `query_budget` : requêtes HTTP du test courant et vérification des budgets."""
+
+    def __init__(self, recorder: QueryRecorder):
+        self.recorder = recorder
+
+    @property
+    def requests(self) -> List[RequestQueries]:
+        return list(self.recorder.requests)
+
+    @contextmanager
+    def track(self):
+        """Capturer les requêtes HTTP émises dans le bloc (liste remplie à la sortie)."""
+        tracked: List[RequestQueries] = []
+        start = len(self.recorder.requests)
+        yield tracked
+        tracked.extend(self.recorder.requests[start:])
+
+    def check(self, requests: Optional[List[RequestQueries]] = None) -> None:
+        """Échouer si une requête dépasse le budget de sa route (toutes celles du test par défaut)."""
+        requests = self.requests if requests is None else requests
+        over = [r for r in requests if r.over_budget]
+        if over:
+            pytest.fail("SQL query budget exceeded (count / budget):\n" + _report(over), pytrace=False)
+
+
+# ---------- Hooks ----------
+
+_worst_by_endpoint: Dict[str, tuple] = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption("--query-report", action="store_true",
+                     help="toujours afficher les routes qui émettent le plus de requêtes SQL")
+
+
+@pytest.fixture(autouse=True)
+def _query_recorder(request):
+    """Compter les requêtes SQL des tests qui utilisent l'application."""
+    if "app" not in request.fixturenames:
+        yield None
+        return
+    recorder = QueryRecorder(request.getfixturevalue("app"))
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+        for entry in recorder.requests:
+            worst = _worst_by_endpoint.get(entry.endpoint)
+            if worst is None or entry.count > worst[0].count:
+                _worst_by_endpoint[entry.endpoint] = (entry, request.node.nodeid)
+
+
+@pytest.fixture
+def query_budget(_query_recorder) -> QueryBudget:
+    """Requêtes SQL par requête HTTP du test, et budgets de ROUTE_BUDGETS."""
+    if _query_recorder is None:
+        pytest.fail("query_budget requires the app fixture")
+    return QueryBudget(_query_recorder)
+
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    if not _worst_by_endpoint:
+        return
+    if exitstatus == 0 and not config.getoption("--query-report"):
+        return
+    entries = sorted(_worst_by_endpoint.values(), key=lambda item: (not item[0].over_budget, -item[0].count))
+    terminalreporter.section("SQL queries per request (worst per route: count / budget)")
+    for entry, nodeid in entries[:REPORT_SIZE]:
+        terminalreporter.write_line(f"{entry.describe()}\n          in {nodeid}")
@@ -0,0 +1,142 @@
+"""
+Tests pour l'assignation groupée POST /v1/notes/<id>/assignments:bulk.
+"""
+import json
+import pytest
+from app import db
+from app.models import User, Note, Assignment, Contact, ActionLog
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def bulk_setup(app):
+    """Alice, 5 contacts mutuels, un contact non réciproque et une note."""
+    alice = User(username="alice", email="alice@test.com", password_hash="hash")
+    db.session.add(alice)
+    db.session.commit()
+
+    friends = []
+    for i in range(5):
+        friend = User(username=f"friend{i}", email=f"friend{i}@test.com", password_hash="hash")
+        db.session.add(friend)
+        db.session.commit()
+        db.session.add_all([
+            Contact(user_id=alice.id, contact_user_id=friend.id, nickname=friend.username),
+            Contact(user_id=friend.id, contact_user_id=alice.id, nickname="Alice"),
+        ])
+        db.session.commit()
+        friends.append(friend.id)
+
+    stranger = User(username="stranger", email="stranger@test.com", password_hash="hash")
+    db.session.add(stranger)
+    db.session.commit()
+    db.session.add(Contact(user_id=alice.id, contact_user_id=stranger.id, nickname="Stranger"))
+    db.session.commit()
+
+    note = Note(content="Pour tout le monde", creator_id=alice.id)
+    db.session.add(note)
+    db.session.commit()
+
+    return {
+        "alice": alice.id,
+        "friends": friends,
+        "stranger": stranger.id,
+        "note": note.id,
+        "headers": {"Authorization": f"Bearer {create_access_token(identity=str(alice.id))}"},
+    }
+
+
+def _bulk(client, setup, user_ids, note_id=None):
+    return client.post(
+        f"/v1/notes/{note_id or setup['note']}/assignments:bulk",
+        json={"user_ids": user_ids},
+        headers=setup["headers"],
+    )
+
+
+class TestBulkAssignments:
+    """Tests de l'assignation groupée."""
+
+    @pytest.mark.integration
+    def test_assigns_all_mutual_contacts(self, client, bulk_setup):
+        """Tous les contacts mutuels sont assignés, avec un log d'audit chacun."""
+        response = _bulk(client, bulk_setup, bulk_setup["friends"])
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["created"] == 5
+        assert data["failed"] == 0
+        assert [r["user_id"] for r in data["results"]] == bulk_setup["friends"]
+        assert all(r["status"] == "created" for r in data["results"])
+        assert data["results"][0]["assignment"]["username"] == "friend0"
+
+        assignments = Assignment.query.filter_by(note_id=bulk_setup["note"]).all()
+        assert sorted(a.user_id for a in assignments) == sorted(bulk_setup["friends"])
+        assert all(a.recipient_status == "en_cours" and not a.is_read for a in assignments)
+
+        logs = ActionLog.query.filter_by(action_type="assignment_created").all()
+        assert len(logs) == 5
+        assert {log.target_id for log in logs} == {a.id for a in assignments}
+        assert json.loads(logs[0].payload)["note_id"] == bulk_setup["note"]
+
+    @pytest.mark.integration
+    def test_per_recipient_errors(self, client, bulk_setup):
+        """Les destinataires refusés n'empêchent pas les autres."""
+        friends = bulk_setup["friends"]
+        db.session.add(Assignment(note_id=bulk_setup["note"], user_id=friends[0]))
+        db.session.commit()
+
+        response = _bulk(client, bulk_setup, [
+            friends[0], friends[1], bulk_setup["stranger"], 99999, bulk_setup["alice"], friends[1]
+        ])
+
+        assert response.status_code == 200
+        data = response.get_json()
+        by_user = {r["user_id"]: r for r in data["results"]}
+        assert len(data["results"]) == 5  # doublon ignoré
+        assert by_user[friends[0]]["code"] == 400
+        assert by_user[friends[1]]["status"] == "created"
+        assert by_user[bulk_setup["stranger"]]["code"] == 403
+        assert by_user[99999]["code"] == 404
+        assert by_user[bulk_setup["alice"]]["status"] == "created"  # auto-assignation
+        assert data["created"] == 2
+        assert data["failed"] == 3
+        assert ActionLog.query.filter_by(action_type="assignment_created").count() == 2
+
+    @pytest.mark.integration
+    def test_only_creator_can_bulk_assign(self, client, bulk_setup):
+        """Un autre utilisateur que le créateur est refusé."""
+        friend = bulk_setup["friends"][0]
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(friend))}"}
+        response = client.post(
+            f"/v1/notes/{bulk_setup['note']}/assignments:bulk",
+            json={"user_ids": [bulk_setup["alice"]]},
+            headers=headers,
+        )
+        assert response.status_code == 403
+        assert Assignment.query.count() == 0
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("user_ids", [None, [], "1,2", [1, "2"], [True]])
+    def test_invalid_payload_returns_400(self, client, bulk_setup, user_ids):
+        """user_ids doit être une liste non vide d'entiers."""
+        assert _bulk(client, bulk_setup, user_ids).status_code == 400
+
+    @pytest.mark.integration
+    def test_unknown_note_returns_404(self, client, bulk_setup):
+        """Note inexistante."""
+        assert _bulk(client, bulk_setup, bulk_setup["friends"], note_id=99999).status_code == 404
+
+    @pytest.mark.integration
+    def test_query_count_is_independent_of_recipients(self, client, bulk_setup, query_counter):
+        """Le nombre de requêtes ne dépend pas du nombre de destinataires."""
+        friends = bulk_setup["friends"]
+        db.session.expunge_all()
+        with query_counter() as small:
+            assert _bulk(client, bulk_setup, friends[:1]).status_code == 200
+
+        db.session.expunge_all()
+        with query_counter() as large:
+            assert _bulk(client, bulk_setup, friends[1:]).status_code == 200
+
+        assert len(large) == len(small)
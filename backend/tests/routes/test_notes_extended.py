@@ -193,6 +193,38 @@ class TestNotesExtendedFilters:
             assert data['total'] >= 1
 
 
+class TestNotesProgress:
+    """Avancement des destinataires dans la liste des notes."""
+    
+    @pytest.mark.integration
+    def test_list_shows_progress_to_creator_only(self, client, app):
+        """Le créateur voit total/lus/terminés ; un destinataire ne les voit pas."""
+        with app.app_context():
+            alice = User(username='alice', email='alice@test.com', password_hash='hash')
+            bob = User(username='bob', email='bob@test.com', password_hash='hash')
+            carol = User(username='carol', email='carol@test.com', password_hash='hash')
+            db.session.add_all([alice, bob, carol])
+            db.session.commit()
+            
+            note = Note(content='Shared', creator_id=alice.id)
+            db.session.add(note)
+            db.session.commit()
+            db.session.add_all([
+                Assignment(note_id=note.id, user_id=bob.id, is_read=True, recipient_status='terminé'),
+                Assignment(note_id=note.id, user_id=carol.id),
+            ])
+            db.session.commit()
+            
+            token = create_access_token(identity=str(alice.id))
+            data = client.get('/v1/notes', headers={"Authorization": f"Bearer {token}"}).get_json()
+            listed = data['notes'][0]
+            assert (listed['total_recipients'], listed['read_count'], listed['completed_count']) == (2, 1, 1)
+            
+            token = create_access_token(identity=str(carol.id))
+            data = client.get('/v1/notes', headers={"Authorization": f"Bearer {token}"}).get_json()
+            assert 'read_count' not in data['notes'][0]
+
+
 class TestNotesContentValidation:
     """Tests pour la validation du contenu."""
     
@@ -272,6 +304,29 @@ class TestOrphanNotes:
             assert data['count'] == 1
             assert data['notes'][0]['is_orphan'] is True
             assert data['notes'][0]['content'] == 'Orphan note'
+    
+    @pytest.mark.integration
+    def test_get_orphan_notes_paginated(self, client, app):
+        """Tester la pagination par curseur et le compteur des notes orphelines."""
+        with app.app_context():
+            user = User(username='alice', email='alice@test.com', password_hash='hash')
+            db.session.add(user)
+            db.session.commit()
+            db.session.add_all([Note(content=f'Orphan {i}', creator_id=user.id) for i in range(3)])
+            db.session.commit()
+            
+            headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+            first = client.get('/v1/notes/orphans?cursor=&per_page=2', headers=headers).get_json()
+            assert first['count'] == 3 and len(first['notes']) == 2 and first['has_next']
+            
+            second = client.get(
+                f"/v1/notes/orphans?cursor={first['next_cursor']}&per_page=2", headers=headers
+            ).get_json()
+            assert len(second['notes']) == 1 and not second['has_next'] and second['next_cursor'] is None
+            assert {n['id'] for n in first['notes']}.isdisjoint(n['id'] for n in second['notes'])
+            
+            assert client.get('/v1/notes/orphans/count', headers=headers).get_json() == {"count": 3}
+            assert client.get('/v1/notes/orphans?cursor=bad', headers=headers).status_code == 400
 
 
 class TestNotesDeletionHistory:
@@ -0,0 +1,126 @@
+"""
+Tests pour la pagination par curseur (keyset) de GET /v1/notes.
+"""
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models import User, Note, Assignment
+from flask_jwt_extended import create_access_token
+
+
+def _collect_pages(client, headers, url):
+    """Parcourir toutes les pages en suivant next_cursor."""
+    ids = []
+    cursor = ''
+    for _ in range(50):
+        separator = '&' if '?' in url else '?'
+        response = client.get(f'{url}{separator}cursor={cursor}', headers=headers)
+        assert response.status_code == 200
+        data = response.get_json()
+        ids.extend(note['id'] for note in data['notes'])
+        if not data['has_next']:
+            assert data['next_cursor'] is None
+            return ids
+        cursor = data['next_cursor']
+    raise AssertionError("Pagination did not terminate")
+
+
+@pytest.fixture
+def seeded_notes(app):
+    """Alice crée 7 notes (dont 3 importantes) et reçoit 2 notes de Bob."""
+    with app.app_context():
+        alice = User(username='alice', email='alice@test.com', password_hash='hash')
+        bob = User(username='bob', email='bob@test.com', password_hash='hash')
+        db.session.add_all([alice, bob])
+        db.session.commit()
+
+        base = datetime(2025, 1, 1, 12, 0, 0)
+        notes = []
+        for i in range(7):
+            notes.append(Note(
+                content=f'Note {i}',
+                creator_id=alice.id,
+                important=(i % 3 == 0),
+                # Deux notes partagent la même date pour tester le départage par id
+                created_date=base + timedelta(minutes=min(i, 5))
+            ))
+        for i in range(2):
+            notes.append(Note(content=f'From Bob {i}', creator_id=bob.id,
+                              created_date=base + timedelta(minutes=10 + i)))
+        db.session.add_all(notes)
+        db.session.commit()
+
+        # Assigner les notes de Bob à Alice, et une note d'Alice à Bob et à elle-même
+        db.session.add_all([
+            Assignment(note_id=notes[7].id, user_id=alice.id),
+            Assignment(note_id=notes[8].id, user_id=alice.id),
+            Assignment(note_id=notes[0].id, user_id=alice.id),
+            Assignment(note_id=notes[0].id, user_id=bob.id),
+        ])
+        db.session.commit()
+
+        token = create_access_token(identity=str(alice.id))
+        yield {"headers": {"Authorization": f"Bearer {token}"}, "notes": notes}
+
+
+class TestNotesCursorPagination:
+    """Tests du mode curseur de GET /v1/notes."""
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize('sort', ['date_desc', 'date_asc', 'important_first'])
+    def test_cursor_pages_match_offset_order(self, client, seeded_notes, sort):
+        """Parcourir par curseur donne exactement l'ordre du mode OFFSET, sans doublon."""
+        headers = seeded_notes["headers"]
+        offset_response = client.get(f'/v1/notes?sort={sort}&per_page=100', headers=headers)
+        expected = [note['id'] for note in offset_response.get_json()['notes']]
+
+        ids = _collect_pages(client, headers, f'/v1/notes?sort={sort}&per_page=2')
+
+        assert ids == expected
+        assert len(ids) == 9
+
+    @pytest.mark.integration
+    def test_cursor_mode_skips_count_by_default(self, client, seeded_notes):
+        """Le total n'est renvoyé qu'avec include_total."""
+        headers = seeded_notes["headers"]
+        data = client.get('/v1/notes?cursor=&per_page=3', headers=headers).get_json()
+        assert 'total' not in data
+        assert 'page' not in data
+        assert data['has_next'] is True
+        assert data['next_cursor']
+
+        data = client.get('/v1/notes?cursor=&per_page=3&include_total=1', headers=headers).get_json()
+        assert data['total'] == 9
+
+    @pytest.mark.integration
+    def test_cursor_with_filter(self, client, seeded_notes):
+        """Les filtres s'appliquent aussi en mode curseur."""
+        headers = seeded_notes["headers"]
+        ids = _collect_pages(client, headers, '/v1/notes?filter=received&per_page=1')
+        assert len(ids) == 3
+
+    @pytest.mark.integration
+    def test_invalid_cursor_returns_400(self, client, seeded_notes):
+        """Un jeton illisible est refusé."""
+        response = client.get('/v1/notes?cursor=not-a-cursor', headers=seeded_notes["headers"])
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_cursor_from_other_sort_returns_400(self, client, seeded_notes):
+        """Un curseur émis pour un tri ne peut pas être réutilisé avec un autre."""
+        headers = seeded_notes["headers"]
+        data = client.get('/v1/notes?cursor=&per_page=2&sort=date_desc', headers=headers).get_json()
+        response = client.get(
+            f'/v1/notes?cursor={data["next_cursor"]}&per_page=2&sort=important_first',
+            headers=headers
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_offset_mode_unchanged(self, client, seeded_notes):
+        """Sans paramètre cursor, la réponse garde le format page/pages."""
+        data = client.get('/v1/notes?per_page=4&page=2', headers=seeded_notes["headers"]).get_json()
+        assert data['total'] == 9
+        assert data['page'] == 2
+        assert data['pages'] == 3
+        assert len(data['notes']) == 4
@@ -0,0 +1,109 @@
+"""
+Tests pour la rétention des logs d'actions (archivage mensuel) et les fenêtres de temps.
+
+Le partitionnement déclaratif est propre à PostgreSQL : sous SQLite, l'archivage
+passe par le repli DELETE, avec le même format d'archive.
+"""
+import csv
+import gzip
+from datetime import date, datetime, timezone
+import pytest
+from app import db
+from app.models import ActionLog
+from app.partitions import add_months, is_partition, month_start, partition_name
+
+
+def _log(user_id, when, action_type="CREATE"):
+    db.session.add(ActionLog(user_id=user_id, action_type=action_type, target_id=1, timestamp=when))
+    db.session.commit()
+
+
+class TestMonths:
+    """Calendrier des partitions."""
+
+    def test_add_months_crosses_years(self):
+        assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+        assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+        assert month_start(date(2026, 10, 18)) == date(2026, 10, 1)
+
+    def test_partition_names(self):
+        """Seules les partitions gérées sont ignorées par l'autogénération."""
+        assert partition_name(date(2026, 3, 1)) == "action_logs_2026_03"
+        assert is_partition("action_logs_2026_03") and is_partition("action_logs_default")
+        assert not is_partition("action_logs") and not is_partition("action_log_daily_stats")
+
+
+@pytest.fixture
+def old_logs(app, admin_user):
+    """Deux logs il y a un an, un il y a onze mois, un maintenant."""
+    today = month_start(datetime.now(timezone.utc).date())
+    year_ago = datetime.combine(add_months(today, -12), datetime.min.time())
+    _log(admin_user.id, year_ago.replace(day=3))
+    _log(None, year_ago.replace(day=20), "UPDATE")
+    _log(admin_user.id, datetime.combine(add_months(today, -11), datetime.min.time()))
+    _log(admin_user.id, datetime.now(timezone.utc))
+    return {"year_ago": add_months(today, -12), "eleven_months_ago": add_months(today, -11)}
+
+
+class TestArchiveCommand:
+    """flask action-logs archive."""
+
+    def test_archives_then_deletes_old_months(self, runner, old_logs, tmp_path):
+        """Chaque mois hors rétention devient un CSV gzip, puis quitte la table."""
+        result = runner.invoke(args=["action-logs", "archive", "--keep-months", "6",
+                                     "--archive-dir", str(tmp_path)])
+
+        assert result.exit_code == 0, result.output
+        assert ActionLog.query.count() == 1
+        archive = tmp_path / f"{partition_name(old_logs['year_ago'])}.csv.gz"
+        with gzip.open(archive, "rt", newline="") as handle:
+            rows = list(csv.DictReader(handle))
+        assert [row["action_type"] for row in rows] == ["CREATE", "UPDATE"]
+        assert rows[1]["user_id"] == ""
+        assert (tmp_path / f"{partition_name(old_logs['eleven_months_ago'])}.csv.gz").exists()
+        assert sorted(p.name for p in tmp_path.iterdir() if p.name.endswith(".partial")) == []
+
+    def test_dry_run_changes_nothing(self, runner, old_logs, tmp_path):
+        """--dry-run liste les mois et leur volume sans écrire ni supprimer."""
+        result = runner.invoke(args=["action-logs", "archive", "--keep-months", "6",
+                                     "--archive-dir", str(tmp_path / "archive"), "--dry-run"])
+
+        assert result.exit_code == 0, result.output
+        assert "2 rows" in result.output and "1 rows" in result.output
+        assert ActionLog.query.count() == 4
+        assert not (tmp_path / "archive").exists()
+
+    def test_retention_keeps_recent_months(self, runner, old_logs, tmp_path):
+        """Rien n'est archivé dans la fenêtre de rétention."""
+        result = runner.invoke(args=["action-logs", "archive", "--keep-months", "13",
+                                     "--archive-dir", str(tmp_path)])
+        assert "nothing to archive" in result.output
+        assert ActionLog.query.count() == 4
+
+    def test_partition_commands_require_postgres(self, runner):
+        """Sans table partitionnée, la création de partitions est refusée."""
+        result = runner.invoke(args=["action-logs", "create-partitions"])
+        assert result.exit_code != 0
+        assert "not partitioned" in result.output
+
+
+class TestTimeWindow:
+    """GET /v1/action_logs?since=&until=."""
+
+    @pytest.mark.integration
+    def test_since_until_filter(self, client, admin_token, old_logs):
+        """since inclus, until exclu ; les fuseaux sont ramenés en UTC."""
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        start = old_logs["year_ago"].isoformat()
+        end = old_logs["eleven_months_ago"].isoformat()
+
+        data = client.get(f"/v1/action_logs?since={start}&until={end}", headers=headers).get_json()
+        assert data["total"] == 2
+
+        data = client.get(f"/v1/action_logs?since={end}T00:00:00%2B00:00", headers=headers).get_json()
+        assert data["total"] == 2
+
+    @pytest.mark.integration
+    def test_invalid_timestamp(self, client, admin_token):
+        headers = {"Authorization": f"Bearer {admin_token}"}
+        assert client.get("/v1/action_logs?since=yesterday", headers=headers).status_code == 400
@@ -0,0 +1,133 @@
+"""
+Tests pour les colonnes structurées des logs (note_id, subject_user_id) et les historiques indexés.
+"""
+import json
+import pytest
+from app import db
+from app.models import User, Note, Assignment, Contact, ActionLog
+from flask_jwt_extended import create_access_token
+
+
+class TestStructuredColumns:
+    """Extraction de note_id / subject_user_id."""
+
+    @pytest.mark.parametrize("action_type,target_id,payload,expected", [
+        ("assignment_deleted", 7, {"note_id": 3, "assigned_user_id": 5}, (3, 5)),
+        ("assignment_created", 7, {"note_id": 3, "assigned_to": 6}, (3, 6)),
+        ("assignment_completed", 7, {"status": "terminé", "note_id": 3, "user_id": 4}, (3, 4)),
+        ("note_updated", 9, {"important": True}, (9, None)),
+        ("user_registered", 2, {"username": "bob"}, (None, 2)),
+        ("contact_created", 8, {"contact_username": "bob"}, (None, None)),
+        ("assignment_created", 7, "not json", (None, None)),
+    ])
+    def test_structured_columns(self, action_type, target_id, payload, expected):
+        """Les règles d'extraction couvrent les payloads écrits par les routes."""
+        raw = json.dumps(payload) if isinstance(payload, dict) else payload
+        columns = ActionLog.structured_columns(action_type, target_id, raw)
+        assert (columns["note_id"], columns["subject_user_id"]) == expected
+
+    def test_orm_insert_fills_columns(self, app):
+        """Un ActionLog inséré par l'ORM reçoit ses colonnes structurées."""
+        log = ActionLog(user_id=None, action_type="assignment_deleted", target_id=1,
+                        payload=json.dumps({"note_id": 12, "assigned_user_id": 34}))
+        db.session.add(log)
+        db.session.commit()
+        assert (log.note_id, log.subject_user_id) == (12, 34)
+
+    @pytest.mark.integration
+    def test_bulk_audit_rows_fill_columns(self, app, client):
+        """Les logs écrits par INSERT en masse (assignation groupée) sont aussi structurés."""
+        alice = User(username="alice", email="alice@test.com", password_hash="hash")
+        bob = User(username="bob", email="bob@test.com", password_hash="hash")
+        db.session.add_all([alice, bob])
+        db.session.commit()
+        db.session.add_all([
+            Contact(user_id=alice.id, contact_user_id=bob.id, nickname="Bob"),
+            Contact(user_id=bob.id, contact_user_id=alice.id, nickname="Alice"),
+            Note(content="N", creator_id=alice.id),
+        ])
+        db.session.commit()
+        note_id = Note.query.one().id
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(alice.id))}"}
+
+        client.post(f"/v1/notes/{note_id}/assignments:bulk", json={"user_ids": [bob.id]}, headers=headers)
+
+        log = ActionLog.query.filter_by(action_type="assignment_created").one()
+        assert (log.note_id, log.subject_user_id) == (note_id, bob.id)
+
+
+@pytest.fixture
+def history_setup(app):
+    """Alice assigne une note à Bob, Carol et Dave ; une autre note a beaucoup de logs."""
+    users = [User(username=name, email=f"{name}@test.com", password_hash="hash")
+             for name in ("alice", "bob", "carol", "dave")]
+    db.session.add_all(users)
+    db.session.commit()
+    alice, bob, carol, dave = users
+    note = Note(content="Suivie", creator_id=alice.id)
+    other = Note(content="Autre", creator_id=alice.id)
+    db.session.add_all([note, other])
+    db.session.commit()
+    assignments = [Assignment(note_id=note.id, user_id=u.id) for u in (bob, carol)]
+    db.session.add_all(assignments)
+    db.session.commit()
+
+    def log(actor, action_type, target_id, **payload):
+        db.session.add(ActionLog(user_id=actor.id, action_type=action_type,
+                                 target_id=target_id, payload=json.dumps(payload)))
+        db.session.commit()
+
+    # Bob termine, Carol termine puis décoche, Dave était terminé puis supprimé
+    log(bob, "assignment_completed", assignments[0].id, status="terminé", note_id=note.id, user_id=bob.id)
+    log(carol, "assignment_completed", assignments[1].id, status="terminé", note_id=note.id, user_id=carol.id)
+    log(carol, "assignment_uncompleted", assignments[1].id, status="en_cours", note_id=note.id, user_id=carol.id)
+    log(alice, "assignment_deleted", 999, note_id=note.id, assigned_user_id=dave.id,
+        was_completed=True, completed_date="2025-01-01T00:00:00")
+    # Bruit sur une autre note
+    for i in range(20):
+        log(alice, "assignment_deleted", 1000 + i, note_id=other.id, assigned_user_id=bob.id)
+
+    return {
+        "note": note.id,
+        "bob": bob.id,
+        "dave": dave.id,
+        "headers": {"Authorization": f"Bearer {create_access_token(identity=str(alice.id))}"},
+    }
+
+
+class TestIndexedHistories:
+    """Historiques par note en une requête indexée."""
+
+    @pytest.mark.integration
+    def test_completion_history(self, client, history_setup):
+        """Seules les completions actives et les assignations terminées supprimées apparaissent."""
+        response = client.get(f"/v1/notes/{history_setup['note']}/completion-history",
+                              headers=history_setup["headers"])
+        assert response.status_code == 200
+        completions = response.get_json()["completions"]
+        assert [(c["user_id"], c["username"]) for c in completions] == [
+            (history_setup["bob"], "bob"), (history_setup["dave"], "dave")
+        ]
+        assert completions[1]["was_deleted"] is True
+        assert completions[1]["completed_date"] == "2025-01-01T00:00:00"
+
+    @pytest.mark.integration
+    def test_deletion_history_only_for_this_note(self, client, history_setup):
+        """Les suppressions des autres notes ne sont pas incluses."""
+        response = client.get(f"/v1/notes/{history_setup['note']}/deletion-history",
+                              headers=history_setup["headers"])
+        deletions = response.get_json()["deletions"]
+        assert len(deletions) == 1
+        assert deletions[0]["username"] == "dave"
+        assert deletions[0]["deleted_by_username"] == "alice"
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("endpoint", ["deletion-history", "completion-history"])
+    def test_history_is_a_single_log_query(self, client, history_setup, query_counter, endpoint):
+        """Note + une requête de logs (usernames joints), sans requête par log."""
+        db.session.expunge_all()
+        with query_counter() as queries:
+            client.get(f"/v1/notes/{history_setup['note']}/{endpoint}", headers=history_setup["headers"])
+        log_queries = [q for q in queries if "action_logs" in q]
+        assert len(log_queries) == 1
+        assert len(queries) == 2
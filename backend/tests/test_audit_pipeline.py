@@ -0,0 +1,152 @@
+"""
+Tests pour le pipeline d'audit asynchrone (file bornée, insertion par lots, spool).
+"""
+import json
+from datetime import datetime, timezone
+import pytest
+from app import create_app, db
+from app.audit import AuditWriter
+from app.models import User, ActionLog
+from flask_jwt_extended import create_access_token
+
+
+def _rows(count, action_type="note_created"):
+    now = datetime.now(timezone.utc)
+    return [
+        {"user_id": None, "action_type": action_type, "target_id": i,
+         "payload": json.dumps({"i": i}), "timestamp": now}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def writer(app, tmp_path):
+    """Writer asynchrone à intervalle court, spool dans un dossier temporaire."""
+    audit_writer = AuditWriter(app, queue_size=1000, batch_size=50, flush_interval_ms=20,
+                               spool_path=str(tmp_path / "audit_spool.jsonl"))
+    yield audit_writer
+    audit_writer.shutdown(timeout=1)
+
+
+class TestAuditWriter:
+    """Tests du writer asynchrone."""
+
+    def test_rows_are_inserted_in_batches(self, app, writer):
+        """Les logs mis en file sont insérés par lots."""
+        writer.enqueue(_rows(120))
+        assert writer.drain()
+
+        assert ActionLog.query.count() == 120
+        stats = writer.stats()
+        assert stats["flushed"] == 120
+        assert 3 <= stats["batches"] < 120
+        assert stats["queue_depth"] == 0
+        assert stats["last_flush_ms"] is not None
+
+    def test_failed_batches_are_spooled_then_replayed(self, app, writer, monkeypatch):
+        """Base indisponible : le lot va dans le spool, rejoué au lot suivant réussi."""
+        original_insert = AuditWriter._insert
+
+        def _unavailable(self, rows):
+            raise RuntimeError("database unavailable")
+        monkeypatch.setattr(AuditWriter, "_insert", _unavailable)
+        writer.enqueue(_rows(3, "failed"))
+        assert writer.drain()
+        with open(writer.spool_path) as spool:
+            assert len(spool.readlines()) == 3
+        assert writer.stats()["failed_batches"] == 1
+
+        monkeypatch.setattr(AuditWriter, "_insert", original_insert)
+        writer.enqueue(_rows(1, "recovered"))
+        assert writer.drain()
+
+        assert ActionLog.query.filter_by(action_type="failed").count() == 3
+        assert ActionLog.query.filter_by(action_type="recovered").count() == 1
+        assert writer.stats()["replayed"] == 3
+        assert not writer.stats()["spool_pending"]
+
+    def test_overflow_goes_to_spool(self, app, writer, monkeypatch):
+        """File pleine : les logs en trop sont écrits dans le spool, sans bloquer."""
+        monkeypatch.setattr(AuditWriter, "_ensure_started", lambda self: None)
+        writer._queue.maxsize = 2
+        writer.enqueue(_rows(5))
+
+        assert writer.stats()["queue_depth"] == 2
+        assert writer.stats()["spooled"] == 3
+
+    def test_spool_is_replayed_on_start_and_shutdown_drains(self, app, tmp_path):
+        """Un spool laissé par un processus précédent est rejoué au démarrage."""
+        spool_path = tmp_path / "audit_spool.jsonl"
+        spool_path.write_text("".join(
+            json.dumps({**row, "timestamp": row["timestamp"].isoformat()}) + "\n"
+            for row in _rows(2, "from_spool")
+        ))
+        audit_writer = AuditWriter(app, flush_interval_ms=20, spool_path=str(spool_path))
+        audit_writer.enqueue(_rows(1, "live"))
+        audit_writer.shutdown(timeout=2)
+
+        assert ActionLog.query.filter_by(action_type="from_spool").count() == 2
+        assert ActionLog.query.filter_by(action_type="live").count() == 1
+        assert not spool_path.exists()
+
+    def test_truncated_lines_and_leftover_replays_are_recovered(self, app, tmp_path):
+        """Ligne tronquée ignorée ; rejeu interrompu d'un processus arrêté repris au démarrage."""
+        import subprocess
+        import sys
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        spool_path = tmp_path / "audit_spool.jsonl"
+        lines = [json.dumps({**row, "timestamp": row["timestamp"].isoformat()}) + "\n"
+                 for row in _rows(3, "leftover")]
+        leftover = tmp_path / f"audit_spool.jsonl.{dead.pid}.1.replay"
+        leftover.write_text("".join(lines[:2]) + lines[2][:20])
+        spool_path.write_text(lines[0] + '{"action_type": "truncat')
+
+        audit_writer = AuditWriter(app, flush_interval_ms=20, spool_path=str(spool_path))
+        audit_writer.enqueue(_rows(1, "live"))
+        audit_writer.shutdown(timeout=2)
+
+        assert ActionLog.query.filter_by(action_type="leftover").count() == 3
+        assert ActionLog.query.filter_by(action_type="live").count() == 1
+        assert audit_writer.stats()["skipped_lines"] == 2
+        assert list(tmp_path.glob("*.replay")) == [] and not spool_path.exists()
+
+
+class TestAsyncAuditMode:
+    """Tests de bout en bout en mode async."""
+
+    @pytest.mark.integration
+    def test_route_logs_are_written_after_commit(self, app, tmp_path):
+        """La route renvoie avant l'écriture du log, qui arrive par le writer."""
+        async_app = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"],
+            "JWT_SECRET_KEY": "test-jwt-secret-key",
+            "AUDIT_MODE": "async",
+            "AUDIT_FLUSH_INTERVAL_MS": 20,
+            "AUDIT_SPOOL_PATH": str(tmp_path / "audit_spool.jsonl"),
+        })
+        writer = async_app.extensions["audit"]
+        with async_app.app_context():
+            user = User(username="alice", email="alice@test.com", password_hash="hash")
+            db.session.add(user)
+            db.session.commit()
+            headers = {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+            client = async_app.test_client()
+            assert client.post("/v1/notes", json={"content": "A"}, headers=headers).status_code == 201
+            # Requête refusée : rien n'est mis en file
+            assert client.put("/v1/notes/999", json={"content": "B"}, headers=headers).status_code == 404
+
+            assert writer.drain()
+            assert ActionLog.query.filter_by(action_type="note_created").count() == 1
+            assert writer.stats()["enqueued"] == 1
+            writer.shutdown(timeout=1)
+
+    @pytest.mark.integration
+    def test_stats_endpoint_in_sync_mode(self, client, admin_user):
+        """L'endpoint admin expose le mode du pipeline."""
+        headers = {"Authorization": f"Bearer {create_access_token(identity=str(admin_user.id))}"}
+        response = client.get("/v1/admin/audit/stats", headers=headers)
+        assert response.status_code == 200
+        assert response.get_json() == {"mode": "sync"}
@@ -0,0 +1,77 @@
+"""
+Tests pour le générateur de données et le test de charge (backend/benchmarks/).
+"""
+import pytest
+from sqlalchemy import func, select
+from app import db, stats
+from app.models import ActionLog, Assignment, Contact, Note, User
+from benchmarks import compare, datagen, workload
+
+
+@pytest.fixture
+def dataset(app):
+    generator = datagen.DatasetGenerator(
+        datagen.Scale(users=30, contacts_per_user=4, notes=200, action_logs=100),
+        mutual_ratio=0.5, batch_size=64, echo=lambda message: None,
+    )
+    return generator.run()
+
+
+class TestDatagen:
+    """Cohérence du jeu de données généré."""
+
+    def test_row_counts(self, app, dataset):
+        assert dataset["rows"]["users"] == db.session.scalar(select(func.count(User.id))) == 30
+        assert dataset["rows"]["notes"] == db.session.scalar(select(func.count(Note.id))) == 200
+        assert dataset["rows"]["assignments"] == db.session.scalar(select(func.count(Assignment.id)))
+        assert dataset["rows"]["action_logs"] == db.session.scalar(select(func.count(ActionLog.id)))
+        assert db.session.scalar(select(func.count(User.id)).where(User.role == "admin")) == 1
+
+    def test_mutual_flag_matches_reverse_contact(self, app, dataset):
+        contacts = {(c.user_id, c.contact_user_id): c.mutual for c in Contact.query}
+        assert any(contacts.values()) and not all(contacts.values())
+        for (owner, target), mutual in contacts.items():
+            assert mutual == ((target, owner) in contacts)
+
+    def test_assignments_only_to_mutual_contacts(self, app, dataset):
+        for assignment in Assignment.query.join(Note):
+            contact = Contact.query.filter_by(user_id=assignment.note.creator_id,
+                                              contact_user_id=assignment.user_id).one()
+            assert contact.mutual
+
+    def test_completions_are_logged_and_stats_rebuilt(self, app, dataset):
+        finished = Assignment.query.filter_by(recipient_status="terminé").count()
+        completed = ActionLog.query.filter(ActionLog.action_type == "assignment_completed",
+                                           ActionLog.note_id.isnot(None)).count()
+        assert completed == finished
+        assert stats.platform_stats()["total_notes"] == 200
+
+
+@pytest.mark.integration
+def test_workload_in_process_report(app, dataset):
+    sample, counts = workload.sample_dataset(50)
+    db.session.remove()
+    mix = {name: weight for name, (weight, _) in workload.MIX.items()}
+
+    result = workload.run(lambda: workload.InProcessClient(app), sample, mix, requests=120,
+                          duration=None, concurrency=1, warmup=0, seed=1)
+
+    assert counts["notes"] == 200
+    assert result["overall"]["count"] == 120
+    assert result["overall"]["errors"] == 0, {n: e["status"] for n, e in result["endpoints"].items()}
+    for endpoint in result["endpoints"].values():
+        if endpoint["count"]:
+            assert endpoint["p50_ms"] <= endpoint["p95_ms"] <= endpoint["p99_ms"]
+
+
+def test_compare_flags_p95_regressions():
+    def report(p95):
+        endpoint = {"count": 10, "errors": 0, "p50_ms": 1.0, "p95_ms": p95, "p99_ms": p95}
+        return {"meta": {"dataset": {"notes": 1}}, "overall": endpoint,
+                "endpoints": {"list_notes": endpoint, "admin_notes": dict(endpoint, p95_ms=2.0)}}
+
+    result = compare.compare(report(10.0), report(15.0), threshold=10, min_ms=1)
+
+    assert result["regressions"] == ["list_notes"]
+    assert result["endpoints"]["list_notes"]["p95_ms"] == [10.0, 15.0, 50.0]
+    assert result["warnings"] == []
@@ -0,0 +1,125 @@
+"""
+Tests pour les GET conditionnels (ETag / If-None-Match) des notes.
+"""
+import pytest
+from app import db
+from app.models import User
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture
+def people(app):
+    """Alice, Bob (contacts mutuels) et Carol ; en-têtes JWT par nom."""
+    users = {}
+    for name in ("alice", "bob", "carol"):
+        user = User(username=name, email=f"{name}@test.com", password_hash="hash")
+        db.session.add(user)
+        db.session.commit()
+        users[name] = {
+            "id": user.id,
+            "headers": {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"},
+        }
+    return users
+
+
+def _conditional(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def _befriend(client, people):
+    client.post("/v1/contacts", json={"contact_username": "bob", "nickname": "Bob"},
+                headers=people["alice"]["headers"])
+    client.post("/v1/contacts", json={"contact_username": "alice", "nickname": "Alice"},
+                headers=people["bob"]["headers"])
+
+
+class TestConditionalGet:
+    """304 tant que rien n'a changé, 200 après une écriture qui concerne l'utilisateur."""
+
+    @pytest.mark.integration
+    def test_unchanged_list_returns_304_without_note_queries(self, client, people, query_counter):
+        """La validation ne lit que la version de l'utilisateur."""
+        headers = people["alice"]["headers"]
+        client.post("/v1/notes", json={"content": "Hello"}, headers=headers)
+        first = client.get("/v1/notes", headers=headers)
+        assert first.status_code == 200
+        assert first.headers["Cache-Control"] == "private, no-cache"
+
+        with query_counter() as queries:
+            response = _conditional(client, "/v1/notes", headers, first.headers["ETag"])
+
+        assert response.status_code == 304
+        assert response.data == b""
+        assert response.headers["ETag"] == first.headers["ETag"]
+        assert not [q for q in queries if "FROM notes" in q or "FROM assignments" in q]
+        assert len(queries) == 1
+
+    @pytest.mark.integration
+    def test_query_parameters_are_part_of_the_etag(self, client, people):
+        """Deux vues différentes de la même liste n'ont pas le même ETag."""
+        headers = people["alice"]["headers"]
+        etag = client.get("/v1/notes", headers=headers).headers["ETag"]
+        response = _conditional(client, "/v1/notes?filter=important", headers, etag)
+        assert response.status_code == 200
+
+    @pytest.mark.integration
+    def test_write_changes_etag_of_affected_users_only(self, client, people):
+        """Assigner à Bob change les ETags d'Alice et Bob, pas celui de Carol."""
+        _befriend(client, people)
+        etags = {name: client.get("/v1/notes", headers=people[name]["headers"]).headers["ETag"]
+                 for name in ("alice", "bob", "carol")}
+
+        note = client.post("/v1/notes", json={"content": "Pour Bob"},
+                           headers=people["alice"]["headers"]).get_json()
+        client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                    headers=people["alice"]["headers"])
+
+        for name, expected in (("alice", 200), ("bob", 200), ("carol", 304)):
+            response = _conditional(client, "/v1/notes", people[name]["headers"], etags[name])
+            assert response.status_code == expected, name
+
+    @pytest.mark.integration
+    def test_note_detail_etag_accounts_for_mark_as_read(self, client, people):
+        """L'ETag renvoyé après le marquage comme lu est immédiatement valide."""
+        _befriend(client, people)
+        note = client.post("/v1/notes", json={"content": "Lis-moi"},
+                           headers=people["alice"]["headers"]).get_json()
+        client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                    headers=people["alice"]["headers"])
+        url = f"/v1/notes/{note['id']}"
+        bob = people["bob"]["headers"]
+
+        first = client.get(url, headers=bob)
+        assert first.get_json()["my_assignment"]["is_read"] is True
+
+        assert _conditional(client, url, bob, first.headers["ETag"]).status_code == 304
+
+    @pytest.mark.integration
+    def test_creator_rename_invalidates_recipients(self, client, people):
+        """Le username du créateur est affiché dans les notes reçues."""
+        _befriend(client, people)
+        note = client.post("/v1/notes", json={"content": "N"},
+                           headers=people["alice"]["headers"]).get_json()
+        client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                    headers=people["alice"]["headers"])
+        bob = people["bob"]["headers"]
+        etag = client.get("/v1/notes", headers=bob).headers["ETag"]
+
+        client.put(f"/v1/users/{people['alice']['id']}", json={"username": "alicia"},
+                   headers=people["alice"]["headers"])
+
+        response = _conditional(client, "/v1/notes", bob, etag)
+        assert response.status_code == 200
+        assert response.get_json()["notes"][0]["creator_username"] == "alicia"
+
+    @pytest.mark.integration
+    def test_stats_count_hits_and_misses(self, client, people, admin_token):
+        """Les compteurs sont exposés aux admins."""
+        headers = people["alice"]["headers"]
+        etag = client.get("/v1/notes", headers=headers).headers["ETag"]
+        _conditional(client, "/v1/notes", headers, etag)
+
+        response = client.get("/v1/admin/etag/stats", headers={"Authorization": f"Bearer {admin_token}"})
+
+        assert response.status_code == 200
+        assert response.get_json() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
@@ -0,0 +1,85 @@
+"""
+Tests pour le dimensionnement et les métriques du pool de connexions (app/db_pool.py).
+"""
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app import db_pool, workers
+
+
+class TestEngineOptions:
+    """Options du pool dérivées de l'environnement."""
+
+    def test_pool_follows_gunicorn_threads(self, monkeypatch):
+        monkeypatch.setenv("GUNICORN_THREADS", "8")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "0")
+        monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+
+        options = db_pool.engine_options({"SQLALCHEMY_DATABASE_URI": "postgresql+psycopg2://app@db/appdb"})
+
+        assert options["pool_size"] == 8
+        assert options["max_overflow"] == 0
+        assert options["pool_pre_ping"] is True
+        assert options["poolclass"] is db_pool.InstrumentedQueuePool
+
+    def test_explicit_pool_size_wins(self, monkeypatch):
+        monkeypatch.setenv("GUNICORN_THREADS", "8")
+        monkeypatch.setenv("DB_POOL_SIZE", "3")
+        options = db_pool.engine_options({"SQLALCHEMY_DATABASE_URI": "postgresql+psycopg2://app@db/appdb"})
+        assert options["pool_size"] == 3
+
+    def test_sqlite_keeps_default_pool(self):
+        assert db_pool.engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"}) == {}
+
+
+def test_pool_wait_and_timeout_are_recorded():
+    """Une connexion demandée à un pool plein attend, puis expire : les deux sont comptés."""
+    engine = create_engine("sqlite://", poolclass=db_pool.InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.05)
+    before = db_pool.metrics.snapshot()
+    held = engine.connect()
+    try:
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+    finally:
+        held.close()
+    after = db_pool.metrics.snapshot()
+
+    assert after["waits"] - before["waits"] == 2
+    assert after["timeouts"] - before["timeouts"] == 1
+    assert after["wait_seconds_max"] >= 0.05
+    assert db_pool.stats(engine)["checked_out"] == 0
+
+
+class TestBudgetCommand:
+    """flask db-pool budget."""
+
+    def test_within_limit(self, runner, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "4")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+        result = runner.invoke(args=["db-pool", "budget", "--replicas", "3", "--workers", "2"])
+        assert result.exit_code == 0, result.output
+        assert "total (3 replicas): 36 / 90" in result.output
+
+    def test_over_limit_fails(self, runner, monkeypatch):
+        monkeypatch.setenv("DB_POOL_SIZE", "4")
+        monkeypatch.setenv("DB_MAX_OVERFLOW", "2")
+        result = runner.invoke(args=["db-pool", "budget", "--replicas", "10", "--workers", "4"])
+        assert result.exit_code != 0
+        assert "exceed DB_MAX_CONNECTIONS=90" in result.output
+
+    def test_default_workers_match_gunicorn(self, runner, monkeypatch):
+        """Sans --workers ni WEB_CONCURRENCY : le même défaut que gunicorn.conf.py."""
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        monkeypatch.setattr(workers.multiprocessing, "cpu_count", lambda: 2)
+        result = runner.invoke(args=["db-pool", "budget"])
+        assert result.exit_code == 0, result.output
+        assert "per replica (5 workers)" in result.output
+
+
+@pytest.mark.integration
+def test_admin_stats_endpoint(client, admin_token):
+    """GET /v1/admin/db-pool/stats expose l'état du pool du worker."""
+    data = client.get("/v1/admin/db-pool/stats", headers={"Authorization": f"Bearer {admin_token}"}).get_json()
+    assert data["checkouts"] >= 1
+    assert {"pool", "pid", "waits", "timeouts"} <= set(data)
@@ -0,0 +1,130 @@
+"""
+Tests pour la recherche plein texte des notes (index inversé en mémoire sous SQLite).
+"""
+import pytest
+from app import db
+from app.models import User, Note, Contact, Assignment
+from app.search import InvertedIndex, MemorySearch
+from flask_jwt_extended import create_access_token
+
+
+class TestInvertedIndex:
+    """Index mot -> notes."""
+
+    def test_all_words_must_match_as_prefixes(self):
+        """ET entre les mots, chaque mot en début de mot, sans casse."""
+        index = InvertedIndex()
+        index.index(1, "Projet : revue de code")
+        index.index(2, "Projet personnel")
+        index.index(3, "Revue annuelle")
+        assert set(index.search("proj REV")) == {1}
+        assert set(index.search("proj")) == {1, 2}
+        assert index.search("evue") == {}
+
+    def test_score_counts_occurrences(self):
+        """Le score est le nombre d'occurrences des mots trouvés."""
+        index = InvertedIndex()
+        index.index(1, "lait")
+        index.index(2, "lait, lait et laitue")
+        assert index.search("lait") == {1: 1, 2: 3}
+
+    def test_reindex_and_remove(self):
+        """Réindexer remplace les anciens mots ; retirer vide les postings."""
+        index = InvertedIndex()
+        index.index(1, "ancien contenu")
+        index.index(1, "nouveau contenu")
+        assert index.search("ancien") == {}
+        index.remove(1)
+        assert index.search("contenu") == {}
+        assert len(index) == 0
+
+
+@pytest.fixture
+def alice(app):
+    """Utilisateur et en-têtes JWT."""
+    user = User(username="alice", email="alice@test.com", password_hash="hash")
+    db.session.add(user)
+    db.session.commit()
+    return {"id": user.id, "headers": {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}}
+
+
+def _post(client, alice, content):
+    return client.post("/v1/notes", json={"content": content}, headers=alice["headers"]).get_json()
+
+
+def _search(client, alice, query, **params):
+    return client.get("/v1/notes", query_string={"q": query, **params}, headers=alice["headers"])
+
+
+class TestNoteSearch:
+    """GET /v1/notes?q= et GET /v1/contacts/<id>/notes?q=."""
+
+    @pytest.mark.integration
+    def test_index_follows_writes(self, client, alice):
+        """Créations et modifications sont visibles après COMMIT."""
+        note = _post(client, alice, "Acheter du lait")
+        assert _search(client, alice, "lait").get_json()["total"] == 1
+
+        client.put(f"/v1/notes/{note['id']}", json={"content": "Acheter du pain"}, headers=alice["headers"])
+        _post(client, alice, "Du lait frais")
+
+        assert [n["content"] for n in _search(client, alice, "lait").get_json()["notes"]] == ["Du lait frais"]
+        assert _search(client, alice, "pain").get_json()["total"] == 1
+
+    def test_rolled_back_write_is_not_indexed(self, app, alice):
+        """Une écriture annulée ne modifie pas l'index."""
+        backend = app.extensions["search"]
+        assert isinstance(backend, MemorySearch)
+        backend.scores("x")
+        db.session.add(Note(content="fantôme", creator_id=alice["id"]))
+        db.session.flush()
+        db.session.rollback()
+        assert backend.scores("fantôme") == {}
+
+    @pytest.mark.integration
+    def test_relevance_sort(self, client, alice):
+        """Le tri par pertinence classe d'abord les notes qui citent le plus les mots."""
+        _post(client, alice, "Budget : revoir le budget et valider le budget")
+        _post(client, alice, "Budget vacances")
+        _post(client, alice, "Sans rapport")
+
+        notes = _search(client, alice, "budget", sort="relevance").get_json()["notes"]
+
+        assert [n["content"] for n in notes] == [
+            "Budget : revoir le budget et valider le budget", "Budget vacances"
+        ]
+
+    @pytest.mark.integration
+    def test_relevance_sort_rejects_cursor(self, client, alice):
+        """Le score dépend de la requête : pas de pagination par curseur."""
+        response = _search(client, alice, "budget", sort="relevance", cursor="")
+        assert response.status_code == 400
+
+    @pytest.mark.integration
+    def test_search_stays_within_visible_notes(self, client, alice):
+        """L'index est global mais le résultat reste filtré par visibilité."""
+        bob = User(username="bob", email="bob@test.com", password_hash="hash")
+        db.session.add(bob)
+        db.session.commit()
+        db.session.add(Note(content="lait de Bob", creator_id=bob.id))
+        db.session.commit()
+        assert _search(client, alice, "lait").get_json()["total"] == 0
+
+    @pytest.mark.integration
+    def test_contact_notes_share_the_search(self, client, alice):
+        """Les notes échangées avec un contact se filtrent avec le même moteur."""
+        bob = User(username="bob", email="bob@test.com", password_hash="hash")
+        db.session.add(bob)
+        db.session.commit()
+        contact = Contact(user_id=alice["id"], contact_user_id=bob.id, nickname="Bob")
+        db.session.add(contact)
+        db.session.add(Contact(user_id=bob.id, contact_user_id=alice["id"], nickname="Alice"))
+        notes = [Note(content=text, creator_id=alice["id"]) for text in ("Réunion lundi", "Courses")]
+        db.session.add_all(notes)
+        db.session.commit()
+        db.session.add_all([Assignment(note_id=n.id, user_id=bob.id) for n in notes])
+        db.session.commit()
+
+        response = client.get(f"/v1/contacts/{contact.id}/notes?q=réun", headers=alice["headers"])
+
+        assert [n["content"] for n in response.get_json()["notes"]] == ["Réunion lundi"]
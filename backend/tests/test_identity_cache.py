@@ -0,0 +1,98 @@
+"""
+Tests pour le cache d'identités (rôle des utilisateurs authentifiés, app/identity.py).
+"""
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db, identity
+from app.models import User
+
+
+def _headers(user_id):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+
+
+@pytest.fixture
+def bob(app):
+    user = User(username="bob", email="bob@test.com", password_hash="hash")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+class TestAdminRequired:
+    """@admin_required via le cache."""
+
+    @pytest.mark.integration
+    def test_cached_check_costs_no_query(self, client, admin_user, query_counter):
+        """Une fois le rôle en cache, l'autorisation ne lit plus la base."""
+        headers = _headers(admin_user.id)
+        client.get("/v1/admin/identity/stats", headers=headers)
+        db.session.expunge_all()
+
+        with query_counter() as queries:
+            response = client.get("/v1/admin/identity/stats", headers=headers)
+
+        assert response.status_code == 200
+        assert queries == []
+        assert response.get_json()["hits"] >= 1
+
+    @pytest.mark.integration
+    def test_demotion_takes_effect_immediately(self, client, admin_user, bob):
+        """PUT /admin/users/<id>/role invalide l'entrée du compte modifié."""
+        client.put(f"/v1/admin/users/{bob.id}/role", json={"role": "admin"}, headers=_headers(admin_user.id))
+        assert client.get("/v1/admin/users", headers=_headers(bob.id)).status_code == 200
+
+        client.put(f"/v1/admin/users/{bob.id}/role", json={"role": "user"}, headers=_headers(admin_user.id))
+
+        assert client.get("/v1/admin/users", headers=_headers(bob.id)).status_code == 403
+
+    @pytest.mark.integration
+    def test_deleted_account_is_rejected(self, client, admin_user, bob):
+        """DELETE /admin/users/<id> retire le compte du cache : son token ne passe plus."""
+        bob.role = "admin"
+        db.session.commit()
+        bob_id = bob.id
+        assert client.get("/v1/admin/users", headers=_headers(bob_id)).status_code == 200
+
+        client.delete(f"/v1/admin/users/{bob_id}", headers=_headers(admin_user.id))
+
+        response = client.get("/v1/admin/users", headers=_headers(bob_id))
+        assert response.status_code == 404
+
+    @pytest.mark.integration
+    def test_rolled_back_change_keeps_entry(self, app, admin_user):
+        """Un changement de rôle annulé n'invalide rien."""
+        cache = identity.get_identity_cache()
+        identity.resolve(admin_user.id)
+        admin_user.role = "user"
+        db.session.flush()
+        db.session.rollback()
+
+        assert cache.get(admin_user.id) == identity.Identity(admin_user.id, "admin")
+
+
+class TestIdentityCache:
+    """IdentityCache seul."""
+
+    def test_entries_expire(self, monkeypatch):
+        cache = identity.IdentityCache(ttl=30)
+        now = [1000.0]
+        monkeypatch.setattr(identity.time, "monotonic", lambda: now[0])
+        cache.put(identity.Identity(1, "admin"), cache.generation)
+
+        assert cache.get(1).is_admin
+        now[0] += 31
+        assert cache.get(1) is None
+
+    def test_stale_load_is_not_stored(self):
+        """Une invalidation pendant le chargement empêche de stocker l'ancien rôle."""
+        cache = identity.IdentityCache(ttl=30)
+        generation = cache.generation
+        cache.invalidate([1])
+        cache.put(identity.Identity(1, "admin"), generation)
+        assert cache.get(1) is None
+
+    def test_zero_ttl_disables_cache(self):
+        cache = identity.IdentityCache(ttl=0)
+        cache.put(identity.Identity(1, "admin"), cache.generation)
+        assert cache.get(1) is None
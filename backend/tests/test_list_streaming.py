@@ -0,0 +1,110 @@
+"""
+Tests pour les listes volumineuses : pagination par curseur et flux NDJSON.
+"""
+import json
+import pytest
+from app import db
+from app.models import User, Note, Contact
+from app.pagination import iter_batches
+
+
+@pytest.fixture
+def crowd(app, admin_user, admin_token):
+    """Vingt-cinq utilisateurs, une note chacun ; en-têtes admin."""
+    users = [User(username=f"user{i:02d}", email=f"user{i:02d}@test.com", password_hash="hash")
+             for i in range(25)]
+    db.session.add_all(users)
+    db.session.commit()
+    db.session.add_all([Note(content=f"Note {u.username}", creator_id=u.id) for u in users])
+    db.session.add(Contact(user_id=users[0].id, contact_user_id=users[1].id, nickname="Un"))
+    db.session.add(Contact(user_id=users[1].id, contact_user_id=users[0].id, nickname="Zéro"))
+    db.session.add(Contact(user_id=users[0].id, contact_user_id=users[2].id, nickname="Deux"))
+    db.session.commit()
+    return {"Authorization": f"Bearer {admin_token}"}
+
+
+def _walk(client, url, headers, key):
+    """Suivre next_cursor jusqu'à la dernière page ; renvoie (ids, nombre de pages)."""
+    ids, cursor, pages = [], "", 0
+    while cursor is not None:
+        body = client.get(url, query_string={"cursor": cursor, "per_page": 10}, headers=headers).get_json()
+        assert len(body[key]) <= body["per_page"] == 10
+        ids.extend(item["id"] for item in body[key])
+        cursor = body["next_cursor"]
+        assert body["has_next"] == (cursor is not None)
+        pages += 1
+    return ids, pages
+
+
+def _ndjson(response):
+    assert response.mimetype == "application/x-ndjson"
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_iter_batches_splits_query(app, crowd):
+    """Les lots couvrent toute la requête sans dépasser leur taille."""
+    batches = list(iter_batches(User.query.order_by(User.id), batch_size=10))
+    assert [len(batch) for batch in batches] == [10, 10, 6]
+
+
+class TestCursorPagination:
+    """?cursor= sur /v1/users et les listes d'administration."""
+
+    @pytest.mark.integration
+    def test_users_pages_cover_everyone_once(self, client, crowd):
+        """Les pages s'enchaînent par id croissant, sans doublon ni oubli."""
+        ids, pages = _walk(client, "/v1/users", crowd, "users")
+        assert pages == 3
+        assert ids == sorted(ids) == [u.id for u in User.query.order_by(User.id)]
+
+    @pytest.mark.integration
+    def test_admin_notes_newest_first(self, client, crowd):
+        """Les notes d'administration sont paginées par id décroissant."""
+        ids, _ = _walk(client, "/v1/admin/notes", crowd, "notes")
+        assert ids == sorted(ids, reverse=True) and len(ids) == 25
+
+    @pytest.mark.integration
+    def test_admin_contacts_keep_mutual_flags(self, client, crowd):
+        """La réciprocité est résolue pour chaque page."""
+        body = client.get("/v1/admin/contacts?cursor=", headers=crowd).get_json()
+        assert [c["is_mutual"] for c in body["contacts"]] == [True, True, False]
+        assert body["next_cursor"] is None
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("cursor", ["garbage", "eyJhZnRlcl9pZCI6ICJ4In0"])
+    def test_invalid_cursor(self, client, crowd, cursor):
+        """Un curseur illisible ou sans id entier est refusé."""
+        assert client.get(f"/v1/users?cursor={cursor}", headers=crowd).status_code == 400
+        assert client.get(f"/v1/admin/users?cursor={cursor}", headers=crowd).status_code == 400
+
+    @pytest.mark.integration
+    def test_without_cursor_returns_full_array(self, client, crowd):
+        """Sans paramètre, l'ancien tableau complet est conservé."""
+        assert len(client.get("/v1/admin/users", headers=crowd).get_json()) == 26
+
+
+class TestNdjsonStream:
+    """?format=ndjson / Accept: application/x-ndjson."""
+
+    @pytest.mark.integration
+    def test_users_stream(self, client, crowd):
+        """Un utilisateur par ligne, par id croissant."""
+        rows = _ndjson(client.get("/v1/users?format=ndjson", headers=crowd))
+        assert len(rows) == 26
+        assert [r["id"] for r in rows] == sorted(r["id"] for r in rows)
+
+    @pytest.mark.integration
+    def test_accept_header_selects_stream(self, client, crowd):
+        """L'en-tête Accept suffit à demander le flux."""
+        response = client.get("/v1/admin/notes", headers={**crowd, "Accept": "application/x-ndjson"})
+        assert len(_ndjson(response)) == 25
+
+    @pytest.mark.integration
+    def test_contacts_stream_reads_precomputed_mutual(self, app, client, crowd, query_counter, monkeypatch):
+        """La réciprocité vient de la colonne `mutual` : aucune requête par lot ni par contact."""
+        monkeypatch.setattr("app.listing.STREAM_BATCH_SIZE", 2)
+        with query_counter() as queries:
+            rows = _ndjson(client.get("/v1/admin/contacts?format=ndjson", headers=crowd))
+        assert [r["is_mutual"] for r in rows] == [True, True, False]
+        # admin_required + lecture en flux
+        assert len(queries) == 2
@@ -0,0 +1,139 @@
+"""
+Tests pour l'endpoint /metrics (format texte Prometheus, app/metrics.py).
+"""
+import multiprocessing
+import os
+import re
+import pytest
+from flask import abort
+from app import metrics
+
+
+def _scrape(client, **kwargs):
+    response = client.get("/metrics", **kwargs)
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain")
+    return response.get_data(as_text=True)
+
+
+def _sample(text, name, **labels):
+    """Valeur d'une série dont les étiquettes contiennent `labels`."""
+    for line in text.splitlines():
+        match = re.match(rf"^{name}\{{(.*)\}} (\S+)$", line)
+        if match and all(f'{key}="{value}"' in match.group(1) for key, value in labels.items()):
+            return float(match.group(2))
+    return None
+
+
+class TestRequestMetrics:
+    """Compteurs et histogrammes par route."""
+
+    @pytest.mark.integration
+    def test_route_latency_and_queries(self, client, auth_token, query_counter):
+        """Chaque requête est comptée sous son blueprint, avec son nombre de requêtes SQL."""
+        headers = {"Authorization": f"Bearer {auth_token}"}
+        with query_counter() as queries:
+            assert client.get("/v1/notes", headers=headers).status_code == 200
+
+        text = _scrape(client)
+
+        route = {"blueprint": "notes", "endpoint": "notes.get_notes"}
+        assert _sample(text, "http_requests_total", method="GET", status="200", **route) == 1
+        assert _sample(text, "http_request_duration_seconds_count", **route) == 1
+        assert _sample(text, "http_request_db_queries_sum", **route) == len(queries)
+        assert _sample(text, "http_request_db_seconds_count", **route) == 1
+
+    @pytest.mark.integration
+    def test_unmatched_routes_share_one_series(self, client):
+        client.get("/v1/does-not-exist")
+        client.get("/also/missing")
+        assert _sample(_scrape(client), "http_requests_total", endpoint="unmatched", status="404") == 2
+
+    @pytest.mark.integration
+    def test_rate_limited_requests(self, app, client):
+        """Les 429 (Flask-Limiter, désactivé en TESTING) sont comptés par route."""
+        @app.get("/_limited")
+        def limited():
+            abort(429)
+
+        client.get("/_limited")
+        client.get("/_limited")
+
+        assert _sample(_scrape(client), "http_rate_limited_total", endpoint="limited") == 2
+
+    @pytest.mark.integration
+    def test_action_log_writes(self, client, auth_token):
+        """Les logs écrits dans la requête (mode sync) ont leur latence."""
+        client.post("/v1/notes", json={"content": "Mesurée"}, headers={"Authorization": f"Bearer {auth_token}"})
+        text = _scrape(client)
+        assert _sample(text, "action_log_rows_written_total", mode="sync") >= 1
+        assert _sample(text, "action_log_write_duration_seconds_count", mode="sync") >= 1
+
+
+class TestExposition:
+    """Format et accès."""
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = metrics.Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 5.0):
+            histogram.observe(value, ("a",))
+
+        assert histogram.samples() == [
+            'demo_seconds_bucket{route="a",le="0.1"} 1',
+            'demo_seconds_bucket{route="a",le="1.0"} 2',
+            'demo_seconds_bucket{route="a",le="+Inf"} 3',
+            'demo_seconds_sum{route="a"} 5.55',
+            'demo_seconds_count{route="a"} 3',
+        ]
+
+    def test_pool_gauges(self, client):
+        text = _scrape(client)
+        assert "# TYPE db_pool_checkouts_total counter" in text
+        assert _sample(text, "db_pool_timeouts_total") is not None
+
+    @pytest.mark.integration
+    def test_token_protects_endpoint(self, app, client):
+        app.config["METRICS_TOKEN"] = "scrape-secret"
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+        _scrape(client, headers={"Authorization": "Bearer scrape-secret"})
+
+
+def _serve_one_request(directory):
+    """Processus « worker » : une requête comptée puis écrite dans le dossier partagé."""
+    registry = metrics.Registry(directory)
+    registry.requests.inc(("notes", "notes.get_notes", "GET", "200"), 2)
+    registry.latency.observe(0.2, ("notes", "notes.get_notes", "GET"))
+    registry.flush([("db_pool_size", "gauge", "Configured pool size.", 4)])
+
+
+class TestMultiprocess:
+    """Agrégation entre workers gunicorn (METRICS_MULTIPROC_DIR)."""
+
+    def test_scrape_sums_other_workers(self, tmp_path):
+        """Compteurs et histogrammes d'un worker terminé s'ajoutent ; ses jauges disparaissent."""
+        worker = multiprocessing.get_context("fork").Process(target=_serve_one_request, args=(str(tmp_path),))
+        worker.start()
+        worker.join()
+        registry = metrics.Registry(str(tmp_path))
+        registry.requests.inc(("notes", "notes.get_notes", "GET", "200"))
+        registry.latency.observe(0.02, ("notes", "notes.get_notes", "GET"))
+
+        text = registry.render([("db_pool_size", "gauge", "Configured pool size.", 5)])
+
+        route = {"blueprint": "notes", "endpoint": "notes.get_notes"}
+        assert _sample(text, "http_requests_total", **route) == 3
+        assert _sample(text, "http_request_duration_seconds_count", **route) == 2
+        assert _sample(text, "http_request_duration_seconds_bucket", le="0.025", **route) == 1
+        assert _sample(text, "http_request_duration_seconds_bucket", le="0.25", **route) == 2
+        assert text.count("db_pool_size{") == 1
+
+    def test_live_worker_gauges_keep_their_pid(self, tmp_path):
+        metrics.Registry(str(tmp_path)).flush([("db_pool_size", "gauge", "Configured pool size.", 4)])
+        (tmp_path / f"metrics_{os.getpid()}.json").rename(tmp_path / f"metrics_{os.getppid()}.json")
+
+        text = metrics.Registry(str(tmp_path)).render([("db_pool_size", "gauge", "Configured pool size.", 5)])
+
+        assert _sample(text, "db_pool_size", pid=os.getppid()) == 4
+        assert _sample(text, "db_pool_size", pid=os.getpid()) == 5
+        assert text.count("# TYPE db_pool_size gauge") == 1
@@ -61,6 +61,75 @@ class TestMutualContacts:
         result = contact.to_dict()
         assert "is_mutual" in result
         assert result["is_mutual"] is False
+    
+    def test_precomputed_flag_follows_create_and_delete(self, app):
+        """La colonne mutual est mise à jour des deux côtés à la création et à la suppression."""
+        user1 = User(username="alice", email="alice@test.com", password_hash="hash1")
+        user2 = User(username="bob", email="bob@test.com", password_hash="hash2")
+        db.session.add_all([user1, user2])
+        db.session.commit()
+        
+        contact1 = Contact(user_id=user1.id, contact_user_id=user2.id, nickname="Bob")
+        db.session.add(contact1)
+        db.session.commit()
+        assert contact1.mutual is False
+        
+        # Bob ajoute Alice : les deux contacts deviennent mutuels
+        contact2 = Contact(user_id=user2.id, contact_user_id=user1.id, nickname="Alice")
+        db.session.add(contact2)
+        db.session.flush()
+        assert contact2.mutual is True
+        assert contact1.mutual is True  # instance déjà chargée, alignée sans requête
+        db.session.commit()
+        
+        # Bob retire Alice : le contact d'Alice n'est plus mutuel
+        db.session.delete(contact2)
+        db.session.commit()
+        assert contact1.mutual is False
+        assert contact1.is_mutual() is False
+    
+    def test_pair_is_locked_in_the_same_order_from_both_sides(self):
+        """PostgreSQL : A->B et B->A prennent le même verrou consultatif (plus petit id d'abord)."""
+        from types import SimpleNamespace
+        from sqlalchemy.dialects import postgresql
+        from app.models.contact import _lock_pair
+
+        class Connection:
+            dialect = postgresql.dialect()
+            statements = []
+
+            def execute(self, statement):
+                self.statements.append(str(statement.compile(
+                    dialect=self.dialect, compile_kwargs={"literal_binds": True})))
+
+        connection = Connection()
+        _lock_pair(connection, SimpleNamespace(user_id=7, contact_user_id=3))
+        _lock_pair(connection, SimpleNamespace(user_id=3, contact_user_id=7))
+        assert connection.statements == ["SELECT pg_advisory_xact_lock(3, 7) AS pg_advisory_xact_lock_1"] * 2
+
+    def test_list_reads_precomputed_flag(self, app, query_counter):
+        """La réciprocité d'une liste se lit sur la colonne `mutual`, sans requête par contact."""
+        from app.repositories import ContactRepository
+        alice = User(username="alice", email="alice@test.com", password_hash="hash")
+        others = [User(username=f"user{i}", email=f"user{i}@test.com", password_hash="hash")
+                  for i in range(4)]
+        db.session.add_all([alice] + others)
+        db.session.commit()
+        
+        contacts = [Contact(user_id=alice.id, contact_user_id=u.id, nickname=u.username) for u in others]
+        # Seuls user0 et user2 ont ajouté Alice en retour
+        reverse = [Contact(user_id=others[i].id, contact_user_id=alice.id, nickname="Alice") for i in (0, 2)]
+        db.session.add_all(contacts + reverse)
+        db.session.commit()
+        
+        repo = ContactRepository()
+        for contact in contacts:
+            db.session.refresh(contact)  # recharger les instances expirées hors mesure
+        with query_counter() as queries:
+            flags = [contact.to_dict()["is_mutual"] for contact in contacts]
+        assert len(queries) == 0
+        assert flags == [True, False, True, False]
+        assert {c.contact_user_id for c in repo.find_mutual_by_user(alice.id)} == {others[0].id, others[2].id}
 
 
 class TestMutualContactsAPI:
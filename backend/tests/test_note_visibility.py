@@ -0,0 +1,176 @@
+"""
+Tests pour la requête de visibilité des notes (UNION ALL créées par / assignées à).
+"""
+import pytest
+from app import db
+from app.models import User, Note, Assignment
+from app.repositories import NoteRepository
+
+
+@pytest.fixture
+def people(app):
+    """Alice, Bob et Carol."""
+    alice = User(username="alice", email="alice@test.com", password_hash="hash")
+    bob = User(username="bob", email="bob@test.com", password_hash="hash")
+    carol = User(username="carol", email="carol@test.com", password_hash="hash")
+    db.session.add_all([alice, bob, carol])
+    db.session.commit()
+    return alice, bob, carol
+
+
+class TestNoteVisibility:
+    """Tests du constructeur de requêtes de visibilité."""
+
+    def test_self_assigned_note_is_returned_once(self, app, people):
+        """Une note créée ET auto-assignée n'apparaît qu'une fois (dédoublonnage par id)."""
+        alice, bob, _ = people
+        note = Note(content="Pour moi et Bob", creator_id=alice.id)
+        db.session.add(note)
+        db.session.commit()
+        db.session.add_all([
+            Assignment(note_id=note.id, user_id=alice.id),
+            Assignment(note_id=note.id, user_id=bob.id),
+        ])
+        db.session.commit()
+
+        repo = NoteRepository()
+        assert [n.id for n in repo.find_visible_by_user(alice.id)] == [note.id]
+        assert repo.build_visible_query(alice.id).count() == 1
+
+    def test_recipient_only_sees_own_status(self, app, people):
+        """Le filtre de statut porte sur la propre assignation du destinataire."""
+        alice, bob, carol = people
+        note = Note(content="Tâche partagée", creator_id=alice.id)
+        db.session.add(note)
+        db.session.commit()
+        db.session.add_all([
+            Assignment(note_id=note.id, user_id=bob.id, recipient_status="terminé"),
+            Assignment(note_id=note.id, user_id=carol.id, recipient_status="en_cours"),
+        ])
+        db.session.commit()
+
+        repo = NoteRepository()
+        # Le créateur voit les deux statuts
+        assert repo.build_visible_query(alice.id, filter_param="completed").count() == 1
+        assert repo.build_visible_query(alice.id, filter_param="in_progress").count() == 1
+        # Bob a terminé : la note n'est pas "en cours" pour lui
+        assert repo.build_visible_query(bob.id, filter_param="completed").count() == 1
+        assert repo.build_visible_query(bob.id, filter_param="in_progress").count() == 0
+
+    def test_deleted_and_foreign_notes_are_hidden(self, app, people):
+        """Les notes supprimées et celles des autres ne sont pas visibles."""
+        from datetime import datetime, timezone
+        alice, bob, _ = people
+        db.session.add_all([
+            Note(content="Supprimée", creator_id=alice.id, delete_date=datetime.now(timezone.utc)),
+            Note(content="De Bob", creator_id=bob.id),
+        ])
+        db.session.commit()
+
+        assert NoteRepository().build_visible_query(alice.id).count() == 0
+
+    def test_orphans_are_created_notes_without_assignment(self, app, people):
+        """Les notes orphelines sont les notes créées, non supprimées, sans assignation."""
+        alice, bob, _ = people
+        orphan = Note(content="Seule", creator_id=alice.id)
+        shared = Note(content="Partagée", creator_id=alice.id)
+        db.session.add_all([orphan, shared])
+        db.session.commit()
+        db.session.add(Assignment(note_id=shared.id, user_id=bob.id))
+        db.session.commit()
+
+        repo = NoteRepository()
+        notes, has_next = repo.find_orphans(alice.id)
+        assert [n.id for n in notes] == [orphan.id] and not has_next
+        assert repo.count_orphans(alice.id) == 1
+
+    def test_orphans_are_paginated_newest_first(self, app, people):
+        """Pages keyset sur (created_date, id), sans doublon ni trou."""
+        alice, _, _ = people
+        notes = [Note(content=f"Note {i}", creator_id=alice.id) for i in range(5)]
+        db.session.add_all(notes)
+        db.session.commit()
+
+        repo = NoteRepository()
+        first, has_next = repo.find_orphans(alice.id, per_page=3)
+        assert has_next
+        rest, has_next = repo.find_orphans(alice.id, repo.sort_values(first[-1], 'date_desc'), per_page=3)
+        assert not has_next
+        assert [n.id for n in first + rest] == [n.id for n in repo.find_orphans(alice.id)[0]]
+        assert sorted(n.id for n in first + rest) == sorted(n.id for n in notes)
+
+
+class TestAssignmentCount:
+    """Compteurs dénormalisés de Note (assignment_count, read_count, completed_count)."""
+
+    def _stored_count(self, note_id):
+        return db.session.execute(
+            db.select(Note.assignment_count).where(Note.id == note_id)
+        ).scalar()
+
+    def test_follows_orm_and_bulk_writes(self, app, people):
+        """Création, suppression, déplacement et création en lot d'assignations."""
+        from app.repositories import AssignmentRepository
+        alice, bob, carol = people
+        note = Note(content="Tâche", creator_id=alice.id)
+        other = Note(content="Autre", creator_id=alice.id)
+        db.session.add_all([note, other])
+        db.session.commit()
+
+        assignment = Assignment(note_id=note.id, user_id=bob.id)
+        db.session.add(assignment)
+        db.session.commit()
+        assert self._stored_count(note.id) == note.assignment_count == 1
+
+        AssignmentRepository().bulk_create(note.id, [carol.id])
+        assert self._stored_count(note.id) == 2
+
+        assignment.note_id = other.id
+        db.session.commit()
+        assert (self._stored_count(note.id), self._stored_count(other.id)) == (1, 1)
+
+        db.session.delete(assignment)
+        db.session.commit()
+        assert self._stored_count(other.id) == other.assignment_count == 0
+        assert NoteRepository().count_orphans(alice.id) == 1
+
+    def test_read_and_completed_follow_repository_writes(self, app, people):
+        """mark_as_read / mark_as_unread / update_status / delete tiennent l'avancement à jour."""
+        from app.repositories import AssignmentRepository
+        alice, bob, carol = people
+        note = Note(content="Tâche", creator_id=alice.id)
+        db.session.add(note)
+        db.session.commit()
+        repo = AssignmentRepository()
+        for_bob = repo.save(Assignment(note_id=note.id, user_id=bob.id))
+        for_carol = repo.save(Assignment(note_id=note.id, user_id=carol.id, is_read=True))
+
+        def progress():
+            db.session.expire(note)
+            return note.to_progress_dict()
+
+        assert progress() == {"total_recipients": 2, "read_count": 1, "completed_count": 0}
+        repo.mark_as_read(for_bob)
+        repo.update_status(for_bob, 'terminé')
+        assert progress() == {"total_recipients": 2, "read_count": 2, "completed_count": 1}
+        repo.update_status(for_bob, 'terminé')
+        repo.mark_as_unread(for_carol)
+        assert progress() == {"total_recipients": 2, "read_count": 1, "completed_count": 1}
+        repo.delete(for_bob)
+        assert progress() == {"total_recipients": 1, "read_count": 0, "completed_count": 0}
+
+    def test_rebuild_fixes_drift(self, app, people):
+        """stats.rebuild réaligne les compteurs modifiés hors de l'application."""
+        from app import stats
+        alice, bob, _ = people
+        note = Note(content="Tâche", creator_id=alice.id)
+        db.session.add(note)
+        db.session.commit()
+        db.session.add(Assignment(note_id=note.id, user_id=bob.id, is_read=True))
+        db.session.commit()
+        db.session.execute(db.update(Note).values(assignment_count=0, read_count=0))
+        db.session.commit()
+
+        assert stats.rebuild()["assignment_counts_fixed"] == 1
+        db.session.expire(note)
+        assert (note.assignment_count, note.read_count, note.completed_count) == (1, 1, 0)
@@ -0,0 +1,128 @@
+"""
+Tests pour le hachage des mots de passe (app/passwords.py) : coût configurable,
+rehachage à la connexion, pool de processus borné.
+"""
+import pytest
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+from app import db, passwords
+from app.models import User
+
+
+def _login(client, password="password123"):
+    return client.post("/v1/auth/login", json={"email": "legacy@test.com", "password": password})
+
+
+@pytest.fixture
+def legacy_user(app):
+    """Compte dont le hash a été produit avec un ancien coût (PBKDF2, 1000 itérations)."""
+    user = User(username="legacy", email="legacy@test.com",
+                password_hash=generate_password_hash("password123", method="pbkdf2:sha256:1000"))
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+class TestRehashOnLogin:
+    """Rehachage transparent à la connexion."""
+
+    @pytest.mark.integration
+    def test_outdated_hash_is_replaced(self, client, legacy_user):
+        """Le hash est recalculé avec la méthode configurée, le mot de passe reste valide."""
+        assert _login(client).status_code == 200
+
+        stored = db.session.get(User, legacy_user.id).password_hash
+        assert stored.startswith("scrypt:32768:8:1$")
+        assert check_password_hash(stored, "password123")
+        assert _login(client).status_code == 200
+        assert passwords.stats()["rehashes"] == 1
+
+    @pytest.mark.integration
+    def test_failed_login_keeps_hash(self, client, legacy_user):
+        original = legacy_user.password_hash
+        assert _login(client, "wrong-password").status_code == 401
+        assert db.session.get(User, legacy_user.id).password_hash == original
+
+    @pytest.mark.integration
+    def test_up_to_date_hash_is_kept(self, client, legacy_user):
+        """Sans changement de configuration, pas de nouveau calcul."""
+        _login(client)
+        current = db.session.get(User, legacy_user.id).password_hash
+        _login(client)
+        assert db.session.get(User, legacy_user.id).password_hash == current
+
+
+class TestHashers:
+    """Paramètres des hashers."""
+
+    def test_werkzeug_defaults_are_explicit(self):
+        """Les paramètres implicites sont comparés aux hashes stockés sous leur forme complète."""
+        assert passwords.WerkzeugHasher("scrypt").method == "scrypt:32768:8:1"
+        hasher = passwords.WerkzeugHasher("pbkdf2")
+        assert hasher.method == f"pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}"
+        assert not hasher.needs_rehash(generate_password_hash("x", method="pbkdf2"))
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            passwords.WerkzeugHasher("md5")
+
+    def test_malformed_hash_does_not_verify(self):
+        assert passwords.WerkzeugHasher("scrypt").verify("hash", "hash") is False
+
+
+class TestProcessPool:
+    """Calcul dans un pool de processus borné."""
+
+    def test_hash_and_verify_in_pool(self):
+        service = passwords.PasswordService(
+            passwords.WerkzeugHasher("pbkdf2:sha256:1000"), workers=1, max_pending=2, timeout=30
+        )
+        try:
+            password_hash = service.hash("secret-password")
+            assert service.verify(password_hash, "secret-password")
+            assert not service.verify(password_hash, "other")
+        finally:
+            service.shutdown()
+
+    def test_saturated_pool_rejects(self):
+        """Au-delà de max_pending calculs en attente : 503 plutôt qu'une file sans fin."""
+        service = passwords.PasswordService(
+            passwords.WerkzeugHasher("pbkdf2:sha256:1000"), workers=1, max_pending=1, timeout=0.01
+        )
+        service._slots.acquire()
+        with pytest.raises(ServiceUnavailable):
+            service.hash("secret-password")
+        assert service.stats()["rejected"] == 1
+
+    def test_timed_out_job_keeps_its_slot_until_done(self, monkeypatch):
+        """Une attente abandonnée (503) ne libère la place qu'à la fin du calcul."""
+        from concurrent.futures import ThreadPoolExecutor
+        import threading
+        release = threading.Event()
+
+        class SlowHasher:
+            def hash(self, password):
+                release.wait(5)
+                return "hash"
+
+        service = passwords.PasswordService(SlowHasher(), workers=1, max_pending=1, timeout=0.05)
+        executor = ThreadPoolExecutor(max_workers=1)
+        monkeypatch.setattr(service, "_executor", lambda: executor)
+        try:
+            with pytest.raises(ServiceUnavailable):
+                service.hash("secret-password")
+            assert not service._slots.acquire(blocking=False)
+            release.set()
+            assert service._slots.acquire(timeout=5)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    def test_default_workers_share_cores_between_web_workers(self, monkeypatch):
+        monkeypatch.setattr(passwords.os, "cpu_count", lambda: 8)
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        assert passwords.default_workers() == 2
+        monkeypatch.setenv("WEB_CONCURRENCY", "16")
+        assert passwords.default_workers() == 1
+        monkeypatch.delenv("WEB_CONCURRENCY")
+        assert passwords.default_workers() == 8
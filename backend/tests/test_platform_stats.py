@@ -0,0 +1,143 @@
+"""
+Tests pour les statistiques d'administration pré-agrégées (platform_stats et agrégats d'audit).
+"""
+from datetime import datetime, timezone
+import pytest
+from app import db
+from app.audit import AuditWriter
+from app.models import User, Note, ActionLog, ActionLogUserStat
+from app.repositories import ActionLogRepository
+
+
+@pytest.fixture
+def admin(admin_token):
+    return {"Authorization": f"Bearer {admin_token}"}
+
+
+def _add_user(name):
+    user = User(username=name, email=f"{name}@test.com", password_hash="hash")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def _log(user_id, action_type):
+    db.session.add(ActionLog(user_id=user_id, action_type=action_type, target_id=1))
+    db.session.commit()
+
+
+def _action_stats(client, admin, **params):
+    return client.get("/v1/action_logs/stats", query_string=params, headers=admin).get_json()
+
+
+def _as_dicts(data):
+    return (
+        {item["action_type"]: item["count"] for item in data["action_counts"]},
+        {item["user_id"]: item["count"] for item in data["user_counts"]},
+    )
+
+
+class TestAdminStats:
+    """GET /v1/admin/stats."""
+
+    @pytest.mark.integration
+    def test_counters_are_cached_until_fresh(self, client, admin):
+        """Les compteurs d'entités sont relus tels quels jusqu'au recomptage."""
+        first = client.get("/v1/admin/stats", headers=admin).get_json()
+        _add_user("bob")
+
+        assert client.get("/v1/admin/stats", headers=admin).get_json()["total_users"] == first["total_users"]
+        fresh = client.get("/v1/admin/stats?fresh=1", headers=admin).get_json()
+        assert fresh["total_users"] == first["total_users"] + 1
+        assert client.get("/v1/admin/stats", headers=admin).get_json()["total_users"] == fresh["total_users"]
+
+    @pytest.mark.integration
+    def test_stale_counters_are_recomputed(self, app, client, admin):
+        """Au-delà de STATS_MAX_AGE_SECONDS, la lecture recompte."""
+        client.get("/v1/admin/stats", headers=admin)
+        app.config["STATS_MAX_AGE_SECONDS"] = 0
+        bob = _add_user("bob")
+        db.session.add(Note(content="x", creator_id=bob.id, important=True))
+        db.session.commit()
+
+        data = client.get("/v1/admin/stats", headers=admin).get_json()
+
+        assert (data["total_users"], data["total_notes"], data["important_notes"]) == (2, 1, 1)
+
+    @pytest.mark.integration
+    def test_cached_read_is_one_query(self, client, admin, query_counter):
+        """Une lecture de platform_stats (rôle de l'admin en cache d'identités)."""
+        client.get("/v1/admin/stats", headers=admin)
+        with query_counter() as queries:
+            client.get("/v1/admin/stats", headers=admin)
+        assert len(queries) == 1
+
+    @pytest.mark.integration
+    def test_total_action_logs_is_transactional(self, client, admin, admin_user):
+        """Le total des logs suit chaque insertion sans recomptage."""
+        client.get("/v1/admin/stats", headers=admin)
+        _log(admin_user.id, "CREATE")
+        assert client.get("/v1/admin/stats", headers=admin).get_json()["total_action_logs"] == 1
+
+
+class TestActionLogAggregates:
+    """Agrégats par type, par auteur et par jour."""
+
+    @pytest.mark.integration
+    def test_orm_bulk_and_async_inserts_are_counted(self, app, client, admin, admin_user):
+        """Les trois chemins d'insertion alimentent les agrégats, égaux au recomptage."""
+        _log(admin_user.id, "CREATE")
+        ActionLogRepository().bulk_create([
+            {"user_id": admin_user.id, "action_type": "UPDATE", "target_id": 1},
+            {"user_id": None, "action_type": "UPDATE", "target_id": 2},
+        ])
+        AuditWriter(app)._insert([{"user_id": admin_user.id, "action_type": "CREATE", "target_id": 3,
+                                   "payload": None, "timestamp": datetime.now(timezone.utc)}])
+
+        aggregated = _as_dicts(_action_stats(client, admin))
+
+        assert aggregated == ({"CREATE": 2, "UPDATE": 2}, {admin_user.id: 3, None: 1})
+        assert aggregated == _as_dicts(_action_stats(client, admin, fresh=1))
+
+    @pytest.mark.integration
+    def test_deleted_user_counts_move_to_anonymous(self, client, admin):
+        """Comme action_logs.user_id, le compteur de l'auteur supprimé passe à NULL."""
+        bob = _add_user("bob")
+        _log(bob.id, "CREATE")
+        _log(bob.id, "UPDATE")
+        db.session.delete(bob)
+        db.session.commit()
+
+        assert ActionLogUserStat.query.count() == 0
+        assert _as_dicts(_action_stats(client, admin))[1] == {None: 2}
+        assert _as_dicts(_action_stats(client, admin, fresh=1))[1] == {None: 2}
+
+    @pytest.mark.integration
+    def test_daily_series(self, client, admin, admin_user):
+        """?days=N ajoute le nombre de logs par jour et par type."""
+        _log(admin_user.id, "CREATE")
+        _log(admin_user.id, "CREATE")
+        today = datetime.now(timezone.utc).date().isoformat()
+
+        expected = [{"day": today, "action_type": "CREATE", "count": 2}]
+        assert _action_stats(client, admin, days=7)["daily"] == expected
+        assert _action_stats(client, admin, days=7, fresh=1)["daily"] == expected
+        assert "daily" not in _action_stats(client, admin)
+
+    @pytest.mark.integration
+    def test_invalid_days(self, client, admin):
+        """days doit être positif."""
+        assert client.get("/v1/action_logs/stats?days=0", headers=admin).status_code == 400
+
+
+def test_rebuild_command_repairs_drift(app, runner, admin_user):
+    """`flask stats rebuild` recalcule les agrégats depuis action_logs."""
+    _log(admin_user.id, "CREATE")
+    ActionLogUserStat.query.delete()
+    db.session.commit()
+
+    result = runner.invoke(args=["stats", "rebuild"])
+
+    assert result.exit_code == 0, result.output
+    assert "total_action_logs: 1" in result.output
+    assert db.session.get(ActionLogUserStat, admin_user.id).count == 1
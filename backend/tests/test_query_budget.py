@@ -0,0 +1,271 @@
+"""
+Garde-fou N+1 : chaque route de routes/v1 (et ses variantes de filtre ou de
+pagination) émet un nombre fixe de requêtes SQL, au plus son budget de
+ROUTE_BUDGETS, quel que soit le nombre de lignes renvoyées.
+"""
+import json
+from datetime import datetime, timezone
+import pytest
+from app import db, identity, passwords
+from app.models import User, Note, Assignment, Contact, ActionLog
+from flask_jwt_extended import create_access_token
+from tests.query_budget_plugin import ROUTE_BUDGETS
+
+
+class _Dataset:
+    """Alice reçoit une note de chaque expéditeur, en diffuse une à tous et les a en contacts."""
+
+    def __init__(self):
+        alice = User(username="alice", email="alice@test.com", password_hash="hash", role="admin")
+        db.session.add(alice)
+        db.session.commit()
+        broadcast = Note(content="Pour tout le monde", creator_id=alice.id)
+        db.session.add(broadcast)
+        db.session.commit()
+        # Garder les ids : les instances sont détachées entre deux mesures
+        self.alice_id = alice.id
+        self.broadcast_id = broadcast.id
+        self.senders = 0
+        self.sender_ids = []
+        self.mutual_sender_ids = []
+        self.received_ids = []       # assignations reçues par Alice
+        self.broadcast_ids = []      # assignations de la note diffusée
+        self.contact_ids = []        # contacts d'Alice
+        self.log_ids = []
+
+    def add_senders(self, count):
+        """Ajouter `count` expéditeurs (une note reçue + un destinataire de plus)."""
+        for _ in range(count):
+            self.senders += 1
+            sender = User(username=f"sender{self.senders}",
+                          email=f"sender{self.senders}@test.com", password_hash="hash")
+            db.session.add(sender)
+            db.session.commit()
+            note = Note(content=f"De {sender.username}", creator_id=sender.id)
+            db.session.add(note)
+            db.session.commit()
+            received = Assignment(note_id=note.id, user_id=self.alice_id)
+            broadcast = Assignment(note_id=self.broadcast_id, user_id=sender.id, is_read=True,
+                                   recipient_status="terminé")
+            contact = Contact(user_id=self.alice_id, contact_user_id=sender.id, nickname=sender.username)
+            db.session.add_all([received, broadcast, contact])
+            db.session.commit()
+            log = ActionLog(user_id=sender.id, action_type="assignment_completed", target_id=broadcast.id,
+                            payload=json.dumps({"status": "terminé", "note_id": self.broadcast_id,
+                                                "user_id": sender.id}))
+            db.session.add(log)
+            db.session.commit()
+            self.sender_ids.append(sender.id)
+            self.received_ids.append(received.id)
+            self.broadcast_ids.append(broadcast.id)
+            self.contact_ids.append(contact.id)
+            self.log_ids.append(log.id)
+            # Un expéditeur sur deux ajoute Alice en retour (contact mutuel)
+            if self.senders % 2:
+                db.session.add(Contact(user_id=sender.id, contact_user_id=self.alice_id, nickname="Alice"))
+                db.session.commit()
+                self.mutual_sender_ids.append(sender.id)
+
+    def new_user(self, prefix, password_hash="hash"):
+        """Nouvel utilisateur sans données (cible fraîche d'une écriture)."""
+        self.senders += 1
+        user = User(username=f"{prefix}{self.senders}", email=f"{prefix}{self.senders}@test.com",
+                    password_hash=password_hash)
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+    def new_note(self, recipients=None, deleted=False):
+        """Nouvelle note d'Alice, assignée à `recipients` (défaut : tous les expéditeurs)."""
+        note = Note(content="Nouvelle note", creator_id=self.alice_id)
+        db.session.add(note)
+        db.session.commit()
+        recipients = self.sender_ids if recipients is None else recipients
+        db.session.add_all([Assignment(note_id=note.id, user_id=user_id) for user_id in recipients])
+        if deleted:
+            note.delete_date = datetime.now(timezone.utc)
+            note.deleted_by = self.alice_id
+        db.session.commit()
+        return note.id
+
+
+# Une requête par route de routes/v1, construite sur le jeu de données courant :
+# (méthode, url, corps JSON, utilisateur). Les écritures visent une cible fraîche,
+# dont la taille suit celle du jeu de données (ex : note assignée à tous).
+ROUTE_CASES = {
+    "action_logs.list_action_logs": lambda ds: ("GET", "/v1/action_logs", None, ds.alice_id),
+    "action_logs.get_action_log": lambda ds: ("GET", f"/v1/action_logs/{ds.log_ids[-1]}", None, ds.alice_id),
+    "action_logs.get_action_log_stats": lambda ds: ("GET", "/v1/action_logs/stats", None, ds.alice_id),
+    "admin.list_all_assignments": lambda ds: ("GET", "/v1/admin/assignments", None, ds.alice_id),
+    "admin.get_assignment_admin": lambda ds: (
+        "GET", f"/v1/admin/assignments/{ds.broadcast_ids[-1]}", None, ds.alice_id),
+    "admin.update_assignment_admin": lambda ds: (
+        "PUT", f"/v1/admin/assignments/{ds.broadcast_ids[-1]}", {"recipient_priority": True}, ds.alice_id),
+    "admin.delete_assignment_admin": lambda ds: (
+        "DELETE", f"/v1/admin/assignments/{ds.broadcast_ids.pop()}", None, ds.alice_id),
+    "admin.get_audit_stats": lambda ds: ("GET", "/v1/admin/audit/stats", None, ds.alice_id),
+    "admin.get_cache_stats": lambda ds: ("GET", "/v1/admin/cache/stats", None, ds.alice_id),
+    "admin.list_all_contacts": lambda ds: ("GET", "/v1/admin/contacts", None, ds.alice_id),
+    "admin.get_contact_admin": lambda ds: ("GET", f"/v1/admin/contacts/{ds.contact_ids[-1]}", None, ds.alice_id),
+    "admin.update_contact_admin": lambda ds: (
+        "PUT", f"/v1/admin/contacts/{ds.contact_ids[-1]}", {"nickname": "Renommé"}, ds.alice_id),
+    "admin.delete_contact_admin": lambda ds: (
+        "DELETE", f"/v1/admin/contacts/{ds.contact_ids.pop()}", None, ds.alice_id),
+    "admin.get_db_pool_stats": lambda ds: ("GET", "/v1/admin/db-pool/stats", None, ds.alice_id),
+    "admin.get_etag_stats": lambda ds: ("GET", "/v1/admin/etag/stats", None, ds.alice_id),
+    "admin.get_identity_stats": lambda ds: ("GET", "/v1/admin/identity/stats", None, ds.alice_id),
+    "admin.list_all_notes": lambda ds: ("GET", "/v1/admin/notes", None, ds.alice_id),
+    "admin.get_note_admin": lambda ds: ("GET", f"/v1/admin/notes/{ds.broadcast_id}", None, ds.alice_id),
+    "admin.update_note_admin": lambda ds: (
+        "PUT", f"/v1/admin/notes/{ds.broadcast_id}", {"content": "Corrigée"}, ds.alice_id),
+    "admin.delete_note_admin": lambda ds: ("DELETE", f"/v1/admin/notes/{ds.new_note()}", None, ds.alice_id),
+    "admin.get_profiler_summary": lambda ds: ("GET", "/v1/admin/profiler", None, ds.alice_id),
+    "admin.reset_profiler": lambda ds: ("DELETE", "/v1/admin/profiler", None, ds.alice_id),
+    "admin.get_stats": lambda ds: ("GET", "/v1/admin/stats", None, ds.alice_id),
+    "admin.list_all_users": lambda ds: ("GET", "/v1/admin/users", None, ds.alice_id),
+    "admin.delete_user_admin": lambda ds: (
+        "DELETE", f"/v1/admin/users/{ds.new_user('gone')}", None, ds.alice_id),
+    "admin.update_user_role": lambda ds: (
+        "PUT", f"/v1/admin/users/{ds.sender_ids[-1]}/role", {"role": "admin"}, ds.alice_id),
+    "assignments.create_assignment": lambda ds: (
+        "POST", "/v1/assignments", {"note_id": ds.new_note([]), "user_id": ds.mutual_sender_ids[-1]}, ds.alice_id),
+    "assignments.list_assignments": lambda ds: ("GET", "/v1/assignments", None, ds.alice_id),
+    "assignments.get_assignment": lambda ds: ("GET", f"/v1/assignments/{ds.received_ids[-1]}", None, ds.alice_id),
+    "assignments.update_assignment": lambda ds: (
+        "PUT", f"/v1/assignments/{ds.received_ids[-1]}", {"is_read": True}, ds.alice_id),
+    "assignments.delete_assignment": lambda ds: (
+        "DELETE", f"/v1/assignments/{ds.broadcast_ids.pop()}", None, ds.alice_id),
+    "assignments.toggle_priority": lambda ds: (
+        "PUT", f"/v1/assignments/{ds.received_ids[-1]}/priority", {"recipient_priority": True}, ds.alice_id),
+    "assignments.update_status": lambda ds: (
+        "PUT", f"/v1/assignments/{ds.received_ids[-1]}/status", {"recipient_status": "terminé"}, ds.alice_id),
+    "assignments.get_unread_assignments": lambda ds: ("GET", "/v1/assignments/unread", None, ds.alice_id),
+    "auth.login": lambda ds: ("POST", "/v1/auth/login", {
+        "email": f"login{ds.senders + 1}@test.com", "password": "password123",
+        "_user": ds.new_user("login", passwords.hash_password("password123")),
+    }, None),
+    "auth.logout": lambda ds: ("POST", "/v1/auth/logout", None, ds.alice_id),
+    "auth.get_me": lambda ds: ("GET", "/v1/auth/me", None, ds.alice_id),
+    "auth.register": lambda ds: ("POST", "/v1/auth/register", {
+        "username": f"newcomer{ds.senders}", "email": f"newcomer{ds.senders}@test.com", "password": "password123",
+    }, None),
+    "contacts.create_contact": lambda ds: ("POST", "/v1/contacts", {
+        "contact_username": f"friend{ds.senders + 1}", "nickname": "Ami", "_user": ds.new_user("friend"),
+    }, ds.alice_id),
+    "contacts.list_contacts": lambda ds: ("GET", "/v1/contacts", None, ds.alice_id),
+    "contacts.get_contact": lambda ds: ("GET", f"/v1/contacts/{ds.contact_ids[-1]}", None, ds.alice_id),
+    "contacts.update_contact": lambda ds: (
+        "PUT", f"/v1/contacts/{ds.contact_ids[-1]}", {"nickname": "Renommé"}, ds.alice_id),
+    "contacts.delete_contact": lambda ds: ("DELETE", f"/v1/contacts/{ds.contact_ids.pop()}", None, ds.alice_id),
+    "contacts.get_contact_notes": lambda ds: (
+        "GET", f"/v1/contacts/{ds.contact_ids[-1]}/notes", None, ds.alice_id),
+    "contacts.list_assignable_users": lambda ds: ("GET", "/v1/contacts/assignable", None, ds.alice_id),
+    "realtime.stream_events": lambda ds: ("GET", "/v1/events/stream", None, ds.alice_id),
+    "realtime.create_stream_ticket": lambda ds: ("POST", "/v1/events/ticket", None, ds.alice_id),
+    "notes.create_note": lambda ds: ("POST", "/v1/notes", {"content": "Nouvelle"}, ds.alice_id),
+    "notes.get_notes": lambda ds: ("GET", "/v1/notes", None, ds.alice_id),
+    "notes.get_note": lambda ds: ("GET", f"/v1/notes/{ds.broadcast_id}", None, ds.alice_id),
+    "notes.update_note": lambda ds: ("PUT", f"/v1/notes/{ds.broadcast_id}", {"content": "Modifiée"}, ds.alice_id),
+    "notes.delete_note": lambda ds: ("DELETE", f"/v1/notes/{ds.new_note()}", None, ds.alice_id),
+    "notes.get_note_assignments": lambda ds: (
+        "GET", f"/v1/notes/{ds.broadcast_id}/assignments", None, ds.alice_id),
+    "notes.create_note_assignments_bulk": lambda ds: (
+        "POST", f"/v1/notes/{ds.new_note([])}/assignments:bulk", {"user_ids": ds.mutual_sender_ids}, ds.alice_id),
+    "notes.get_completion_history": lambda ds: (
+        "GET", f"/v1/notes/{ds.broadcast_id}/completion-history", None, ds.alice_id),
+    "notes.get_deletion_history": lambda ds: (
+        "GET", f"/v1/notes/{ds.new_note(deleted=True)}/deletion-history", None, ds.alice_id),
+    "notes.get_note_details": lambda ds: ("GET", f"/v1/notes/{ds.broadcast_id}/details", None, ds.alice_id),
+    "notes.get_orphan_notes": lambda ds: ("GET", "/v1/notes/orphans?cursor=", None, ds.alice_id),
+    "notes.count_orphan_notes": lambda ds: ("GET", "/v1/notes/orphans/count", None, ds.alice_id),
+    "users.list_users": lambda ds: ("GET", "/v1/users", None, ds.alice_id),
+    "users.get_user": lambda ds: ("GET", f"/v1/users/{ds.sender_ids[-1]}", None, ds.alice_id),
+    "users.update_user": lambda ds: ("PUT", f"/v1/users/{ds.alice_id}", {"username": f"alice{ds.senders}"}, ds.alice_id),
+    "users.delete_user": lambda ds: ("DELETE", f"/v1/users/{ds.new_user('leaver')}", None, ds.alice_id),
+    "users.get_current_user": lambda ds: ("GET", "/v1/users/me", None, ds.alice_id),
+    "users.search_users": lambda ds: ("GET", "/v1/users/search?q=sender", None, ds.alice_id),
+}
+
+# Autres formes d'une même route (filtres, pagination par curseur) : même budget
+# (ROUTE_BUDGETS), même vérification de coût constant que son cas principal.
+ROUTE_VARIANTS = {
+    "notes.get_notes": [
+        lambda ds: ("GET", "/v1/notes?cursor=", None, ds.alice_id),
+        lambda ds: ("GET", "/v1/notes?filter=received", None, ds.alice_id),
+    ],
+    "assignments.list_assignments": [
+        lambda ds: ("GET", f"/v1/assignments?user_id={ds.alice_id}", None, ds.alice_id),
+    ],
+    "admin.list_all_notes": [lambda ds: ("GET", "/v1/admin/notes?cursor=", None, ds.alice_id)],
+    "admin.list_all_contacts": [lambda ds: ("GET", "/v1/admin/contacts?cursor=", None, ds.alice_id)],
+}
+
+
+def _route_cases():
+    """(endpoint, fabrique de requête) : le cas de chaque route puis ses variantes."""
+    cases = [pytest.param(endpoint, case, id=endpoint) for endpoint, case in sorted(ROUTE_CASES.items())]
+    for endpoint, variants in sorted(ROUTE_VARIANTS.items()):
+        cases += [pytest.param(endpoint, case, id=f"{endpoint}-variant{index}")
+                  for index, case in enumerate(variants, 1)]
+    return cases
+
+
+def _v1_endpoints(app):
+    return {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith("/v1/")}
+
+
+def test_every_v1_route_has_a_budget_and_a_case(app):
+    """Une route ajoutée à routes/v1 doit déclarer son budget (tests/query_budget_plugin.py)."""
+    endpoints = _v1_endpoints(app)
+    assert endpoints - set(ROUTE_BUDGETS) == set(), "missing budget"
+    assert endpoints - set(ROUTE_CASES) == set(), "missing case"
+    assert set(ROUTE_BUDGETS) - endpoints == set(), "budget for a removed route"
+
+
+def _measure(client, query_budget, ds, endpoint, case):
+    """Construire la requête de la route, l'exécuter à froid et renvoyer ses requêtes SQL."""
+    method, url, body, user_id = case(ds)
+    if body:
+        body = {key: value for key, value in body.items() if not key.startswith("_")}
+    headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"} if user_id else {}
+    db.session.expunge_all()
+    identity.get_identity_cache().clear()
+    with query_budget.track() as tracked:
+        response = client.open(url, method=method, json=body, headers=headers)
+    assert response.status_code < 400, (endpoint, response.status_code, response.get_json())
+    assert [entry.endpoint for entry in tracked] == [endpoint]
+    return tracked[0]
+
+
+class TestRouteQueryBudget:
+    """Chaque route de routes/v1 : budget respecté et coût constant en taille du résultat."""
+
+    @pytest.mark.integration
+    @pytest.mark.parametrize("endpoint, case", _route_cases())
+    def test_route_is_constant_and_within_budget(self, app, client, query_budget, endpoint, case):
+        dataset = _Dataset()
+        dataset.add_senders(2)
+        small = _measure(client, query_budget, dataset, endpoint, case)
+
+        dataset.add_senders(8)
+        large = _measure(client, query_budget, dataset, endpoint, case)
+
+        # Moins de requêtes la seconde fois : caches (statistiques, index des noms) déjà chauds
+        assert large.count <= small.count, (
+            f"{endpoint}: {small.count} queries for 2 senders, {large.count} for 10 (N+1)\n{large.describe()}"
+        )
+        query_budget.check([small, large])
+
+
+@pytest.mark.integration
+def test_check_reports_offending_route(client, auth_token, query_budget, monkeypatch):
+    """Un dépassement échoue en citant la route, son compte et son budget."""
+    monkeypatch.setitem(ROUTE_BUDGETS, "notes.get_notes", 1)
+    client.get("/v1/notes", headers={"Authorization": f"Bearer {auth_token}"})
+    count = query_budget.requests[-1].count
+
+    with pytest.raises(pytest.fail.Exception) as failure:
+        query_budget.check()
+
+    assert count > 1
+    assert f"{count:>3} / 1   notes.get_notes (GET /v1/notes)" in str(failure.value)
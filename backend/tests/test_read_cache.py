@@ -0,0 +1,215 @@
+"""
+Tests pour le cache en lecture et son invalidation par événements de domaine.
+"""
+import pytest
+from flask import Flask
+from app import cache, db
+from app.cache import MemoryCache, NullCache, ReadThroughCache
+from app.models import User
+from flask_jwt_extended import create_access_token
+
+
+class TestMemoryCache:
+    """LRU borné avec TTL."""
+
+    def test_lru_eviction(self):
+        """L'entrée la moins récemment utilisée est évincée."""
+        backend = MemoryCache(max_entries=2)
+        backend.set("a", "1", ttl=60)
+        backend.set("b", "2", ttl=60)
+        backend.get("a")
+        backend.set("c", "3", ttl=60)
+        assert backend.get("a") == "1"
+        assert backend.get("b") is None
+        assert backend.get("c") == "3"
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Une entrée expirée n'est plus servie."""
+        now = [1000.0]
+        monkeypatch.setattr("app.cache.time.monotonic", lambda: now[0])
+        backend = MemoryCache()
+        backend.set("a", "1", ttl=30)
+        now[0] += 31
+        assert backend.get("a") is None
+
+    def test_generations_survive_eviction(self):
+        """Les générations ne sont pas soumises au LRU."""
+        backend = MemoryCache(max_entries=1)
+        backend.incr_generation("gen:notes:1")
+        backend.set("x", "1", ttl=60)
+        backend.set("y", "2", ttl=60)
+        assert backend.get_generation("gen:notes:1") == 1
+
+
+class TestWorkerCheck:
+    """Cache propre au processus sous plusieurs workers gunicorn."""
+
+    def test_memory_cache_disabled_with_several_workers(self, monkeypatch):
+        """Un autre worker ne verrait pas les invalidations : pas de cache plutôt que des lectures périmées."""
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        app = Flask(__name__)
+        app.config["CACHE_BACKEND"] = "memory"
+        cache.init_app(app)
+        assert isinstance(app.extensions["cache"].backend, NullCache)
+
+    def test_single_worker_keeps_memory_cache(self, monkeypatch):
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        app = Flask(__name__)
+        app.config["CACHE_BACKEND"] = "memory"
+        cache.init_app(app)
+        assert isinstance(app.extensions["cache"].backend, MemoryCache)
+
+
+@pytest.fixture
+def cached_app(app):
+    """Application de test avec un cache mémoire."""
+    app.extensions["cache"] = ReadThroughCache(MemoryCache(), ttl=60)
+    return app
+
+
+@pytest.fixture
+def people(cached_app):
+    """Alice, Bob et Carol ; en-têtes JWT par nom."""
+    users = {}
+    for name in ("alice", "bob", "carol"):
+        user = User(username=name, email=f"{name}@test.com", password_hash="hash")
+        db.session.add(user)
+        db.session.commit()
+        users[name] = {
+            "id": user.id,
+            "headers": {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"},
+        }
+    return users
+
+
+def _befriend(client, people, a, b):
+    client.post("/v1/contacts", json={"contact_username": b, "nickname": b}, headers=people[a]["headers"])
+
+
+def _stats(cached_app):
+    return cached_app.extensions["cache"].stats()
+
+
+class TestReadThroughCache:
+    """Lectures en cache et invalidation ciblée."""
+
+    @pytest.mark.integration
+    def test_second_read_is_served_from_cache(self, cached_app, client, people, query_counter):
+        """La seconde lecture n'interroge pas la table des notes."""
+        headers = people["alice"]["headers"]
+        client.post("/v1/notes", json={"content": "Hello"}, headers=headers)
+        client.get("/v1/notes", headers=headers)
+
+        with query_counter() as queries:
+            response = client.get("/v1/notes", headers=headers)
+
+        assert len(response.get_json()["notes"]) == 1
+        assert not [q for q in queries if "FROM notes" in q]
+        assert _stats(cached_app)["hits"] == 1
+
+    @pytest.mark.integration
+    def test_assignment_evicts_only_affected_users(self, cached_app, client, people):
+        """Assigner une note à Bob invalide Alice et Bob, pas Carol."""
+        _befriend(client, people, "alice", "bob")
+        _befriend(client, people, "bob", "alice")
+        for name in ("alice", "bob", "carol"):
+            client.get("/v1/notes", headers=people[name]["headers"])
+
+        note = client.post("/v1/notes", json={"content": "Pour Bob"},
+                           headers=people["alice"]["headers"]).get_json()
+        client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                    headers=people["alice"]["headers"])
+
+        hits_before = _stats(cached_app)["hits"]
+        assert len(client.get("/v1/notes", headers=people["bob"]["headers"]).get_json()["notes"]) == 1
+        assert len(client.get("/v1/notes", headers=people["alice"]["headers"]).get_json()["notes"]) == 1
+        assert _stats(cached_app)["hits"] == hits_before
+        client.get("/v1/notes", headers=people["carol"]["headers"])
+        assert _stats(cached_app)["hits"] == hits_before + 1
+
+    @pytest.mark.integration
+    def test_contact_change_evicts_both_sides(self, cached_app, client, people):
+        """La réciprocité change pour les deux utilisateurs."""
+        _befriend(client, people, "alice", "bob")
+        alice_assignable = client.get("/v1/contacts/assignable", headers=people["alice"]["headers"])
+        assert [u["username"] for u in alice_assignable.get_json()] == ["alice"]
+
+        _befriend(client, people, "bob", "alice")
+
+        alice_assignable = client.get("/v1/contacts/assignable", headers=people["alice"]["headers"])
+        assert [u["username"] for u in alice_assignable.get_json()] == ["alice", "bob"]
+
+    @pytest.mark.integration
+    def test_reading_a_note_evicts_unread(self, cached_app, client, people):
+        """Ouvrir une note reçue la retire des non lues."""
+        _befriend(client, people, "alice", "bob")
+        _befriend(client, people, "bob", "alice")
+        note = client.post("/v1/notes", json={"content": "Lis-moi"},
+                           headers=people["alice"]["headers"]).get_json()
+        client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                    headers=people["alice"]["headers"])
+        bob = people["bob"]["headers"]
+        assert client.get("/v1/assignments/unread", headers=bob).get_json()["count"] == 1
+
+        client.get(f"/v1/notes/{note['id']}", headers=bob)
+
+        assert client.get("/v1/assignments/unread", headers=bob).get_json()["count"] == 0
+
+    @pytest.mark.integration
+    def test_failed_write_does_not_invalidate(self, cached_app, client, people):
+        """Une requête annulée ne publie pas d'événement."""
+        headers = people["alice"]["headers"]
+        client.get("/v1/contacts", headers=headers)
+        invalidations = _stats(cached_app)["invalidations"]
+
+        response = client.post("/v1/contacts", json={"contact_username": "nobody", "nickname": "x"},
+                               headers=headers)
+
+        assert response.status_code == 404
+        assert _stats(cached_app)["invalidations"] == invalidations
+
+    @pytest.mark.integration
+    def test_username_change_invalidates_correspondents_only(self, cached_app, client, people):
+        """Un changement de username est visible chez ses correspondants ; les autres gardent leur cache."""
+        _befriend(client, people, "alice", "bob")
+        client.get("/v1/contacts", headers=people["alice"]["headers"])
+        client.get("/v1/notes", headers=people["carol"]["headers"])
+
+        client.put(f"/v1/users/{people['bob']['id']}", json={"username": "robert"},
+                   headers=people["bob"]["headers"])
+
+        contacts = client.get("/v1/contacts", headers=people["alice"]["headers"]).get_json()
+        assert "robert" in [c["username"] for c in contacts]
+        hits = _stats(cached_app)["hits"]
+        client.get("/v1/notes", headers=people["carol"]["headers"])
+        assert _stats(cached_app)["hits"] == hits + 1
+
+    @pytest.mark.integration
+    def test_email_change_reaches_contact_owners(self, cached_app, client, people):
+        """L'email d'un contact est affiché dans les contacts et les assignables : invalidés."""
+        _befriend(client, people, "alice", "bob")
+        _befriend(client, people, "bob", "alice")
+        client.get("/v1/contacts", headers=people["alice"]["headers"])
+        client.get("/v1/contacts/assignable", headers=people["alice"]["headers"])
+
+        client.put(f"/v1/users/{people['bob']['id']}", json={"email": "robert@test.com"},
+                   headers=people["bob"]["headers"])
+
+        contacts = client.get("/v1/contacts", headers=people["alice"]["headers"]).get_json()
+        assert "robert@test.com" in [c["email"] for c in contacts]
+        assignable = client.get("/v1/contacts/assignable", headers=people["alice"]["headers"]).get_json()
+        assert "robert@test.com" in [u["email"] for u in assignable]
+
+    @pytest.mark.integration
+    def test_password_change_keeps_the_cache(self, cached_app, client, people):
+        """Le mot de passe n'apparaît dans aucune lecture en cache : pas d'invalidation."""
+        from app.repositories import UserRepository
+        _befriend(client, people, "alice", "bob")
+        client.get("/v1/contacts", headers=people["alice"]["headers"])
+        invalidations = _stats(cached_app)["invalidations"]
+
+        bob = db.session.get(User, people["bob"]["id"])
+        bob.password_hash = "other-hash"
+        UserRepository().save(bob)
+
+        assert _stats(cached_app)["invalidations"] == invalidations
@@ -0,0 +1,200 @@
+"""
+Tests pour le flux de changements temps réel (SSE) et son broker en mémoire.
+"""
+import json
+import threading
+from itertools import islice
+import pytest
+from flask import Flask
+from app import db, realtime
+from app.models import User
+from app.realtime import MemoryBroker
+from flask_jwt_extended import create_access_token
+
+
+class TestMemoryBroker:
+    """Tampon circulaire par utilisateur et reprise après un id."""
+
+    def test_fan_out_per_user(self):
+        """Un événement n'est visible que des utilisateurs ciblés."""
+        broker = MemoryBroker()
+        broker.publish([1, 2], "note.updated", {"note_id": 5})
+        assert [e["type"] for e in broker.read_since(1, "0")[0]] == ["note.updated"]
+        assert broker.read_since(3, "0") == ([], False)
+
+    def test_resume_after_last_id(self):
+        """Seuls les événements postérieurs à l'id sont renvoyés."""
+        broker = MemoryBroker()
+        broker.publish([1], "assignment.created", {})
+        broker.publish([1], "assignment.read", {})
+        events, lost = broker.read_since(1, "1")
+        assert not lost
+        assert [e["type"] for e in events] == ["assignment.read"]
+
+    def test_overflowed_buffer_reports_loss(self):
+        """Une reprise au-delà du tampon est signalée."""
+        broker = MemoryBroker(buffer_size=2)
+        for _ in range(3):
+            broker.publish([1], "note.updated", {})
+        assert broker.read_since(1, "0") == ([], True)
+        assert len(broker.read_since(1, "1")[0]) == 2
+
+    @pytest.mark.parametrize("last_id", ["42", "not-an-id"])
+    def test_unknown_id_reports_loss(self, last_id):
+        """Un id inconnu (redémarrage, autre broker) impose un rechargement."""
+        assert MemoryBroker().read_since(1, last_id) == ([], True)
+
+    def test_wait_times_out(self):
+        """Sans événement, wait rend la main après le délai."""
+        assert MemoryBroker().wait(1, "0", timeout=0.01) == []
+
+
+@pytest.fixture
+def people(app):
+    """Alice et Bob (contacts mutuels), Carol ; en-têtes JWT par nom."""
+    app.config.update(REALTIME_HEARTBEAT_SECONDS=0.01, REALTIME_STREAM_MAX_SECONDS=0.05)
+    users = {}
+    for name in ("alice", "bob", "carol"):
+        user = User(username=name, email=f"{name}@test.com", password_hash="hash")
+        db.session.add(user)
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+        users[name] = {"id": user.id, "token": token, "headers": {"Authorization": f"Bearer {token}"}}
+    return users
+
+
+def _events(response, limit=10):
+    """Événements SSE (type, données) lus sur le flux, commentaires exclus."""
+    chunks = [chunk.decode() for chunk in islice(response.iter_encoded(), limit)]
+    response.close()
+    parsed = []
+    for chunk in chunks:
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def _assign_to_bob(client, people):
+    client.post("/v1/contacts", json={"contact_username": "bob", "nickname": "Bob"},
+                headers=people["alice"]["headers"])
+    client.post("/v1/contacts", json={"contact_username": "alice", "nickname": "Alice"},
+                headers=people["bob"]["headers"])
+    note = client.post("/v1/notes", json={"content": "Pour Bob"},
+                       headers=people["alice"]["headers"]).get_json()
+    client.post("/v1/assignments", json={"note_id": note["id"], "user_id": people["bob"]["id"]},
+                headers=people["alice"]["headers"])
+    return note
+
+
+class TestEventStream:
+    """GET /v1/events/stream."""
+
+    @pytest.mark.integration
+    def test_requires_authentication(self, client):
+        """Sans JWT, le flux est refusé."""
+        assert client.get("/v1/events/stream").status_code == 401
+
+    @pytest.mark.integration
+    def test_resume_replays_missed_events(self, client, people):
+        """Avec Last-Event-ID, les événements manqués sont renvoyés dans l'ordre."""
+        note = _assign_to_bob(client, people)
+        client.get(f"/v1/notes/{note['id']}", headers=people["bob"]["headers"])
+
+        response = client.get("/v1/events/stream",
+                              headers={**people["bob"]["headers"], "Last-Event-ID": "0"})
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/event-stream"
+        events = _events(response)
+        assert [e for e, _ in events] == [
+            "contact.created", "contact.created", "assignment.created", "assignment.read"
+        ]
+        assert events[2][1]["note_id"] == note["id"]
+
+    @pytest.mark.integration
+    def test_other_users_do_not_receive_events(self, client, people):
+        """Carol n'est concernée par aucun des changements."""
+        _assign_to_bob(client, people)
+        response = client.get("/v1/events/stream",
+                              headers={**people["carol"]["headers"], "Last-Event-ID": "0"})
+        assert _events(response) == []
+
+    @pytest.mark.integration
+    def test_ticket_in_query_string(self, client, people):
+        """EventSource passe un ticket de flux en paramètre."""
+        created = client.post("/v1/events/ticket", headers=people["alice"]["headers"])
+        assert created.status_code == 201
+        ticket = created.get_json()["ticket"]
+
+        response = client.get(f"/v1/events/stream?jwt={ticket}")
+        assert response.status_code == 200
+        response.close()
+
+    @pytest.mark.integration
+    def test_access_token_refused_in_query_string(self, client, people):
+        """Un JWT d'accès ne doit pas finir dans les logs d'accès : refusé dans l'URL."""
+        response = client.get(f"/v1/events/stream?jwt={people['alice']['token']}")
+        assert response.status_code == 401
+
+    @pytest.mark.integration
+    def test_ticket_only_opens_the_stream(self, client, people):
+        """Un ticket ne donne accès à aucune autre route."""
+        ticket = client.post("/v1/events/ticket", headers=people["alice"]["headers"]).get_json()["ticket"]
+        headers = {"Authorization": f"Bearer {ticket}"}
+        assert client.get("/v1/notes", headers=headers).status_code == 401
+        assert client.post("/v1/events/ticket", headers=headers).status_code == 401
+
+    @pytest.mark.integration
+    def test_stream_cap_per_worker(self, app, client, people):
+        """Au-delà de REALTIME_MAX_STREAMS flux ouverts : 503, place rendue à la fermeture."""
+        app.extensions["realtime_slots"] = threading.BoundedSemaphore(1)
+        first = client.get("/v1/events/stream", headers=people["alice"]["headers"])
+        assert first.status_code == 200
+
+        refused = client.get("/v1/events/stream", headers=people["bob"]["headers"])
+        assert refused.status_code == 503
+
+        first.close()
+        again = client.get("/v1/events/stream", headers=people["bob"]["headers"])
+        assert again.status_code == 200
+        again.close()
+
+    @pytest.mark.integration
+    def test_unknown_last_event_id_sends_reset(self, client, people):
+        """Une reprise impossible demande un rechargement complet."""
+        response = client.get("/v1/events/stream",
+                              headers={**people["alice"]["headers"], "Last-Event-ID": "999"})
+        assert [e for e, _ in _events(response)] == ["reset"]
+
+    @pytest.mark.integration
+    def test_event_published_while_connected(self, app, client, people):
+        """Un événement publié pendant la connexion est poussé immédiatement."""
+        app.config["REALTIME_STREAM_MAX_SECONDS"] = 5
+        response = client.get("/v1/events/stream", headers=people["alice"]["headers"])
+        chunks = response.iter_encoded()
+        assert next(chunks).startswith(b"retry:")
+
+        app.extensions["realtime"].publish([people["alice"]["id"]], "note.updated", {"note_id": 1})
+
+        chunk = next(chunk for chunk in chunks if not chunk.startswith(b":"))
+        response.close()
+        assert b"event: note.updated" in chunk
+
+
+class TestWorkerCheck:
+    """Broker propre au processus sous plusieurs workers gunicorn."""
+
+    def test_memory_broker_refused_with_several_workers(self, monkeypatch):
+        monkeypatch.setenv("WEB_CONCURRENCY", "3")
+        app = Flask(__name__)
+        app.config["REALTIME_BROKER"] = "memory"
+        with pytest.raises(RuntimeError, match="REALTIME_BROKER=redis"):
+            realtime.init_app(app)
+
+    def test_single_worker_keeps_memory_broker(self, monkeypatch):
+        monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+        app = Flask(__name__)
+        app.config["REALTIME_BROKER"] = "memory"
+        realtime.init_app(app)
+        assert isinstance(app.extensions["realtime"], MemoryBroker)
@@ -0,0 +1,103 @@
+"""
+Tests pour le profileur SQL (app/profiler.py) et GET/DELETE /v1/admin/profiler.
+"""
+import json
+import pytest
+from app import profiler
+
+
+@pytest.fixture
+def admin(admin_token):
+    return {"Authorization": f"Bearer {admin_token}"}
+
+
+@pytest.fixture
+def enabled(app):
+    app.config["SQL_PROFILER_ENABLED"] = True
+    return profiler.get_profiler()
+
+
+def _summary(client, admin):
+    response = client.get("/v1/admin/profiler", headers=admin)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+class TestAttribution:
+    """Chaque requête SQL est rattachée à sa route et à sa méthode de service."""
+
+    @pytest.mark.integration
+    def test_statements_tagged_with_route_and_service(self, client, auth_token, admin, enabled):
+        client.get("/v1/notes", headers={"Authorization": f"Bearer {auth_token}"})
+
+        data = _summary(client, admin)
+
+        routes = {(item["route"], item["service"]) for item in data["top_by_time"]}
+        assert any(route == "notes.get_notes" and service.startswith("NoteService.")
+                   for route, service in routes), routes
+        assert data["requests_profiled"] >= 1
+        assert any(service.startswith("NoteService.") for service in data["by_service"])
+
+    @pytest.mark.integration
+    def test_disabled_by_default(self, client, auth_token, admin):
+        client.get("/v1/notes", headers={"Authorization": f"Bearer {auth_token}"})
+        data = _summary(client, admin)
+        assert data["enabled"] is False
+        assert data["requests_profiled"] == 0
+
+    @pytest.mark.integration
+    def test_sampling(self, client, auth_token, admin, enabled):
+        """Avec un taux nul, les requêtes sont comptées comme ignorées, sans rien mesurer."""
+        enabled.sample_rate = 0.0
+        client.get("/v1/notes", headers={"Authorization": f"Bearer {auth_token}"})
+        data = _summary(client, admin)
+        assert data["requests_profiled"] == 0
+        assert data["requests_skipped"] >= 1
+
+    @pytest.mark.integration
+    def test_reset_and_admin_only(self, client, auth_token, admin, enabled):
+        client.get("/v1/notes", headers={"Authorization": f"Bearer {auth_token}"})
+        assert client.get("/v1/admin/profiler", headers={"Authorization": f"Bearer {auth_token}"}).status_code == 403
+
+        assert client.delete("/v1/admin/profiler", headers=admin).status_code == 200
+        routes = {item["route"] for item in _summary(client, admin)["top_by_time"]}
+        assert "notes.get_notes" not in routes
+
+
+class TestAggregation:
+    """SqlProfiler seul."""
+
+    def _profile(self, *statements):
+        profile = profiler.RequestProfile()
+        profile.statements.extend(statements)
+        return profile
+
+    def test_repeated_statement_is_reported_as_n_plus_one(self):
+        sql_profiler = profiler.SqlProfiler(sample_rate=1.0, slow_ms=100, duplicate_threshold=3)
+        lookup = ("SELECT * FROM users WHERE users.id = ?", "ContactService.get_contacts", 1.0)
+        sql_profiler.record("contacts.list", self._profile(("SELECT 1", "view", 1.0), *[lookup] * 4))
+        sql_profiler.record("contacts.list", self._profile(*[lookup] * 2))
+
+        summary = sql_profiler.summary()
+
+        assert summary["n_plus_one"] == [{
+            "route": "contacts.list", "service": "ContactService.get_contacts",
+            "statement": lookup[0], "requests": 1, "max_repeats": 4,
+        }]
+        assert summary["top_by_count"][0]["count"] == 6
+        assert summary["by_service"]["ContactService.get_contacts"]["count"] == 6
+
+    def test_slow_queries_are_logged(self, app, tmp_path):
+        app.config["SQL_SLOW_QUERY_LOG"] = str(tmp_path / "slow.log")
+        sql_profiler = profiler.SqlProfiler(sample_rate=1.0, slow_ms=50, duplicate_threshold=3,
+                                            slow_log=profiler._slow_query_logger(app))
+
+        sql_profiler.record("notes.get_notes", self._profile(
+            ("SELECT fast", "view", 1.0), ("SELECT slow", "NoteService.list_notes", 75.0),
+        ))
+
+        entries = [json.loads(line) for line in (tmp_path / "slow.log").read_text().splitlines()]
+        assert [(e["statement"], e["service"], e["duration_ms"]) for e in entries] == [
+            ("SELECT slow", "NoteService.list_notes", 75.0)
+        ]
+        assert sql_profiler.summary()["slow_queries"][0]["route"] == "notes.get_notes"
@@ -0,0 +1,111 @@
+"""
+Tests pour l'unité de travail par requête (un seul COMMIT, audit atomique).
+"""
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import create_app, db
+from app.models import User, Note, ActionLog
+from app.repositories import NoteRepository, ActionLogRepository
+from flask_jwt_extended import create_access_token
+
+
+@contextmanager
+def _count_commits():
+    """Compter les COMMIT émis sur le moteur."""
+    commits = []
+    listener = lambda conn: commits.append(1)
+    event.listen(db.engine, "commit", listener)
+    try:
+        yield commits
+    finally:
+        event.remove(db.engine, "commit", listener)
+
+
+@pytest.fixture
+def alice_headers(app):
+    """En-têtes JWT d'Alice."""
+    alice = User(username="alice", email="alice@test.com", password_hash="hash")
+    db.session.add(alice)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(alice.id))}"}
+
+
+class TestUnitOfWork:
+    """Tests de l'unité de travail."""
+
+    @pytest.mark.integration
+    def test_write_request_commits_once(self, client, alice_headers):
+        """La note et son log d'audit sont validés par un seul COMMIT."""
+        with _count_commits() as commits:
+            response = client.post("/v1/notes", json={"content": "Hello"}, headers=alice_headers)
+
+        assert response.status_code == 201
+        assert len(commits) == 1
+        assert Note.query.count() == 1
+        assert ActionLog.query.filter_by(action_type="note_created").count() == 1
+
+    @pytest.mark.integration
+    def test_failure_after_write_rolls_back_everything(self, client, alice_headers, monkeypatch):
+        """Si l'audit échoue, la note n'est pas enregistrée non plus."""
+        def _fail(self, action_log):
+            raise RuntimeError("audit unavailable")
+        monkeypatch.setattr(ActionLogRepository, "save", _fail)
+
+        response = client.post("/v1/notes", json={"content": "Hello"}, headers=alice_headers)
+
+        assert response.status_code == 500
+        assert Note.query.count() == 0
+
+    @pytest.mark.integration
+    def test_error_response_rolls_back(self, client, alice_headers):
+        """Une réponse 4xx ne valide rien."""
+        with _count_commits() as commits:
+            response = client.put("/v1/notes/999", json={"content": "x"}, headers=alice_headers)
+        assert response.status_code == 404
+        assert commits == []
+
+    def test_repository_commits_immediately_outside_requests(self, app):
+        """Hors requête, le repository valide immédiatement (CLI, scripts)."""
+        user = User(username="bob", email="bob@test.com", password_hash="hash")
+        db.session.add(user)
+        db.session.commit()
+        note = NoteRepository().save(Note(content="Hors requête", creator_id=user.id))
+
+        db.session.rollback()
+        assert db.session.get(Note, note.id) is not None
+
+    @pytest.mark.integration
+    def test_can_be_disabled(self, app):
+        """UNIT_OF_WORK=False rétablit le commit par appel de repository."""
+        legacy = create_app({
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": app.config["SQLALCHEMY_DATABASE_URI"],
+            "JWT_SECRET_KEY": "test-jwt-secret-key",
+            "UNIT_OF_WORK": False,
+        })
+        with legacy.app_context():
+            user = User(username="carol", email="carol@test.com", password_hash="hash")
+            db.session.add(user)
+            db.session.commit()
+            user_id = user.id
+            headers = {"Authorization": f"Bearer {create_access_token(identity=str(user_id))}"}
+            with _count_commits() as commits:
+                response = legacy.test_client().post("/v1/notes", json={"content": "Hi"}, headers=headers)
+            assert response.status_code == 201
+            assert len(commits) == 2  # note puis log d'audit
+
+    @pytest.mark.integration
+    def test_on_commit_callbacks_run_only_after_success(self, app, client):
+        """Les effets de bord différés sont abandonnés si la requête échoue."""
+        from app import unit_of_work
+        calls = []
+
+        def _view(status):
+            unit_of_work.on_commit(lambda: calls.append(status))
+            return {"status": status}, status
+        app.add_url_rule("/_uow/<int:status>", "uow_probe", _view)
+
+        client.get("/_uow/200")
+        client.get("/_uow/409")
+        assert calls == [200]
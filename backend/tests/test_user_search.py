@@ -0,0 +1,99 @@
+"""
+Tests pour la recherche d'utilisateurs par username (trie en mémoire sous SQLite).
+"""
+import pytest
+from app import db
+from app.models import User
+from app.search import UsernameTrie
+from flask_jwt_extended import create_access_token
+
+
+class TestUsernameTrie:
+    """Préfixes et correspondances approchées."""
+
+    @pytest.fixture
+    def trie(self):
+        trie = UsernameTrie()
+        for user_id, name in enumerate(["alice", "alicia", "al", "bob", "alfred"], start=1):
+            trie.add(user_id, name)
+        return trie
+
+    def test_prefix_shortest_first(self, trie):
+        """Les complétions les plus courtes d'abord, puis par ordre alphabétique."""
+        assert trie.prefix("al", limit=10) == [3, 1, 5, 2]
+        assert trie.prefix("al", limit=2) == [3, 1]
+        assert trie.prefix("zz", limit=10) == []
+
+    def test_fuzzy_tolerates_typos(self, trie):
+        """Une faute de frappe est tolérée."""
+        assert [name for _, name, _ in trie.fuzzy("alcie", 1)] == []
+        assert sorted(name for _, name, _ in trie.fuzzy("alcie", 2)) == ["alice", "alicia"]
+        assert [(d, name) for d, name, _ in trie.fuzzy("bbo", 2)] == [(2, "bob")]
+        assert trie.fuzzy("bob", 2, exclude={4}) == []
+
+    def test_remove_prunes(self, trie):
+        """Un username retiré n'est plus trouvé, ses voisins restent."""
+        trie.remove(2)
+        assert trie.prefix("alic", limit=10) == [1]
+        trie.add(1, "Alicette")
+        assert trie.prefix("alice", limit=10) == [1]
+        assert len(trie) == 4
+
+
+@pytest.fixture
+def searcher(app):
+    """Quelques utilisateurs ; renvoie les en-têtes de 'me'."""
+    names = ["me", "alice", "alicia", "albert", "bob", "robert"]
+    users = [User(username=name, email=f"{name}@test.com", password_hash="hash") for name in names]
+    db.session.add_all(users)
+    db.session.commit()
+    return {"Authorization": f"Bearer {create_access_token(identity=str(users[0].id))}"}
+
+
+def _search(client, headers, **params):
+    return client.get("/v1/users/search", query_string=params, headers=headers)
+
+
+class TestUserSearchEndpoint:
+    """GET /v1/users/search."""
+
+    def test_requires_authentication(self, client):
+        """Sans JWT, la recherche est refusée."""
+        assert client.get("/v1/users/search?q=al").status_code == 401
+
+    @pytest.mark.integration
+    def test_prefix_then_fuzzy(self, client, searcher):
+        """Complétions du préfixe, puis usernames proches."""
+        names = [u["username"] for u in _search(client, searcher, q="Ali").get_json()]
+        assert names == ["alice", "alicia"]
+        names = [u["username"] for u in _search(client, searcher, q="robrt").get_json()]
+        assert names == ["robert"]
+
+    @pytest.mark.integration
+    def test_excludes_current_user_and_limits(self, client, searcher):
+        """Le demandeur n'apparaît pas ; limit borne le nombre de résultats."""
+        assert _search(client, searcher, q="me").get_json() == []
+        assert len(_search(client, searcher, q="a", limit=2).get_json()) == 2
+        assert _search(client, searcher, q="  ").get_json() == []
+
+    @pytest.mark.integration
+    def test_index_follows_registrations_and_renames(self, client, searcher):
+        """Les comptes créés ou renommés sont trouvés après COMMIT."""
+        assert _search(client, searcher, q="zoe").get_json() == []
+        client.post("/v1/auth/register", json={"username": "zoe", "email": "zoe@test.com",
+                                               "password": "Password123!"})
+        bob = User.query.filter_by(username="bob").one()
+        bob.username = "zorro"
+        db.session.commit()
+
+        names = [u["username"] for u in _search(client, searcher, q="zo").get_json()]
+        assert names == ["zoe", "zorro"]
+        assert _search(client, searcher, q="bob").get_json() == []
+
+    @pytest.mark.integration
+    def test_single_query(self, client, searcher, query_counter):
+        """Une seule requête SQL, sans charger la table entière."""
+        _search(client, searcher, q="al")
+        with query_counter() as queries:
+            _search(client, searcher, q="al")
+        assert len(queries) == 1
@@ -101,7 +101,7 @@ export const userService = {
 
   // Rechercher des utilisateurs par username
   async searchUsers(query: string): Promise<User[]> {
-    const response = await fetch(`${API_BASE}/users?search=${encodeURIComponent(query)}`, {
+    const response = await fetch(`${API_BASE}/users/search?q=${encodeURIComponent(query)}`, {
       headers: getHeaders(),
     });
     return handleResponse<User[]>(response);